@@ -0,0 +1,100 @@
+"""Upstream connection pool 벤치마크 (로컬 stand-in upstream, 외부 호출 없음)
+
+요청마다 새 httpx.AsyncClient를 여는 기존 방식 vs 공유 UpstreamClients 비교
+- stand-in은 평문 HTTP/1.1 → TCP 연결 비용만 측정됨 (실서버는 TLS 핸드셰이크까지 절약)
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from proxy.http_pool import UpstreamClients
+
+N_SEQUENTIAL = 300
+N_CONCURRENT = 300
+CONCURRENCY = 20
+
+BODY = json.dumps({"id": "cgt-local", "status": "running"}).encode()
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+URL = f"http://127.0.0.1:{server.server_port}/api/v3/contents/generations/tasks/cgt-local"
+
+
+async def per_request_client():
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.get(URL)
+        response.raise_for_status()
+
+
+async def run_sequential(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await fn()
+    return time.perf_counter() - t0
+
+
+async def run_concurrent(fn, n, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await fn()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    return time.perf_counter() - t0
+
+
+async def main():
+    pool = UpstreamClients(http2=False)
+
+    async def pooled():
+        response = await pool.client("byteplus").get(URL)
+        response.raise_for_status()
+
+    results = {}
+    for label, fn in (("per-request client", per_request_client), ("shared pool", pooled)):
+        seq = await run_sequential(fn, N_SEQUENTIAL)
+        conc = await run_concurrent(fn, N_CONCURRENT, CONCURRENCY)
+        results[label] = (seq, conc)
+        print(f"{label:20s} sequential {N_SEQUENTIAL}: {seq * 1000 / N_SEQUENTIAL:6.2f} ms/req | "
+              f"concurrent {N_CONCURRENT}x{CONCURRENCY}: {N_CONCURRENT / conc:7.1f} req/s")
+
+    stats = pool.stats()["upstreams"]["byteplus"]
+    print(f"pool stats: {stats}")
+    await pool.aclose()
+
+    baseline, pooled_t = results["per-request client"][0], results["shared pool"][0]
+    print(f"sequential speedup: {baseline / pooled_t:.1f}x")
+
+    assert stats["requests"] == N_SEQUENTIAL + N_CONCURRENT
+    assert stats["pool_misses"] <= CONCURRENCY, "keep-alive connection이 재사용되지 않음"
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    server.shutdown()
@@ -0,0 +1,142 @@
+"""유저 DB 로그인/회원가입 처리량 벤치마크 (임시 디렉터리, 외부 호출 없음)
+
+요청마다 init_user_db() + sqlite3.connect + 쓰기마다 volume commit(동기)하던 기존 방식
+vs UserStore (연결 1개 + WAL + 전용 스레드 + 타이머 배치 commit)
+- volume commit은 stand-in(동기 sleep)으로 비용만 흉내 → 실제 Modal commit은 보통 더 느림
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from proxy.user_store import SCHEMA, UserStore
+
+N_REGISTER = 300
+N_LOGIN = 2000
+CONCURRENCY = 20
+COMMIT_COST = 0.02  # stand-in volume commit (초)
+
+commits = []
+
+
+def volume_commit():
+    time.sleep(COMMIT_COST)
+    commits.append(time.time())
+
+
+def hash_password(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+# ── 기존 방식 (라우트 본문과 동일한 흐름) ─────────────────────────────────
+def make_legacy(db_path):
+    def init_user_db():
+        conn = sqlite3.connect(db_path)
+        conn.execute(SCHEMA)
+        conn.commit()
+        conn.close()
+
+    async def register(username, password):
+        init_user_db()
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+        if cursor.fetchone():
+            conn.close()
+            return False
+        cursor.execute(
+            "INSERT INTO users (username, password_hash, email, approved) VALUES (?, ?, ?, 0)",
+            (username, hash_password(password), "")
+        )
+        conn.commit()
+        conn.close()
+        volume_commit()
+        return True
+
+    async def login(username, password):
+        init_user_db()
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, username, email, approved FROM users WHERE username = ? AND password_hash = ?",
+            (username, hash_password(password))
+        )
+        user = cursor.fetchone()
+        conn.close()
+        return user
+
+    return register, login
+
+
+def make_store(db_path):
+    async def commit():
+        await asyncio.to_thread(volume_commit)
+
+    store = UserStore(db_path, commit=commit, commit_interval=0.5)
+
+    async def register(username, password):
+        return await store.register(username, hash_password(password), "")
+
+    async def login(username, password):
+        return await store.authenticate(username, hash_password(password))
+
+    return store, register, login
+
+
+async def run(fn, args_list):
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(args):
+        async with sem:
+            return await fn(*args)
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(one(a) for a in args_list))
+    return time.perf_counter() - t0, results
+
+
+async def main():
+    users = [(f"user{i}", f"pw{i}") for i in range(N_REGISTER)]
+    logins = [users[i % N_REGISTER] for i in range(N_LOGIN)]
+
+    legacy_db = os.path.join(tempfile.mkdtemp(), "users.db")
+    legacy_register, legacy_login = make_legacy(legacy_db)
+    commits.clear()
+    reg_legacy, ok = await run(legacy_register, users)
+    assert all(ok)
+    legacy_commits = len(commits)
+    conn = sqlite3.connect(legacy_db)
+    conn.execute("UPDATE users SET approved = 1")
+    conn.commit()
+    conn.close()
+    login_legacy, found = await run(legacy_login, logins)
+    assert all(found)
+
+    store, store_register, store_login = make_store(os.path.join(tempfile.mkdtemp(), "users.db"))
+    await store.init()
+    commits.clear()
+    reg_store, ok = await run(store_register, users)
+    assert all(ok)
+    assert not await store.register("user0", hash_password("x"), "")  # 중복
+    for i in range(1, N_REGISTER + 1):
+        await store.set_approved(i, 1)
+    login_store, found = await run(store_login, logins)
+    assert all(found) and all(u[3] == 1 for u in found)
+    await store.aclose()
+    store_commits = len(commits)
+
+    print(f"register x{N_REGISTER}: legacy {N_REGISTER / reg_legacy:8.0f}/s ({legacy_commits} commits)   "
+          f"store {N_REGISTER / reg_store:8.0f}/s ({store_commits} commits)")
+    print(f"login    x{N_LOGIN}: legacy {N_LOGIN / login_legacy:8.0f}/s   store {N_LOGIN / login_store:8.0f}/s")
+    assert store_commits < legacy_commits
+    print(f"store stats: {store.stats()}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
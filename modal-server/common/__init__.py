@@ -0,0 +1 @@
+# Shared job helpers (LTX / Official / SeeDANCE apps)
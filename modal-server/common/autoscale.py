@@ -0,0 +1,70 @@
+"""
+Demand Predictor (keep-warm / max-containers 권장값)
+- 최근 job 도착 이력(분 단위 버킷) + 평균 GPU 점유 시간
+- Little's law: 필요 동시 컨테이너 ≈ 도착률(jobs/s) × 평균 처리시간(s)
+- keep_warm: EWMA 도착률 기준 (평상시 콜드스타트 회피)
+- max_containers: 최근 분당 도착 p95 기준 + headroom (버스트 흡수)
+"""
+
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class DemandPredictor:
+    def __init__(self, window_min: int = 60, alpha: float = 0.3, headroom: float = 1.2,
+                 default_service_sec: float = 90.0, max_cap: int = 50):
+        self.window_min = window_min
+        self.alpha = alpha
+        self.headroom = headroom
+        self.default_service_sec = default_service_sec
+        self.max_cap = max_cap
+        self._arrivals: Deque[Tuple[int, int]] = deque()   # (minute, count)
+        self._service: Deque[float] = deque(maxlen=200)    # 최근 job GPU 점유 시간
+
+    @staticmethod
+    def _minute(ts: Optional[float] = None) -> int:
+        return int((ts or time.time()) // 60)
+
+    def record_arrival(self, ts: Optional[float] = None):
+        minute = self._minute(ts)
+        if self._arrivals and self._arrivals[-1][0] == minute:
+            self._arrivals[-1] = (minute, self._arrivals[-1][1] + 1)
+        else:
+            self._arrivals.append((minute, 1))
+        self._trim(minute)
+
+    def record_service(self, seconds: float):
+        self._service.append(seconds)
+
+    def _trim(self, now_minute: int):
+        while self._arrivals and self._arrivals[0][0] <= now_minute - self.window_min:
+            self._arrivals.popleft()
+
+    def _per_minute_series(self, now_minute: int):
+        counts = dict(self._arrivals)
+        return [counts.get(m, 0) for m in range(now_minute - self.window_min + 1, now_minute + 1)]
+
+    def recommend(self) -> Dict[str, float]:
+        now_minute = self._minute()
+        self._trim(now_minute)
+        series = self._per_minute_series(now_minute)
+
+        ewma = 0.0
+        for count in series:
+            ewma = self.alpha * count + (1 - self.alpha) * ewma
+        ordered = sorted(series)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0
+
+        service = (sum(self._service) / len(self._service)) if self._service else self.default_service_sec
+        keep_warm = math.ceil(ewma / 60.0 * service) if ewma > 0 else 0
+        max_containers = math.ceil(max(p95, ewma) / 60.0 * service * self.headroom)
+
+        return {
+            "arrivals_per_min_ewma": round(ewma, 3),
+            "arrivals_per_min_p95": p95,
+            "mean_service_sec": round(service, 1),
+            "keep_warm": min(self.max_cap, keep_warm),
+            "max_containers": min(self.max_cap, max(1, max_containers, keep_warm)),
+        }
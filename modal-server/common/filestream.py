@@ -0,0 +1,148 @@
+"""
+File-backed 응답 헬퍼
+- 저장된 파일을 chunk 단위로 스트리밍 (메모리 상주 X)
+  서버가 ASGI pathsend extension을 지원하면 파일 경로만 넘김 → 서버 측 sendfile (zero-copy)
+- Range: bytes=start-end / start- / -suffix / 다중 구간(multipart/byteranges) → 206 Partial Content
+- ETag(mtime+size, 또는 호출자가 준 content hash) + Last-Modified
+  If-None-Match / If-Modified-Since → 304 Not Modified, If-Range 불일치 → 전체 200
+- bytes_response: 메모리에 캐시된 작은 파일용 (같은 조건부 / 단일 Range 처리)
+"""
+
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+
+from starlette.responses import FileResponse, Response
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: str, total_size: int) -> Tuple[int, int]:
+    """
+    단일 byte range 파싱
+
+    Returns:
+        (start, end) inclusive
+
+    Raises:
+        ValueError: 형식 오류 또는 만족 불가능한 범위 (→ 416)
+    """
+    match = _RANGE_RE.match(range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        raise ValueError(f"Invalid Range header: {range_header}")
+
+    if not match.group(1):
+        # suffix range: 마지막 N 바이트
+        suffix = int(match.group(2))
+        if suffix == 0:
+            raise ValueError(f"Invalid range: empty suffix (total: {total_size})")
+        return max(0, total_size - suffix), total_size - 1
+
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else total_size - 1
+    end = min(end, total_size - 1)
+    if start >= total_size or start > end:
+        raise ValueError(f"Invalid range: {start}-{end} (total: {total_size})")
+    return start, end
+
+
+def stat_etag(st: os.stat_result) -> str:
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def file_etag(path: str) -> str:
+    return stat_etag(os.stat(path))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in candidates
+
+
+def not_modified_since(if_modified_since: Optional[str], mtime: float) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def is_not_modified(request_headers: Mapping[str, str], etag: str, mtime: float) -> bool:
+    # If-None-Match가 있으면 If-Modified-Since는 무시 (RFC 9110 13.1.3)
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    return not_modified_since(request_headers.get("if-modified-since"), mtime)
+
+
+def file_response(
+    path: str,
+    request_headers: Mapping[str, str],
+    media_type: str = "video/mp4",
+    filename: Optional[str] = None,
+    extra_headers: Optional[Mapping[str, str]] = None,
+    etag: Optional[str] = None,
+    st: Optional[os.stat_result] = None,
+) -> Response:
+    """저장된 파일 → 200 / 206 / 304 / 416 응답 (etag 미지정 시 mtime+size 기반)"""
+    st = st or os.stat(path)
+    etag = etag or stat_etag(st)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Access-Control-Allow-Origin": "*",
+    }
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if extra_headers:
+        headers.update(extra_headers)
+
+    if is_not_modified(request_headers, etag, st.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    # Range / If-Range / multi-range / 416은 FileResponse가 같은 ETag·Last-Modified 기준으로 처리
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=st)
+
+
+def bytes_response(
+    data: bytes,
+    request_headers: Mapping[str, str],
+    media_type: str,
+    etag: str,
+    mtime: float,
+    extra_headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """메모리 데이터 → 200 / 206 / 304 / 416 (다중 Range는 전체 200으로 응답)"""
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(mtime, usegmt=True),
+        "Access-Control-Allow-Origin": "*",
+    }
+    if extra_headers:
+        headers.update(extra_headers)
+
+    if is_not_modified(request_headers, etag, mtime):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header and "," not in range_header and (
+        not if_range or if_range == etag or if_range == headers["Last-Modified"]
+    ):
+        try:
+            start, end = parse_range(range_header, len(data))
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+    return Response(content=data, status_code=200, media_type=media_type, headers=headers)
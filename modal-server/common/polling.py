@@ -0,0 +1,51 @@
+"""
+적응형 폴링 스케줄 (외부 의존성 없음)
+- 초반은 드물게, 예상 완료 시각 근처에서 촘촘하게, 예상 초과 후에는 다시 점점 느슨하게
+- upstream 에러 시 지수 backoff + jitter
+- proxy 폴러(asyncio)와 main_seedance의 동기 폴링 루프가 같은 스케줄을 사용
+"""
+
+import random
+
+
+class PollSchedule:
+    """
+    Args:
+        expected_sec: 예상 완료 시간 (태스크 생성 시점 기준, 초)
+        min_interval: 예상 완료 근처 폴링 간격 (초)
+        max_interval: 초반 / 예상 초과 후 최대 폴링 간격 (초)
+        error_base: 에러 backoff 시작 간격 (초)
+        error_max: 에러 backoff 상한 (초)
+    """
+
+    def __init__(
+        self,
+        expected_sec: float = 60.0,
+        min_interval: float = 2.0,
+        max_interval: float = 15.0,
+        error_base: float = 2.0,
+        error_max: float = 60.0,
+    ):
+        self.expected_sec = expected_sec
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.error_base = error_base
+        self.error_max = error_max
+
+    def next_interval(self, age: float, errors: int = 0) -> float:
+        """
+        age: 태스크 생성 후 경과 시간 (초)
+        errors: 연속 에러 횟수 (0이면 정상 스케줄)
+        """
+        if errors > 0:
+            backoff = min(self.error_max, self.error_base * (2 ** (errors - 1)))
+            return backoff * random.uniform(0.8, 1.2)
+
+        remaining = self.expected_sec - age
+        if remaining > 0:
+            # 남은 시간의 절반만큼 기다림 → 예상 시각에 가까울수록 촘촘
+            interval = remaining / 2
+        else:
+            # 예상 초과: 초과 시간의 1/4씩 간격을 늘림 (오래 걸리는 태스크에 과도한 폴링 방지)
+            interval = self.min_interval + (-remaining) / 4
+        return max(self.min_interval, min(self.max_interval, interval))
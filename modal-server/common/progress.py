@@ -0,0 +1,146 @@
+"""
+Job Progress Reporter
+- VideoGenerator.generate → stage 전환 + diffusion step 콜백을 공유 저장소(modal.Dict)에 기록
+- web tier의 /events/{job_id} SSE가 이 스냅샷을 읽어서 클라이언트로 전달
+- ETA: 현재 stage는 실측 step 속도, 이후 stage는 사전 추정치(prior) 합산
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ProgressReporter:
+    """
+    단일 job의 진행 상황 스냅샷을 store[job_id]에 기록
+
+    Args:
+        store: dict 호환 저장소 (modal.Dict 또는 일반 dict). None이면 no-op
+        job_id: web tier가 발급한 job id. None이면 no-op
+        stages: [(stage_name, prior_seconds), ...] 실행 순서대로
+        min_interval: step 업데이트 최소 기록 간격 (초). stage 전환은 항상 기록
+    """
+
+    def __init__(
+        self,
+        store,
+        job_id: Optional[str],
+        stages: List[Tuple[str, float]],
+        min_interval: float = 0.5,
+    ):
+        self.store = store
+        self.job_id = job_id
+        self.priors: Dict[str, float] = dict(stages)
+        self.order: List[str] = [name for name, _ in stages]
+        self.min_interval = min_interval
+
+        self.started_at = time.time()
+        self.stage_name: Optional[str] = None
+        self.stage_started_at = self.started_at
+        self.total_steps: Optional[int] = None
+        self.step = 0
+        self.seq = 0
+        self._last_write = 0.0
+        self.durations: Dict[str, float] = {}  # 완료된 stage별 실측 소요시간 (telemetry용)
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None and bool(self.job_id)
+
+    def skip(self, name: str):
+        """실행하지 않을 stage를 ETA 계산에서 제외"""
+        self.priors.pop(name, None)
+        if name in self.order:
+            self.order.remove(name)
+
+    def _close_stage(self):
+        if self.stage_name and self.stage_name != "done":
+            self.durations[self.stage_name] = round(time.time() - self.stage_started_at, 3)
+
+    def stage(self, name: str, total_steps: Optional[int] = None):
+        """stage 전환 기록 (이전 stage는 완료로 간주)"""
+        self._close_stage()
+        self.stage_name = name
+        self.stage_started_at = time.time()
+        self.total_steps = total_steps
+        self.step = 0
+        self._write(force=True)
+
+    def update_step(self, step: int):
+        """현재 stage에서 완료된 step 수 기록 (1-based)"""
+        self.step = step
+        self._write(force=self.total_steps is not None and step >= self.total_steps)
+
+    def step_callback(self) -> Callable:
+        """diffusers callback_on_step_end 호환 콜백"""
+        def _on_step_end(pipe, step_index, timestep, callback_kwargs):
+            self.update_step(step_index + 1)
+            return callback_kwargs
+        return _on_step_end
+
+    def finish(self, stage: str = "done"):
+        self._close_stage()
+        self.stage_name = stage
+        self.stage_started_at = time.time()
+        self.total_steps = None
+        self.step = 0
+        self._write(force=True)
+
+    # ── ETA ──────────────────────────────────────────────────────────────
+    def _stage_remaining(self, now: float) -> float:
+        elapsed = now - self.stage_started_at
+        if self.total_steps and self.step > 0:
+            per_step = elapsed / self.step
+            return max(0.0, per_step * (self.total_steps - self.step))
+        prior = self.priors.get(self.stage_name, 0.0)
+        return max(0.0, prior - elapsed)
+
+    def eta_seconds(self, now: Optional[float] = None) -> Optional[float]:
+        if self.stage_name not in self.order:
+            return 0.0 if self.stage_name == "done" else None
+        now = now or time.time()
+        idx = self.order.index(self.stage_name)
+        later = sum(self.priors[name] for name in self.order[idx + 1:])
+        return round(self._stage_remaining(now) + later, 1)
+
+    def _fraction(self, now: float) -> float:
+        """prior 가중치 기준 전체 진행률 (0.0 ~ 1.0)"""
+        if self.stage_name == "done":
+            return 1.0
+        total = sum(self.priors.values()) or 1.0
+        if self.stage_name not in self.order:
+            return 0.0
+        idx = self.order.index(self.stage_name)
+        done = sum(self.priors[name] for name in self.order[:idx])
+        prior = self.priors[self.stage_name]
+        if self.total_steps:
+            current = prior * min(1.0, self.step / self.total_steps)
+        else:
+            current = min(prior, now - self.stage_started_at)
+        return round(min(0.99, (done + current) / total), 3)
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        return {
+            "seq": self.seq,
+            "stage": self.stage_name,
+            "step": self.step,
+            "total_steps": self.total_steps,
+            "fraction": self._fraction(now),
+            "elapsed_sec": round(now - self.started_at, 1),
+            "eta_sec": self.eta_seconds(now),
+            "updated_at": now,
+        }
+
+    def _write(self, force: bool = False):
+        if not self.enabled:
+            return
+        now = time.time()
+        if not force and now - self._last_write < self.min_interval:
+            return
+        self.seq += 1
+        self._last_write = now
+        try:
+            self.store[self.job_id] = self.snapshot()
+        except Exception as e:
+            # 진행률 기록 실패가 생성 자체를 막으면 안 됨
+            print(f"[PROGRESS {self.job_id}] write failed: {type(e).__name__}: {e}")
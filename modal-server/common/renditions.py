@@ -0,0 +1,163 @@
+"""
+업로드 이미지 파생본 (generator별 입력 해상도)
+- 프록시가 업로드 시 1회 생성: uploads volume의 derived/{sha256}_{name}.png
+  메타데이터(meta/{sha256}.json)에 파생본 sha256 + pixel md5(= md5(RGB bytes)) 기록
+- generator는 image_url 대신 파생본 참조를 받으면 volume에서 바로 읽음
+  → 원본 다운로드 / 원본 디코딩 / crop·resize 생략
+- 참조 형식: "upload:{sha256}" 또는 프록시 업로드 URL (.../api/v3/uploads/{sha256}.{ext})
+- 파생본이 없으면 load_original로 volume의 원본을 읽음 ("upload:" 참조는 HTTP로 받을 수 없음)
+"""
+
+import hashlib
+import json
+import os
+import re
+from io import BytesIO
+from typing import Callable, Dict, NamedTuple, Optional
+
+# 이름 → (width, height, fit) — fit: crop = 중앙 crop 후 resize, stretch = 비율 무시 resize
+RENDITIONS = {
+    "960x544": (960, 544, "crop"),      # main.py Stage 1 / main_official.py W1×H1
+    "1248x704": (1248, 704, "stretch"), # main_seedance.py (SeeDANCE 1.0 Pro-fast)
+}
+
+UPLOADS_MOUNT = "/uploads"
+DERIVED_DIR = "derived"
+META_DIR = "meta"
+
+_REF_RE = re.compile(r"(?:^upload:|/api/v3/uploads/(?:derived/)?)([0-9a-f]{64})(?:[._]|$)")
+
+
+def rendition_filename(sha256: str, name: str) -> str:
+    return f"{sha256}_{name}.png"
+
+
+def render(img, name: str):
+    """PIL 이미지 → 파생본 (generator에서 하던 crop + LANCZOS resize와 동일)"""
+    from PIL import Image
+
+    width, height, fit = RENDITIONS[name]
+    img = img.convert("RGB")
+    if fit == "crop":
+        iw, ih = img.size
+        target_ar = width / height
+        if iw / ih > target_ar:
+            new_w = int(ih * target_ar)
+            left = (iw - new_w) // 2
+            img = img.crop((left, 0, left + new_w, ih))
+        else:
+            new_h = int(iw / target_ar)
+            top = (ih - new_h) // 2
+            img = img.crop((0, top, iw, top + new_h))
+    return img.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def render_all(source: bytes) -> Dict[str, dict]:
+    """
+    원본 이미지 bytes → {name: {"png": bytes, "sha256", "pixel_md5", "width", "height"}}
+    원본 디코딩은 1회
+    """
+    from PIL import Image
+
+    original = Image.open(BytesIO(source))
+    original.load()
+    results = {}
+    for name in RENDITIONS:
+        img = render(original, name)
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        png = buffer.getvalue()
+        results[name] = {
+            "png": png,
+            "sha256": hashlib.sha256(png).hexdigest(),
+            "pixel_md5": hashlib.md5(img.tobytes()).hexdigest(),
+            "width": img.size[0],
+            "height": img.size[1],
+        }
+    return results
+
+
+def parse_upload_ref(image_url: str) -> Optional[str]:
+    """파생본 참조면 원본 sha256, 아니면 None (data URL / 외부 URL)"""
+    if not image_url or image_url.startswith("data:"):
+        return None
+    match = _REF_RE.search(image_url)
+    return match.group(1) if match else None
+
+
+class UploadNotFound(FileNotFoundError):
+    """upload:{sha256} 참조인데 uploads volume에 원본이 없음"""
+
+
+class Rendition(NamedTuple):
+    png: bytes
+    pixel_md5: str
+    width: int
+    height: int
+
+
+def load_rendition(
+    image_url: str,
+    name: str,
+    upload_dir: str = UPLOADS_MOUNT,
+    reload: Optional[Callable[[], None]] = None,
+) -> Optional[Rendition]:
+    """
+    image_url이 업로드 참조이고 파생본이 volume에 있으면 반환, 아니면 None (→ 기존 경로)
+
+    reload: 파일이 안 보일 때 1회 호출 (다른 컨테이너가 방금 commit한 경우 volume.reload)
+    """
+    sha256 = parse_upload_ref(image_url)
+    if sha256 is None or not os.path.isdir(upload_dir):
+        return None
+    meta_path = os.path.join(upload_dir, META_DIR, f"{sha256}.json")
+    if not os.path.exists(meta_path):
+        _reload_once(reload)
+    try:
+        with open(meta_path) as f:
+            info = json.load(f).get("renditions", {}).get(name)
+        if not info:
+            return None
+        with open(os.path.join(upload_dir, DERIVED_DIR, info["filename"]), "rb") as f:
+            png = f.read()
+    except (FileNotFoundError, ValueError):
+        return None
+    return Rendition(png, info["pixel_md5"], info["width"], info["height"])
+
+
+def _reload_once(reload: Optional[Callable[[], None]]):
+    if reload is None:
+        return
+    try:
+        reload()
+    except Exception as e:
+        print(f"[RENDITION] Volume reload failed: {type(e).__name__}: {e}")
+
+
+def load_original(
+    image_url: str,
+    upload_dir: str = UPLOADS_MOUNT,
+    reload: Optional[Callable[[], None]] = None,
+) -> Optional[bytes]:
+    """
+    파생본이 없을 때: 업로드 참조면 volume의 원본 bytes, 업로드 참조가 아니면 None (→ data URL / HTTP 다운로드)
+
+    Raises:
+        UploadNotFound: "upload:{sha256}" 참조인데 원본이 없음 (프록시 업로드 URL은 None → HTTP 다운로드)
+    """
+    sha256 = parse_upload_ref(image_url)
+    if sha256 is None:
+        return None
+    meta_path = os.path.join(upload_dir, META_DIR, f"{sha256}.json")
+    if not os.path.exists(meta_path):
+        _reload_once(reload)
+    try:
+        with open(meta_path) as f:
+            filename = json.load(f)["filename"]
+        with open(os.path.join(upload_dir, filename), "rb") as f:
+            return f.read()
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+    if image_url.startswith("upload:"):
+        raise UploadNotFound(f"Upload {sha256[:12]}... not found in {upload_dir} (re-upload the image)")
+    return None
@@ -0,0 +1,172 @@
+"""
+Upstream 장애 대응 (외부 의존성 없음)
+- CircuitBreaker: 연속 실패가 기준을 넘으면 open → reset_timeout 동안 호출 없이 즉시 실패 (fast-fail)
+  이후 half-open에서 probe 1건만 통과 → 성공하면 closed, 실패하면 다시 open
+- RetryPolicy: 멱등 호출만 재시도, 간격은 decorrelated jitter (sleep = min(cap, U(base, prev × 3)))
+  → 장애 중 여러 클라이언트의 재시도가 같은 시각에 몰리지 않음
+- 실패 판정은 호출 측이 결정 (HTTP: transport 에러 / 5xx, Runware: 연결 끊김 / timeout)
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """breaker가 열려 있어 upstream을 호출하지 않음 (라우트에서 503 + Retry-After)"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit open: upstream failing, retry after {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Args:
+        name: upstream 이름 (로그 / stats)
+        failure_threshold: 연속 실패 몇 번에 open
+        reset_timeout: open 유지 시간 (초) → 이후 half-open probe
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_inflight = False
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opens = 0
+        self.last_error: Optional[str] = None
+
+    def before_call(self):
+        """호출 허용 여부 (open이면 CircuitOpenError)"""
+        if self.state == OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = HALF_OPEN
+            print(f"[BREAKER] {self.name}: half-open (probe)")
+        if self.state == HALF_OPEN:
+            if self._probe_inflight:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 1.0)
+            self._probe_inflight = True
+
+    def record_success(self):
+        self.successes += 1
+        self.consecutive_failures = 0
+        self._probe_inflight = False
+        if self.state != CLOSED:
+            print(f"[BREAKER] {self.name}: closed (upstream recovered)")
+        self.state = CLOSED
+
+    def record_failure(self, error: str):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error[:200]
+        self._probe_inflight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opens += 1
+                print(f"[BREAKER] {self.name}: open for {self.reset_timeout:.0f}s "
+                      f"after {self.consecutive_failures} failures ({self.last_error})")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        retry_after = None
+        if self.state == OPEN:
+            retry_after = round(max(0.0, self.opened_at + self.reset_timeout - time.monotonic()), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after_sec": retry_after,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "opens": self.opens,
+            "last_error": self.last_error,
+        }
+
+
+class RetryPolicy:
+    """
+    Args:
+        attempts: 총 시도 횟수 (1이면 재시도 없음)
+        base: 첫 대기 하한 (초)
+        cap: 대기 상한 (초)
+    """
+
+    def __init__(self, attempts: int = 3, base: float = 0.2, cap: float = 2.0):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+
+    def next_delay(self, previous: float) -> float:
+        return min(self.cap, random.uniform(self.base, max(self.base, previous) * 3))
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+async def call(
+    breaker: CircuitBreaker,
+    fn: Callable[[], Awaitable[Any]],
+    retry: RetryPolicy = NO_RETRY,
+    failure_of: Callable[[Any], Optional[str]] = lambda result: None,
+    is_failure: Callable[[BaseException], bool] = lambda e: True,
+    on_discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+) -> Any:
+    """
+    breaker 확인 → fn() → 결과 / 예외로 성공·실패 기록 → 실패면 (재시도 가능할 때) jitter 후 재시도
+
+    failure_of: 정상 반환값 중 실패로 볼 것 (예: HTTP 503 응답) → 실패 사유, 아니면 None
+        재시도가 끝나도 실패면 마지막 결과를 그대로 반환 (호출 측 기존 에러 처리 유지)
+    is_failure: 예외 중 upstream 장애로 볼 것 (아니면 breaker 성공으로 보고 그대로 raise)
+    on_discard: 재시도로 버리는 결과 정리 (예: streaming 응답 close)
+    """
+    delay = retry.base
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
+        result, error = None, None
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            breaker._probe_inflight = False
+            raise
+        except Exception as e:
+            if not is_failure(e):
+                breaker.record_success()
+                raise
+            error = e
+            breaker.record_failure(f"{type(e).__name__}: {e}")
+        else:
+            reason = failure_of(result)
+            if reason is None:
+                breaker.record_success()
+                return result
+            breaker.record_failure(reason)
+
+        if attempt >= retry.attempts or breaker.state == OPEN:
+            # 재시도 소진 또는 이번 실패로 breaker open → 마지막 결과 / 예외 그대로
+            if error is not None:
+                raise error
+            return result
+        delay = retry.next_delay(delay)
+        if on_discard is not None and result is not None:
+            await on_discard(result)
+        print(f"[RETRY] {breaker.name}: attempt {attempt} failed, retrying in {delay:.2f}s")
+        await asyncio.sleep(delay)
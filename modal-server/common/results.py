@@ -0,0 +1,130 @@
+"""
+Job Result Store
+- 완성 MP4를 {root}/{job_id}.mp4로 저장 (파일 쓰기 + TTL sweep은 스레드에서 → event loop 블로킹 없음)
+- lookup: 로컬에 없는 job_id는 volume reload 후 재확인 (컨테이너 재시작 / 다른 컨테이너 결과)
+  reload는 reload_interval마다 최대 1회, 동시 miss는 진행 중인 reload 1개를 같이 기다림
+  → 없는 id / 만료 id를 반복 조회해도 reload가 요청 수만큼 늘지 않음
+- TTL 지난 파일은 "expired" (→ 410), sweep에서 삭제
+"""
+
+import asyncio
+import os
+import re
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+JOB_ID_RE = re.compile(r"^[0-9a-f]{8}$")
+
+
+class ResultStore:
+    """
+    Args:
+        root: 결과 파일 디렉터리 (volume mount)
+        ttl_sec: 결과 보관 시간 (mtime 기준)
+        reload: volume 최신화 coroutine (None이면 로컬 디스크로 간주)
+        commit: 저장 후 volume 반영 coroutine
+        sweep_interval: 만료 파일 정리 최소 간격 (초)
+        reload_interval: miss로 인한 reload 최소 간격 (초)
+    """
+
+    def __init__(
+        self,
+        root: str,
+        ttl_sec: float,
+        reload: Optional[Callable[[], Awaitable[None]]] = None,
+        commit: Optional[Callable[[], Awaitable[None]]] = None,
+        sweep_interval: float = 600.0,
+        reload_interval: float = 10.0,
+    ):
+        self.root = root
+        self.ttl_sec = ttl_sec
+        self.reload = reload
+        self.commit = commit
+        self.sweep_interval = sweep_interval
+        self.reload_interval = reload_interval
+        self._last_sweep = 0.0
+        self._last_reload = float("-inf")
+        self._reload_task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, job_id: str) -> Optional[str]:
+        """job_id 형식이 맞을 때만 경로 (경로 조작 방지)"""
+        return f"{self.root}/{job_id}.mp4" if JOB_ID_RE.match(job_id) else None
+
+    # ── 저장 / 정리 ──────────────────────────────────────────────────────
+    async def save(self, job_id: str, data: bytes) -> str:
+        """파일 쓰기 + sweep은 스레드에서, 이후 volume commit"""
+        path = self.path(job_id)
+        await asyncio.to_thread(self._write, path, data)
+        if self.commit:
+            await self.commit()
+        return path
+
+    def _write(self, path: str, data: bytes):
+        with open(path, "wb") as f:
+            f.write(data)
+        self.sweep()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """TTL 지난 결과 파일 삭제 (최대 sweep_interval마다 1회) → 삭제 수"""
+        now = time.time() if now is None else now
+        if now - self._last_sweep < self.sweep_interval:
+            return 0
+        self._last_sweep = now
+        removed = 0
+        for name in os.listdir(self.root):
+            path = f"{self.root}/{name}"
+            try:
+                if now - os.path.getmtime(path) > self.ttl_sec:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        if removed:
+            print(f"[RESULTS] Swept {removed} expired file(s)")
+        return removed
+
+    # ── 조회 ─────────────────────────────────────────────────────────────
+    async def lookup(self, job_id: str, known: bool = False) -> Tuple[str, Optional[str], Optional[os.stat_result]]:
+        """
+        Args:
+            known: 이 컨테이너의 jobs에 있는 id (파일이 없으면 reload 없이 not_found)
+
+        Returns:
+            ("hit", path, stat) / ("not_found", None, None) / ("expired", None, None)
+        """
+        path = self.path(job_id)
+        if path is None:
+            return "not_found", None, None
+        st = _stat(path)
+        if st is None and not known and self.reload:
+            await self._reload_throttled()
+            st = _stat(path)
+        if st is None:
+            return "not_found", None, None
+        if time.time() - st.st_mtime > self.ttl_sec:
+            return "expired", None, None
+        return "hit", path, st
+
+    async def _reload_throttled(self):
+        if self._reload_task is None or self._reload_task.done():
+            if time.monotonic() - self._last_reload < self.reload_interval:
+                return
+            self._last_reload = time.monotonic()
+            self._reload_task = asyncio.ensure_future(self._do_reload())
+        await asyncio.shield(self._reload_task)
+
+    async def _do_reload(self):
+        self.reloads += 1
+        try:
+            await self.reload()
+        except Exception as e:
+            print(f"[RESULTS] Volume reload failed: {type(e).__name__}: {e}")
+
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
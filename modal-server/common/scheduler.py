@@ -0,0 +1,167 @@
+"""
+Priority + Fair-share Job Scheduler (web tier)
+- 우선순위 클래스: interactive > batch > sweep (RegenerateModal 단일 재생성이 배치 뒤에서 대기하지 않도록)
+- 클래스 내부: 유저별 round-robin (한 유저의 30-scene 배치가 다른 유저를 막지 않음)
+- Aging: 오래 기다린 하위 클래스 job은 한 단계씩 승격 → 기아(starvation) 방지
+- 동시 실행 슬롯 수(max_inflight)는 GPU 컨테이너 수에 맞춤 → 전체 처리량은 그대로
+- 범위: 프로세스 1개 (상태는 메모리) → max_inflight / 공정 분배 / queue position은 이 인스턴스를 거친 job에만 적용
+  main.py web_app은 max_containers=1 + @modal.concurrent로 고정해서 전역 한도로 동작
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+PRIORITY_CLASSES = ("interactive", "batch", "sweep")
+
+# 이 시간(초)만큼 대기할 때마다 한 클래스씩 승격
+DEFAULT_AGING_SEC = {"interactive": None, "batch": 300.0, "sweep": 600.0}
+
+
+class _Entry:
+    __slots__ = ("job_id", "user", "priority", "enqueued_at", "granted")
+
+    def __init__(self, job_id: str, user: str, priority: str):
+        self.job_id = job_id
+        self.user = user
+        self.priority = priority
+        self.enqueued_at = time.time()
+        self.granted = asyncio.get_running_loop().create_future()
+
+
+class FairShareScheduler:
+    def __init__(self, max_inflight: int, aging_sec: Optional[Dict[str, Optional[float]]] = None,
+                 on_dispatch: Optional[Callable[[str, float], None]] = None):
+        self.max_inflight = max_inflight
+        self.on_dispatch = on_dispatch  # (priority, wait_sec) → telemetry hook
+        self.aging_sec = dict(DEFAULT_AGING_SEC, **(aging_sec or {}))
+        self.inflight = 0
+        # class → OrderedDict(user → deque[_Entry]); OrderedDict 순서 = round-robin 순서
+        self._queues: Dict[str, "OrderedDict[str, deque]"] = {c: OrderedDict() for c in PRIORITY_CLASSES}
+        self._waiting: Dict[str, _Entry] = {}
+        self._waits: Dict[str, deque] = {c: deque(maxlen=500) for c in PRIORITY_CLASSES}
+
+    @staticmethod
+    def normalize_priority(priority: Optional[str]) -> str:
+        return priority if priority in PRIORITY_CLASSES else "interactive"
+
+    async def run(self, job_id: str, user: str, priority: str,
+                  job: Callable[[], Awaitable]):
+        """슬롯을 받을 때까지 대기 → job 실행 → 슬롯 반환"""
+        await self.acquire(job_id, user, priority)
+        try:
+            return await job()
+        finally:
+            self.release()
+
+    async def acquire(self, job_id: str, user: str, priority: str):
+        entry = _Entry(job_id, user or "anonymous", self.normalize_priority(priority))
+        self._queues[entry.priority].setdefault(entry.user, deque()).append(entry)
+        self._waiting[job_id] = entry
+        self._dispatch()
+        try:
+            await entry.granted
+        except asyncio.CancelledError:
+            if entry.granted.done() and not entry.granted.cancelled():
+                self.release()
+            else:
+                self._remove(entry)
+            raise
+
+    def release(self):
+        self.inflight -= 1
+        self._dispatch()
+
+    # ── 내부 ─────────────────────────────────────────────────────────────
+    def _effective_rank(self, entry: _Entry, now: float) -> int:
+        rank = PRIORITY_CLASSES.index(entry.priority)
+        aging = self.aging_sec.get(entry.priority)
+        if aging:
+            rank -= int((now - entry.enqueued_at) // aging)
+        return max(0, rank)
+
+    def _pick(self, queues=None, now: Optional[float] = None) -> Optional[_Entry]:
+        """각 클래스의 round-robin head 중 (승격 반영 rank, 대기 시작) 최소값"""
+        queues = self._queues if queues is None else queues
+        now = now or time.time()
+        best = None
+        for cls in PRIORITY_CLASSES:
+            users = queues[cls]
+            if not users:
+                continue
+            head = users[next(iter(users))][0]
+            key = (self._effective_rank(head, now), head.enqueued_at)
+            if best is None or key < best[0]:
+                best = (key, head)
+        return best[1] if best else None
+
+    @staticmethod
+    def _rotate(users: "OrderedDict[str, deque]", entry: _Entry):
+        pending = users.pop(entry.user)
+        pending.popleft()
+        if pending:
+            users[entry.user] = pending  # 맨 뒤로 이동 → 다음 유저 차례
+
+    def _pop(self, entry: _Entry):
+        self._rotate(self._queues[entry.priority], entry)
+        self._waiting.pop(entry.job_id, None)
+
+    def _remove(self, entry: _Entry):
+        users = self._queues[entry.priority]
+        pending = users.get(entry.user)
+        if pending and entry in pending:
+            pending.remove(entry)
+            if not pending:
+                del users[entry.user]
+        self._waiting.pop(entry.job_id, None)
+
+    def _dispatch(self):
+        while self.inflight < self.max_inflight:
+            entry = self._pick()
+            if entry is None:
+                return
+            self._pop(entry)
+            self.inflight += 1
+            wait = time.time() - entry.enqueued_at
+            self._waits[entry.priority].append(wait)
+            if self.on_dispatch:
+                self.on_dispatch(entry.priority, wait)
+            entry.granted.set_result(True)
+
+    # ── 조회 ─────────────────────────────────────────────────────────────
+    def _dispatch_order(self) -> List[str]:
+        """현재 대기열의 예상 dispatch 순서 (대기열 사본에 _pick을 반복 적용 → 실제 dispatch와 같은 규칙)"""
+        now = time.time()
+        queues = {cls: OrderedDict((user, deque(q)) for user, q in self._queues[cls].items())
+                  for cls in PRIORITY_CLASSES}
+        order = []
+        while True:
+            entry = self._pick(queues, now)
+            if entry is None:
+                return order
+            self._rotate(queues[entry.priority], entry)
+            order.append(entry.job_id)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """대기 중이면 1-based 대기 순번, 아니면 None"""
+        if job_id not in self._waiting:
+            return None
+        order = self._dispatch_order()
+        return order.index(job_id) + 1 if job_id in order else None
+
+    def stats(self) -> dict:
+        def _p95(values):
+            if not values:
+                return None
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2)
+
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "queued": {
+                cls: sum(len(q) for q in self._queues[cls].values()) for cls in PRIORITY_CLASSES
+            },
+            "wait_p95_sec": {cls: _p95(self._waits[cls]) for cls in PRIORITY_CLASSES},
+        }
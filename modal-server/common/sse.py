@@ -0,0 +1,28 @@
+"""
+Server-Sent Events 포맷 헬퍼
+"""
+
+import json
+from typing import Optional
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # 프록시 버퍼링 방지
+    "Access-Control-Allow-Origin": "*",
+}
+
+
+def sse_event(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    """단일 SSE 메시지 직렬화 (data는 JSON 한 줄)"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_comment(text: str = "keepalive") -> str:
+    """연결 유지용 comment 라인 (클라이언트는 무시)"""
+    return f": {text}\n\n"
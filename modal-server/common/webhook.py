@@ -0,0 +1,199 @@
+"""
+Job Completion Webhook
+- /start에 callback_url을 넘기면 job이 terminal 상태(complete/error)가 될 때 POST 1회 전달
+- 서명: HMAC-SHA256(secret, "{timestamp}.{body}") → X-Webhook-Signature: sha256=<hex>
+- 재시도: 네트워크 오류 / 429 / 5xx 에 대해 지수 백오프 + jitter
+- SSRF 방지: loopback / link-local / private 등 비공개 주소로 해석되는 host 거부 (접수 시 + 매 전송 직전),
+  redirect는 따라가지 않음 (로컬 개발은 WEBHOOK_ALLOW_PRIVATE_HOSTS=true)
+- stdlib(urllib)만 사용 → LTX / Official / SeeDANCE 이미지 모두에서 동작
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import random
+import socket
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Optional, Tuple
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+JOB_ID_HEADER = "X-Webhook-Job-Id"
+
+MAX_ATTEMPTS = 5
+BASE_DELAY = 1.0   # 1s → 2s → 4s → 8s (+ jitter)
+MAX_DELAY = 30.0
+TIMEOUT = 10.0
+
+
+def host_error(callback_url: str) -> Optional[str]:
+    """callback host가 공개 주소가 아니면 에러 메시지 (DNS 이름은 해석된 모든 주소 검사)"""
+    host = urllib.parse.urlsplit(callback_url).hostname
+    if not host:
+        return "invalid_callback_url: missing host"
+    if os.getenv("WEBHOOK_ALLOW_PRIVATE_HOSTS", "false").lower() == "true":
+        return None
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        return f"invalid_callback_url: cannot resolve {host}"
+    for *_, sockaddr in infos:
+        ip = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        # is_global: loopback / link-local(169.254 메타데이터 포함) / private / CGNAT / 예약 대역 모두 False
+        if not ip.is_global or ip.is_multicast:
+            return f"invalid_callback_url: {host} resolves to a non-public address"
+    return None
+
+
+def validate_callback(callback_url: Optional[str], callback_secret: Optional[str]) -> Optional[str]:
+    """
+    /start 요청의 callback 파라미터 검증 (DNS 조회 포함 → async 라우트에서는 스레드로)
+
+    Returns:
+        에러 메시지 (정상이면 None)
+    """
+    if not callback_url:
+        return None
+    if not callback_url.startswith(("http://", "https://")):
+        return "invalid_callback_url: must be http(s)"
+    error = host_error(callback_url)
+    if error:
+        return error
+    if not resolve_secret(callback_secret):
+        return "callback_secret_missing: provide callback_secret or set WEBHOOK_SECRET"
+    return None
+
+
+def callback_from_request(data: dict, base_url: str, job_id: str,
+                          download_path: str = "download") -> Tuple[Optional[dict], Optional[str]]:
+    """
+    /start body의 callback_url / callback_secret 분리 + 검증
+
+    Returns:
+        (job 완료 시 notify에 넘길 callback dict 또는 None, 에러 메시지 또는 None)
+    """
+    callback_url = data.pop("callback_url", None)
+    callback_secret = data.pop("callback_secret", None)
+    error = validate_callback(callback_url, callback_secret)
+    if error or not callback_url:
+        return None, error
+    return {
+        "url": callback_url,
+        "secret": resolve_secret(callback_secret),
+        "download_url": f"{base_url.rstrip('/')}/{download_path}/{job_id}",
+    }, None
+
+
+def resolve_secret(callback_secret: Optional[str]) -> Optional[str]:
+    """요청별 secret 우선, 없으면 ENV WEBHOOK_SECRET"""
+    return callback_secret or os.getenv("WEBHOOK_SECRET")
+
+
+def sign(body: bytes, secret: str, timestamp: str) -> str:
+    mac = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256)
+    return f"sha256={mac.hexdigest()}"
+
+
+def verify(body: bytes, secret: str, timestamp: str, signature: str, tolerance: float = 300.0) -> bool:
+    """수신측 검증 헬퍼 (timestamp 허용 오차 기본 5분)"""
+    try:
+        if abs(time.time() - float(timestamp)) > tolerance:
+            return False
+    except (TypeError, ValueError):
+        return False
+    return hmac.compare_digest(sign(body, secret, timestamp), signature or "")
+
+
+def build_payload(job_id: str, status: str, download_url: Optional[str] = None,
+                  error: Optional[str] = None, meta: Optional[dict] = None) -> dict:
+    return {
+        "event": "job.completed" if status == "complete" else "job.failed",
+        "job_id": job_id,
+        "status": status,
+        "download_url": download_url if status == "complete" else None,
+        "error": error,
+        "meta": meta or {},
+        "timestamp": int(time.time()),
+    }
+
+
+def notify(job_id: str, meta: dict, callback: Optional[dict] = None) -> bool:
+    """terminal 상태 webhook 전달 (meta: status / error + 나머지는 payload meta, callback 없으면 no-op)"""
+    if not callback:
+        return False
+    payload = build_payload(
+        job_id, meta["status"],
+        download_url=callback["download_url"],
+        error=meta.get("error"),
+        meta={k: v for k, v in meta.items() if k not in ("status", "error")},
+    )
+    return deliver(callback["url"], payload, callback["secret"])
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """3xx → HTTPError (검증하지 않은 주소로 넘어가지 않음)"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def _retryable(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def deliver(callback_url: str, payload: dict, secret: str,
+            max_attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY,
+            timeout: float = TIMEOUT) -> bool:
+    """
+    서명된 webhook POST 전달 (동기, 재시도 포함)
+
+    Returns:
+        2xx 응답을 받으면 True, 재시도 소진 / 재시도 불가 응답이면 False
+    """
+    job_id = payload.get("job_id", "")
+    body = json.dumps(payload, ensure_ascii=False).encode()
+
+    for attempt in range(1, max_attempts + 1):
+        # 접수 이후 DNS가 바뀌었을 수 있음 → 매 전송 직전 다시 확인
+        error = host_error(callback_url)
+        if error:
+            print(f"[WEBHOOK {job_id}] refused: {error}")
+            return False
+        timestamp = str(int(time.time()))
+        req = urllib.request.Request(
+            callback_url,
+            data=body,
+            method="POST",
+            headers={
+                "Content-Type": "application/json",
+                "User-Agent": "ltx-job-webhook/1",
+                JOB_ID_HEADER: job_id,
+                TIMESTAMP_HEADER: timestamp,
+                SIGNATURE_HEADER: sign(body, secret, timestamp),
+            },
+        )
+        try:
+            with _opener.open(req, timeout=timeout) as resp:
+                print(f"[WEBHOOK {job_id}] delivered: HTTP {resp.status} (attempt {attempt})")
+                return True
+        except urllib.error.HTTPError as e:
+            print(f"[WEBHOOK {job_id}] HTTP {e.code} (attempt {attempt}/{max_attempts})")
+            if not _retryable(e.code):
+                return False
+        except Exception as e:
+            print(f"[WEBHOOK {job_id}] {type(e).__name__}: {str(e)[:100]} (attempt {attempt}/{max_attempts})")
+
+        if attempt < max_attempts:
+            delay = min(MAX_DELAY, base_delay * (2 ** (attempt - 1)))
+            time.sleep(delay + random.uniform(0, delay / 2))
+
+    print(f"[WEBHOOK {job_id}] giving up after {max_attempts} attempts")
+    return False
@@ -37,10 +37,43 @@ image = (
         "HF_HUB_DISABLE_PROGRESS_BARS": "1",
         "PYTORCH_ALLOC_CONF": "expandable_segments:True"  # OOM 단편화 방지
     })
+    .add_local_python_source("common")
 )
 
 app = modal.App("ltx-video-service-distilled-1080p", image=image)
 model_cache = modal.Volume.from_name("model-cache-distilled", create_if_missing=True)
+# job_id → 최신 진행 스냅샷 (GPU 컨테이너가 쓰고 web_app SSE가 읽음)
+progress_store = modal.Dict.from_name("ltx-job-progress", create_if_missing=True)
+# 완성 MP4 저장소 (/result 반복 다운로드 + Range 서빙, TTL 만료 시 삭제)
+result_cache = modal.Volume.from_name("ltx-job-results", create_if_missing=True)
+# BytePlus 프록시 업로드 volume (업로드 시 생성된 960x544 파생본을 읽기 전용으로 사용)
+upload_volume = modal.Volume.from_name("byteplus-uploads", create_if_missing=True)
+UPLOADS_MOUNT = "/uploads"  # common.renditions.UPLOADS_MOUNT
+RESULT_DIR = "/results"
+RESULT_TTL_SEC = 24 * 3600
+# GPU 컨테이너 → web_app telemetry 이벤트 (cold start, stage 소요시간, GPU-seconds)
+# 소비자는 web_app 1개(max_containers=1)뿐 → 집계 owner 1개, 스크레이프가 없어도 주기적으로 비움
+telemetry_queue = modal.Queue.from_name("ltx-telemetry", create_if_missing=True)
+
+# 단계별 사전 소요시간 추정치 (초, A10G 기준) — ETA 계산용 prior
+STAGE_PRIORS = [
+    ("preprocess", 5.0),
+    ("stage1", 45.0),
+    ("stage2a", 10.0),
+    ("stage2b", 30.0),
+    ("decode", 10.0),
+    ("postprocess", 20.0),
+]
+
+def _emit_telemetry(event: dict):
+    """telemetry 이벤트 전송 (block 없음: queue가 가득 차면 버림 → 생성 경로는 기다리지 않음)"""
+    import queue
+    try:
+        telemetry_queue.put(event, block=False)
+    except queue.Full:
+        print(f"[TELEMETRY] queue full, dropped {event.get('type')} event")
+    except Exception as e:
+        print(f"[TELEMETRY] put failed: {type(e).__name__}: {e}")
 
 # ── OCR helpers (module level) ──
 def _ocr_check_frames(video_frames, ocr_reader):
@@ -92,16 +125,19 @@ def _blur_text_boxes(video_frames, boxes):
 @app.cls(
     gpu="A10G",
     timeout=3600,
-    volumes={"/models": model_cache},
+    volumes={"/models": model_cache, UPLOADS_MOUNT: upload_volume},
     secrets=[modal.Secret.from_name("huggingface-secret")]
 )
 class VideoGenerator:
     @modal.enter()
     def load_model(self):
         import os
+        import time
         import torch
         import cv2
 
+        load_start = time.time()
+
         # Force disable progress bars at runtime (critical for cp949 fix)
         os.environ["HF_HUB_DISABLE_PROGRESS_BARS"] = "1"
         os.environ["PYTHONIOENCODING"] = "utf-8"
@@ -143,9 +179,11 @@ class VideoGenerator:
                 low_cpu_mem_usage=True,
             )
 
+        model_cache_hit = os.path.exists(cache_dir)
         try:
             self.pipe = _load_pipeline()
         except Exception as load_err:
+            model_cache_hit = False
             print(f"  [LOAD FAILED] {type(load_err).__name__}: {str(load_err)[:200]}")
             print(f"  [CACHE PURGE] Removing {cache_dir} and retrying...")
             import shutil
@@ -285,6 +323,10 @@ class VideoGenerator:
         print("    - VRAM: ~22GB (A10G compatible)")
         print(f"{'='*70}\n")
 
+        load_sec = time.time() - load_start
+        print(f"[COLD START] load_model: {load_sec:.1f}s (model cache {'hit' if model_cache_hit else 'miss'})")
+        _emit_telemetry({"type": "cold_start", "load_sec": load_sec, "model_cache_hit": model_cache_hit})
+
     @modal.method()
     def generate(self, prompt: str, image_url: str, character_description: str = "", num_frames: int = 121,
                  # 테스트용 파라미터 (품질 실험)
@@ -292,13 +334,19 @@ class VideoGenerator:
                  test_guidance: float = None,
                  test_steps: int = None,
                  multi_face_mode: bool = False,  # 다인물 모드: Stage2b 활성화 → 얼굴 디테일 향상
-                 tone_fix: bool = False):  # Neutral color (no EQ adjustment)
+                 tone_fix: bool = False,  # Neutral color (no EQ adjustment)
+                 job_id: str = None):  # web tier job id → progress_store 진행률 기록
         import tempfile
         import torch
         import numpy as np
         import requests
         from PIL import Image
         from io import BytesIO
+        from common.progress import ProgressReporter
+        from common.renditions import load_original, load_rendition
+
+        progress = ProgressReporter(progress_store, job_id, STAGE_PRIORS)
+        progress.stage("preprocess")
 
         print(f"\n{'='*60}")
         print(f"[IMAGE-TO-VIDEO] Starting generation")
@@ -307,6 +355,8 @@ class VideoGenerator:
         # multi_face_mode → enable_stage2b
         enable_stage2b = multi_face_mode
         print(f"[MODE] multi_face_mode={multi_face_mode}  →  Stage2b={'ON (face detail boost)' if enable_stage2b else 'OFF (fast path)'}")
+        if not enable_stage2b:
+            progress.skip("stage2b")
 
         # Item 1: Server-side whitelist enforcement (safety net)
         MOTION_WHITELIST = ['blink only', 'blink + breathing', 'blink + breathing + micro head <0.3°']
@@ -321,24 +371,6 @@ class VideoGenerator:
 
         print(f"User prompt: {prompt[:100]}...")
 
-        # Handle both HTTP URLs and base64 data URLs
-        if image_url.startswith('data:'):
-            # Extract base64 data
-            import base64
-            header, encoded = image_url.split(',', 1)
-            image_data = base64.b64decode(encoded)
-            reference_image = Image.open(BytesIO(image_data)).convert("RGB")
-            print(f"[INPUT] Loaded base64 image: {reference_image.size}")
-        else:
-            # Download from HTTP URL
-            response = requests.get(image_url, timeout=30)
-            reference_image = Image.open(BytesIO(response.content)).convert("RGB")
-            print(f"[INPUT] Downloaded image from URL: {reference_image.size}")
-
-        # Use FULL FRAME (no crop) - preserve original composition
-        img_width, img_height = reference_image.size
-        print(f"[PREPROCESSING] Full-frame input: {img_width}x{img_height} (no crop, original composition)")
-
         # 960x544 Stage 1 → 2x upsample → 1920x1088 → crop 8px → 1920x1080
         target_width = 960    # multiples of 32
         target_height = 544   # multiples of 32
@@ -346,34 +378,65 @@ class VideoGenerator:
         print(f"[PREPROCESSING] Target resolution: {target_width}x{target_height}")
         print(f"[PREPROCESSING] Stage 1 ({target_width}x{target_height}) → Stage 2a 2x → {target_width*2}x{target_height*2} → crop 8px → 1920x1080")
 
-        # Center crop and resize for best quality
-        img_width, img_height = reference_image.size
-        aspect_ratio = target_width / target_height
-        img_aspect = img_width / img_height
-
-        print(f"[PREPROCESSING] Original: {img_width}x{img_height} (aspect: {img_aspect:.2f})")
-
-        if img_aspect > aspect_ratio:
-            # Image is wider - crop width
-            new_width = int(img_height * aspect_ratio)
-            left = (img_width - new_width) // 2
-            reference_image = reference_image.crop((left, 0, left + new_width, img_height))
-            print(f"[PREPROCESSING] Cropped width: {img_width} -> {new_width}")
+        # 업로드 참조(upload:{sha256} / 프록시 업로드 URL)면 업로드 시 만든 파생본 사용
+        # → 원본 다운로드 / 디코딩 / crop·resize 생략, hash는 meta에 기록된 pixel md5
+        rendition = load_rendition(image_url, "960x544", reload=upload_volume.reload)
+        if rendition is not None:
+            reference_image = Image.open(BytesIO(rendition.png)).convert("RGB")
+            img_hash = rendition.pixel_md5[:8]
+            print(f"[INPUT] Upload rendition: {reference_image.size} (download / crop / resize skipped)")
+            print(f"[PREPROCESSING] Image hash: {img_hash}")
         else:
-            # Image is taller - crop height
-            new_height = int(img_width / aspect_ratio)
-            top = (img_height - new_height) // 2
-            reference_image = reference_image.crop((0, top, img_width, top + new_height))
-            print(f"[PREPROCESSING] Cropped height: {img_height} -> {new_height}")
+            # 파생본 없는 업로드 참조 → volume의 원본 ("upload:{sha256}"은 HTTP로 받을 수 없음)
+            original = load_original(image_url, reload=upload_volume.reload)
+            if original is not None:
+                reference_image = Image.open(BytesIO(original)).convert("RGB")
+                print(f"[INPUT] Loaded upload original: {reference_image.size}")
+            # Handle both HTTP URLs and base64 data URLs
+            elif image_url.startswith('data:'):
+                # Extract base64 data
+                import base64
+                header, encoded = image_url.split(',', 1)
+                image_data = base64.b64decode(encoded)
+                reference_image = Image.open(BytesIO(image_data)).convert("RGB")
+                print(f"[INPUT] Loaded base64 image: {reference_image.size}")
+            else:
+                # Download from HTTP URL
+                response = requests.get(image_url, timeout=30)
+                reference_image = Image.open(BytesIO(response.content)).convert("RGB")
+                print(f"[INPUT] Downloaded image from URL: {reference_image.size}")
+
+            # Use FULL FRAME (no crop) - preserve original composition
+            img_width, img_height = reference_image.size
+            print(f"[PREPROCESSING] Full-frame input: {img_width}x{img_height} (no crop, original composition)")
+
+            # Center crop and resize for best quality
+            img_width, img_height = reference_image.size
+            aspect_ratio = target_width / target_height
+            img_aspect = img_width / img_height
+
+            print(f"[PREPROCESSING] Original: {img_width}x{img_height} (aspect: {img_aspect:.2f})")
+
+            if img_aspect > aspect_ratio:
+                # Image is wider - crop width
+                new_width = int(img_height * aspect_ratio)
+                left = (img_width - new_width) // 2
+                reference_image = reference_image.crop((left, 0, left + new_width, img_height))
+                print(f"[PREPROCESSING] Cropped width: {img_width} -> {new_width}")
+            else:
+                # Image is taller - crop height
+                new_height = int(img_width / aspect_ratio)
+                top = (img_height - new_height) // 2
+                reference_image = reference_image.crop((0, top, img_width, top + new_height))
+                print(f"[PREPROCESSING] Cropped height: {img_height} -> {new_height}")
 
-        # Resize to target dimensions with high-quality resampling
-        reference_image = reference_image.resize((target_width, target_height), Image.Resampling.LANCZOS)
-        print(f"[PREPROCESSING] Final size: {reference_image.size}")
+            # Resize to target dimensions with high-quality resampling
+            reference_image = reference_image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            print(f"[PREPROCESSING] Final size: {reference_image.size}")
 
-        # Save preprocessed image for verification
-        import hashlib
-        img_hash = hashlib.md5(np.array(reference_image).tobytes()).hexdigest()[:8]
-        print(f"[PREPROCESSING] Image hash: {img_hash}")
+            import hashlib
+            img_hash = hashlib.md5(np.array(reference_image).tobytes()).hexdigest()[:8]
+            print(f"[PREPROCESSING] Image hash: {img_hash}")
 
         # CRITICAL FIX: Maximum image conditioning for LTX-2
         # Problems from previous test:
@@ -711,6 +774,7 @@ class VideoGenerator:
             frame_rate = 24.0
             video_latent = None
             audio_latent = None
+            progress.stage("stage1", total_steps=final_steps_stage1)
 
             for attempt in range(1 + MAX_RETRIES):
                 seed = _new_seed()
@@ -749,6 +813,7 @@ class VideoGenerator:
                         generator=generator,
                         output_type="latent",
                         return_dict=False,
+                        callback_on_step_end=progress.step_callback(),
                     )
 
                 # Accept result (retry on exception only)
@@ -820,6 +885,7 @@ class VideoGenerator:
             print(f"\n{'='*60}")
             print(f"[STAGE 2a] Latent upsample {target_width}x{target_height} → {target_width*2}x{target_height*2}")
             print(f"{'='*60}")
+            progress.stage("stage2a")
 
             from diffusers.pipelines.ltx2 import LTX2LatentUpsamplePipeline
             from diffusers.pipelines.ltx2.latent_upsampler import LTX2LatentUpsamplerModel
@@ -876,6 +942,7 @@ class VideoGenerator:
         run_stage2b = enable_stage2b and time_budget_ok and remaining_budget >= MIN_STAGE2B_BUDGET
 
         if run_stage2b:
+            progress.stage("stage2b", total_steps=DEFAULT_STEPS_STAGE2)
             try:
                 print(f"\n{'='*60}")
                 print(f"[STAGE 2b] 4-step refinement at {target_width*2}x{target_height*2}")
@@ -917,6 +984,7 @@ class VideoGenerator:
                     latents=upscaled_latent,  # Initialize from upscaled latent
                     output_type="latent",  # Keep latent for VAE decode
                     return_dict=False,
+                    callback_on_step_end=progress.step_callback(),
                 )
 
                 # DEBUG: Inspect Stage 2b return structure
@@ -978,6 +1046,7 @@ class VideoGenerator:
         else:
             # Stage 2b SKIPPED (not enabled or budget exceeded)
             refine_time = 0.0
+            progress.skip("stage2b")
             print(f"\n{'='*60}")
             print(f"[STAGE 2b SKIPPED]")
             print(f"{'='*60}")
@@ -1000,6 +1069,7 @@ class VideoGenerator:
         print(f"[VAE DECODE] Converting latent to pixels")
         print(f"{'='*60}")
 
+        progress.stage("decode")
         decode_start = time.time()
 
         # Ensure latent matches VAE dtype (bfloat16)
@@ -1032,6 +1102,8 @@ class VideoGenerator:
         else:
             print(f"[CROP] Skipped (decoded: {decoded_w}x{decoded_h}, expected 1920x1088)")
 
+        progress.stage("postprocess")
+
         # ── Frame0 similarity guard (D) ──
         _THUMB = 256  # resize to 256px max for fast L1
         from PIL import Image as _PILImage
@@ -1405,10 +1477,21 @@ class VideoGenerator:
         except Exception as e:
             print(f"[WARNING] ffprobe verification failed: {str(e)}")
 
+        progress.finish()
+        _emit_telemetry({
+            "type": "job",
+            "gpu_sec": time.time() - progress.started_at,
+            "stages": progress.durations,
+            "finished_at": time.time(),
+        })
         return video_bytes
 
 # 3. Web API
-@app.function(image=image, timeout=900)
+# web tier는 컨테이너 1개로 고정: FairShareScheduler(max_inflight / 유저별 round-robin / queue_position),
+# jobs dict, telemetry 집계가 모두 프로세스 메모리 → 여러 replica면 GPU가 N × max_inflight를 받고 공정 분배도 깨짐
+# 동시 요청은 @modal.concurrent로 한 컨테이너에서 처리 (생성 자체는 VideoGenerator GPU 컨테이너)
+@app.function(image=image, timeout=900, volumes={RESULT_DIR: result_cache}, max_containers=1)
+@modal.concurrent(max_inputs=500)
 @modal.asgi_app()
 def web_app():
     from fastapi import FastAPI, Request
@@ -1418,6 +1501,15 @@ def web_app():
     from typing import List
     import asyncio
     import json
+    import os
+    import time
+    from common.sse import SSE_HEADERS, sse_event, sse_comment
+    from common import webhook
+    from common.filestream import file_response
+    from common.results import ResultStore
+    from common.scheduler import FairShareScheduler
+    from common.metrics import Registry, CONTENT_TYPE
+    from common.autoscale import DemandPredictor
 
     web = FastAPI()
 
@@ -1481,53 +1573,203 @@ def web_app():
         test_conditioning: float = None
         test_guidance: float = None
         test_steps: int = None
+        # Completion webhook (optional): terminal 상태에서 서명된 POST 전송
+        callback_url: str = None
+        callback_secret: str = None
+        # Scheduler: interactive (단일 재생성) | batch | sweep (파라미터 실험)
+        priority: str = "interactive"
+        user_id: str = None
 
     class BatchGenerateRequest(BaseModel):
         scenes: List[GenerateRequest]
+        user_id: str = None
 
     # ── Polling pattern for long-running generations ──
-    jobs = {}  # {job_id: {"status", "result", "error"}}
+    jobs = {}  # {job_id: {"status", "result", "error", "finished_at"}} — result = RESULT_DIR 내 파일 경로
+    # ── Telemetry (/metrics, /autoscale) ──
+    registry = Registry()
+    m_submitted = registry.counter("ltx_jobs_submitted_total", "Jobs accepted by the web tier", ("priority",))
+    m_finished = registry.counter("ltx_jobs_finished_total", "Jobs that reached a terminal state", ("status",))
+    m_queue_wait = registry.histogram("ltx_queue_wait_seconds", "Submit to GPU dispatch wait", ("priority",))
+    m_stage = registry.histogram("ltx_stage_seconds", "Per-stage generation latency", ("stage",))
+    m_cold_starts = registry.counter("ltx_cold_starts_total", "VideoGenerator container cold starts")
+    m_load_model = registry.histogram("ltx_load_model_seconds", "load_model duration per cold start",
+                                      buckets=(10, 30, 60, 120, 180, 300, 600, 900))
+    m_cache = registry.counter("ltx_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+    m_gpu_seconds = registry.counter("ltx_gpu_seconds_total", "GPU-seconds consumed by generate()")
+    g_jobs = registry.gauge("ltx_jobs", "Jobs currently tracked by state", ("state",))
+    g_gpu_minute = registry.gauge("ltx_gpu_seconds_per_minute", "GPU-seconds finished in the last full minute")
+    g_recommend = registry.gauge("ltx_recommended_containers", "Autoscaling recommendation", ("setting",))
+    predictor = DemandPredictor()
+    gpu_by_minute = {}  # minute → GPU-seconds (최근 60분)
+
+    # GPU 동시 실행 슬롯: 우선순위/유저 공정 분배 후 VideoGenerator 호출
+    scheduler = FairShareScheduler(
+        max_inflight=int(os.environ.get("LTX_MAX_INFLIGHT", "10")),
+        on_dispatch=lambda priority, wait: m_queue_wait.observe(wait, priority),
+    )
+
+    async def _submit(job_id, user, priority, job):
+        """scheduler 경유 실행 + 도착 기록 (demand predictor 입력)"""
+        priority = scheduler.normalize_priority(priority)
+        m_submitted.inc(1, priority)
+        predictor.record_arrival()
+        return await scheduler.run(job_id, user, priority, job)
+
+    def _apply_telemetry(event):
+        if event.get("type") == "cold_start":
+            m_cold_starts.inc()
+            m_load_model.observe(event["load_sec"])
+            m_cache.inc(1, "model", "hit" if event.get("model_cache_hit") else "miss")
+        elif event.get("type") == "job":
+            m_gpu_seconds.inc(event["gpu_sec"])
+            predictor.record_service(event["gpu_sec"])
+            minute = int(event.get("finished_at", time.time()) // 60)
+            gpu_by_minute[minute] = gpu_by_minute.get(minute, 0.0) + event["gpu_sec"]
+            for stage, seconds in (event.get("stages") or {}).items():
+                m_stage.observe(seconds, stage)
+
+    async def _drain_telemetry():
+        """GPU 컨테이너가 쌓아 둔 이벤트 비움 (주기적 + 스크레이프 시점)"""
+        for _ in range(20):
+            try:
+                events = await telemetry_queue.get_many.aio(500, block=False)
+            except Exception as e:
+                print(f"[TELEMETRY] drain failed: {e}")
+                return
+            if not events:
+                return
+            for event in events:
+                _apply_telemetry(event)
+
+    TELEMETRY_DRAIN_SEC = float(os.environ.get("TELEMETRY_DRAIN_SEC", "15"))
+    background = {}
+
+    async def _drain_telemetry_loop():
+        """/metrics 스크레이프가 없어도 queue(파티션당 5,000개)가 차지 않도록 주기적으로 비움"""
+        while True:
+            await _drain_telemetry()
+            await asyncio.sleep(TELEMETRY_DRAIN_SEC)
+
+    @web.on_event("startup")
+    async def start_telemetry_drain():
+        background["telemetry"] = asyncio.create_task(_drain_telemetry_loop())
+
+    def _refresh_gauges():
+        states = {"queued": 0, "running": 0, "complete": 0, "error": 0}
+        for job in jobs.values():
+            states[job["status"]] = states.get(job["status"], 0) + 1
+        for state, count in states.items():
+            g_jobs.set(count, state)
+        now_minute = int(time.time() // 60)
+        for minute in [m for m in gpu_by_minute if m < now_minute - 60]:
+            del gpu_by_minute[minute]
+        g_gpu_minute.set(round(gpu_by_minute.get(now_minute - 1, 0.0), 3))
+        recommendation = predictor.recommend()
+        g_recommend.set(recommendation["keep_warm"], "keep_warm")
+        g_recommend.set(recommendation["max_containers"], "max_containers")
+        return recommendation
+    # 미확인 job_id의 volume reload는 RESULT_RELOAD_SEC마다 최대 1회 (없는 id 반복 조회 → reload 폭주 방지)
+    results = ResultStore(
+        RESULT_DIR, RESULT_TTL_SEC,
+        reload=result_cache.reload.aio,
+        commit=result_cache.commit.aio,
+        reload_interval=float(os.getenv("RESULT_RELOAD_SEC", "10")),
+    )
+
+    def _sweep_expired_jobs():
+        """TTL 지난 job 엔트리 정리 (파일은 ResultStore.sweep)"""
+        now = time.time()
+        for job_id in [j for j, job in jobs.items()
+                       if job.get("finished_at") and now - job["finished_at"] > RESULT_TTL_SEC]:
+            del jobs[job_id]
+
+    def _user_of(user_id, request: Request):
+        return user_id or (request.client.host if request.client else "anonymous")
 
     async def _run_job(job_id, prompt, image_url, character_description, num_frames,
-                       test_conditioning, test_guidance, test_steps, multi_face_mode=False):
-        try:
+                       test_conditioning, test_guidance, test_steps, multi_face_mode=False,
+                       user="anonymous", priority="interactive"):
+        async def _generate():
+            jobs[job_id]["status"] = "running"
             print(f"[JOB {job_id}] Starting generation... multi_face_mode={multi_face_mode}")
             generator = VideoGenerator()
-            video_bytes = await generator.generate.remote.aio(
+            return await generator.generate.remote.aio(
                 prompt, image_url, character_description, num_frames,
-                test_conditioning, test_guidance, test_steps, multi_face_mode
+                test_conditioning, test_guidance, test_steps, multi_face_mode,
+                job_id=job_id,
             )
+
+        try:
+            video_bytes = await _submit(job_id, user, priority, _generate)
+            # 수십 MB 쓰기 + sweep(listdir/stat) → 스레드에서
+            path = await results.save(job_id, video_bytes)
+            _sweep_expired_jobs()
             jobs[job_id]["status"] = "complete"
-            jobs[job_id]["result"] = video_bytes
-            print(f"[JOB {job_id}] Complete: {len(video_bytes)} bytes")
+            jobs[job_id]["result"] = path
+            jobs[job_id]["size_bytes"] = len(video_bytes)
+            print(f"[JOB {job_id}] Complete: {len(video_bytes)} bytes → {path}")
         except Exception as e:
             import traceback
             jobs[job_id]["status"] = "error"
             jobs[job_id]["error"] = str(e)
             print(f"[JOB {job_id}] Error: {e}")
             traceback.print_exc()
+        jobs[job_id]["finished_at"] = time.time()
+        m_finished.inc(1, jobs[job_id]["status"])
+        try:
+            await progress_store.pop.aio(job_id)
+        except Exception:
+            pass
+        await _notify_callback(job_id)
+
+    async def _notify_callback(job_id):
+        job = jobs.get(job_id)
+        if not job or not job.get("callback"):
+            return
+        meta = {"status": job["status"], "error": job["error"]}
+        if job["result"]:
+            meta["size_bytes"] = job["size_bytes"]
+        # urllib 재시도 루프(sleep 포함) → 이벤트 루프 밖에서 실행
+        await asyncio.to_thread(webhook.notify, job_id, meta, job["callback"])
 
     @web.post("/start")
-    async def start_generation(req: GenerateRequest):
+    async def start_generation(req: GenerateRequest, request: Request):
         """Start video generation, return job_id immediately"""
         import uuid
         job_id = uuid.uuid4().hex[:8]
-        jobs[job_id] = {"status": "running", "result": None, "error": None}
+        # callback host 검증은 DNS 조회 포함 → 이벤트 루프 밖에서
+        callback, callback_error = await asyncio.to_thread(
+            webhook.callback_from_request,
+            {"callback_url": req.callback_url, "callback_secret": req.callback_secret},
+            str(request.base_url), job_id, "result",
+        )
+        if callback_error:
+            return Response(
+                content=json.dumps({"error": callback_error}),
+                status_code=400,
+                media_type="application/json",
+                headers={"Access-Control-Allow-Origin": "*"}
+            )
+        priority = scheduler.normalize_priority(req.priority)
+        jobs[job_id] = {"status": "queued", "result": None, "error": None, "callback": callback,
+                        "priority": priority}
         asyncio.create_task(_run_job(
             job_id, req.prompt, req.image_url, req.character_description,
             req.num_frames, req.test_conditioning, req.test_guidance, req.test_steps,
-            req.multi_face_mode
+            req.multi_face_mode, user=_user_of(req.user_id, request), priority=priority,
         ))
-        print(f"[JOB {job_id}] Started")
+        print(f"[JOB {job_id}] Queued (priority={priority})")
         return Response(
-            content=json.dumps({"job_id": job_id}),
+            content=json.dumps({"job_id": job_id, "priority": priority,
+                                "queue_position": scheduler.position(job_id)}),
             media_type="application/json",
             headers={"Access-Control-Allow-Origin": "*"}
         )
 
     @web.get("/status/{job_id}")
     async def job_status(job_id: str):
-        """Poll job status: running | complete | error"""
+        """Poll job status: queued | running | complete | error"""
         if job_id not in jobs:
             return Response(
                 content=json.dumps({"status": "not_found"}),
@@ -1536,40 +1778,115 @@ def web_app():
                 headers={"Access-Control-Allow-Origin": "*"}
             )
         job = jobs[job_id]
+        progress = await _read_progress(job_id) if job["status"] == "running" else None
         return Response(
-            content=json.dumps({"status": job["status"], "error": job["error"]}),
+            content=json.dumps({
+                "status": job["status"],
+                "error": job["error"],
+                "progress": progress,
+                "priority": job.get("priority"),
+                "queue_position": scheduler.position(job_id),
+            }),
             media_type="application/json",
             headers={"Access-Control-Allow-Origin": "*"}
         )
 
-    @web.get("/result/{job_id}")
-    async def job_result(job_id: str):
-        """Retrieve completed video"""
+    async def _read_progress(job_id):
+        try:
+            return await progress_store.get.aio(job_id)
+        except Exception as e:
+            print(f"[JOB {job_id}] progress read failed: {e}")
+            return None
+
+    EVENTS_POLL_INTERVAL = 1.0   # progress_store 조회 주기 (서버 내부)
+    EVENTS_KEEPALIVE = 15.0      # 변화 없을 때 comment 전송 주기
+
+    @web.get("/events/{job_id}")
+    async def job_events(job_id: str):
+        """SSE progress stream: progress* → complete | error (then close)"""
         if job_id not in jobs:
             return Response(
-                content=json.dumps({"error": "not_found"}),
+                content=json.dumps({"status": "not_found"}),
                 status_code=404,
                 media_type="application/json",
                 headers={"Access-Control-Allow-Origin": "*"}
             )
-        job = jobs[job_id]
-        if job["status"] != "complete":
+
+        async def _stream():
+            last_seq = None
+            last_position = None
+            last_sent = time.time()
+            while True:
+                job = jobs.get(job_id)
+                if job is None:
+                    yield sse_event("error", {"status": "not_found"})
+                    return
+                if job["status"] == "complete":
+                    yield sse_event("complete", {"status": "complete", "result": f"/result/{job_id}"})
+                    return
+                if job["status"] == "error":
+                    yield sse_event("error", {"status": "error", "error": job["error"]})
+                    return
+                if job["status"] == "queued":
+                    position = scheduler.position(job_id)
+                    if position != last_position:
+                        last_position = position
+                        last_sent = time.time()
+                        yield sse_event("queued", {"status": "queued", "queue_position": position})
+                    elif time.time() - last_sent >= EVENTS_KEEPALIVE:
+                        last_sent = time.time()
+                        yield sse_comment()
+                    await asyncio.sleep(EVENTS_POLL_INTERVAL)
+                    continue
+
+                snap = await _read_progress(job_id)
+                if snap and snap.get("seq") != last_seq:
+                    last_seq = snap.get("seq")
+                    last_sent = time.time()
+                    yield sse_event("progress", snap, event_id=str(last_seq))
+                elif time.time() - last_sent >= EVENTS_KEEPALIVE:
+                    last_sent = time.time()
+                    yield sse_comment()
+
+                await asyncio.sleep(EVENTS_POLL_INTERVAL)
+
+        return StreamingResponse(_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    @web.get("/result/{job_id}")
+    async def job_result(job_id: str, request: Request):
+        """Retrieve completed video (repeatable until TTL, Range/ETag 지원)"""
+        job = jobs.get(job_id)
+        if job is not None and job["status"] != "complete":
             return Response(
                 content=json.dumps({"error": "not ready", "status": job["status"]}),
                 status_code=202,
                 media_type="application/json",
                 headers={"Access-Control-Allow-Origin": "*"}
             )
-        video_bytes = job["result"]
-        del jobs[job_id]
-        return Response(
-            content=video_bytes,
+
+        # 컨테이너 재시작 / 다른 컨테이너의 결과는 volume reload 후 서빙 (reload는 rate limit)
+        status, path, st = await results.lookup(job_id, known=job is not None)
+        if status != "hit":
+            m_cache.inc(1, "result", "miss" if status == "not_found" else status)
+            return Response(
+                content=json.dumps({"error": status}),
+                status_code=404 if status == "not_found" else 410,
+                media_type="application/json",
+                headers={"Access-Control-Allow-Origin": "*"}
+            )
+
+        response = file_response(
+            path,
+            request.headers,
             media_type="video/mp4",
-            headers={"Access-Control-Allow-Origin": "*"}
+            extra_headers={"Cache-Control": f"private, max-age={RESULT_TTL_SEC}"},
+            st=st,
         )
+        m_cache.inc(1, "result", "not_modified" if response.status_code == 304 else "hit")
+        return response
 
     @web.post("/generate")
-    async def generate(req: GenerateRequest):
+    async def generate(req: GenerateRequest, request: Request):
         """Generate single video from image"""
         print(f"\n{'='*60}")
         print(f"[API REQUEST] /generate")
@@ -1583,15 +1900,21 @@ def web_app():
             generator = VideoGenerator()
 
             print("[API] Calling generate.remote()...")
-            video_bytes = generator.generate.remote(
-                req.prompt,
-                req.image_url,
-                req.character_description,
-                req.num_frames,
-                req.test_conditioning,
-                req.test_guidance,
-                req.test_steps,
-                req.multi_face_mode,
+            import uuid
+            video_bytes = await _submit(
+                uuid.uuid4().hex[:8],
+                _user_of(req.user_id, request),
+                req.priority,
+                lambda: generator.generate.remote.aio(
+                    req.prompt,
+                    req.image_url,
+                    req.character_description,
+                    req.num_frames,
+                    req.test_conditioning,
+                    req.test_guidance,
+                    req.test_steps,
+                    req.multi_face_mode,
+                ),
             )
 
             print(f"[API] Video generated successfully: {len(video_bytes)} bytes")
@@ -1643,32 +1966,31 @@ def web_app():
         )
 
     @web.post("/batch-generate")
-    async def batch_generate(req: BatchGenerateRequest):
-        """Generate multiple videos in parallel (up to 10 at a time)"""
+    async def batch_generate(req: BatchGenerateRequest, request: Request):
+        """Generate multiple videos in parallel (batch priority, scheduler slot 한도 내)"""
         try:
+            import uuid
             generator = VideoGenerator()
             total = len(req.scenes)
+            user = _user_of(req.user_id, request)
+            done = {"count": 0}
 
-            # Process in batches of 10 for cost optimization
-            batch_size = min(10, total)
-            results = []
-
-            for i in range(0, total, batch_size):
-                batch = req.scenes[i:i+batch_size]
-
-                # Parallel processing
-                batch_results = await asyncio.gather(*[
-                    generator.generate.remote.aio(
+            async def _scene(scene):
+                video = await _submit(
+                    uuid.uuid4().hex[:8], user, "batch",
+                    lambda: generator.generate.remote.aio(
                         scene.prompt,
                         scene.image_url,
                         scene.character_description,
                         scene.num_frames
-                    )
-                    for scene in batch
-                ])
+                    ),
+                )
+                done["count"] += 1
+                print(f"Batch progress: {done['count']}/{total}")
+                return video
 
-                results.extend(batch_results)
-                print(f"Batch progress: {len(results)}/{total}")
+            # 동시 실행 수는 scheduler(max_inflight)가 제한 — interactive job이 배치 중간에 끼어들 수 있음
+            results = await asyncio.gather(*[_scene(scene) for scene in req.scenes])
 
             # Return all videos as base64 for easy handling
             import base64
@@ -1705,4 +2027,17 @@ def web_app():
         """Health check endpoint"""
         return {"status": "healthy", "service": "ltx-video-720p"}
 
+    @web.get("/metrics")
+    async def metrics():
+        """Prometheus text format: queue depth, stage latency, cold starts, cache, GPU-seconds"""
+        await _drain_telemetry()
+        _refresh_gauges()
+        return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+    @web.get("/autoscale")
+    async def autoscale():
+        """keep-warm / max-containers 권장값 (최근 job 이력 기반)"""
+        await _drain_telemetry()
+        return {"recommendation": _refresh_gauges(), "scheduler": scheduler.stats()}
+
     return web
@@ -4,15 +4,17 @@ v1.3-byteplus-sdk: 공식 SDK 사용으로 REST 스키마 문제 해결
 """
 
 import modal
+import asyncio
 import traceback
 import uuid
 import base64
 import os
-import re
+import time
 from pathlib import Path
+from typing import Optional
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 BUILD_VERSION = "v1.10-runware-provider-fixed"
 
@@ -29,6 +31,8 @@ app = modal.App("byteplus-proxy")
 upload_volume = modal.Volume.from_name("byteplus-uploads", create_if_missing=True)
 cache_volume = modal.Volume.from_name("byteplus-1080p-cache", create_if_missing=True)
 user_db_volume = modal.Volume.from_name("user-database", create_if_missing=True)
+# routed job snapshot (job id → 상태 / 결과 URL): 접수한 컨테이너가 아니어도 / 재시작 후에도 조회
+router_jobs = modal.Dict.from_name("router-jobs", create_if_missing=True)
 UPLOAD_DIR = "/uploads"
 CACHE_DIR = "/cache"
 USER_DB_DIR = "/user-db"
@@ -37,14 +41,103 @@ USER_DB_PATH = "/user-db/users.db"
 # Modal Image with BytePlus SDK + Runware SDK + all dependencies
 image = (
     modal.Image.debian_slim()
-    .apt_install("ffmpeg")  # 720p → 1080p 리사이징용
+    .apt_install("ffmpeg", "fonts-noto-cjk")  # 720p → 1080p 리사이징 + 서버 렌더링 (drawtext 한글 폰트)
     .pip_install("byteplus-python-sdk-v2")  # BytePlus 공식 SDK
-    .pip_install("runware")  # Runware SDK (https://pypi.org/project/runware/)
-    .pip_install("fastapi", "httpx", "sniffio", "anyio", "httpcore")
+    .pip_install("runware", "websockets")  # Runware SDK (https://pypi.org/project/runware/) + WebSocket pool
+    .pip_install("fastapi", "httpx", "sniffio", "anyio", "httpcore", "h2", "python-multipart")
+    .pip_install("Pillow")  # 업로드 파생본 (generator 입력 해상도)
+    .add_local_python_source("proxy", "common", "providers")
 )
 
 fast_app = FastAPI()
 
+# 앱 수명 동안 재사용하는 upstream HTTP client (keep-alive pool)
+from proxy.http_pool import UpstreamClients
+from proxy.streaming import open_upstream, relay_response
+from proxy.export import ExportManager
+from proxy.cache_index import CacheIndex
+from proxy.fetch_cache import RemoteFetchCache
+from proxy.task_cache import TaskStatusCache
+from proxy.poller import PollProvider, TaskPoller
+from proxy.rate_limit import RateLimit, RateLimited, RateLimiter
+from proxy.telemetry import MetricsMiddleware, ProxyMetrics, snapshot
+from proxy.router import POLICIES, ProviderRouter, RouteProvider, RouterError
+from proxy.user_store import UserStore
+from proxy.uploads import UploadRejected, UploadStore, iter_multipart_file, sniff_media
+from proxy.render import RenderError, RenderService, parse_ref
+from proxy.image_serving import ImageServer
+from common.filestream import file_response
+from common.metrics import CONTENT_TYPE
+from common.polling import PollSchedule
+from common.resilience import CircuitOpenError
+from common.sse import SSE_HEADERS, sse_comment, sse_event
+from common.renditions import DERIVED_DIR
+from providers.modal_jobs import ModalJobService
+from providers.runware_client import (
+    RUNWARE_BREAKER, runware_generate_video, runware_get_task, runware_submit_video,
+)
+from providers.runware_pool import RUNWARE_WS_URL, RunwareAuthError, RunwareConnectionLost, RunwareSessionPool
+
+# /metrics: 라우트 / upstream latency, 응답 바이트, 1080p 변환 시간 (컴포넌트 통계는 스크레이프 시점)
+metrics = ProxyMetrics()
+upstreams = UpstreamClients(observer=metrics.observe_upstream)
+
+def rate_limit_config(name: str, default: str) -> RateLimit:
+    """RATE_LIMIT_<NAME>="초당 요청 수,burst" (API key별 token bucket)"""
+    rate, burst = os.getenv(f"RATE_LIMIT_{name.upper()}", default).split(",")
+    return RateLimit(float(rate), int(burst))
+
+# provider 태스크 생성 호출 앞단 rate limit (같은 키로 배치 요청이 몰려도 provider 한도 속도로 접수)
+rate_limiter = RateLimiter(
+    {
+        "byteplus": rate_limit_config("byteplus", "2,5"),
+        "evolink": rate_limit_config("evolink", "2,5"),
+        "runware": rate_limit_config("runware", "3,10"),
+    },
+    max_wait=float(os.getenv("RATE_LIMIT_MAX_WAIT_SEC", "15")),
+)
+
+async def acquire_rate_limit(provider: str, api_key: str, request_id: str) -> dict:
+    """토큰 대기 → 응답 헤더 (X-RateLimit-Wait-Ms 등), max_wait 넘게 기다려야 하면 429"""
+    try:
+        waited = await rate_limiter.acquire(provider, api_key)
+    except RateLimited as e:
+        print(f"[{request_id}] [RATE] {e}")
+        raise HTTPException(
+            429,
+            f"rate_limited: {e}",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
+    metrics.rate_limit_wait.observe(waited, provider)
+    if waited:
+        print(f"[{request_id}] [RATE] {provider} queued {waited * 1000:.0f}ms")
+    return rate_limiter.headers(provider, api_key, waited)
+
+def note_upstream_throttle(provider: str, api_key: str, response):
+    """limiter를 통과했는데도 upstream 429 → bucket 비움 (Retry-After 반영)"""
+    if response.status_code != 429:
+        return
+    retry_after = response.headers.get("Retry-After")
+    try:
+        rate_limiter.throttled(provider, api_key, float(retry_after) if retry_after else None)
+    except ValueError:
+        rate_limiter.throttled(provider, api_key)
+
+
+@fast_app.on_event("shutdown")
+async def close_upstreams():
+    await upstreams.aclose()
+
+@fast_app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    """breaker open → upstream 호출 없이 503 + Retry-After (장애 중 timeout까지 기다리지 않음)"""
+    print(f"[BREAKER] Fast-fail {request.url.path}: {exc}")
+    return JSONResponse(
+        {"error": "upstream_unavailable", "upstream": exc.name, "detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
 # CORS 설정
 fast_app.add_middleware(
     CORSMiddleware,
@@ -52,29 +145,35 @@ fast_app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 배치 클라이언트가 대기 시간 / 남은 토큰을 읽을 수 있도록
+    expose_headers=["X-RateLimit-Wait-Ms", "X-RateLimit-Limit", "X-RateLimit-Remaining", "Retry-After"],
 )
+fast_app.add_middleware(MetricsMiddleware, metrics=metrics)
 
 # ============ 유저 DB 관리 ============
-import sqlite3
 import hashlib
-from datetime import datetime
-
-def init_user_db():
-    """SQLite 유저 DB 초기화"""
-    conn = sqlite3.connect(USER_DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            email TEXT,
-            approved INTEGER DEFAULT 0,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+
+async def _commit_user_db():
+    await asyncio.to_thread(user_db_volume.commit)
+
+# 워커당 연결 1개 (WAL), 쓰기 후 volume commit은 USER_DB_COMMIT_SEC 동안 모아서 1회
+user_store = UserStore(
+    USER_DB_PATH,
+    commit=_commit_user_db,
+    commit_interval=float(os.getenv("USER_DB_COMMIT_SEC", "5")),
+)
+
+@fast_app.on_event("startup")
+async def open_user_store():
+    try:
+        await user_store.init()
+    except Exception as e:
+        # volume 미마운트 등 → 첫 auth 요청에서 다시 시도
+        print(f"[USERDB] Init failed: {type(e).__name__}: {e}")
+
+@fast_app.on_event("shutdown")
+async def close_user_store():
+    await user_store.aclose()
 
 def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
@@ -83,7 +182,6 @@ def hash_password(password: str) -> str:
 async def register_user(request: Request):
     """회원가입 (승인 대기 상태로 등록)"""
     try:
-        init_user_db()
         body = await request.json()
         username = body.get("username", "").strip()
         password = body.get("password", "")
@@ -92,25 +190,10 @@ async def register_user(request: Request):
         if not username or not password:
             return JSONResponse({"success": False, "error": "missing_fields"}, status_code=400)
 
-        conn = sqlite3.connect(USER_DB_PATH)
-        cursor = conn.cursor()
-
-        # 중복 체크
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        if cursor.fetchone():
-            conn.close()
+        # 중복이면 UNIQUE 제약으로 실패 → 별도 SELECT 없음
+        if not await user_store.register(username, hash_password(password), email):
             return JSONResponse({"success": False, "error": "duplicate_username"})
 
-        # 새 유저 추가
-        password_hash = hash_password(password)
-        cursor.execute(
-            "INSERT INTO users (username, password_hash, email, approved) VALUES (?, ?, ?, 0)",
-            (username, password_hash, email)
-        )
-        conn.commit()
-        conn.close()
-        user_db_volume.commit()
-
         return JSONResponse({"success": True, "message": "registered_pending_approval"})
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
@@ -119,19 +202,11 @@ async def register_user(request: Request):
 async def login_user(request: Request):
     """로그인 (승인된 유저만 가능)"""
     try:
-        init_user_db()
         body = await request.json()
         username = body.get("username", "").strip()
         password = body.get("password", "")
 
-        conn = sqlite3.connect(USER_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, username, email, approved FROM users WHERE username = ? AND password_hash = ?",
-            (username, hash_password(password))
-        )
-        user = cursor.fetchone()
-        conn.close()
+        user = await user_store.authenticate(username, hash_password(password))
 
         if not user:
             return JSONResponse({"success": False, "error": "invalid_credentials"})
@@ -156,12 +231,7 @@ async def list_users(request: Request):
         if admin_key != expected_key:
             return JSONResponse({"success": False, "error": "unauthorized"}, status_code=401)
 
-        init_user_db()
-        conn = sqlite3.connect(USER_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, username, email, approved, created_at FROM users ORDER BY created_at DESC")
-        users = [{"id": r[0], "username": r[1], "email": r[2], "approved": r[3], "created_at": r[4]} for r in cursor.fetchall()]
-        conn.close()
+        users = await user_store.list_users()
 
         return JSONResponse({"success": True, "users": users})
     except Exception as e:
@@ -180,13 +250,7 @@ async def approve_user(request: Request):
         user_id = body.get("user_id")
         approved = body.get("approved", 1)
 
-        init_user_db()
-        conn = sqlite3.connect(USER_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE users SET approved = ? WHERE id = ?", (approved, user_id))
-        conn.commit()
-        conn.close()
-        user_db_volume.commit()
+        await user_store.set_approved(user_id, approved)
 
         return JSONResponse({"success": True})
     except Exception as e:
@@ -204,112 +268,195 @@ async def update_password(request: Request):
         if not username or not old_password or not new_password:
             return JSONResponse({"success": False, "error": "missing_fields"}, status_code=400)
 
-        init_user_db()
-        conn = sqlite3.connect(USER_DB_PATH)
-        cursor = conn.cursor()
-
-        # 기존 비밀번호 확인
-        old_hash = hash_password(old_password)
-        cursor.execute("SELECT id FROM users WHERE username = ? AND password_hash = ?", (username, old_hash))
-        user = cursor.fetchone()
-
-        if not user:
-            conn.close()
+        # 기존 비밀번호 확인 + 변경을 UPDATE 1회로
+        if not await user_store.update_password(username, hash_password(old_password), hash_password(new_password)):
             return JSONResponse({"success": False, "error": "wrong_password"}, status_code=401)
 
-        # 새 비밀번호로 업데이트
-        new_hash = hash_password(new_password)
-        cursor.execute("UPDATE users SET password_hash = ? WHERE username = ?", (new_hash, username))
-        conn.commit()
-        conn.close()
-        user_db_volume.commit()
-
         return JSONResponse({"success": True})
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
-@fast_app.post("/api/v3/uploads")
-async def upload_image(request: Request):
-    """Data URL을 Imgur에 업로드하고 공개 URL 반환 (BytePlus 호환)"""
+async def _commit_uploads():
+    await asyncio.to_thread(upload_volume.commit)
+
+# content hash 기반 업로드 저장소 (같은 이미지 재업로드 → 기존 URL)
+upload_store = UploadStore(
+    UPLOAD_DIR,
+    max_bytes=int(float(os.getenv("UPLOAD_MAX_MB", "5")) * 1024 * 1024),
+    commit=_commit_uploads,
+    renditions=os.getenv("UPLOAD_RENDITIONS", "true").lower() == "true",
+)
+_mirror_tasks = set()
+
+def upload_public_url(request: Request, filename: str) -> str:
+    """volume 서빙 URL (UPLOAD_PUBLIC_BASE_URL로 외부 도메인 지정 가능)"""
+    base = os.getenv("UPLOAD_PUBLIC_BASE_URL") or str(request.base_url)
+    return f"{base.rstrip('/')}/api/v3/uploads/{filename}"
+
+def upload_response(request: Request, meta: dict, deduplicated: bool) -> dict:
+    result = {
+        "image_url": upload_public_url(request, meta["filename"]),
+        "sha256": meta["sha256"],
+        "size": meta["size"],
+        "mime": meta["mime"],
+        "deduplicated": deduplicated,
+        # generator에 image_url 대신 넘기면 volume의 파생본을 바로 사용 (다운로드 / crop·resize 생략)
+        "image_ref": f"upload:{meta['sha256']}",
+    }
+    if meta.get("renditions"):
+        result["renditions"] = {
+            name: upload_public_url(request, f"derived/{info['filename']}")
+            for name, info in meta["renditions"].items()
+        }
+    if meta.get("mirror_url"):
+        result["mirror_url"] = meta["mirror_url"]
+    return result
+
+async def mirror_to_imgur(meta: dict):
+    """Imgur 미러 업로드 (선택, 백그라운드) → 메타데이터에 mirror_url 기록"""
+    imgur_client_id = os.getenv("IMGUR_CLIENT_ID")
+    if not imgur_client_id:
+        return
     try:
-        import httpx
+        path = os.path.join(UPLOAD_DIR, meta["filename"])
+        data = await asyncio.to_thread(Path(path).read_bytes)
+        response = await upstreams.client("imgur").post(
+            "https://api.imgur.com/3/image",
+            headers={"Authorization": f"Client-ID {imgur_client_id}"},
+            files={"image": (meta["filename"], data, meta["mime"])},
+        )
+        if response.status_code != 200:
+            print(f"[UPLOAD] Imgur mirror failed: HTTP {response.status_code} - {response.text[:200]}")
+            return
+        mirror_url = response.json()["data"]["link"]
+        await upload_store.update_meta(meta["sha256"], mirror_url=mirror_url)
+        print(f"[UPLOAD] Mirrored {meta['sha256'][:12]} → {mirror_url}")
+    except Exception as e:
+        print(f"[UPLOAD] Imgur mirror error: {type(e).__name__}: {str(e)[:200]}")
 
-        # ENV에서 Imgur Client ID 읽기 (필수)
-        imgur_client_id = os.getenv("IMGUR_CLIENT_ID")
-        if not imgur_client_id:
-            raise HTTPException(400, "imgur_client_id_missing: Set IMGUR_CLIENT_ID in Modal secrets")
+def maybe_mirror(meta: dict, requested: Optional[str]):
+    enabled = (requested or os.getenv("UPLOAD_IMGUR_MIRROR", "false")).lower() in ("true", "imgur", "1")
+    if not enabled or meta.get("mirror_url"):
+        return
+    task = asyncio.get_running_loop().create_task(mirror_to_imgur(meta))
+    _mirror_tasks.add(task)
+    task.add_done_callback(_mirror_tasks.discard)
 
-        body = await request.json()
-        data_url = body.get("data_url", "")
-
-        # 1. data URL 형식 검증
-        if not data_url.startswith("data:image/"):
-            raise HTTPException(400, "invalid_data_url: Must start with 'data:image/'")
-
-        # 2. MIME 타입 검증 (png/jpeg/webp만 허용)
-        header, b64_data = data_url.split(",", 1)
-        mime_type = header.split(";")[0].replace("data:", "")
-        allowed_mimes = ["image/png", "image/jpeg", "image/jpg", "image/webp"]
-        if mime_type not in allowed_mimes:
-            raise HTTPException(400, f"unsupported_format: Only {allowed_mimes} allowed, got {mime_type}")
-
-        # 3. 크기 제한 (5MB)
-        decoded_bytes = base64.b64decode(b64_data)
-        size_mb = len(decoded_bytes) / (1024 * 1024)
-        if size_mb > 5:
-            raise HTTPException(413, f"file_too_large: {size_mb:.2f}MB exceeds 5MB limit")
-
-        print(f"[UPLOAD] Uploading {mime_type} ({size_mb:.2f}MB) to Imgur")
-
-        # 4. Imgur 업로드
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                "https://api.imgur.com/3/image",
-                headers={"Authorization": f"Client-ID {imgur_client_id}"},
-                data={"image": b64_data, "type": "base64"}
-            )
+@fast_app.post("/api/v3/uploads")
+async def upload_image(request: Request, mirror: str = None):
+    """이미지 업로드 → volume 저장 후 공개 URL 반환 (BytePlus 호환)
 
-            if response.status_code != 200:
-                error_detail = f"imgur_upload_failed: HTTP {response.status_code} - {response.text[:200]}"
-                print(f"[UPLOAD ERROR] {error_detail}")
-                raise HTTPException(500, error_detail)
+    - multipart/form-data (field "file") 또는 image/* / application/octet-stream binary body: streaming 저장
+    - application/json {"data_url": "data:image/...;base64,..."}: 기존 방식 호환
+    - X-Content-SHA256 헤더에 해당하는 이미지가 이미 있으면 body를 읽지 않고 바로 반환
+    - mirror=imgur 또는 UPLOAD_IMGUR_MIRROR=true → Imgur에도 백그라운드 업로드
+    """
+    try:
+        known_hash = request.headers.get("X-Content-SHA256")
+        if known_hash:
+            meta = await upload_store.find(known_hash)
+            if meta is not None:
+                meta = await upload_store.ensure_renditions(meta)
+                upload_store.deduplicated += 1
+                print(f"[UPLOAD] Hash hit {known_hash[:12]} (body skipped)")
+                return upload_response(request, meta, True)
+
+        content_type = request.headers.get("content-type", "")
+        content_length = int(request.headers.get("content-length") or 0)
+
+        if content_type.startswith("application/json"):
+            body = await request.json()
+            data_url = body.get("data_url", "")
+
+            # 1. data URL 형식 검증
+            if not data_url.startswith("data:image/"):
+                raise HTTPException(400, "invalid_data_url: Must start with 'data:image/'")
+
+            # 2. MIME 타입 검증 (png/jpeg/webp만 허용)
+            header, b64_data = data_url.split(",", 1)
+            mime_type = header.split(";")[0].replace("data:", "")
+            allowed_mimes = ["image/png", "image/jpeg", "image/jpg", "image/webp"]
+            if mime_type not in allowed_mimes:
+                raise HTTPException(400, f"unsupported_format: Only {allowed_mimes} allowed, got {mime_type}")
+
+            # 3. 크기 제한: 디코딩 전에 base64 길이로 먼저 판단
+            if len(b64_data) * 3 // 4 > upload_store.max_bytes + 3:
+                raise HTTPException(413, f"file_too_large: exceeds {upload_store.max_bytes // (1024 * 1024)}MB limit")
+            meta, deduplicated = await upload_store.save_bytes(base64.b64decode(b64_data), mime_type)
+
+        elif content_type.startswith("multipart/form-data"):
+            if content_length > upload_store.max_bytes + 64 * 1024:
+                raise HTTPException(413, f"file_too_large: exceeds {upload_store.max_bytes // (1024 * 1024)}MB limit")
+            meta, deduplicated = await upload_store.save_stream(
+                iter_multipart_file(request.stream(), content_type)
+            )
 
-            result = response.json()
-            image_url = result["data"]["link"]
+        elif content_type.startswith("image/") or content_type.startswith("application/octet-stream"):
+            if content_length > upload_store.max_bytes:
+                raise HTTPException(413, f"file_too_large: exceeds {upload_store.max_bytes // (1024 * 1024)}MB limit")
+            meta, deduplicated = await upload_store.save_stream(request.stream(), content_type.split(";")[0])
 
-            print(f"[UPLOAD] Success → {image_url}")
+        else:
+            raise HTTPException(415, f"unsupported_content_type: {content_type or 'missing'}")
 
-            # 5. 접근성 검증 (선택적)
-            try:
-                verify_response = await client.head(image_url, timeout=5.0)
-                print(f"[UPLOAD] Verified: {verify_response.status_code}")
-            except Exception as e:
-                print(f"[UPLOAD] Verification skipped: {str(e)[:100]}")
+        print(f"[UPLOAD] {'Dedup' if deduplicated else 'Stored'} {meta['filename']} "
+              f"({meta['size'] / (1024 * 1024):.2f}MB)")
 
-            return {"image_url": image_url}
+        maybe_mirror(meta, mirror)
+        return upload_response(request, meta, deduplicated)
 
-    except HTTPException:
+    except UploadRejected as e:
+        print(f"[UPLOAD ERROR] {e.detail}")
+        raise HTTPException(e.status, e.detail)
+    except (HTTPException, CircuitOpenError):
         raise
     except Exception as e:
         error_msg = f"upload_error: {type(e).__name__}: {str(e)[:200]}"
         print(f"[UPLOAD ERROR] {error_msg}")
         raise HTTPException(500, error_msg)
 
-@fast_app.get("/api/v3/uploads/{filename}")
-async def serve_image(filename: str):
-    """업로드된 이미지 서빙"""
+@fast_app.get("/api/v3/uploads/by-hash/{sha256}")
+async def find_upload(sha256: str, request: Request):
+    """업로드 전 중복 확인: 같은 이미지가 이미 있으면 URL 반환"""
+    meta = await upload_store.find(sha256)
+    if meta is None:
+        raise HTTPException(404, "Image not found")
+    return upload_response(request, meta, True)
+
+# 작은 이미지는 메모리 LRU (IMAGE_MEMORY_CACHE_MB), content hash ETag + immutable 캐시
+image_server = ImageServer(
+    UPLOAD_DIR,
+    memory_budget_bytes=int(float(os.getenv("IMAGE_MEMORY_CACHE_MB", "64")) * 1024 * 1024),
+)
+
+derived_image_server = ImageServer(
+    os.path.join(UPLOAD_DIR, DERIVED_DIR),
+    memory_budget_bytes=int(float(os.getenv("IMAGE_MEMORY_CACHE_MB", "64")) * 1024 * 1024),
+)
+
+@fast_app.api_route("/api/v3/uploads/derived/{filename}", methods=["GET", "HEAD"])
+async def serve_derived_image(filename: str, request: Request):
+    """업로드 파생본 서빙 ({sha256}_{WxH}.png, immutable)"""
     try:
-        filepath = f"{UPLOAD_DIR}/{filename}"
-        if not Path(filepath).exists():
+        response = await derived_image_server.response(filename, request.headers)
+        if response is None:
             raise HTTPException(404, "Image not found")
+        return response
+    except (HTTPException, CircuitOpenError):
+        raise
+    except Exception as e:
+        print(f"[SERVE ERROR] {e}")
+        raise HTTPException(500, str(e))
 
-        with open(filepath, "rb") as f:
-            content = f.read()
-
-        ext = filename.split(".")[-1]
-        mime = f"image/{ext}"
-        return Response(content=content, media_type=mime)
-    except HTTPException:
+@fast_app.api_route("/api/v3/uploads/{filename}", methods=["GET", "HEAD"])
+async def serve_image(filename: str, request: Request):
+    """업로드된 이미지 서빙 (ETag / 304 / Range / immutable Cache-Control)"""
+    try:
+        response = await image_server.response(filename, request.headers)
+        if response is None:
+            raise HTTPException(404, "Image not found")
+        return response
+    except (HTTPException, CircuitOpenError):
         raise
     except Exception as e:
         print(f"[SERVE ERROR] {e}")
@@ -373,45 +520,49 @@ async def create_task(request: Request):
         # BytePlus API 직접 호출 (올바른 엔드포인트)
         import httpx
 
-        endpoint = "https://ark.ap-southeast.bytepluses.com/api/v3/contents/generations/tasks"
+        endpoint = BYTEPLUS_TASKS_ENDPOINT
         request_body = {
             "model": model_id,
             "content": content
         }
 
+        rate_headers = await acquire_rate_limit("byteplus", api_key, request_id)
         print(f"[{request_id}] Calling: {endpoint}")
 
-        async with httpx.AsyncClient(timeout=30.0) as http_client:
-            response = await http_client.post(
-                endpoint,
-                json=request_body,
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                }
-            )
+        http_client = upstreams.client("byteplus")
+        response = await http_client.post(
+            endpoint,
+            json=request_body,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            }
+        )
 
-            print(f"[{request_id}] Response: {response.status_code}")
+        print(f"[{request_id}] Response: {response.status_code}")
 
-            if response.status_code != 200:
-                error_text = response.text
-                print(f"[{request_id}] Error: {error_text}")
+        if response.status_code != 200:
+            error_text = response.text
+            print(f"[{request_id}] Error: {error_text}")
+            note_upstream_throttle("byteplus", api_key, response)
 
-                # 에러 코드 분석
-                if "ModelNotOpen" in error_text or "NotFound" in error_text:
-                    raise HTTPException(404, f"Model not activated: {error_text}")
-                elif "AccessDenied" in error_text or "Unauthorized" in error_text:
-                    raise HTTPException(403, f"Access denied: {error_text}")
-                else:
-                    raise HTTPException(response.status_code, error_text)
+            # 에러 코드 분석
+            if "ModelNotOpen" in error_text or "NotFound" in error_text:
+                raise HTTPException(404, f"Model not activated: {error_text}")
+            elif "AccessDenied" in error_text or "Unauthorized" in error_text:
+                raise HTTPException(403, f"Access denied: {error_text}")
+            else:
+                raise HTTPException(response.status_code, error_text)
 
-            result = response.json()
+        result = response.json()
 
         print(f"[{request_id}] Result: {result}")
 
-        return JSONResponse(content=result, status_code=200)
+        track_task("byteplus", result.get("id"), api_key)
+
+        return JSONResponse(content=result, status_code=200, headers=rate_headers)
 
-    except HTTPException:
+    except (HTTPException, CircuitOpenError):
         raise
     except httpx.HTTPError as e:
         error_msg = str(e)
@@ -426,44 +577,109 @@ async def create_task(request: Request):
             detail=f"Internal error (request_id={request_id}): {type(e).__name__}: {str(e)}"
         )
 
+BYTEPLUS_TASKS_ENDPOINT = "https://ark.ap-southeast.bytepluses.com/api/v3/contents/generations/tasks"
+
+async def fetch_byteplus_task(api_key: str, task_id: str):
+    """BytePlus 태스크 upstream 조회 → (status_code, result dict 또는 에러 텍스트)"""
+    response = await upstreams.client("byteplus").get(
+        f"{BYTEPLUS_TASKS_ENDPOINT}/{task_id}",
+        headers={"Authorization": f"Bearer {api_key}"}
+    )
+    if response.status_code != 200:
+        return response.status_code, response.text
+    return 200, response.json()
+
+# 태스크 상태 캐시: 진행 중은 짧게, 종료 상태는 길게 + 동시 조회 합치기
+task_status = TaskStatusCache(
+    fetch_byteplus_task,
+    ttl_active=float(os.getenv("TASK_STATUS_TTL_SEC", "2")),
+    ttl_terminal=float(os.getenv("TASK_STATUS_TERMINAL_TTL_SEC", "3600")),
+)
+
+@fast_app.post("/api/v3/content_generation/tasks/status")
+async def get_tasks_bulk(request: Request):
+    """여러 BytePlus 태스크 상태를 한 번에 조회 (배치 폴링용)
+
+    Body: {"task_ids": ["cgt-...", ...]} (최대 100개)
+    Response: {"tasks": {task_id: result}, "errors": {task_id: {"status": code, "error": text}}}
+    """
+    request_id = str(uuid.uuid4())[:8]
+
+    try:
+        auth_header = request.headers.get("Authorization")
+        if not auth_header:
+            raise HTTPException(401, "Authorization header missing")
+
+        api_key = auth_header.replace("Bearer ", "")
+        body = await request.json()
+        task_ids = list(dict.fromkeys(body.get("task_ids") or []))  # 순서 유지 중복 제거
+
+        if not task_ids:
+            raise HTTPException(400, "task_ids required")
+        if len(task_ids) > 100:
+            raise HTTPException(400, f"Too many task_ids: {len(task_ids)} (max 100)")
+
+        # upstream 동시 조회 수 제한 (캐시 hit는 즉시 반환)
+        gate = asyncio.Semaphore(10)
+
+        async def one(task_id: str):
+            async with gate:
+                return await task_status.get(api_key, task_id)
+
+        outcomes = await asyncio.gather(*(one(t) for t in task_ids), return_exceptions=True)
+
+        tasks, errors, sources = {}, {}, {}
+        for task_id, outcome in zip(task_ids, outcomes):
+            if isinstance(outcome, Exception):
+                status = 503 if isinstance(outcome, CircuitOpenError) else 502
+                errors[task_id] = {"status": status, "error": f"{type(outcome).__name__}: {outcome}"}
+                continue
+            status_code, payload, source = outcome
+            sources[source] = sources.get(source, 0) + 1
+            if status_code != 200:
+                errors[task_id] = {"status": status_code, "error": payload}
+                continue
+            tasks[task_id] = payload
+            await maybe_prefetch_export(task_id, payload)
+
+        print(f"[{request_id}] Bulk status: {len(task_ids)} tasks, {len(errors)} errors, sources={sources}")
+        return JSONResponse(content={"tasks": tasks, "errors": errors}, status_code=200)
+
+    except (HTTPException, CircuitOpenError):
+        raise
+    except Exception as e:
+        tb = traceback.format_exc()
+        print(f"[{request_id}] [ERROR]:")
+        print(tb)
+        raise HTTPException(500, f"Error (request_id={request_id}): {str(e)}")
+
 @fast_app.get("/api/v3/content_generation/tasks/{task_id}")
 async def get_task(task_id: str, request: Request):
-    """BytePlus 태스크 조회"""
+    """BytePlus 태스크 조회 (상태 캐시 + 동시 조회 합치기)"""
     request_id = str(uuid.uuid4())[:8]
 
     try:
-        import httpx
-
         auth_header = request.headers.get("Authorization")
         if not auth_header:
             raise HTTPException(401, "Authorization header missing")
 
         api_key = auth_header.replace("Bearer ", "")
 
-        print(f"[{request_id}] Get task: {task_id}")
+        status_code, result, source = await task_status.get(api_key, task_id)
 
-        # 올바른 엔드포인트 사용
-        endpoint = f"https://ark.ap-southeast.bytepluses.com/api/v3/contents/generations/tasks/{task_id}"
+        print(f"[{request_id}] Get task: {task_id} → {status_code} ({source})")
 
-        async with httpx.AsyncClient(timeout=30.0) as http_client:
-            response = await http_client.get(
-                endpoint,
-                headers={"Authorization": f"Bearer {api_key}"}
-            )
+        if status_code != 200:
+            print(f"[{request_id}] Error: {result}")
+            raise HTTPException(status_code, result)
 
-            print(f"[{request_id}] Response: {response.status_code}")
+        print(f"[{request_id}] Status: {result.get('status')}")
 
-            if response.status_code != 200:
-                error_text = response.text
-                print(f"[{request_id}] Error: {error_text}")
-                raise HTTPException(response.status_code, error_text)
-
-            result = response.json()
-            print(f"[{request_id}] Status: {result.get('status')}")
+        await maybe_prefetch_export(task_id, result)
 
-            return JSONResponse(content=result, status_code=200)
+        return JSONResponse(content=result, status_code=200, headers={"X-Cache": source})
 
-    except HTTPException:
+    except (HTTPException, CircuitOpenError):
         raise
     except Exception as e:
         tb = traceback.format_exc()
@@ -471,79 +687,135 @@ async def get_task(task_id: str, request: Request):
         print(tb)
         raise HTTPException(500, f"Error (request_id={request_id}): {str(e)}")
 
-def parse_range_header(range_header: str, total_size: int) -> tuple[int, int]:
-    """
-    Parse HTTP Range header: bytes=start-end
-    Returns: (start, end) inclusive
-    """
-    match = re.match(r'bytes=(\d+)-(\d*)', range_header)
-    if not match:
-        raise ValueError(f"Invalid Range header: {range_header}")
-
-    start = int(match.group(1))
-    end = int(match.group(2)) if match.group(2) else total_size - 1
-
-    # 범위 검증
-    if start >= total_size or end >= total_size or start > end:
-        raise ValueError(f"Invalid range: {start}-{end} (total: {total_size})")
-
-    return start, end
-
-def resize_to_1080p(video_bytes: bytes, request_id: str) -> bytes:
-    """720p → 1080p 리사이징 (유튜브 업로드용, 오디오 제거)"""
-    import subprocess
-    import tempfile
-    import json
-
-    # 임시 파일 생성
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp_in:
-        tmp_in.write(video_bytes)
-        tmp_in_path = tmp_in.name
-
-    tmp_out_path = tmp_in_path.replace(".mp4", "_1080p.mp4")
-
-    # FFmpeg 리사이징 (lanczos + 오디오 제거)
-    ffmpeg_result = subprocess.run([
-        "ffmpeg", "-i", tmp_in_path,
-        "-vf", "scale=1920:1080:flags=lanczos",  # 고품질 스케일링
-        "-c:v", "libx264",
-        "-preset", "ultrafast",  # 빠른 처리
-        "-crf", "18",  # 고품질 유지
-        "-tune", "animation",  # 애니메이션 최적화
-        "-an",  # 오디오 제거
-        "-y", tmp_out_path
-    ], capture_output=True, stderr=subprocess.PIPE, text=True)
-
-    if ffmpeg_result.returncode != 0:
-        print(f"[{request_id}] FFmpeg error: {ffmpeg_result.stderr}")
-        raise RuntimeError(f"FFmpeg failed: {ffmpeg_result.stderr[:200]}")
-
-    # ffprobe로 최종 해상도 검증
-    probe_result = subprocess.run([
-        "ffprobe", "-v", "error",
-        "-select_streams", "v:0",
-        "-show_entries", "stream=width,height",
-        "-of", "json",
-        tmp_out_path
-    ], capture_output=True, text=True)
-
-    if probe_result.returncode == 0:
-        probe_data = json.loads(probe_result.stdout)
-        width = probe_data["streams"][0]["width"]
-        height = probe_data["streams"][0]["height"]
-        print(f"[{request_id}] Verified resolution: {width}x{height}")
-    else:
-        print(f"[{request_id}] ffprobe failed, skipping verification")
+def extract_video_url(result: dict):
+    """BytePlus API 응답 구조: result.data.video_url 또는 result.content.video_url"""
+    video_url = None
+    if "data" in result and isinstance(result["data"], dict):
+        video_url = result["data"].get("video_url")
+    if not video_url and "content" in result and isinstance(result["content"], dict):
+        video_url = result["content"].get("video_url")
+    return video_url
+
+def is_allowed_video_url(video_url: str) -> bool:
+    """SSRF 방지: BytePlus 결과 저장소(volces.com / tos-ap-southeast)만 허용"""
+    return "volces.com" in video_url or "tos-ap-southeast" in video_url
+
+# 1080p 캐시 인덱스: LRU + byte budget, volume commit은 주기적으로 묶어서 1회
+async def _commit_cache():
+    await asyncio.to_thread(cache_volume.commit)
+
+
+cache_index = CacheIndex(
+    CACHE_DIR,
+    budget_bytes=int(float(os.getenv("CACHE_BUDGET_GB", "50")) * 1024 ** 3),
+    commit=_commit_cache,
+    flush_interval=float(os.getenv("CACHE_FLUSH_SEC", "30")),
+)
+
+
+# Evolink / Runware 결과 영상 fetch 캐시: 정규화 URL → content hash 파일, 별도 LRU budget
+remote_index = CacheIndex(
+    os.path.join(CACHE_DIR, "remote"),
+    budget_bytes=int(float(os.getenv("REMOTE_CACHE_BUDGET_GB", "20")) * 1024 ** 3),
+    commit=_commit_cache,
+    flush_interval=float(os.getenv("CACHE_FLUSH_SEC", "30")),
+)
+remote_videos = RemoteFetchCache(
+    remote_index,
+    lambda: upstreams.client("video"),
+    max_bytes=int(float(os.getenv("REMOTE_CACHE_MAX_MB", "1024")) * 1024 * 1024),
+)
+
+
+@fast_app.on_event("shutdown")
+async def flush_cache_index():
+    await remote_videos.aclose()
+    await cache_index.aclose()
+    await remote_index.aclose()
+
+
+async def remote_video_response(url: str, request: Request, filename: str, request_id: str) -> Response:
+    """외부 결과 영상 (검증된 URL) → 캐시 hit면 파일 서빙, miss면 다운로드하면서 동시에 스트리밍"""
+    cached = await remote_videos.lookup(url)
+    if cached:
+        path, meta = cached
+        try:
+            response = file_response(path, request.headers, media_type="video/mp4", filename=filename,
+                                     extra_headers={"Access-Control-Allow-Origin": "*"},
+                                     etag=f'"{meta["sha256"]}"')
+            print(f"[{request_id}] Cache hit: {meta['sha256'][:12]} (range={request.headers.get('Range')})")
+            return response
+        except FileNotFoundError:
+            # 다른 컨테이너가 evict한 파일 → 인덱스에서 제거 후 다시 받음
+            remote_videos.forget(url, meta)
+
+    range_header = request.headers.get("Range")
+    if range_header:
+        # 부분 요청(미리보기 seek)은 upstream Range relay, 전체 파일은 백그라운드로 받아 캐시
+        remote_videos.get_or_fetch(url)
+        upstream = await open_upstream(upstreams.client("video"), url, range_header)
+        return relay_response(upstream, range_header, filename, request_id)
+
+    job = remote_videos.get_or_fetch(url)
+    await job.started.wait()
+    if job.error and job.bytes_written == 0:
+        raise HTTPException(502, f"Upstream download failed (request_id={request_id}): {job.error}")
+    print(f"[{request_id}] Cache miss: streaming write-through ({job.consumers} other readers)")
+    headers = {
+        "Content-Type": "video/mp4",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Access-Control-Allow-Origin": "*",
+    }
+    if job.total_size is not None:
+        headers["Content-Length"] = str(job.total_size)
+    return StreamingResponse(job.stream(), status_code=200, media_type="video/mp4", headers=headers)
 
-    # 결과 읽기
-    with open(tmp_out_path, "rb") as f:
-        output_bytes = f.read()
 
-    # 임시 파일 삭제
-    os.unlink(tmp_in_path)
-    os.unlink(tmp_out_path)
+async def _on_export_complete(path: str):
+    cache_index.add(path)
 
-    return output_bytes
+
+# 1080p export: ffmpeg pipe 변환 worker (동시 변환 수 제한 + task_id별 single-flight)
+exports = ExportManager(
+    CACHE_DIR,
+    max_workers=int(os.getenv("EXPORT_MAX_WORKERS", "2")),
+    on_complete=_on_export_complete,
+    max_speculative=int(os.getenv("EXPORT_PREFETCH_MAX", "1")),
+    on_transcode=lambda outcome, seconds: metrics.export.observe(seconds, outcome),
+)
+
+
+async def maybe_prefetch_export(task_id: str, result: dict):
+    """태스크가 succeeded로 보이면 1080p 변환을 미리 시작 (export 클릭 시 캐시 hit 목표)"""
+    if os.getenv("EXPORT_PREFETCH", "true").lower() != "true":
+        return
+    if result.get("status") != "succeeded" or exports.active(task_id):
+        return
+    video_url = extract_video_url(result)
+    if not video_url or not is_allowed_video_url(video_url):
+        return
+    try:
+        await cache_index.ready()
+        if cache_index.contains(f"{task_id}_1080p.mp4"):
+            return
+        exports.prefetch(task_id, video_url)
+    except Exception as e:
+        # prefetch 실패가 상태 조회 응답을 막으면 안 됨
+        print(f"[EXPORT {task_id}] Prefetch skipped: {type(e).__name__}: {e}")
+
+
+def export_stream_response(job, filename: str) -> StreamingResponse:
+    """변환 중인 export를 그대로 스트리밍 (길이 미정 → Range 미지원, 완료 후 캐시에서 Range 처리)"""
+    return StreamingResponse(
+        job.stream(),
+        status_code=200,
+        media_type="video/mp4",
+        headers={
+            "Content-Type": "video/mp4",
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Access-Control-Allow-Origin": "*",
+        }
+    )
 
 @fast_app.get("/api/v3/content_generation/tasks/{task_id}/download")
 async def download_video(task_id: str, request: Request, export: str = None):
@@ -556,8 +828,6 @@ async def download_video(task_id: str, request: Request, export: str = None):
     request_id = str(uuid.uuid4())[:8]
 
     try:
-        import httpx
-
         auth_header = request.headers.get("Authorization")
         if not auth_header:
             raise HTTPException(401, "Authorization header missing")
@@ -567,225 +837,60 @@ async def download_video(task_id: str, request: Request, export: str = None):
 
         filename = f"{task_id}_1080p.mp4" if export == "1080" else f"{task_id}.mp4"
 
-        # 1. export=1080 캐시 확인 (Range 지원)
+        # 1. export=1080 캐시 확인 (파일 스트리밍 + Range/multi-range + ETag 조건부 요청)
         if export == "1080":
-            cache_path = f"{CACHE_DIR}/{task_id}_1080p.mp4"
-            if os.path.exists(cache_path):
-                print(f"[{request_id}] Cache hit: {task_id}_1080p.mp4")
-                file_size = os.path.getsize(cache_path)
-
-                # Range 요청 처리
-                if range_header:
-                    try:
-                        start, end = parse_range_header(range_header, file_size)
-                        print(f"[{request_id}] Range request: {start}-{end}/{file_size}")
-
-                        with open(cache_path, "rb") as f:
-                            f.seek(start)
-                            chunk = f.read(end - start + 1)
-
-                        return Response(
-                            content=chunk,
-                            status_code=206,
-                            media_type="video/mp4",
-                            headers={
-                                "Content-Range": f"bytes {start}-{end}/{file_size}",
-                                "Accept-Ranges": "bytes",
-                                "Content-Length": str(len(chunk)),
-                                "Content-Type": "video/mp4",
-                                "Content-Disposition": f'attachment; filename="{filename}"',
-                                "Access-Control-Allow-Origin": "*",
-                            }
-                        )
-                    except ValueError as e:
-                        raise HTTPException(416, f"Range not satisfiable: {str(e)}")
-
-                # 전체 파일 반환
-                with open(cache_path, "rb") as f:
-                    cached_bytes = f.read()
-
-                return Response(
-                    content=cached_bytes,
-                    status_code=200,
-                    media_type="video/mp4",
-                    headers={
-                        "Accept-Ranges": "bytes",
-                        "Content-Length": str(file_size),
-                        "Content-Type": "video/mp4",
-                        "Content-Disposition": f'attachment; filename="{filename}"',
-                        "Access-Control-Allow-Origin": "*",
-                    }
-                )
-
-        # 2. BytePlus에서 task 조회하여 video_url 획득
-        endpoint = f"https://ark.ap-southeast.bytepluses.com/api/v3/contents/generations/tasks/{task_id}"
-
-        async with httpx.AsyncClient(timeout=30.0) as http_client:
-            response = await http_client.get(
-                endpoint,
-                headers={"Authorization": f"Bearer {api_key}"}
-            )
-
-            if response.status_code != 200:
-                error_text = response.text
-                raise HTTPException(response.status_code, f"Task query failed (request_id={request_id}): {error_text}")
-
-            result = response.json()
-            print(f"[{request_id}] BytePlus API response keys: {list(result.keys())}")
-            print(f"[{request_id}] Full response: {result}")
-
-            # BytePlus API 응답 구조: result.data.video_url 또는 result.content.video_url
-            video_url = None
-            if "data" in result and isinstance(result["data"], dict):
-                video_url = result["data"].get("video_url")
-            if not video_url and "content" in result and isinstance(result["content"], dict):
-                video_url = result["content"].get("video_url")
-
-            if not video_url:
-                print(f"[{request_id}] ERROR: No video_url found in response: {result}")
-                raise HTTPException(404, f"No video_url in task (request_id={request_id}): {result.get('status')}")
-
-            # 3. SSRF 방지: volces.com 도메인만 허용
-            if not ("volces.com" in video_url or "tos-ap-southeast" in video_url):
-                raise HTTPException(403, f"Invalid video URL domain (request_id={request_id})")
-
-            print(f"[{request_id}] Streaming video: {video_url[:80]}...")
-
-            # 4. 스트리밍 다운로드 (Range 헤더 전달 시도)
-            async with httpx.AsyncClient(timeout=120.0) as stream_client:
-                upstream_headers = {}
-                if range_header:
-                    upstream_headers["Range"] = range_header
-                    print(f"[{request_id}] Forwarding Range: {range_header}")
-
-                video_response = await stream_client.get(
-                    video_url,
-                    follow_redirects=True,
-                    headers=upstream_headers
-                )
-
-                # Upstream이 206을 반환하면 그대로 전달 (export=1080 아닐 때만)
-                if video_response.status_code == 206 and export != "1080":
-                    print(f"[{request_id}] Upstream supports Range, forwarding 206")
-                    return Response(
-                        content=video_response.content,
-                        status_code=206,
-                        media_type="video/mp4",
-                        headers={
-                            "Content-Range": video_response.headers.get("Content-Range", ""),
-                            "Accept-Ranges": "bytes",
-                            "Content-Length": video_response.headers.get("Content-Length", str(len(video_response.content))),
-                            "Content-Type": "video/mp4",
-                            "Content-Disposition": f'attachment; filename="{filename}"',
-                            "Access-Control-Allow-Origin": "*",
-                        }
-                    )
-
-                # Upstream이 200 반환 또는 export=1080
-                if video_response.status_code not in [200, 206]:
-                    raise HTTPException(
-                        502,
-                        f"Upstream video download failed (request_id={request_id}): HTTP {video_response.status_code}"
-                    )
-
-                original_bytes = video_response.content
-                original_mb = len(original_bytes) / (1024 * 1024)
-                print(f"[{request_id}] Downloaded: {original_mb:.2f}MB")
-
-                # 5. export=1080 요청 시 변환 + 캐시
-                if export == "1080":
-                    print(f"[{request_id}] Converting to 1080p...")
-                    upscaled_bytes = resize_to_1080p(original_bytes, request_id)
-                    upscaled_mb = len(upscaled_bytes) / (1024 * 1024)
-                    print(f"[{request_id}] Upscaled 1080p: {upscaled_mb:.2f}MB")
-
-                    # 캐시 저장
-                    os.makedirs(CACHE_DIR, exist_ok=True)
-                    cache_path = f"{CACHE_DIR}/{task_id}_1080p.mp4"
-                    with open(cache_path, "wb") as f:
-                        f.write(upscaled_bytes)
-                    cache_volume.commit()
-                    print(f"[{request_id}] Cached: {task_id}_1080p.mp4")
-
-                    file_size = len(upscaled_bytes)
-
-                    # Range 요청 처리
-                    if range_header:
-                        try:
-                            start, end = parse_range_header(range_header, file_size)
-                            chunk = upscaled_bytes[start:end+1]
-                            print(f"[{request_id}] Range: {start}-{end}/{file_size}")
-
-                            return Response(
-                                content=chunk,
-                                status_code=206,
-                                media_type="video/mp4",
-                                headers={
-                                    "Content-Range": f"bytes {start}-{end}/{file_size}",
-                                    "Accept-Ranges": "bytes",
-                                    "Content-Length": str(len(chunk)),
-                                    "Content-Type": "video/mp4",
-                                    "Content-Disposition": f'attachment; filename="{filename}"',
-                                    "Access-Control-Allow-Origin": "*",
-                                }
-                            )
-                        except ValueError as e:
-                            raise HTTPException(416, f"Range not satisfiable: {str(e)}")
-
-                    # 전체 파일 반환
-                    return Response(
-                        content=upscaled_bytes,
-                        status_code=200,
-                        media_type="video/mp4",
-                        headers={
-                            "Accept-Ranges": "bytes",
-                            "Content-Length": str(file_size),
-                            "Content-Type": "video/mp4",
-                            "Content-Disposition": f'attachment; filename="{filename}"',
-                            "Access-Control-Allow-Origin": "*",
-                        }
-                    )
-
-                # 6. 기본: 720p 원본 반환 (Range 지원)
-                file_size = len(original_bytes)
-
-                if range_header:
-                    try:
-                        start, end = parse_range_header(range_header, file_size)
-                        chunk = original_bytes[start:end+1]
-                        print(f"[{request_id}] Range: {start}-{end}/{file_size}")
-
-                        return Response(
-                            content=chunk,
-                            status_code=206,
-                            media_type="video/mp4",
-                            headers={
-                                "Content-Range": f"bytes {start}-{end}/{file_size}",
-                                "Accept-Ranges": "bytes",
-                                "Content-Length": str(len(chunk)),
-                                "Content-Type": "video/mp4",
-                                "Content-Disposition": f'attachment; filename="{filename}"',
-                                "Access-Control-Allow-Origin": "*",
-                            }
-                        )
-                    except ValueError as e:
-                        raise HTTPException(416, f"Range not satisfiable: {str(e)}")
-
-                # 전체 파일 반환
-                return Response(
-                    content=original_bytes,
-                    status_code=200,
-                    media_type="video/mp4",
-                    headers={
-                        "Accept-Ranges": "bytes",
-                        "Content-Length": str(file_size),
-                        "Content-Type": "video/mp4",
-                        "Content-Disposition": f'attachment; filename="{filename}"',
-                        "Access-Control-Allow-Origin": "*",
-                    }
-                )
-
-    except HTTPException:
+            await cache_index.ready()
+            cache_path = cache_index.lookup(filename)
+            if cache_path:
+                try:
+                    response = file_response(cache_path, request.headers, media_type="video/mp4", filename=filename)
+                    print(f"[{request_id}] Cache hit: {filename} (range={range_header})")
+                    return response
+                except FileNotFoundError:
+                    # 다른 컨테이너가 evict한 파일 → 인덱스에서 제거 후 재변환
+                    cache_index.forget(filename)
+
+            # 같은 task_id 변환이 진행 중이면 upstream 조회 없이 합류
+            job = exports.active(task_id)
+            if job is not None:
+                return export_stream_response(job, filename)
+
+        # 2. BytePlus에서 task 조회하여 video_url 획득 (폴링이 채워둔 상태 캐시 재사용)
+        status_code, result, source = await task_status.get(api_key, task_id)
+
+        if status_code != 200:
+            raise HTTPException(status_code, f"Task query failed (request_id={request_id}): {result}")
+
+        print(f"[{request_id}] BytePlus API response keys: {list(result.keys())}")
+        print(f"[{request_id}] Full response: {result}")
+
+        video_url = extract_video_url(result)
+
+        if not video_url:
+            print(f"[{request_id}] ERROR: No video_url found in response: {result}")
+            raise HTTPException(404, f"No video_url in task (request_id={request_id}): {result.get('status')}")
+
+        # 3. SSRF 방지: volces.com 도메인만 허용
+        if not is_allowed_video_url(video_url):
+            raise HTTPException(403, f"Invalid video URL domain (request_id={request_id})")
+
+        print(f"[{request_id}] Streaming video: {video_url[:80]}...")
+
+        stream_client = upstreams.client("video")
+
+        # 4. 기본: 720p 원본 스트리밍 relay (Range는 upstream에 그대로 전달, 메모리 상주 X)
+        if export != "1080":
+            if range_header:
+                print(f"[{request_id}] Forwarding Range: {range_header}")
+            upstream = await open_upstream(stream_client, video_url, range_header)
+            return relay_response(upstream, range_header, filename, request_id)
+
+        # 5. export=1080: ffmpeg가 upstream에서 직접 읽어 변환 → 캐시 파일에 쓰면서 동시에 스트리밍
+        job = exports.get_or_start(task_id, video_url)
+        print(f"[{request_id}] Streaming 1080p export: {task_id}")
+        return export_stream_response(job, filename)
+
+    except (HTTPException, CircuitOpenError):
         raise
     except Exception as e:
         tb = traceback.format_exc()
@@ -799,8 +904,6 @@ async def create_evolink_video(request: Request):
     request_id = str(uuid.uuid4())[:8]
 
     try:
-        import httpx
-
         # ENV에서 Evolink 설정 읽기 (프론트에서 전달받음)
         body = await request.json()
         evolink_api_key = body.get("api_key") or os.getenv("EVOLINK_API_KEY")
@@ -833,32 +936,36 @@ async def create_evolink_video(request: Request):
 
         endpoint = f"{evolink_base_url}/v1/videos/generations"
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                endpoint,
-                json=request_body,
-                headers={
-                    "Authorization": f"Bearer {evolink_api_key}",
-                    "Content-Type": "application/json"
-                }
-            )
+        rate_headers = await acquire_rate_limit("evolink", evolink_api_key, request_id)
+        client = upstreams.client("evolink")
+        response = await client.post(
+            endpoint,
+            json=request_body,
+            headers={
+                "Authorization": f"Bearer {evolink_api_key}",
+                "Content-Type": "application/json"
+            }
+        )
+
+        print(f"[{request_id}] Evolink response: {response.status_code}")
 
-            print(f"[{request_id}] Evolink response: {response.status_code}")
+        if response.status_code != 200:
+            error_text = response.text
+            print(f"[{request_id}] Evolink error: {error_text}")
+            note_upstream_throttle("evolink", evolink_api_key, response)
+            raise HTTPException(
+                response.status_code,
+                f"Evolink API failed (request_id={request_id}): {error_text}"
+            )
 
-            if response.status_code != 200:
-                error_text = response.text
-                print(f"[{request_id}] Evolink error: {error_text}")
-                raise HTTPException(
-                    response.status_code,
-                    f"Evolink API failed (request_id={request_id}): {error_text}"
-                )
+        result = response.json()
+        print(f"[{request_id}] Task created: {result.get('id')}")
 
-            result = response.json()
-            print(f"[{request_id}] Task created: {result.get('id')}")
+        track_task("evolink", result.get("id"), evolink_api_key)
 
-            return JSONResponse(content=result, status_code=200)
+        return JSONResponse(content=result, status_code=200, headers=rate_headers)
 
-    except HTTPException:
+    except (HTTPException, CircuitOpenError):
         raise
     except Exception as e:
         tb = traceback.format_exc()
@@ -869,45 +976,44 @@ async def create_evolink_video(request: Request):
             f"Evolink generation error (request_id={request_id}): {type(e).__name__}: {str(e)}"
         )
 
+async def fetch_evolink_task(api_key: str, task_id: str):
+    """Evolink 태스크 upstream 조회 → (status_code, result dict 또는 에러 텍스트)"""
+    evolink_base_url = os.getenv("EVOLINK_BASE_URL", "https://api.evolink.ai")
+    response = await upstreams.client("evolink").get(
+        f"{evolink_base_url}/v1/tasks/{task_id}",
+        headers={"Authorization": f"Bearer {api_key}"}
+    )
+    if response.status_code != 200:
+        return response.status_code, response.text
+    return 200, response.json()
+
 @fast_app.get("/api/v3/evolink/tasks/{task_id}")
 async def get_evolink_task(task_id: str, request: Request):
     """Evolink 태스크 상태 조회"""
     request_id = str(uuid.uuid4())[:8]
 
     try:
-        import httpx
-
         # Authorization 헤더에서 API 키 추출
         auth_header = request.headers.get("Authorization")
         evolink_api_key = auth_header.replace("Bearer ", "") if auth_header else os.getenv("EVOLINK_API_KEY")
         if not evolink_api_key:
             raise HTTPException(400, "evolink_api_key_missing: Provide Authorization header")
 
-        evolink_base_url = os.getenv("EVOLINK_BASE_URL", "https://api.evolink.ai")
-
-        endpoint = f"{evolink_base_url}/v1/tasks/{task_id}"
+        status_code, result = await fetch_evolink_task(evolink_api_key, task_id)
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                endpoint,
-                headers={"Authorization": f"Bearer {evolink_api_key}"}
+        if status_code != 200:
+            print(f"[{request_id}] Evolink task query error: {result}")
+            raise HTTPException(
+                status_code,
+                f"Evolink task query failed (request_id={request_id}): {result}"
             )
 
-            if response.status_code != 200:
-                error_text = response.text
-                print(f"[{request_id}] Evolink task query error: {error_text}")
-                raise HTTPException(
-                    response.status_code,
-                    f"Evolink task query failed (request_id={request_id}): {error_text}"
-                )
+        status = result.get("status")
+        print(f"[{request_id}] Task {task_id}: {status}")
 
-            result = response.json()
-            status = result.get("status")
-            print(f"[{request_id}] Task {task_id}: {status}")
-
-            return JSONResponse(content=result, status_code=200)
+        return JSONResponse(content=result, status_code=200)
 
-    except HTTPException:
+    except (HTTPException, CircuitOpenError):
         raise
     except Exception as e:
         tb = traceback.format_exc()
@@ -924,8 +1030,6 @@ async def download_evolink_video(request: Request, url: str = None):
     request_id = str(uuid.uuid4())[:8]
 
     try:
-        import httpx
-
         if not url:
             raise HTTPException(400, "url parameter missing")
 
@@ -935,33 +1039,10 @@ async def download_evolink_video(request: Request, url: str = None):
 
         print(f"[{request_id}] Proxying Evolink video: {url[:80]}...")
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.get(url, follow_redirects=True)
-
-            if response.status_code != 200:
-                raise HTTPException(
-                    502,
-                    f"Upstream download failed (request_id={request_id}): HTTP {response.status_code}"
-                )
-
-            video_bytes = response.content
-            file_size_mb = len(video_bytes) / (1024 * 1024)
-            print(f"[{request_id}] Downloaded: {file_size_mb:.2f}MB")
-
-            return Response(
-                content=video_bytes,
-                status_code=200,
-                media_type="video/mp4",
-                headers={
-                    "Accept-Ranges": "bytes",
-                    "Content-Length": str(len(video_bytes)),
-                    "Content-Type": "video/mp4",
-                    "Content-Disposition": f'attachment; filename="evolink_video.mp4"',
-                    "Access-Control-Allow-Origin": "*",
-                }
-            )
+        # 공유 fetch 캐시 (반복 미리보기 / export 시 CDN 재다운로드 X, Range 지원)
+        return await remote_video_response(url, request, "evolink_video.mp4", request_id)
 
-    except HTTPException:
+    except (HTTPException, CircuitOpenError):
         raise
     except Exception as e:
         tb = traceback.format_exc()
@@ -972,9 +1053,24 @@ async def download_evolink_video(request: Request, url: str = None):
             f"Evolink download error (request_id={request_id}): {type(e).__name__}: {str(e)}"
         )
 
+# API key별 인증된 WebSocket 연결 유지 + 동시 요청 multiplexing (heartbeat / 자동 재연결)
+runware_pool = RunwareSessionPool(
+    os.getenv("RUNWARE_WS_URL", RUNWARE_WS_URL),
+    idle_timeout=float(os.getenv("RUNWARE_IDLE_SEC", "300")),
+)
+
+@fast_app.on_event("shutdown")
+async def close_runware_pool():
+    await runware_pool.aclose()
+
 @fast_app.post("/api/v3/runware/videos/generations")
-async def create_runware_video(request: Request):
-    """Runware 비디오 생성 (SeeDance 1.0 Pro Fast) - 동기 완료 대기"""
+async def create_runware_video(request: Request, mode: str = None):
+    """Runware 비디오 생성 (SeeDance 1.0 Pro Fast)
+
+    - mode=sync (기본, RUNWARE_DEFAULT_MODE): 완료까지 대기 후 result.video_url 반환
+    - mode=async 또는 body "async": true → 접수 즉시 {"id", "status": "processing"} 반환
+      이후 GET /api/v3/runware/tasks/{id} 또는 /api/v3/tasks/runware/{id}/events 로 완료 확인
+    """
     request_id = str(uuid.uuid4())[:8]
 
     try:
@@ -985,17 +1081,9 @@ async def create_runware_video(request: Request):
                 "Runware provider is disabled. Set RUNWARE_ENABLED=true in Modal secrets to enable."
             )
 
-        # Runware provider client import
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent))
-        from providers.runware_client import runware_generate_video
-
         body = await request.json()
-        runware_api_key = body.get("api_key")
-
-        # API 키를 환경변수에 임시 설정 (provider client에서 사용)
-        if runware_api_key:
-            os.environ["RUNWARE_API_KEY"] = runware_api_key
+        # 요청별 API 키는 인자로만 전달 (환경변수 변경 X → 동시 요청 간 키 섞임 없음)
+        runware_api_key = body.get("api_key") or os.getenv("RUNWARE_API_KEY")
 
         image_url = body.get("image_url")
         prompt = body.get("prompt", "")
@@ -1013,9 +1101,35 @@ async def create_runware_video(request: Request):
         }
         size = resolution_map.get(resolution, {"width": 1280, "height": 720})
 
-        print(f"[{request_id}] Runware generation: {resolution} ({size['width']}×{size['height']}) duration={duration}s")
-
-        # 동기 완료 대기 (WebSocket 연결 자동 관리)
+        async_mode = body.get("async") is True or (
+            (mode or os.getenv("RUNWARE_DEFAULT_MODE", "sync")).lower() == "async"
+        )
+        print(f"[{request_id}] Runware generation: {resolution} ({size['width']}×{size['height']}) "
+              f"duration={duration}s mode={'async' if async_mode else 'sync'}")
+
+        rate_headers = await acquire_rate_limit("runware", runware_api_key, request_id)
+        if async_mode:
+            # 접수만 하고 반환 → 완료 대기는 Runware 측 + 폴러가 담당 (HTTP 연결 / worker 점유 X)
+            task_id = await runware_submit_video(
+                image_url=image_url,
+                prompt=prompt,
+                duration_sec=duration,
+                width=size["width"],
+                height=size["height"],
+                fps=24,
+                model_id="bytedance:2@2",
+                api_key=runware_api_key,
+                pool=runware_pool,
+            )
+            print(f"[{request_id}] Runware task created: {task_id}")
+            track_task("runware", task_id, runware_api_key)
+            return JSONResponse(content={
+                "id": task_id,
+                "status": "processing",
+                "result": None
+            }, status_code=200, headers=rate_headers)
+
+        # 동기 완료 대기 (API key별 WebSocket 연결 재사용)
         result = await runware_generate_video(
             image_url=image_url,
             prompt=prompt,
@@ -1023,7 +1137,9 @@ async def create_runware_video(request: Request):
             width=size["width"],
             height=size["height"],
             fps=24,
-            model_id="bytedance:2@2"
+            model_id="bytedance:2@2",
+            api_key=runware_api_key,
+            pool=runware_pool,
         )
 
         task_id = result["task_id"]
@@ -1036,9 +1152,9 @@ async def create_runware_video(request: Request):
             "id": task_id,
             "status": status,
             "result": {"video_url": video_url} if video_url else None
-        }, status_code=200)
+        }, status_code=200, headers=rate_headers)
 
-    except HTTPException:
+    except (HTTPException, CircuitOpenError):
         raise
     except ValueError as e:
         # Billing Gate 또는 Feature Flag 오류
@@ -1062,7 +1178,58 @@ async def create_runware_video(request: Request):
         print(tb)
         raise HTTPException(500, f"Unexpected error (request_id={request_id}): {type(e).__name__}: {str(e)}")
 
-# Runware 태스크 조회 엔드포인트 제거 (동기 완료 대기 방식으로 불필요)
+async def fetch_runware_task(api_key: str, task_id: str):
+    """Runware 태스크 조회 (getResponse 1회) → (status_code, result dict 또는 에러 텍스트)"""
+    try:
+        return 200, await runware_get_task(task_id, api_key=api_key, pool=runware_pool)
+    except LookupError as e:
+        return 404, str(e)
+    except RunwareAuthError as e:
+        return 401, str(e)
+    except (RunwareConnectionLost, asyncio.TimeoutError, CircuitOpenError) as e:
+        return 503, f"runware_unavailable: {type(e).__name__}: {str(e)}"
+
+@fast_app.get("/api/v3/runware/tasks/{task_id}")
+async def get_runware_task(task_id: str, request: Request):
+    """Runware 태스크 상태 조회 (async 모드, Evolink 조회와 같은 형태)"""
+    request_id = str(uuid.uuid4())[:8]
+
+    try:
+        if not os.getenv("RUNWARE_ENABLED", "false").lower() == "true":
+            raise HTTPException(
+                403,
+                "Runware provider is disabled. Set RUNWARE_ENABLED=true in Modal secrets to enable."
+            )
+
+        # Authorization 헤더에서 API 키 추출
+        auth_header = request.headers.get("Authorization")
+        runware_api_key = auth_header.replace("Bearer ", "") if auth_header else os.getenv("RUNWARE_API_KEY")
+        if not runware_api_key:
+            raise HTTPException(400, "runware_api_key_missing: Provide Authorization header")
+
+        status_code, result = await fetch_runware_task(runware_api_key, task_id)
+
+        if status_code != 200:
+            print(f"[{request_id}] Runware task query error: {result}")
+            raise HTTPException(
+                status_code,
+                f"Runware task query failed (request_id={request_id}): {result}"
+            )
+
+        print(f"[{request_id}] Task {task_id}: {result['status']}")
+
+        return JSONResponse(content=result, status_code=200)
+
+    except (HTTPException, CircuitOpenError):
+        raise
+    except Exception as e:
+        tb = traceback.format_exc()
+        print(f"[{request_id}] [ERROR]:")
+        print(tb)
+        raise HTTPException(
+            500,
+            f"Runware task query error (request_id={request_id}): {type(e).__name__}: {str(e)}"
+        )
 
 @fast_app.get("/api/v3/runware/download")
 async def download_runware_video(request: Request, url: str = None):
@@ -1070,8 +1237,6 @@ async def download_runware_video(request: Request, url: str = None):
     request_id = str(uuid.uuid4())[:8]
 
     try:
-        import httpx
-
         if not url:
             raise HTTPException(400, "url parameter missing")
 
@@ -1081,30 +1246,10 @@ async def download_runware_video(request: Request, url: str = None):
 
         print(f"[{request_id}] Proxying Runware video: {url[:80]}...")
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.get(url, follow_redirects=True)
-
-            if response.status_code != 200:
-                raise HTTPException(502, f"Upstream download failed (request_id={request_id}): HTTP {response.status_code}")
-
-            video_bytes = response.content
-            file_size_mb = len(video_bytes) / (1024 * 1024)
-            print(f"[{request_id}] Downloaded: {file_size_mb:.2f}MB")
-
-            return Response(
-                content=video_bytes,
-                status_code=200,
-                media_type="video/mp4",
-                headers={
-                    "Accept-Ranges": "bytes",
-                    "Content-Length": str(len(video_bytes)),
-                    "Content-Type": "video/mp4",
-                    "Content-Disposition": 'attachment; filename="runware_video.mp4"',
-                    "Access-Control-Allow-Origin": "*",
-                }
-            )
+        # 공유 fetch 캐시 (반복 미리보기 / export 시 CDN 재다운로드 X, Range 지원)
+        return await remote_video_response(url, request, "runware_video.mp4", request_id)
 
-    except HTTPException:
+    except (HTTPException, CircuitOpenError):
         raise
     except Exception as e:
         tb = traceback.format_exc()
@@ -1112,6 +1257,529 @@ async def download_runware_video(request: Request, url: str = None):
         print(tb)
         raise HTTPException(500, f"Runware download error (request_id={request_id}): {str(e)}")
 
+# ── 중앙 태스크 폴러 ─────────────────────────────────────────────────────
+async def poll_byteplus_task(api_key: str, task_id: str):
+    """폴러용 BytePlus 조회: 결과를 상태 캐시에 넣어 프론트 GET 조회도 캐시 hit로 처리"""
+    status_code, result = await fetch_byteplus_task(api_key, task_id)
+    if status_code == 200 and isinstance(result, dict):
+        task_status.put(api_key, task_id, result)
+        await maybe_prefetch_export(task_id, result)
+    return status_code, result
+
+# 자체 Modal 생성 앱 job API (URL이 설정된 것만 poller / router에 등록)
+MODAL_JOB_SERVICES = {
+    # name: (URL 환경변수, 결과 경로, 예상 완료 시간)
+    "ltx": ("LTX_API_URL", "result", 240),
+    "ltx_official": ("LTX_OFFICIAL_API_URL", "download", 240),
+    "seedance": ("SEEDANCE_API_URL", "download", 120),
+}
+
+def modal_job_payload(name: str):
+    """provider 공통 spec → 각 Modal 앱 /start body"""
+    def build(spec: dict, api_key: str) -> dict:
+        if name == "ltx":
+            return {"prompt": spec.get("prompt", ""), "image_url": spec["image_url"],
+                    "num_frames": spec.get("num_frames", 97), "priority": "interactive"}
+        payload = {"image_url": spec["image_url"], "dialogue": spec.get("dialogue", ""),
+                   "image_prompt": spec.get("image_prompt") or spec.get("prompt", "")}
+        if name == "seedance":
+            payload["api_key"] = api_key  # SeeDANCE 앱은 BytePlus API key로 호출
+        if spec.get("num_frames"):
+            payload["num_frames"] = spec["num_frames"]
+        return payload
+    return build
+
+modal_jobs = {
+    name: ModalJobService(os.environ[env], lambda: upstreams.client("modal"), modal_job_payload(name), path)
+    for name, (env, path, _) in MODAL_JOB_SERVICES.items()
+    if os.getenv(env)
+}
+
+task_poller = TaskPoller(
+    {
+        "byteplus": PollProvider(
+            poll_byteplus_task,
+            PollSchedule(expected_sec=float(os.getenv("POLL_EXPECTED_BYTEPLUS_SEC", "60"))),
+        ),
+        "evolink": PollProvider(
+            fetch_evolink_task,
+            PollSchedule(expected_sec=float(os.getenv("POLL_EXPECTED_EVOLINK_SEC", "90"))),
+            success={"completed", "succeeded"},
+            failure={"failed", "cancelled", "error"},
+        ),
+        "runware": PollProvider(
+            fetch_runware_task,
+            PollSchedule(expected_sec=float(os.getenv("POLL_EXPECTED_RUNWARE_SEC", "60"))),
+            success={"completed"},
+            failure={"failed"},
+        ),
+        **{
+            name: PollProvider(
+                service.fetch,
+                PollSchedule(expected_sec=MODAL_JOB_SERVICES[name][2]),
+                success={"completed"},
+                failure={"failed"},
+            )
+            for name, service in modal_jobs.items()
+        },
+    },
+    concurrency=int(os.getenv("POLL_CONCURRENCY", "20")),
+    max_age=float(os.getenv("POLL_MAX_AGE_SEC", "1800")),
+)
+POLL_EVENTS_KEEPALIVE = 15.0
+
+def track_task(provider: str, task_id: str, api_key: str):
+    """생성 직후 태스크를 폴러에 등록 (TASK_POLLER_AUTOTRACK=false면 구독 시에만 폴링)"""
+    if not task_id or os.getenv("TASK_POLLER_AUTOTRACK", "true").lower() != "true":
+        return
+    try:
+        task_poller.track(provider, task_id, api_key, created_at=time.time())
+    except Exception as e:
+        print(f"[POLL] Track failed for {provider}/{task_id}: {type(e).__name__}: {e}")
+
+@fast_app.on_event("shutdown")
+async def close_task_poller():
+    await task_poller.aclose()
+
+@fast_app.get("/api/v3/tasks/{provider}/{task_id}/events")
+async def task_events(provider: str, task_id: str, request: Request, api_key: str = None):
+    """태스크 상태 변화 SSE: status* → complete | error (then close)
+
+    EventSource는 헤더를 못 보내므로 api_key 쿼리 파라미터도 허용
+    """
+    if provider not in task_poller.providers:
+        raise HTTPException(404, f"Unknown provider: {provider}")
+
+    auth_header = request.headers.get("Authorization")
+    key = auth_header.replace("Bearer ", "") if auth_header else api_key
+    if not key and provider == "evolink":
+        key = os.getenv("EVOLINK_API_KEY")
+    if not key:
+        raise HTTPException(401, "Authorization header or api_key missing")
+
+    tracked, queue = task_poller.subscribe(provider, task_id, key)
+
+    async def _stream():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), POLL_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield sse_comment()
+                    continue
+                if not event["terminal"]:
+                    yield sse_event("status", event, event_id=str(event["seq"]))
+                    continue
+                name = "complete" if event["success"] else "error"
+                yield sse_event(name, event, event_id=str(event["seq"]))
+                return
+        finally:
+            task_poller.unsubscribe(tracked, queue)
+
+    return StreamingResponse(_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# ── Provider Router ──────────────────────────────────────────────────────
+async def submit_byteplus(spec: dict, api_key: str) -> str:
+    model_alias = spec.get("model") or "seedance-1-0-pro-fast-251015"
+    model_id = os.getenv("BYTEPLUS_SEEDANCE_MODEL_ID") or MODEL_ALIAS_MAP.get(model_alias, model_alias)
+    text = (f"{spec.get('prompt', '')} --resolution {spec.get('resolution', '720p')} "
+            f"--duration {spec.get('duration', 5)} --camerafixed false")
+    # max_wait 초과(RateLimited) → 라우터가 다음 provider로 failover
+    await rate_limiter.acquire("byteplus", api_key)
+    response = await upstreams.client("byteplus").post(
+        BYTEPLUS_TASKS_ENDPOINT,
+        json={"model": model_id, "content": [
+            {"type": "image_url", "image_url": {"url": spec["image_url"]}},
+            {"type": "text", "text": text},
+        ]},
+        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+    )
+    if response.status_code != 200:
+        note_upstream_throttle("byteplus", api_key, response)
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:300]}")
+    return response.json()["id"]
+
+async def submit_evolink(spec: dict, api_key: str) -> str:
+    evolink_base_url = os.getenv("EVOLINK_BASE_URL", "https://api.evolink.ai")
+    await rate_limiter.acquire("evolink", api_key)
+    response = await upstreams.client("evolink").post(
+        f"{evolink_base_url}/v1/videos/generations",
+        json={
+            "model": os.getenv("EVOLINK_MODEL_ID", "doubao-seedance-1.0-pro-fast"),
+            "prompt": spec.get("prompt", ""),
+            "duration": spec.get("duration", 5),
+            "quality": spec.get("resolution", "720p"),
+            "aspect_ratio": spec.get("aspect_ratio", "16:9"),
+            "image_urls": [spec["image_url"]],
+        },
+        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+    )
+    if response.status_code != 200:
+        note_upstream_throttle("evolink", api_key, response)
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:300]}")
+    return response.json()["id"]
+
+RUNWARE_SIZES = {"480p": (864, 480), "720p": (1280, 720), "1080p": (1920, 1088)}
+
+async def submit_runware(spec: dict, api_key: str) -> str:
+    width, height = RUNWARE_SIZES.get(spec.get("resolution", "720p"), (1280, 720))
+    await rate_limiter.acquire("runware", api_key)
+    return await runware_submit_video(
+        image_url=spec["image_url"], prompt=spec.get("prompt", ""), duration_sec=spec.get("duration", 5),
+        width=width, height=height, fps=24, model_id="bytedance:2@2", api_key=api_key, pool=runware_pool,
+    )
+
+def result_video_url(payload: dict):
+    """Evolink / Runware / Modal job: result.video_url"""
+    result = payload.get("result")
+    return result.get("video_url") if isinstance(result, dict) else None
+
+def router_cost(name: str, default: float) -> float:
+    """완료 응답에 비용이 없는 provider의 1건 비용 추정 (ROUTER_COST_<NAME>로 조정)"""
+    return float(os.getenv(f"ROUTER_COST_{name.upper()}", str(default)))
+
+route_providers = {
+    "byteplus": RouteProvider(
+        submit_byteplus, extract_video_url, cost_per_job=router_cost("byteplus", 0.15),
+        expected_sec=float(os.getenv("POLL_EXPECTED_BYTEPLUS_SEC", "60")),
+    ),
+    "evolink": RouteProvider(
+        submit_evolink, result_video_url, cost_per_job=router_cost("evolink", 0.15),
+        expected_sec=float(os.getenv("POLL_EXPECTED_EVOLINK_SEC", "90")),
+        default_key=lambda: os.getenv("EVOLINK_API_KEY"),
+    ),
+    "runware": RouteProvider(
+        submit_runware, result_video_url, cost_per_job=router_cost("runware", 0.14),
+        expected_sec=float(os.getenv("POLL_EXPECTED_RUNWARE_SEC", "60")),
+        default_key=lambda: os.getenv("RUNWARE_API_KEY"),
+        enabled=lambda: os.getenv("RUNWARE_ENABLED", "false").lower() == "true",
+    ),
+    **{
+        name: RouteProvider(
+            service.submit, result_video_url, cost_per_job=router_cost(name, 0.05),
+            expected_sec=MODAL_JOB_SERVICES[name][2],
+            # LTX는 key 없이 호출 (poller 구분용 고정값), SeeDANCE는 BytePlus key 필요
+            default_key=(lambda: None) if name == "seedance" else (lambda: "modal"),
+        )
+        for name, service in modal_jobs.items()
+    },
+}
+
+async def watch_routed_task(provider: str, task_id: str, api_key: str) -> dict:
+    """router 완료 감지: 폴러에 등록 후 종료 이벤트까지 대기 (SSE 구독과 같은 경로)"""
+    task_poller.track(provider, task_id, api_key, created_at=time.time())
+    tracked, queue = task_poller.subscribe(provider, task_id, api_key)
+    try:
+        while True:
+            event = await queue.get()
+            if event["terminal"]:
+                return event
+    finally:
+        task_poller.unsubscribe(tracked, queue)
+
+provider_router = ProviderRouter(
+    route_providers,
+    watch_routed_task,
+    policy=os.getenv("ROUTER_POLICY", "latency"),
+    order=[p.strip() for p in os.getenv("ROUTER_ORDER", "").split(",") if p.strip()],
+    hedge_after_sec=float(os.environ["ROUTER_HEDGE_SEC"]) if os.getenv("ROUTER_HEDGE_SEC") else None,
+    max_error_rate=float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5")),
+    save=lambda job_id, snapshot: router_jobs.put.aio(job_id, snapshot),
+    load=lambda job_id: router_jobs.get.aio(job_id),
+)
+
+@fast_app.on_event("shutdown")
+async def close_provider_router():
+    await provider_router.aclose()
+
+@fast_app.post("/api/v3/router/jobs")
+async def create_routed_job(request: Request):
+    """provider 자동 선택 영상 생성
+
+    Body: {"image_url", "prompt", "duration", "resolution", "dialogue", "image_prompt",
+           "api_keys": {"byteplus": "...", "evolink": "...", "runware": "..."},
+           "policy": "latency|cost|reliability|order", "providers": [...], "hedge_after_sec": 90}
+    Response: {"id": "rt-...", "status": "processing", "provider", "provider_task_id", ...}
+    """
+    request_id = str(uuid.uuid4())[:8]
+
+    try:
+        body = await request.json()
+        if not body.get("image_url"):
+            raise HTTPException(400, "image_url required")
+        api_keys = {k: v for k, v in (body.get("api_keys") or {}).items() if v}
+        if "seedance" not in api_keys and "byteplus" in api_keys:
+            api_keys["seedance"] = api_keys["byteplus"]
+        spec = {k: body[k] for k in ("image_url", "prompt", "duration", "resolution", "model", "dialogue",
+                                       "image_prompt", "num_frames", "aspect_ratio") if body.get(k) is not None}
+
+        job = await provider_router.submit(
+            spec,
+            api_keys,
+            policy=body.get("policy"),
+            providers=body.get("providers"),
+            hedge_after_sec=body.get("hedge_after_sec"),
+        )
+        print(f"[{request_id}] Routed job {job.id} → {job.attempts[-1].provider} (candidates={job.candidates})")
+        return JSONResponse(content=job.to_dict(), status_code=200)
+
+    except RouterError as e:
+        print(f"[{request_id}] Router error: {e.detail}")
+        raise HTTPException(e.status, f"{e.detail} (request_id={request_id})")
+    except (HTTPException, CircuitOpenError):
+        raise
+    except Exception as e:
+        tb = traceback.format_exc()
+        print(f"[{request_id}] [ERROR]:")
+        print(tb)
+        raise HTTPException(500, f"Router error (request_id={request_id}): {type(e).__name__}: {str(e)}")
+
+@fast_app.get("/api/v3/router/jobs/{job_id}")
+async def get_routed_job(job_id: str, wait: float = 0):
+    """routed job 상태 (wait초 동안 완료 대기 가능, 최대 30초)"""
+    job = provider_router.get(job_id)
+    if job is not None:
+        if wait > 0 and job.status == "processing":
+            try:
+                await asyncio.wait_for(job.done.wait(), min(wait, 30.0))
+            except asyncio.TimeoutError:
+                pass
+        return JSONResponse(content=job.to_dict(), status_code=200)
+
+    # 다른 컨테이너 / 재시작 전에 접수된 job → 저장된 snapshot (wait 동안 1초 간격 재조회)
+    snapshot = await provider_router.lookup(job_id)
+    if snapshot is None:
+        raise HTTPException(404, f"Unknown job: {job_id}")
+    deadline = time.monotonic() + min(wait, 30.0)
+    while snapshot["status"] == "processing" and time.monotonic() < deadline:
+        await asyncio.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+        snapshot = await provider_router.lookup(job_id) or snapshot
+    return JSONResponse(content=snapshot, status_code=200)
+
+@fast_app.get("/api/v3/router/jobs/{job_id}/result")
+async def get_routed_result(job_id: str, request: Request):
+    """routed job 결과 영상 (어느 provider가 만들었든 같은 경로, fetch 캐시 + Range)"""
+    request_id = str(uuid.uuid4())[:8]
+    job = await provider_router.lookup(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown job: {job_id}")
+    if job["status"] != "completed":
+        return JSONResponse({"error": "not_ready", "status": job["status"], "detail": job["error"]}, status_code=409)
+    try:
+        return await remote_video_response(job["result"]["video_url"], request, f"{job_id}.mp4", request_id)
+    except (HTTPException, CircuitOpenError):
+        raise
+    except Exception as e:
+        tb = traceback.format_exc()
+        print(f"[{request_id}] [ERROR]:")
+        print(tb)
+        raise HTTPException(500, f"Result download error (request_id={request_id}): {type(e).__name__}: {str(e)}")
+
+@fast_app.get("/api/v3/router/providers")
+async def router_providers():
+    """provider별 p50 / p95 완료 지연, 에러율, 비용, healthy 여부 + 정책별 현재 순서"""
+    return {
+        **provider_router.stats(),
+        "ranking": {policy: provider_router.rank(policy, api_keys={name: "-" for name in route_providers})
+                    for policy in POLICIES},
+    }
+
+# ── 서버 렌더링 (프론트 ffmpeg.wasm 단계 대체) ─────────────────────────────
+# render 입력용 업로드 (오디오 / 장면 영상 / 자막 PNG): 이미지 업로드와 같은 content hash 저장소, 포맷 / 크기만 다름
+media_store = UploadStore(
+    os.path.join(UPLOAD_DIR, "media"),
+    max_bytes=int(float(os.getenv("RENDER_UPLOAD_MAX_MB", "500")) * 1024 * 1024),
+    commit=_commit_uploads,
+    sniff=sniff_media,
+    formats="png/jpeg/webp/mp4/mov/webm/mp3/wav/m4a",
+)
+
+async def resolve_render_input(ref: str, api_keys: dict) -> str:
+    """render 입력 참조 → 로컬 파일 (upload: volume 그대로, task: 결과 영상 fetch 캐시 경유)"""
+    kind, value = parse_ref(ref)
+    if kind == "upload":
+        for store in (media_store, upload_store):
+            meta = await store.find(value)
+            if meta is not None:
+                return os.path.join(store.upload_dir, meta["filename"])
+        raise RenderError(404, f"upload_not_found: {value[:16]}")
+
+    provider, _, task_id = value.partition(":")
+    api_key = api_keys.get(provider)
+    if not api_key and provider in route_providers:
+        api_key = route_providers[provider].default_key()
+    if provider == "byteplus":
+        status_code, payload, _ = await task_status.get(api_key, task_id)
+        video_url = extract_video_url(payload) if status_code == 200 else None
+        allowed = bool(video_url) and is_allowed_video_url(video_url)
+    elif provider == "evolink":
+        status_code, payload = await fetch_evolink_task(api_key, task_id)
+        video_url = result_video_url(payload) if status_code == 200 else None
+        allowed = bool(video_url) and "evolink.ai" in video_url
+    elif provider == "runware":
+        status_code, payload = await fetch_runware_task(api_key, task_id)
+        video_url = result_video_url(payload) if status_code == 200 else None
+        allowed = bool(video_url) and ("runware.ai" in video_url or "cdn.runware" in video_url)
+    elif provider in modal_jobs:
+        status_code, payload = await modal_jobs[provider].fetch(api_key, task_id)
+        video_url = result_video_url(payload) if status_code == 200 else None
+        allowed = video_url == modal_jobs[provider].result_url(task_id)
+    else:
+        raise RenderError(400, f"unknown_provider: {provider}")
+    if status_code != 200:
+        raise RenderError(424, f"task lookup failed for {provider}/{task_id}: HTTP {status_code}")
+    if not video_url:
+        raise RenderError(409, f"task {provider}/{task_id} has no result video yet")
+    if not allowed:
+        raise RenderError(403, f"task {provider}/{task_id} result URL is not an allowed domain")
+
+    cached = await remote_videos.lookup(video_url)
+    if cached and os.path.exists(cached[0]):
+        return cached[0]
+    return await remote_videos.get_or_fetch(video_url).wait()
+
+# 렌더 결과: 별도 LRU budget ({job_id}.mp4, 같은 입력 + 파라미터면 재사용)
+render_index = CacheIndex(
+    os.path.join(CACHE_DIR, "renders"),
+    budget_bytes=int(float(os.getenv("RENDER_CACHE_BUDGET_GB", "20")) * 1024 ** 3),
+    commit=_commit_cache,
+    flush_interval=float(os.getenv("CACHE_FLUSH_SEC", "30")),
+)
+
+async def _on_render_complete(path: str):
+    await render_index.ready()
+    render_index.add(path)
+
+render_service = RenderService(
+    render_index.cache_dir,
+    resolve_render_input,
+    max_workers=int(os.getenv("RENDER_MAX_WORKERS", "2")),
+    font_file=os.getenv("RENDER_FONT_FILE", "/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc"),
+    on_complete=_on_render_complete,
+    on_render=lambda op, outcome, seconds: metrics.renders.observe(seconds, op, outcome),
+)
+
+@fast_app.on_event("shutdown")
+async def close_render_service():
+    await render_service.aclose()
+    await render_index.aclose()
+
+@fast_app.post("/api/v3/render/uploads")
+async def upload_render_input(request: Request):
+    """render 입력 업로드 (오디오 / 영상 / 자막 PNG) → {"ref": "upload:<sha256>"}
+
+    - multipart/form-data (field "file") 또는 binary body (streaming 저장)
+    - X-Content-SHA256 헤더에 해당하는 파일이 이미 있으면 body를 읽지 않고 바로 반환
+    """
+    try:
+        known_hash = request.headers.get("X-Content-SHA256")
+        if known_hash:
+            meta = await media_store.find(known_hash) or await upload_store.find(known_hash)
+            if meta is not None:
+                media_store.deduplicated += 1
+                print(f"[RENDER UPLOAD] Hash hit {known_hash[:12]} (body skipped)")
+                return {"ref": f"upload:{meta['sha256']}", "sha256": meta["sha256"], "size": meta["size"],
+                        "mime": meta["mime"], "deduplicated": True}
+
+        content_type = request.headers.get("content-type", "")
+        content_length = int(request.headers.get("content-length") or 0)
+        if content_length > media_store.max_bytes + 64 * 1024:
+            raise HTTPException(413, f"file_too_large: exceeds {media_store.max_bytes // (1024 * 1024)}MB limit")
+        if content_type.startswith("multipart/form-data"):
+            meta, deduplicated = await media_store.save_stream(iter_multipart_file(request.stream(), content_type))
+        else:
+            meta, deduplicated = await media_store.save_stream(request.stream(), content_type.split(";")[0] or None)
+
+        print(f"[RENDER UPLOAD] {'Dedup' if deduplicated else 'Stored'} {meta['filename']} "
+              f"({meta['size'] / (1024 * 1024):.2f}MB)")
+        return {"ref": f"upload:{meta['sha256']}", "sha256": meta["sha256"], "size": meta["size"],
+                "mime": meta["mime"], "deduplicated": deduplicated}
+
+    except UploadRejected as e:
+        print(f"[RENDER UPLOAD ERROR] {e.detail}")
+        raise HTTPException(e.status, e.detail)
+    except (HTTPException, CircuitOpenError):
+        raise
+    except Exception as e:
+        error_msg = f"upload_error: {type(e).__name__}: {str(e)[:200]}"
+        print(f"[RENDER UPLOAD ERROR] {error_msg}")
+        raise HTTPException(500, error_msg)
+
+@fast_app.post("/api/v3/render/{op}")
+async def create_render(op: str, request: Request, wait: float = 0):
+    """서버 렌더링 (op: zoom / subtitle / audio / merge, videoService.ts 단계와 같은 결과)
+
+    Body (입력은 참조: "upload:<sha256>" / "task:<provider>:<task_id>" / "render:<job_id>"):
+      zoom: {"image", "subtitles": [PNG refs], "zoom_direction", "pan_direction", "intensity",
+             "subtitle_length", "audio_duration"}
+      subtitle: {"video", "overlay"} 또는 {"video", "text", "font_size", "text_color", "stroke_color",
+                "stroke_width", "position"}
+      audio: {"video", "audio"}
+      merge: {"videos": [...]}
+      공통: "api_keys": {"byteplus": "...", ...} (task 참조 조회용)
+    Response: 202 {"id": "rd-...", "status": "queued|running", "result_ref": "render:rd-..."}
+              (wait초 안에 끝나면 200 + status completed / failed, 최대 30초)
+    """
+    request_id = str(uuid.uuid4())[:8]
+
+    try:
+        body = await request.json()
+        api_keys = {k: v for k, v in (body.get("api_keys") or {}).items() if v}
+        auth_header = request.headers.get("Authorization")
+        if auth_header and "byteplus" not in api_keys:
+            api_keys["byteplus"] = auth_header.replace("Bearer ", "")
+
+        job = render_service.submit(op, body, api_keys)
+        job = await render_service.wait(job, min(wait, 30.0))
+        print(f"[{request_id}] Render {op} → {job.id} ({job.status}{', cached' if job.cached else ''})")
+        return JSONResponse(content=job.to_dict(), status_code=200 if job.done.is_set() else 202)
+
+    except RenderError as e:
+        print(f"[{request_id}] Render rejected: {e.detail}")
+        raise HTTPException(e.status, f"{e.detail} (request_id={request_id})")
+    except (HTTPException, CircuitOpenError):
+        raise
+    except Exception as e:
+        tb = traceback.format_exc()
+        print(f"[{request_id}] [ERROR]:")
+        print(tb)
+        raise HTTPException(500, f"Render error (request_id={request_id}): {type(e).__name__}: {str(e)}")
+
+@fast_app.get("/api/v3/render/jobs/{job_id}")
+async def get_render_job(job_id: str, wait: float = 0):
+    """render job 상태 + 진행률 (wait초 동안 완료 대기 가능, 최대 30초)"""
+    job = render_service.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown render job: {job_id}")
+    job = await render_service.wait(job, min(wait, 30.0))
+    return JSONResponse(content=job.to_dict(), status_code=200)
+
+@fast_app.get("/api/v3/render/jobs/{job_id}/result")
+async def get_render_result(job_id: str, request: Request):
+    """render 결과 영상 (immutable: job id = 입력 + 파라미터 hash, Range / ETag 지원)"""
+    request_id = str(uuid.uuid4())[:8]
+    job = render_service.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown render job: {job_id}")
+    if job.status != "completed":
+        return JSONResponse({"error": "not_ready", "status": job.status, "detail": job.error}, status_code=409)
+    try:
+        await render_index.ready()
+        render_index.lookup(f"{job.id}.mp4")
+        return file_response(render_service.output_path(job.id), request.headers, media_type="video/mp4",
+                             filename=f"{job.id}.mp4", extra_headers={"Access-Control-Allow-Origin": "*"},
+                             etag=f'"{job.id}"')
+    except FileNotFoundError:
+        render_index.forget(f"{job.id}.mp4")
+        raise HTTPException(410, f"Render result evicted, submit again (request_id={request_id})")
+    except (HTTPException, CircuitOpenError):
+        raise
+    except Exception as e:
+        tb = traceback.format_exc()
+        print(f"[{request_id}] [ERROR]:")
+        print(tb)
+        raise HTTPException(500, f"Render download error (request_id={request_id}): {type(e).__name__}: {str(e)}")
+
 @fast_app.get("/health")
 async def health():
     """헬스 체크"""
@@ -1121,6 +1789,126 @@ async def health():
         "version": BUILD_VERSION
     }
 
+@fast_app.get("/api/v3/admin/cache/stats")
+async def cache_stats(request: Request):
+    """관리자용: 1080p 캐시 용량 / hit율 / eviction / export worker 상태"""
+    admin_key = request.headers.get("X-Admin-Key", "")
+    expected_key = os.getenv("ADMIN_KEY", "admin123")
+    if admin_key != expected_key:
+        return JSONResponse({"success": False, "error": "unauthorized"}, status_code=401)
+
+    await cache_index.ready()
+    return JSONResponse({
+        "success": True,
+        "cache": cache_index.stats(),
+        "remote_videos": remote_videos.stats(),
+        "exports": exports.stats(),
+        "task_status": task_status.stats(),
+        "poller": task_poller.stats(),
+        "user_db": user_store.stats(),
+        "uploads": upload_store.stats(),
+        "images": image_server.stats(),
+        "derived_images": derived_image_server.stats(),
+        "runware": runware_pool.stats(),
+        "router": provider_router.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "renders": {**render_service.stats(), "index": render_index.stats(top=5)},
+        "media_uploads": media_store.stats(),
+    })
+
+@fast_app.get("/health/upstreams")
+async def upstream_health():
+    """upstream connection pool 통계 (재사용 hit/miss, latency) + circuit breaker / rate limit 상태"""
+    return {
+        **upstreams.stats(),
+        "runware": {"breaker": RUNWARE_BREAKER.stats(), "sessions": runware_pool.stats()},
+        "rate_limits": rate_limiter.stats(),
+    }
+
+@metrics.collector
+def collect_component_metrics():
+    """캐시 / 변환 / breaker / rate limit / 폴러 통계 → 스크레이프 시점 snapshot"""
+    volume = cache_index.stats(top=0)
+    remote = remote_videos.stats()
+    task = task_status.stats()
+    images = image_server.stats()
+    derived = derived_image_server.stats()
+    renders = render_index.stats(top=0)
+    yield snapshot("counter", "proxy_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"), {
+        ("volume", "hit"): volume["hits"],
+        ("volume", "miss"): volume["misses"],
+        ("remote_video", "hit"): remote["hits"],
+        ("remote_video", "miss"): remote["misses"],
+        ("remote_video", "coalesced"): remote["coalesced"],
+        ("task_status", "hit"): task["hits"],
+        ("task_status", "miss"): task["misses"],
+        ("task_status", "coalesced"): task["coalesced"],
+        ("image_memory", "hit"): images["memory_hits"],
+        ("image_memory", "miss"): images["disk_reads"],
+        ("derived_image_memory", "hit"): derived["memory_hits"],
+        ("derived_image_memory", "miss"): derived["disk_reads"],
+    })
+    yield snapshot("gauge", "proxy_cache_bytes", "Bytes held by cache", ("cache",), {
+        ("volume",): volume["total_bytes"],
+        ("remote_video",): remote["index"]["total_bytes"],
+        ("render",): renders["total_bytes"],
+        ("image_memory",): images["memory_bytes"],
+        ("derived_image_memory",): derived["memory_bytes"],
+    })
+    yield snapshot("counter", "proxy_cache_evictions_total", "Files evicted to stay under budget", ("cache",), {
+        ("volume",): volume["evictions"],
+        ("remote_video",): remote["index"]["evictions"],
+        ("render",): renders["evictions"],
+    })
+    export = exports.stats()
+    yield snapshot("gauge", "proxy_exports_active", "1080p transcodes in progress", (), {(): len(export["active"])})
+    yield snapshot("counter", "proxy_exports_coalesced_total", "Export requests joined to an in-flight transcode",
+                   (), {(): export["coalesced"]})
+    render = render_service.stats()
+    yield snapshot("gauge", "proxy_render_jobs", "Render jobs held in memory by state", ("state",),
+                   {(state,): count for state, count in render["jobs"].items()})
+    yield snapshot("counter", "proxy_render_requests_total", "Render submits by outcome", ("result",), {
+        ("started",): render["submitted"],
+        ("cache_hit",): render["cache_hits"],
+        ("coalesced",): render["coalesced"],
+    })
+
+    pools = upstreams.stats()["upstreams"]
+    yield snapshot("counter", "proxy_upstream_connections_total", "Upstream requests by connection reuse",
+                   ("upstream", "connection"), {
+                       **{(name, "reused"): u["pool_hits"] for name, u in pools.items()},
+                       **{(name, "new"): u["pool_misses"] for name, u in pools.items()},
+                   })
+    breakers = {(name, host): b["state"] == "open" for name, u in pools.items() for host, b in u["breakers"].items()}
+    breakers[("runware", "ws")] = RUNWARE_BREAKER.state == "open"
+    yield snapshot("gauge", "proxy_upstream_breaker_open", "1 while the circuit breaker fast-fails calls",
+                   ("upstream", "host"), breakers)
+
+    rate_rows = {}
+    for name, p in rate_limiter.stats()["providers"].items():
+        rate_rows[(name, "immediate")] = p["granted"] - p["queued"]
+        rate_rows[(name, "queued")] = p["queued"]
+        rate_rows[(name, "rejected")] = p["rejected"]
+        rate_rows[(name, "upstream_429")] = p["upstream_429"]
+    yield snapshot("counter", "proxy_rate_limit_requests_total", "Provider submits by rate limiter outcome",
+                   ("provider", "result"), rate_rows)
+
+    poller = task_poller.stats()
+    yield snapshot("gauge", "proxy_tasks_tracked", "Tasks tracked by the status poller", ("state",), {
+        ("active",): poller["active"],
+        ("tracked",): poller["tracked"],
+    })
+    yield snapshot("counter", "proxy_poller_requests_total", "Status polls sent upstream", ("provider",),
+                   {(name,): count for name, count in poller["upstream_requests"].items()})
+
+@fast_app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text format: 라우트 / upstream latency, 응답 바이트, 1080p 변환 / 렌더링, 캐시 hit, breaker, rate limit"""
+    await cache_index.ready()
+    await remote_index.ready()
+    await render_index.ready()
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
 @app.function(
     image=image,
     timeout=600,
@@ -1129,7 +1917,12 @@ async def health():
         modal.Secret.from_name("imgur-client-id"),
         modal.Secret.from_name("admin-key"),
     ],
+    # 컨테이너 1개로 고정: rate limit bucket / 태스크 폴러 / export single-flight / 라우터 통계가 프로세스 메모리
+    # → replica가 늘면 키별 한도가 replica 수만큼 풀림 (배치 동시 요청 → 429 폭주)
+    max_containers=1,
 )
+# 요청은 대부분 upstream / 스트리밍 대기 (I/O) → 한 컨테이너의 event loop에서 동시 처리
+@modal.concurrent(max_inputs=1000)
 @modal.asgi_app()
 def web():
     return fast_app
@@ -36,11 +36,15 @@ image = (
         "PYTORCH_CUDA_ALLOC_CONF": "expandable_segments:True",
         "PYTHONIOENCODING": "utf-8",
     })
+    .add_local_python_source("common")
 )
 
 app = modal.App("ltx-official-exp", image=image)
 model_cache = modal.Volume.from_name("model-cache-official-exp", create_if_missing=True)
 video_cache = modal.Volume.from_name("video-cache-official", create_if_missing=True)
+# BytePlus 프록시 업로드 volume (업로드 시 생성된 960x544 파생본을 읽기 전용으로 사용)
+upload_volume = modal.Volume.from_name("byteplus-uploads", create_if_missing=True)
+UPLOADS_MOUNT = "/uploads"  # common.renditions.UPLOADS_MOUNT
 
 # ── Safe Motion Mapper 템플릿 ──────────────────────────────────────────────
 SAFE_MOTION_TEMPLATES = {
@@ -74,7 +78,7 @@ W1, H1 = 960, 544
 @app.cls(
     gpu="A100-80GB",
     timeout=3600,
-    volumes={"/models": model_cache},
+    volumes={"/models": model_cache, UPLOADS_MOUNT: upload_volume},
     secrets=[modal.Secret.from_name("huggingface-secret")],
 )
 class OfficialVideoGenerator:
@@ -126,6 +130,7 @@ class OfficialVideoGenerator:
         from PIL import Image
         from io import BytesIO
         from diffusers.pipelines.ltx2.export_utils import encode_video
+        from common.renditions import load_original, load_rendition
 
         t_total_start = time.time()
         import os as _os, re as _re, subprocess as _sp
@@ -194,25 +199,34 @@ class OfficialVideoGenerator:
         print(f"[FINAL] negative_prompt='{NEGATIVE_PROMPT}'")
         print(f"{'='*70}\n")
 
-        # 이미지 로드
-        if image_url.startswith("data:"):
-            _, encoded = image_url.split(",", 1)
-            ref_img = Image.open(BytesIO(base64.b64decode(encoded))).convert("RGB")
+        # 업로드 참조면 업로드 시 만든 W1×H1 파생본 사용 (다운로드 / 크롭 / 리사이즈 생략)
+        rendition = load_rendition(image_url, f"{W1}x{H1}", reload=upload_volume.reload)
+        if rendition is not None:
+            ref_img = Image.open(BytesIO(rendition.png)).convert("RGB")
+            print(f"[DIFFUSERS] Input from upload rendition {W1}x{H1} (md5 {rendition.pixel_md5[:8]})")
         else:
-            import requests as _req
-            ref_img = Image.open(BytesIO(_req.get(image_url, timeout=30).content)).convert("RGB")
-
-        # Stage 1 해상도로 크롭 + 리사이즈
-        iw, ih = ref_img.size
-        target_ar = W1 / H1
-        if iw / ih > target_ar:
-            new_w = int(ih * target_ar)
-            ref_img = ref_img.crop(((iw - new_w) // 2, 0, (iw + new_w) // 2, ih))
-        else:
-            new_h = int(iw / target_ar)
-            ref_img = ref_img.crop((0, (ih - new_h) // 2, iw, (ih + new_h) // 2))
-        ref_img = ref_img.resize((W1, H1), Image.Resampling.LANCZOS)
-        print(f"[DIFFUSERS] Input resized to {W1}x{H1}")
+            # 이미지 로드 (파생본 없는 업로드 참조는 volume의 원본)
+            original = load_original(image_url, reload=upload_volume.reload)
+            if original is not None:
+                ref_img = Image.open(BytesIO(original)).convert("RGB")
+            elif image_url.startswith("data:"):
+                _, encoded = image_url.split(",", 1)
+                ref_img = Image.open(BytesIO(base64.b64decode(encoded))).convert("RGB")
+            else:
+                import requests as _req
+                ref_img = Image.open(BytesIO(_req.get(image_url, timeout=30).content)).convert("RGB")
+
+            # Stage 1 해상도로 크롭 + 리사이즈
+            iw, ih = ref_img.size
+            target_ar = W1 / H1
+            if iw / ih > target_ar:
+                new_w = int(ih * target_ar)
+                ref_img = ref_img.crop(((iw - new_w) // 2, 0, (iw + new_w) // 2, ih))
+            else:
+                new_h = int(iw / target_ar)
+                ref_img = ref_img.crop((0, (ih - new_h) // 2, iw, (ih + new_h) // 2))
+            ref_img = ref_img.resize((W1, H1), Image.Resampling.LANCZOS)
+            print(f"[DIFFUSERS] Input resized to {W1}x{H1}")
 
         generator = torch.Generator("cpu").manual_seed(seed)
 
@@ -380,7 +394,7 @@ class OfficialVideoGenerator:
 
 # ── 생성 + 저장 전담 함수 (spawn 패턴) ─────────────────────────────────────
 @app.function(image=image, timeout=700, volumes={"/video-cache": video_cache})
-def run_and_save(data: dict, job_id: str):
+def run_and_save(data: dict, job_id: str, callback: dict = None):
     """generate() 호출 후 결과를 Volume에 직접 저장. web() 함수와 완전히 독립."""
     import json, os, base64 as _b64
 
@@ -411,15 +425,19 @@ def run_and_save(data: dict, job_id: str):
         _save_status(meta)
         print(f"[RUN_AND_SAVE {job_id}] complete → {len(video_bytes)//1024}KB saved")
     except Exception as e:
-        _save_status({"status": "error", "error": str(e)})
+        meta = {"status": "error", "error": str(e)}
+        _save_status(meta)
         print(f"[RUN_AND_SAVE {job_id}] error: {e}")
 
+    from common import webhook
+    webhook.notify(job_id, meta, callback)
+
 
 # ── ASGI 웹 앱 ────────────────────────────────────────────────────────────
 @app.function(image=image, timeout=60, volumes={"/video-cache": video_cache})
 @modal.asgi_app()
 def web():
-    import uuid, json, os
+    import asyncio, uuid, json, os
     from fastapi import FastAPI, Request
     from fastapi.middleware.cors import CORSMiddleware
     from fastapi.responses import JSONResponse, StreamingResponse
@@ -434,14 +452,21 @@ def web():
 
     CACHE_DIR = "/video-cache"
 
-    def _read_status(job_id):
-        video_cache.reload()
-        p = f"{CACHE_DIR}/{job_id}.json"
+    def _load_status(p):
         if not os.path.exists(p):
             return None
         with open(p) as f:
             return json.load(f)
 
+    def _read_status(job_id):
+        p = f"{CACHE_DIR}/{job_id}.json"
+        # terminal 상태는 더 이상 바뀌지 않음 → 로컬 사본이 있으면 Volume reload 생략
+        st = _load_status(p)
+        if st and st.get("status") in ("complete", "error"):
+            return st
+        video_cache.reload()
+        return _load_status(p)
+
     @fast_app.get("/health")
     def health():
         return {"status": "ok", "build": BUILD_VERSION, "engine": "diffusers"}
@@ -450,8 +475,14 @@ def web():
     async def start_generation(request: Request):
         data = await request.json()
         job_id = uuid.uuid4().hex[:8]
+        # callback host 검증은 DNS 조회 포함 → 이벤트 루프 밖에서
+        from common import webhook
+        callback, error = await asyncio.to_thread(
+            webhook.callback_from_request, data, str(request.base_url), job_id)
+        if error:
+            return JSONResponse({"error": error}, status_code=400)
         # spawn: fire-and-forget, run_and_save가 독립 컨테이너에서 실행
-        run_and_save.spawn(data, job_id)
+        run_and_save.spawn(data, job_id, callback)
         print(f"[WEB] spawned job {job_id}")
         return JSONResponse({"job_id": job_id})
 
@@ -13,10 +13,14 @@ image = (
     modal.Image.debian_slim(python_version="3.11")
     .pip_install("fastapi", "requests", "Pillow")
     .env({"PYTHONIOENCODING": "utf-8"})
+    .add_local_python_source("common")
 )
 
 app = modal.App("seedance-experiment", image=image)
 video_cache = modal.Volume.from_name("video-cache-seedance", create_if_missing=True)
+# BytePlus 프록시 업로드 volume (업로드 시 생성된 1248x704 파생본을 읽기 전용으로 사용)
+upload_volume = modal.Volume.from_name("byteplus-uploads", create_if_missing=True)
+UPLOADS_MOUNT = "/uploads"  # common.renditions.UPLOADS_MOUNT
 
 # ── Safe Motion Mapper (v3.3과 동일) ───────────────────────────────────────
 SAFE_MOTION_TEMPLATES = {
@@ -37,6 +41,7 @@ SCENE_DESC_FORBIDDEN = [
 @app.cls(
     cpu=2.0,  # GPU 불필요
     timeout=600,
+    volumes={UPLOADS_MOUNT: upload_volume},
     # secrets 제거: API 키는 request body에서 받음
 )
 class SeeDANCEVideoGenerator:
@@ -62,6 +67,7 @@ class SeeDANCEVideoGenerator:
         import requests
         from io import BytesIO
         from PIL import Image as PILImage
+        from common.renditions import load_original, load_rendition
 
         t_start = time.time()
 
@@ -125,18 +131,26 @@ class SeeDANCEVideoGenerator:
         print(f"{'='*70}\n")
 
         # ── 이미지 업로드 (base64) ─────────────────────────────────────
-        if image_url.startswith("data:"):
-            _, encoded = image_url.split(",", 1)
-            img_data = base64.b64decode(encoded)
+        # 업로드 참조면 업로드 시 만든 1248×704 PNG를 그대로 사용 (다운로드 / 디코딩 / 리사이즈 생략)
+        rendition = load_rendition(image_url, "1248x704", reload=upload_volume.reload)
+        if rendition is not None:
+            img_base64 = base64.b64encode(rendition.png).decode()
+            print(f"[IMAGE] Upload rendition 1248x704 (md5 {rendition.pixel_md5[:8]})")
         else:
-            img_data = requests.get(image_url, timeout=30).content
-
-        img = PILImage.open(BytesIO(img_data)).convert("RGB")
-        # SeeDANCE 1.0 Pro-fast: 1248×704 (16:9, 720p)
-        img = img.resize((1248, 704), PILImage.Resampling.LANCZOS)
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
+            # 파생본 없는 업로드 참조는 volume의 원본 ("upload:{sha256}"은 HTTP로 받을 수 없음)
+            img_data = load_original(image_url, reload=upload_volume.reload)
+            if img_data is None and image_url.startswith("data:"):
+                _, encoded = image_url.split(",", 1)
+                img_data = base64.b64decode(encoded)
+            elif img_data is None:
+                img_data = requests.get(image_url, timeout=30).content
+
+            img = PILImage.open(BytesIO(img_data)).convert("RGB")
+            # SeeDANCE 1.0 Pro-fast: 1248×704 (16:9, 720p)
+            img = img.resize((1248, 704), PILImage.Resampling.LANCZOS)
+            buffer = BytesIO()
+            img.save(buffer, format="PNG")
+            img_base64 = base64.b64encode(buffer.getvalue()).decode()
 
         # ── SeeDANCE API 호출 ──────────────────────────────────────────
         print(f"[API] Calling {self.provider} SeeDANCE API...")
@@ -180,26 +194,39 @@ class SeeDANCEVideoGenerator:
 
             print(f"[API] Task created: {task_id}")
 
-            # 2단계: 태스크 완료 대기 (폴링)
+            # 2단계: 태스크 완료 대기 (적응형 폴링: 예상 완료 근처 촘촘, 에러 시 backoff)
+            from common.polling import PollSchedule
+
             max_wait = 180  # 최대 3분
-            poll_interval = 5
-            elapsed = 0
+            schedule = PollSchedule(expected_sec=45, min_interval=2, max_interval=10)
+            t_poll = time.time()
+            errors = 0
+            polls = 0
             video_url = None
 
-            while elapsed < max_wait:
-                time.sleep(poll_interval)
-                elapsed += poll_interval
+            while time.time() - t_poll < max_wait:
+                time.sleep(schedule.next_interval(time.time() - t_poll, errors))
+                elapsed = int(time.time() - t_poll)
+                polls += 1
 
-                status_resp = requests.get(
-                    f"{self.api_base}/video/generations/{task_id}",
-                    headers=headers,
-                    timeout=30,
-                )
+                try:
+                    status_resp = requests.get(
+                        f"{self.api_base}/video/generations/{task_id}",
+                        headers=headers,
+                        timeout=30,
+                    )
+                    if status_resp.status_code >= 500 or status_resp.status_code == 429:
+                        raise requests.HTTPError(f"HTTP {status_resp.status_code}", response=status_resp)
+                except requests.RequestException as e:
+                    errors += 1
+                    print(f"[API] Task {task_id} poll error #{errors}: {e} ({elapsed}s)")
+                    continue
+                errors = 0
                 status_resp.raise_for_status()
                 status_result = status_resp.json()
 
                 status = status_result.get("status") or status_result.get("data", {}).get("status")
-                print(f"[API] Task {task_id} status: {status} ({elapsed}s)")
+                print(f"[API] Task {task_id} status: {status} ({elapsed}s, poll #{polls})")
 
                 if status in ["completed", "success", "complete"]:
                     video_url = (
@@ -256,7 +283,7 @@ class SeeDANCEVideoGenerator:
 
 # ── 생성 + 저장 함수 (spawn 패턴, v3.4와 동일) ─────────────────────────────
 @app.function(image=image, timeout=700, volumes={"/video-cache": video_cache})
-def run_and_save(data: dict, job_id: str):
+def run_and_save(data: dict, job_id: str, callback: dict = None):
     import json, os, base64
 
     CACHE_DIR = "/video-cache"
@@ -283,15 +310,19 @@ def run_and_save(data: dict, job_id: str):
         _save_status(meta)
         print(f"[RUN_AND_SAVE {job_id}] complete → {len(video_bytes)//1024}KB")
     except Exception as e:
-        _save_status({"status": "error", "error": str(e)})
+        meta = {"status": "error", "error": str(e)}
+        _save_status(meta)
         print(f"[RUN_AND_SAVE {job_id}] error: {e}")
 
+    from common import webhook
+    webhook.notify(job_id, meta, callback)
+
 
 # ── ASGI 웹 앱 (v3.4와 동일 구조) ───────────────────────────────────────────
 @app.function(image=image, timeout=60, volumes={"/video-cache": video_cache})
 @modal.asgi_app()
 def web():
-    import uuid, json, os
+    import asyncio, uuid, json, os
     from fastapi import FastAPI, Request
     from fastapi.middleware.cors import CORSMiddleware
     from fastapi.responses import JSONResponse, StreamingResponse
@@ -306,14 +337,21 @@ def web():
 
     CACHE_DIR = "/video-cache"
 
-    def _read_status(job_id):
-        video_cache.reload()
-        p = f"{CACHE_DIR}/{job_id}.json"
+    def _load_status(p):
         if not os.path.exists(p):
             return None
         with open(p) as f:
             return json.load(f)
 
+    def _read_status(job_id):
+        p = f"{CACHE_DIR}/{job_id}.json"
+        # terminal 상태는 더 이상 바뀌지 않음 → 로컬 사본이 있으면 Volume reload 생략
+        st = _load_status(p)
+        if st and st.get("status") in ("complete", "error"):
+            return st
+        video_cache.reload()
+        return _load_status(p)
+
     @fast_app.get("/health")
     def health():
         return {"status": "ok", "build": BUILD_VERSION, "engine": "seedance"}
@@ -322,7 +360,13 @@ def web():
     async def start_generation(request: Request):
         data = await request.json()
         job_id = uuid.uuid4().hex[:8]
-        run_and_save.spawn(data, job_id)
+        # callback host 검증은 DNS 조회 포함 → 이벤트 루프 밖에서
+        from common import webhook
+        callback, error = await asyncio.to_thread(
+            webhook.callback_from_request, data, str(request.base_url), job_id)
+        if error:
+            return JSONResponse({"error": error}, status_code=400)
+        run_and_save.spawn(data, job_id, callback)
         print(f"[WEB] spawned job {job_id}")
         return JSONResponse({"job_id": job_id})
 
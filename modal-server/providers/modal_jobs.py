@@ -0,0 +1,63 @@
+"""
+Modal Job Service Client
+- 자체 Modal 앱(LTX distilled: main.py / LTX official: main_official.py / SeeDANCE: main_seedance.py)의
+  job API를 프록시에서 호출: POST /start → job_id, GET /status/{job_id}, 결과 영상은 /result 또는 /download
+- 상태를 다른 provider와 같은 형태로 변환: {"id", "status", "result": {"video_url"}, "error"}
+  → TaskPoller / ProviderRouter에서 BytePlus / Evolink / Runware와 같은 방식으로 다룸
+"""
+
+from typing import Callable, Tuple
+
+import httpx
+
+# job API 상태 → 공통 상태
+_STATUS_MAP = {"queued": "processing", "running": "processing", "complete": "completed", "error": "failed"}
+
+
+class ModalJobService:
+    """
+    Args:
+        base_url: Modal 웹 엔드포인트 (예: https://<workspace>--ltx-video-service-distilled-1080p-web-app.modal.run)
+        client: httpx client를 돌려주는 함수 (앱 수명 keep-alive pool)
+        build_payload: (spec, api_key) → /start body
+        result_path: 결과 영상 경로 prefix ("result" 또는 "download")
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        client: Callable[[], httpx.AsyncClient],
+        build_payload: Callable[[dict, str], dict],
+        result_path: str = "result",
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.client = client
+        self.build_payload = build_payload
+        self.result_path = result_path
+
+    def result_url(self, job_id: str) -> str:
+        return f"{self.base_url}/{self.result_path}/{job_id}"
+
+    async def submit(self, spec: dict, api_key: str) -> str:
+        response = await self.client().post(f"{self.base_url}/start", json=self.build_payload(spec, api_key))
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:300]}")
+        job_id = response.json().get("job_id")
+        if not job_id:
+            raise RuntimeError(f"No job_id in response: {response.text[:300]}")
+        return job_id
+
+    async def fetch(self, api_key: str, job_id: str) -> Tuple[int, object]:
+        """TaskPoller fetch 형식 → (status_code, 공통 상태 dict 또는 에러 텍스트)"""
+        response = await self.client().get(f"{self.base_url}/status/{job_id}")
+        if response.status_code != 200:
+            return response.status_code, response.text
+        raw = response.json()
+        status = _STATUS_MAP.get(raw.get("status"), raw.get("status"))
+        return 200, {
+            "id": job_id,
+            "status": status,
+            "result": {"video_url": self.result_url(job_id)} if status == "completed" else None,
+            "error": raw.get("error"),
+            "progress": raw.get("progress"),
+        }
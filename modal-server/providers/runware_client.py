@@ -1,14 +1,192 @@
 """
 Runware Provider Client
 - WebSocket 기반 비디오 생성 (SeeDance 1.0 Pro Fast)
+- 연결은 RunwareSessionPool이 API key별로 유지 (요청마다 connect / disconnect 하지 않음)
 - Feature Flag: RUNWARE_ENABLED (기본 OFF)
 - Billing Gate: $5 최소 요구 / $20 최소 충전
+- circuit breaker: 연결 끊김 / timeout이 이어지면 fast-fail (CircuitOpenError), getResponse만 jitter 재시도
 """
 
 import os
 import asyncio
+import time
+import uuid
 from typing import Dict, Optional
 
+from common import resilience
+from common.polling import PollSchedule
+from common.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from providers.runware_pool import (
+    RUNWARE_WS_URL, RunwareAuthError, RunwareConnectionLost, RunwareError, RunwareSessionPool,
+)
+
+# 프로세스 기본 pool (호출 측에서 pool을 넘기지 않을 때)
+_default_pool: Optional[RunwareSessionPool] = None
+
+# videoInference 완료 대기 스케줄 (SeeDance Pro Fast 5초 영상 기준)
+RUNWARE_POLL_SCHEDULE = PollSchedule(expected_sec=60, min_interval=2, max_interval=10)
+RUNWARE_MAX_WAIT_SEC = 900
+
+# Runware 연결 장애 감지 (API 에러 응답은 정상 동작으로 봄)
+RUNWARE_BREAKER = CircuitBreaker(
+    "runware",
+    failure_threshold=int(os.getenv("BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("BREAKER_RESET_SEC", "30")),
+)
+RUNWARE_RETRY = RetryPolicy(attempts=3, base=0.2, cap=2.0)
+
+
+def get_default_pool() -> RunwareSessionPool:
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = RunwareSessionPool(os.getenv("RUNWARE_WS_URL", RUNWARE_WS_URL))
+    return _default_pool
+
+
+def _check_enabled(api_key: Optional[str]) -> str:
+    # Feature Flag 체크 (Billing Gate)
+    if not os.getenv("RUNWARE_ENABLED", "false").lower() == "true":
+        raise ValueError(
+            "Runware provider is disabled. Set RUNWARE_ENABLED=true in Modal secrets to enable."
+        )
+    api_key = api_key or os.getenv("RUNWARE_API_KEY")
+    if not api_key:
+        raise ValueError("RUNWARE_API_KEY not configured in Modal secrets")
+    return api_key
+
+
+def _wrap_error(e: Exception) -> Exception:
+    """SDK 시절과 같은 예외 규칙: 크레딧 부족 → ValueError, 그 외 → RuntimeError"""
+    error_msg = str(e).lower()
+
+    # Billing Gate: insufficient credits 체크
+    if "insufficient" in error_msg or "credits" in error_msg or "paid invoice" in error_msg:
+        print(f"[RUNWARE] BILLING ERROR: {str(e)}")
+        return ValueError(f"runware_insufficient_credits: {str(e)}")
+
+    if isinstance(e, RuntimeError):
+        return e
+    print(f"[RUNWARE] ERROR: {type(e).__name__}: {str(e)}")
+    return RuntimeError(f"Runware API failed: {type(e).__name__}: {str(e)}")
+
+
+def _is_not_found(e: RunwareError) -> bool:
+    return bool(e.code) and "notfound" in e.code.lower()
+
+
+async def _request(session, payload: dict, idempotent: bool) -> dict:
+    """breaker 경유 요청 1건 (멱등 요청만 재연결 재전송 + jitter 재시도)"""
+    return await resilience.call(
+        RUNWARE_BREAKER,
+        lambda: session.request(payload, retry=idempotent),
+        RUNWARE_RETRY if idempotent else resilience.NO_RETRY,
+        is_failure=lambda e: not isinstance(e, RunwareError),
+    )
+
+
+async def runware_submit_video(
+    image_url: str,
+    prompt: str,
+    duration_sec: int = 5,
+    width: int = 1280,
+    height: int = 720,
+    fps: int = 24,
+    model_id: str = "bytedance:2@2",
+    api_key: Optional[str] = None,
+    pool: Optional[RunwareSessionPool] = None,
+) -> str:
+    """
+    Runware 비디오 생성 요청만 보내고 접수되면 taskUUID 반환 (완료 대기 X)
+
+    Raises:
+        ValueError: Feature Flag OFF / 파라미터 오류 / 크레딧 부족
+        RuntimeError: API 호출 실패
+    """
+    api_key = _check_enabled(api_key)
+
+    if not image_url or not image_url.startswith("http"):
+        raise ValueError(f"Invalid image_url: must be HTTP/HTTPS URL, got {image_url[:50]}")
+
+    print(f"[RUNWARE] Generating video: {width}x{height} @ {fps}fps, {duration_sec}s")
+    print(f"[RUNWARE] Model: {model_id}")
+    print(f"[RUNWARE] Image: {image_url[:80]}...")
+
+    session = (pool or get_default_pool()).session(api_key)
+    task_uuid = str(uuid.uuid4())
+
+    # deliveryMethod=async → 접수 응답만 받고 완료는 getResponse로 확인
+    request = {
+        "taskType": "videoInference",
+        "taskUUID": task_uuid,
+        "deliveryMethod": "async",
+        "model": model_id,
+        "positivePrompt": prompt.strip(),
+        "width": width,
+        "height": height,
+        "duration": duration_sec,
+        "frameImages": [{"inputImage": image_url}],  # HTTP URL 직접 사용
+        "numberResults": 1,
+        "includeCost": True,  # 비용 정보 포함
+    }
+    print(f"[RUNWARE] Sending videoInference request (task={task_uuid})...")
+    try:
+        await _request(session, request, idempotent=False)
+    except CircuitOpenError:
+        raise
+    except RunwareConnectionLost:
+        # 접수 여부를 알 수 없음 → 재전송 대신 같은 taskUUID로 조회 (없는 태스크면 에러)
+        print(f"[RUNWARE] Connection lost during submit, checking task {task_uuid}")
+        try:
+            await _request(session, {"taskType": "getResponse", "taskUUID": task_uuid}, idempotent=True)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            raise _wrap_error(e)
+    except Exception as e:
+        raise _wrap_error(e)
+    return task_uuid
+
+
+async def runware_get_task(
+    task_id: str,
+    api_key: Optional[str] = None,
+    pool: Optional[RunwareSessionPool] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    getResponse 1회 → Evolink 태스크 조회와 같은 형태로 정규화
+
+    Returns:
+        {"id", "status": processing | completed | failed, "result": {"video_url"} or None, "cost", "error"}
+
+    Raises:
+        LookupError: Runware에 없는 taskUUID
+        RunwareAuthError: API key 인증 실패
+        RunwareConnectionLost / asyncio.TimeoutError: 일시적 연결 문제 (재시도 후에도 실패)
+        CircuitOpenError: 연결 장애가 이어져 호출하지 않음
+    """
+    api_key = _check_enabled(api_key)
+    session = (pool or get_default_pool()).session(api_key)
+    try:
+        video = await _request(session, {"taskType": "getResponse", "taskUUID": task_id}, idempotent=True)
+    except RunwareAuthError:
+        raise
+    except RunwareError as e:
+        if _is_not_found(e):
+            raise LookupError(f"Runware task not found: {task_id}")
+        # 생성 실패 (필터링 / 크레딧 / 모델 에러 등)
+        return {"id": task_id, "status": "failed", "result": None, "cost": None,
+                "error": {"code": e.code, "message": str(e)}}
+
+    video_url = video.get("videoURL")
+    completed = video.get("status") == "success" or bool(video_url)
+    return {
+        "id": task_id,
+        "status": "completed" if completed else "processing",
+        "result": {"video_url": video_url} if video_url else None,
+        "cost": video.get("cost"),
+        "error": None,
+    }
+
 
 async def runware_generate_video(
     image_url: str,
@@ -17,10 +195,12 @@ async def runware_generate_video(
     width: int = 1280,
     height: int = 720,
     fps: int = 24,
-    model_id: str = "bytedance:2@2"
+    model_id: str = "bytedance:2@2",
+    api_key: Optional[str] = None,
+    pool: Optional[RunwareSessionPool] = None,
 ) -> Dict[str, Optional[str]]:
     """
-    Runware SDK를 사용한 비디오 생성 (동기 완료 대기)
+    Runware 비디오 생성 (동기 완료 대기) = runware_submit_video + runware_get_task 폴링
 
     Args:
         image_url: 입력 이미지 HTTP URL (공개 접근 가능)
@@ -30,96 +210,52 @@ async def runware_generate_video(
         height: 해상도 높이
         fps: 프레임률 (기본 24)
         model_id: Runware 모델 ID
+        api_key: Runware API key (없으면 RUNWARE_API_KEY 환경변수)
+        pool: 연결 pool (없으면 프로세스 기본 pool)
 
     Returns:
-        {"task_id": str, "video_url": str or None, "status": str}
+        {"task_id": str, "video_url": str or None, "status": str, "cost": float or None}
 
     Raises:
         ValueError: Feature Flag OFF 또는 파라미터 오류
         RuntimeError: API 호출 실패
     """
-    from runware import Runware, IVideoInference, IFrameImage
-
-    # Feature Flag 체크 (Billing Gate)
-    if not os.getenv("RUNWARE_ENABLED", "false").lower() == "true":
-        raise ValueError(
-            "Runware provider is disabled. Set RUNWARE_ENABLED=true in Modal secrets to enable."
-        )
+    task_uuid = await runware_submit_video(
+        image_url, prompt, duration_sec, width, height, fps, model_id, api_key=api_key, pool=pool
+    )
 
-    api_key = os.getenv("RUNWARE_API_KEY")
-    if not api_key:
-        raise ValueError("RUNWARE_API_KEY not configured in Modal secrets")
-
-    if not image_url or not image_url.startswith("http"):
-        raise ValueError(f"Invalid image_url: must be HTTP/HTTPS URL, got {image_url[:50]}")
-
-    print(f"[RUNWARE] Generating video: {width}x{height} @ {fps}fps, {duration_sec}s")
-    print(f"[RUNWARE] Model: {model_id}")
-    print(f"[RUNWARE] Image: {image_url[:80]}...")
-
-    runware = None
     try:
-        # 1. WebSocket 연결
-        runware = Runware(api_key=api_key)
-        await runware.connect()
-        print("[RUNWARE] Connected to Runware API")
-
-        # 2. 비디오 생성 요청 (공식 SDK 패턴)
-        request = IVideoInference(
-            positivePrompt=prompt,
-            model=model_id,
-            width=width,
-            height=height,
-            duration=duration_sec,
-            frameImages=[
-                IFrameImage(inputImage=image_url)  # HTTP URL 직접 사용
-            ],
-            numberResults=1,
-            includeCost=True  # 비용 정보 포함
-        )
-
-        print("[RUNWARE] Sending videoInference request...")
-
-        # 3. 동기 완료 대기 (SDK가 자동으로 폴링)
-        videos = await runware.videoInference(requestVideo=request)
-
-        if not videos or len(videos) == 0:
-            raise RuntimeError("No video returned from Runware API")
-
-        video = videos[0]
-
-        # 4. 결과 추출
-        task_id = getattr(video, 'taskUUID', None) or getattr(video, 'videoUUID', 'unknown')
-        video_url = getattr(video, 'videoURL', None)
-        status = getattr(video, 'status', 'completed')
-        cost = getattr(video, 'cost', None)
+        # 같은 연결에서 다른 요청들과 함께 getResponse 폴링
+        started = time.time()
+        errors = 0
+        while True:
+            age = time.time() - started
+            if age > RUNWARE_MAX_WAIT_SEC:
+                raise RuntimeError(f"Runware video timeout after {RUNWARE_MAX_WAIT_SEC}s (task={task_uuid})")
+            try:
+                task = await runware_get_task(task_uuid, api_key=api_key, pool=pool)
+                errors = 0
+            except (RunwareConnectionLost, asyncio.TimeoutError, CircuitOpenError) as e:
+                errors += 1
+                print(f"[RUNWARE] Poll retry ({errors}) task={task_uuid}: {type(e).__name__}")
+                task = {"status": "processing"}
+            if task["status"] == "failed":
+                raise RuntimeError(task["error"]["message"])
+            if task["status"] == "completed":
+                break
+            await asyncio.sleep(RUNWARE_POLL_SCHEDULE.next_interval(age, errors))
 
-        print(f"[RUNWARE] Success: task_id={task_id}, status={status}, cost=${cost}")
+        video_url = (task.get("result") or {}).get("video_url")
+        cost = task.get("cost")
+        print(f"[RUNWARE] Success: task_id={task_uuid}, cost=${cost}")
         print(f"[RUNWARE] Video URL: {video_url[:80] if video_url else 'None'}...")
 
         return {
-            "task_id": task_id,
+            "task_id": task_uuid,
             "video_url": video_url,
-            "status": status,
+            "status": "success",
             "cost": cost
         }
 
     except Exception as e:
-        error_msg = str(e).lower()
-
-        # Billing Gate: insufficient credits 체크
-        if "insufficient" in error_msg or "credits" in error_msg or "paid invoice" in error_msg:
-            print(f"[RUNWARE] BILLING ERROR: {str(e)}")
-            raise ValueError(f"runware_insufficient_credits: {str(e)}")
-
-        print(f"[RUNWARE] ERROR: {type(e).__name__}: {str(e)}")
-        raise RuntimeError(f"Runware API failed: {type(e).__name__}: {str(e)}")
-
-    finally:
-        # 5. WebSocket 연결 정리
-        if runware:
-            try:
-                await runware.disconnect()
-                print("[RUNWARE] Disconnected from Runware API")
-            except Exception as e:
-                print(f"[RUNWARE] Warning: disconnect failed: {e}")
+        raise _wrap_error(e)
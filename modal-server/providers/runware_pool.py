@@ -0,0 +1,311 @@
+"""
+Runware WebSocket Session Pool
+- API key별로 인증된 WebSocket 연결 1개를 유지 (요청마다 connect / authentication / disconnect 하지 않음)
+- 한 연결 위에서 여러 요청을 taskUUID로 구분해 동시에 처리 (multiplexing)
+- heartbeat(ping / pong)로 끊긴 연결 감지 → 다음 요청 시 자동 재연결 (connectionSessionUUID로 세션 이어받기)
+- API key는 인자로만 전달 (os.environ 변경 없음 → 동시 요청 간 key 섞임 없음)
+- 프로토콜은 Runware SDK와 동일: authentication / videoInference(deliveryMethod=async) / getResponse / ping
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+RUNWARE_WS_URL = "wss://ws-api.runware.ai/v1"
+
+
+class RunwareError(Exception):
+    """Runware API가 돌려준 에러 (errors[] 항목)"""
+
+    def __init__(self, message: str, code: Optional[str] = None, task_uuid: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+        self.task_uuid = task_uuid
+
+
+class RunwareAuthError(RunwareError):
+    pass
+
+
+class RunwareConnectionLost(ConnectionError):
+    """응답 대기 중 연결이 끊김 (요청이 서버에 도달했는지 알 수 없음)"""
+
+
+def key_fingerprint(api_key: str) -> str:
+    """로그 / stats용 API key 식별자 (원문 노출 X)"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+
+def _error_from(item: dict) -> RunwareError:
+    message = item.get("message") or item.get("code") or "Runware error"
+    cls = RunwareAuthError if item.get("taskType") == "authentication" else RunwareError
+    return cls(message, item.get("code"), item.get("taskUUID"))
+
+
+class RunwareSession:
+    """
+    API key 1개에 대한 연결
+
+    Args:
+        api_key: Runware API key
+        url: WebSocket URL
+        ping_interval: ping 전송 간격 (초)
+        ping_timeout: 마지막 pong 이후 이 시간이 지나면 연결 끊김으로 판단 (초)
+        request_timeout: 요청 1건 응답 대기 상한 (초)
+        idle_timeout: 진행 중 요청 없이 이 시간이 지나면 연결 종료 (초, 다음 요청 시 재연결)
+        connect: WebSocket 연결 함수 (None이면 websockets.connect)
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        url: str = RUNWARE_WS_URL,
+        ping_interval: float = 5.0,
+        ping_timeout: float = 30.0,
+        request_timeout: float = 60.0,
+        idle_timeout: float = 300.0,
+        connect: Optional[Callable] = None,
+    ):
+        self.api_key = api_key
+        self.fingerprint = key_fingerprint(api_key)
+        self.url = url
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.request_timeout = request_timeout
+        self.idle_timeout = idle_timeout
+        self._connect_fn = connect
+        self._ws = None
+        self._session_uuid: Optional[str] = None
+        self._connect_lock = asyncio.Lock()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._last_pong = 0.0
+        self._last_used = time.monotonic()
+        self._connect_failures = 0
+        self._closed = False
+        self.connects = 0
+        self.resumed = 0
+        self.requests = 0
+        self.disconnects = 0
+
+    # ── 연결 ─────────────────────────────────────────────────────────────
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and self._reader_task is not None and not self._reader_task.done()
+
+    async def ensure_connected(self):
+        if self.connected:
+            return
+        async with self._connect_lock:
+            if self.connected:
+                return
+            if self._closed:
+                raise RunwareConnectionLost("session closed")
+            if self._connect_failures:
+                # 연속 실패 시 backoff (1, 2, 4 ... 최대 30초)
+                await asyncio.sleep(min(2 ** (self._connect_failures - 1), 30))
+            try:
+                await self._open()
+                self._connect_failures = 0
+            except RunwareAuthError:
+                raise
+            except Exception:
+                self._connect_failures += 1
+                raise
+
+    async def _open(self):
+        connect = self._connect_fn
+        if connect is None:
+            import websockets
+            connect = websockets.connect
+
+        ws = await connect(self.url, max_size=None)
+        auth = {"taskType": "authentication", "apiKey": self.api_key}
+        if self._session_uuid:
+            auth["connectionSessionUUID"] = self._session_uuid
+        try:
+            await ws.send(json.dumps([auth]))
+            while True:
+                message = json.loads(await asyncio.wait_for(ws.recv(), self.request_timeout))
+                for error in message.get("errors", []):
+                    if error.get("taskType") == "authentication":
+                        raise _error_from(error)
+                data = message.get("data") or [{}]
+                session_uuid = data[0].get("connectionSessionUUID")
+                if session_uuid:
+                    break
+        except BaseException:
+            await ws.close()
+            raise
+
+        resumed = session_uuid == self._session_uuid
+        self._session_uuid = session_uuid
+        self._ws = ws
+        self._last_pong = time.monotonic()
+        self.connects += 1
+        self.resumed += resumed
+        self._reader_task = asyncio.create_task(self._read_loop(ws))
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        print(f"[RUNWARE POOL] Connected key={self.fingerprint} "
+              f"({'resumed' if resumed else 'new'} session, connects={self.connects})")
+
+    async def _read_loop(self, ws):
+        try:
+            async for raw in ws:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                self._dispatch(message)
+        except Exception as e:
+            print(f"[RUNWARE POOL] Connection lost key={self.fingerprint}: {type(e).__name__}: {str(e)[:100]}")
+        finally:
+            self._drop(ws)
+
+    def _dispatch(self, message: dict):
+        for item in message.get("data", []):
+            if item.get("taskType") == "ping":
+                self._last_pong = time.monotonic()
+                continue
+            future = self._pending.pop(item.get("taskUUID"), None)
+            if future is not None and not future.done():
+                future.set_result(item)
+        for error in message.get("errors", []):
+            future = self._pending.pop(error.get("taskUUID"), None)
+            if future is not None and not future.done():
+                future.set_exception(_error_from(error))
+
+    def _drop(self, ws):
+        """연결 정리 + 대기 중 요청 실패 처리 (요청 쪽에서 재시도 여부 결정)"""
+        if self._ws is not ws:
+            return
+        self._ws = None
+        self.disconnects += 1
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(RunwareConnectionLost("connection lost while waiting for response"))
+
+    async def _heartbeat_loop(self):
+        while not self._closed:
+            await asyncio.sleep(self.ping_interval)
+            ws = self._ws
+            if ws is None:
+                if not self._pending:
+                    return  # 재연결은 다음 요청에서
+                continue
+            now = time.monotonic()
+            if now - self._last_pong > self.ping_timeout:
+                print(f"[RUNWARE POOL] No pong for {now - self._last_pong:.0f}s key={self.fingerprint} → reconnect")
+                await self._close_ws(ws)
+                continue
+            if not self._pending and now - self._last_used > self.idle_timeout:
+                print(f"[RUNWARE POOL] Idle {now - self._last_used:.0f}s key={self.fingerprint} → close")
+                await self._close_ws(ws)
+                return
+            try:
+                await ws.send(json.dumps([{"taskType": "ping", "ping": True}]))
+            except Exception:
+                await self._close_ws(ws)
+
+    async def _close_ws(self, ws):
+        try:
+            await ws.close()
+        except Exception:
+            pass
+        self._drop(ws)
+
+    # ── 요청 ─────────────────────────────────────────────────────────────
+    async def request(self, payload: dict, timeout: Optional[float] = None, retry: bool = True) -> dict:
+        """
+        taskUUID 기준 요청 1건 → 응답 data 항목 1개
+
+        같은 taskUUID로 이미 대기 중인 요청이 있으면 응답을 공유 (getResponse 중복 폴링 방지)
+        retry: 연결이 끊겨 응답을 못 받았을 때 재연결 후 1회 재전송 (getResponse처럼 멱등인 요청만)
+        """
+        task_uuid = payload.setdefault("taskUUID", str(uuid.uuid4()))
+        for attempt in range(2):
+            await self.ensure_connected()
+            self._last_used = time.monotonic()
+            future = self._pending.get(task_uuid)
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._pending[task_uuid] = future
+                self.requests += 1
+                try:
+                    await self._ws.send(json.dumps([payload]))
+                except Exception:
+                    self._pending.pop(task_uuid, None)
+                    await self._close_ws(self._ws)
+                    if retry and attempt == 0:
+                        continue
+                    raise RunwareConnectionLost("send failed")
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout or self.request_timeout)
+            except RunwareConnectionLost:
+                if retry and attempt == 0:
+                    continue
+                raise
+            except asyncio.TimeoutError:
+                if self._pending.get(task_uuid) is future:
+                    del self._pending[task_uuid]
+                raise
+        raise RunwareConnectionLost("connection lost")
+
+    @property
+    def inflight(self) -> int:
+        return len(self._pending)
+
+    async def aclose(self):
+        self._closed = True
+        for task in (self._heartbeat_task,):
+            if task and not task.done():
+                task.cancel()
+        if self._ws is not None:
+            await self._close_ws(self._ws)
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "inflight": self.inflight,
+            "requests": self.requests,
+            "connects": self.connects,
+            "resumed": self.resumed,
+            "disconnects": self.disconnects,
+        }
+
+
+class RunwareSessionPool:
+    """
+    API key → RunwareSession (최초 요청 시 생성, 이후 재사용)
+
+    Args:
+        url: WebSocket URL (테스트 시 로컬 stand-in 서버)
+        **session_kwargs: RunwareSession 옵션 (ping_interval, ping_timeout, request_timeout, idle_timeout, connect)
+    """
+
+    def __init__(self, url: str = RUNWARE_WS_URL, **session_kwargs):
+        self.url = url
+        self.session_kwargs = session_kwargs
+        self._sessions: Dict[str, RunwareSession] = {}
+
+    def session(self, api_key: str) -> RunwareSession:
+        session = self._sessions.get(api_key)
+        if session is None or session._closed:
+            session = RunwareSession(api_key, self.url, **self.session_kwargs)
+            self._sessions[api_key] = session
+        return session
+
+    async def aclose(self):
+        sessions, self._sessions = list(self._sessions.values()), {}
+        await asyncio.gather(*(s.aclose() for s in sessions), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {s.fingerprint: s.stats() for s in self._sessions.values()}
@@ -0,0 +1 @@
+# BytePlus proxy subsystems (upstream pool, cache, polling ...)
@@ -0,0 +1,266 @@
+"""
+Cache Volume LRU Index
+- 캐시 디렉터리(Modal volume) 파일별 size / last_access / hits를 SQLite 인덱스로 관리
+- 조회는 메모리 미러만 사용 (volume에 os.path.exists 호출 X), SQLite는 영속화용
+- byte budget 초과 시 last_access 오래된 순으로 삭제 (low watermark까지)
+- 접근 기록 / 추가 / 삭제는 모아두었다가 주기적으로 SQLite flush + volume commit 1회
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+INDEX_FILENAME = ".cache-index.sqlite3"
+
+
+class _Entry:
+    __slots__ = ("size", "created_at", "last_access", "hits")
+
+    def __init__(self, size: int, created_at: float, last_access: float, hits: int = 0):
+        self.size = size
+        self.created_at = created_at
+        self.last_access = last_access
+        self.hits = hits
+
+
+class CacheIndex:
+    """
+    캐시 파일명 → 엔트리
+
+    Args:
+        cache_dir: 캐시 디렉터리 (volume mount)
+        budget_bytes: 총 용량 상한
+        commit: 변경사항을 volume에 반영하는 coroutine (None이면 로컬 디스크로 간주)
+        flush_interval: flush 주기 (초)
+        low_watermark: eviction 목표 비율 (budget 대비)
+        suffix: 인덱스 대상 파일 접미사 (.part 등 진행 중 파일 제외)
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        budget_bytes: int,
+        commit: Optional[Callable[[], Awaitable[None]]] = None,
+        flush_interval: float = 30.0,
+        low_watermark: float = 0.9,
+        suffix: str = ".mp4",
+    ):
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(cache_dir, INDEX_FILENAME)
+        self.budget_bytes = budget_bytes
+        self.commit = commit
+        self.flush_interval = flush_interval
+        self.low_watermark = low_watermark
+        self.suffix = suffix
+
+        self._entries: Dict[str, _Entry] = {}
+        self._dirty_rows: set = set()      # SQLite에 반영할 이름
+        self._deleted_rows: set = set()
+        self._files_changed = False        # 파일 추가/삭제 → volume commit 필요
+        self._loaded = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.commits = 0
+
+    # ── 로드 / 정합성 ───────────────────────────────────────────────────
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                name TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        return conn
+
+    def load(self):
+        """인덱스 로드 + 디렉터리와 대조 (다른 컨테이너가 쓴 파일 편입, 사라진 파일 제거)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT name, size, created_at, last_access, hits FROM entries").fetchall()
+        finally:
+            conn.close()
+        indexed = {name: _Entry(size, created, last, hits) for name, size, created, last, hits in rows}
+
+        on_disk = {}
+        with os.scandir(self.cache_dir) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith(self.suffix) and not e.name.startswith("."):
+                    on_disk[e.name] = e.stat()
+
+        self._entries = {}
+        for name, st in on_disk.items():
+            entry = indexed.get(name)
+            if entry is None or entry.size != st.st_size:
+                entry = _Entry(st.st_size, st.st_mtime, st.st_mtime, entry.hits if entry else 0)
+                self._dirty_rows.add(name)
+            self._entries[name] = entry
+        self._deleted_rows |= set(indexed) - set(on_disk)
+        self._loaded = True
+        print(f"[CACHE] Index loaded: {len(self._entries)} files, {self.total_bytes / 1024 ** 3:.2f}GB "
+              f"(reconciled +{len(self._dirty_rows)} / -{len(self._deleted_rows)})")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    async def ready(self):
+        """첫 사용 시 인덱스 로드 (디렉터리 스캔은 event loop 밖에서)"""
+        if not self._loaded:
+            await asyncio.to_thread(self._ensure_loaded)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(e.size for e in self._entries.values())
+
+    # ── 조회 / 등록 ──────────────────────────────────────────────────────
+    def path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def lookup(self, name: str) -> Optional[str]:
+        """인덱스에 있으면 경로 반환 + LRU 갱신 (디스크 확인 없음)"""
+        self._ensure_loaded()
+        entry = self._entries.get(name)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry.hits += 1
+        entry.last_access = time.time()
+        self._dirty_rows.add(name)
+        self._start_flush_loop()
+        return self.path(name)
+
+    def contains(self, name: str) -> bool:
+        """hit/LRU 통계에 영향 없는 존재 확인 (prefetch 중복 방지용)"""
+        self._ensure_loaded()
+        return name in self._entries
+
+    def forget(self, name: str):
+        """인덱스에는 있었지만 파일이 사라진 경우 (다른 컨테이너가 evict 등)"""
+        if self._entries.pop(name, None) is not None:
+            self._dirty_rows.discard(name)
+            self._deleted_rows.add(name)
+
+    def add(self, path: str):
+        """새 캐시 파일 등록 → 필요 시 eviction"""
+        self._ensure_loaded()
+        name = os.path.basename(path)
+        now = time.time()
+        self._entries[name] = _Entry(os.path.getsize(path), now, now)
+        self._dirty_rows.add(name)
+        self._deleted_rows.discard(name)
+        self._files_changed = True
+        self.evict(protect=name)
+        self._start_flush_loop()
+
+    def mark_changed(self):
+        """인덱스 밖 파일(메타데이터 등)을 썼을 때 → 다음 flush에서 volume commit"""
+        self._files_changed = True
+        self._start_flush_loop()
+
+    def evict(self, protect: Optional[str] = None) -> List[str]:
+        """budget 초과 시 LRU 순으로 low watermark까지 삭제"""
+        total = self.total_bytes
+        if total <= self.budget_bytes:
+            return []
+        target = self.budget_bytes * self.low_watermark
+        victims = []
+        for name in sorted(self._entries, key=lambda n: self._entries[n].last_access):
+            if total <= target:
+                break
+            if name == protect:
+                continue
+            entry = self._entries.pop(name)
+            try:
+                os.unlink(self.path(name))
+            except FileNotFoundError:
+                pass
+            total -= entry.size
+            self.evictions += 1
+            self.evicted_bytes += entry.size
+            self._dirty_rows.discard(name)
+            self._deleted_rows.add(name)
+            victims.append(name)
+        if victims:
+            self._files_changed = True
+            print(f"[CACHE] Evicted {len(victims)} files → {total / 1024 ** 3:.2f}GB / "
+                  f"{self.budget_bytes / 1024 ** 3:.2f}GB")
+        return victims
+
+    # ── flush ────────────────────────────────────────────────────────────
+    def _write_rows(self, upserts: list, deletes: list):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO entries (name, size, created_at, last_access, hits) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET size=excluded.size, last_access=excluded.last_access, "
+                    "hits=excluded.hits",
+                    upserts,
+                )
+                conn.executemany("DELETE FROM entries WHERE name = ?", [(n,) for n in deletes])
+        finally:
+            conn.close()
+
+    async def flush(self):
+        """모아둔 변경을 SQLite 1 트랜잭션 + volume commit 1회로 반영"""
+        if not (self._dirty_rows or self._deleted_rows or self._files_changed):
+            return
+        upserts = [
+            (n, e.size, e.created_at, e.last_access, e.hits)
+            for n in self._dirty_rows if (e := self._entries.get(n)) is not None
+        ]
+        deletes = list(self._deleted_rows)
+        self._dirty_rows, self._deleted_rows = set(), set()
+        self._files_changed = False
+        await asyncio.to_thread(self._write_rows, upserts, deletes)
+        if self.commit:
+            await self.commit()
+            self.commits += 1
+
+    def _start_flush_loop(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[CACHE] Flush failed: {type(e).__name__}: {e}")
+
+    async def aclose(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+        await self.flush()
+
+    def stats(self, top: int = 10) -> dict:
+        self._ensure_loaded()
+        lookups = self.hits + self.misses
+        hottest = sorted(self._entries.items(), key=lambda kv: kv[1].hits, reverse=True)[:top]
+        return {
+            "files": len(self._entries),
+            "total_bytes": self.total_bytes,
+            "budget_bytes": self.budget_bytes,
+            "usage_ratio": round(self.total_bytes / self.budget_bytes, 4) if self.budget_bytes else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "volume_commits": self.commits,
+            "pending_rows": len(self._dirty_rows) + len(self._deleted_rows),
+            "hottest": [{"name": n, "hits": e.hits, "size": e.size, "last_access": e.last_access}
+                        for n, e in hottest],
+        }
@@ -0,0 +1,284 @@
+"""
+1080p Export Worker
+- ffmpeg를 asyncio subprocess로 실행 (event loop 블로킹 X), 출력은 stdout pipe → 임시 파일 없음
+- 동시 변환 수 제한 (worker 슬롯 = asyncio.Semaphore)
+- single-flight: 같은 task_id 동시 요청은 변환 1회를 공유
+- 변환 결과는 CACHE_DIR의 .part 파일에 쓰면서 동시에 모든 요청자에게 스트리밍 (tail-follow)
+  → 완료 시 {task_id}_1080p.mp4로 rename + on_complete(캐시 인덱스 등록)
+- speculative prefetch: 태스크 성공 직후 미리 변환 (동시 실행 max_speculative개, 나머지는 대기열)
+  → 대기 중인 prefetch에 실제 요청이 합류하면 대기열을 건너뛰고 즉시 시작
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+CHUNK_SIZE = 256 * 1024  # 256KB
+
+
+def ffmpeg_1080p_command(source_url: str) -> List[str]:
+    """720p → 1080p (lanczos, 오디오 제거). pipe 출력이라 moov를 뒤에서 쓸 수 없으므로 fragmented MP4"""
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", source_url,
+        "-vf", "scale=1920:1080:flags=lanczos",  # 고품질 스케일링
+        "-c:v", "libx264",
+        "-preset", "ultrafast",  # 빠른 처리
+        "-crf", "18",  # 고품질 유지
+        "-tune", "animation",  # 애니메이션 최적화
+        "-an",  # 오디오 제거
+        "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+        "-f", "mp4", "pipe:1",
+    ]
+
+
+class ExportJob:
+    """단일 task_id 변환 1건 (여러 요청자가 공유)"""
+
+    def __init__(self, task_id: str, part_path: str, final_path: str):
+        self.task_id = task_id
+        self.part_path = part_path
+        self.final_path = final_path
+        self.bytes_written = 0
+        self.done = False
+        self.error: Optional[str] = None
+        self.consumers = 0
+        self.speculative = False
+        self.holds_speculative_slot = False
+        self._cond = asyncio.Condition()
+
+    async def _publish(self, nbytes: int = 0, done: bool = False, error: Optional[str] = None):
+        async with self._cond:
+            self.bytes_written += nbytes
+            if error:
+                self.error = error
+            if done or error:
+                self.done = True
+            self._cond.notify_all()
+
+    async def stream(self, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """변환 중인 파일을 따라가며 읽기 (완료 후 호출되면 완성 파일 전체)"""
+        self.consumers += 1
+        offset = 0
+        f = None
+        try:
+            while True:
+                async with self._cond:
+                    await self._cond.wait_for(lambda: self.bytes_written > offset or self.done)
+                    available, done, error = self.bytes_written, self.done, self.error
+                if error:
+                    raise RuntimeError(f"Export failed for {self.task_id}: {error}")
+                if available > offset:
+                    if f is None:
+                        # rename 이후에 들어온 요청자는 완성 파일을 연다 (열린 handle은 rename과 무관)
+                        try:
+                            f = open(self.final_path if done else self.part_path, "rb")
+                        except FileNotFoundError:
+                            f = open(self.final_path, "rb")
+                    f.seek(offset)
+                    while offset < available:
+                        chunk = f.read(min(chunk_size, available - offset))
+                        if not chunk:
+                            break
+                        offset += len(chunk)
+                        yield chunk
+                elif done:
+                    return
+        finally:
+            self.consumers -= 1
+            if f is not None:
+                f.close()
+
+
+class ExportManager:
+    """
+    task_id → 진행 중 ExportJob
+
+    Args:
+        cache_dir: 결과 저장 디렉터리 (Modal volume mount)
+        max_workers: 동시에 실행할 ffmpeg 프로세스 수
+        on_complete: 완료 후 호출 (final_path) → 캐시 인덱스 등록 등
+        build_command: source_url → argv (기본: ffmpeg_1080p_command)
+        max_speculative: 동시에 실행할 prefetch 수 (max_workers보다 작게 → 실제 요청용 슬롯 확보)
+        max_pending_speculative: prefetch 대기열 상한 (초과분은 버림)
+        on_transcode: ffmpeg 종료마다 (결과 "completed" / "failed", 변환 시간 초) → /metrics
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_workers: int = 2,
+        on_complete: Optional[Callable[[str], Awaitable[None]]] = None,
+        build_command: Callable[[str], List[str]] = ffmpeg_1080p_command,
+        max_speculative: int = 1,
+        max_pending_speculative: int = 100,
+        on_transcode: Optional[Callable[[str, float], None]] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.on_complete = on_complete
+        self.build_command = build_command
+        self.on_transcode = on_transcode
+        self._slots = asyncio.Semaphore(max_workers)
+        self._jobs: Dict[str, ExportJob] = {}
+        self._tasks: set = set()  # 실행 중 task 참조 유지 (GC 방지)
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+
+        self.max_speculative = max_speculative
+        self.max_pending_speculative = max_pending_speculative
+        self._pending_speculative: "OrderedDict[str, tuple]" = OrderedDict()  # task_id → (job, source_url)
+        self._speculative_running = 0
+        self._speculative_seen: "OrderedDict[str, None]" = OrderedDict()     # 같은 태스크 재시도 방지
+        self.speculative_started = 0
+        self.speculative_joined = 0
+        self.speculative_dropped = 0
+
+    def final_path(self, task_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{task_id}_1080p.mp4")
+
+    def active(self, task_id: str) -> Optional[ExportJob]:
+        return self._jobs.get(task_id)
+
+    def get_or_start(self, task_id: str, source_url: str) -> ExportJob:
+        """진행 중인 변환이 있으면 합류, 없으면 새로 시작"""
+        job = self._jobs.get(task_id)
+        if job is not None:
+            self.coalesced += 1
+            if job.speculative:
+                self.speculative_joined += 1
+            pending = self._pending_speculative.pop(task_id, None)
+            if pending is not None:
+                # 아직 대기 중인 prefetch → 실제 요청이므로 즉시 시작
+                print(f"[EXPORT {task_id}] Promoting queued prefetch")
+                self._launch(job, pending[1])
+            else:
+                print(f"[EXPORT {task_id}] Joining in-flight export ({job.bytes_written} bytes so far)")
+            return job
+        job = self._new_job(task_id)
+        self._launch(job, source_url)
+        return job
+
+    def prefetch(self, task_id: str, source_url: str) -> bool:
+        """태스크 성공 직후 미리 변환 예약 (이미 진행/시도한 태스크면 False)"""
+        if task_id in self._jobs or task_id in self._speculative_seen:
+            return False
+        self._speculative_seen[task_id] = None
+        while len(self._speculative_seen) > 4096:
+            self._speculative_seen.popitem(last=False)
+        if len(self._pending_speculative) >= self.max_pending_speculative:
+            self.speculative_dropped += 1
+            print(f"[EXPORT {task_id}] Prefetch queue full, skipping")
+            return False
+        job = self._new_job(task_id)
+        job.speculative = True
+        self._pending_speculative[task_id] = (job, source_url)
+        print(f"[EXPORT {task_id}] Prefetch queued ({len(self._pending_speculative)} pending)")
+        self._pump_speculative()
+        return True
+
+    def _pump_speculative(self):
+        while self._speculative_running < self.max_speculative and self._pending_speculative:
+            _, (job, source_url) = self._pending_speculative.popitem(last=False)
+            job.holds_speculative_slot = True
+            self._speculative_running += 1
+            self.speculative_started += 1
+            self._launch(job, source_url)
+
+    def _new_job(self, task_id: str) -> ExportJob:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        job = ExportJob(task_id, os.path.join(self.cache_dir, f".{task_id}_1080p.mp4.part"), self.final_path(task_id))
+        self._jobs[task_id] = job
+        return job
+
+    def _launch(self, job: ExportJob, source_url: str):
+        # 요청자 연결이 끊겨도 변환은 끝까지 진행 → 캐시에 남음
+        task = asyncio.get_running_loop().create_task(self._run(job, source_url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: ExportJob, source_url: str):
+        try:
+            async with self._slots:
+                print(f"[EXPORT {job.task_id}] Transcoding to 1080p...")
+                started = time.perf_counter()
+                try:
+                    await self._transcode(job, source_url)
+                except Exception:
+                    if self.on_transcode:
+                        self.on_transcode("failed", time.perf_counter() - started)
+                    raise
+                if self.on_transcode:
+                    self.on_transcode("completed", time.perf_counter() - started)
+            os.replace(job.part_path, job.final_path)
+            if self.on_complete:
+                await self.on_complete(job.final_path)
+            self.completed += 1
+            print(f"[EXPORT {job.task_id}] Cached: {os.path.basename(job.final_path)} "
+                  f"({job.bytes_written / (1024 * 1024):.2f}MB)")
+            await job._publish(done=True)
+        except Exception as e:
+            self.failed += 1
+            print(f"[EXPORT {job.task_id}] Failed: {type(e).__name__}: {e}")
+            if os.path.exists(job.part_path):
+                os.unlink(job.part_path)
+            await job._publish(error=f"{type(e).__name__}: {e}")
+        finally:
+            self._jobs.pop(job.task_id, None)
+            if job.holds_speculative_slot:
+                self._speculative_running -= 1
+                self._pump_speculative()
+
+    async def _transcode(self, job: ExportJob, source_url: str):
+        proc = await asyncio.create_subprocess_exec(
+            *self.build_command(source_url),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stderr_tail: deque = deque(maxlen=20)
+
+        async def drain_stderr():
+            # stderr를 읽지 않으면 pipe 버퍼가 차서 ffmpeg가 멈춤
+            async for line in proc.stderr:
+                stderr_tail.append(line.decode(errors="replace").rstrip())
+
+        stderr_task = asyncio.create_task(drain_stderr())
+        try:
+            with open(job.part_path, "wb") as out:
+                while True:
+                    chunk = await proc.stdout.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    out.flush()
+                    await job._publish(len(chunk))
+            returncode = await proc.wait()
+            await stderr_task
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            stderr_task.cancel()
+            raise
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg exited {returncode}: {' | '.join(stderr_tail)[-300:]}")
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "active": {task_id: job.bytes_written for task_id, job in self._jobs.items()},
+            "completed": self.completed,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "speculative": {
+                "running": self._speculative_running,
+                "pending": len(self._pending_speculative),
+                "started": self.speculative_started,
+                "joined_by_request": self.speculative_joined,
+                "dropped": self.speculative_dropped,
+            },
+        }
@@ -0,0 +1,287 @@
+"""
+Remote Video Fetch Cache
+- Evolink / Runware 결과 영상 다운로드 프록시용 공유 캐시 (Modal volume)
+- 키: 정규화 URL (host 소문자, fragment / 서명·만료 query 제거, query 정렬)
+  다운로드 후 content hash로 저장: {sha256}.mp4 → 재서명된 URL로 같은 영상이 와도 파일 1개
+  URL → hash 매핑은 urls/{url_key}.json
+- miss: upstream을 .part 파일에 쓰면서(write-through) 요청자에게 동시에 스트리밍 (tail-follow)
+  같은 URL 동시 요청은 다운로드 1회 공유, 요청자가 끊겨도 다운로드는 끝까지 → 캐시에 남음
+- hit: 파일 스트리밍 + Range / content hash ETag / 304 (common.filestream)
+- LRU + byte budget은 CacheIndex 재사용
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from proxy.cache_index import CacheIndex
+
+CHUNK_SIZE = 256 * 1024  # 256KB
+
+# CDN 서명 / 만료 파라미터: 같은 객체라도 URL마다 달라지므로 키에서 제외
+_SIGNING_PARAMS = {"expires", "signature", "sig", "token", "policy", "key-pair-id", "auth_key", "e", "se", "sp", "sv"}
+_SIGNING_PREFIXES = ("x-amz-", "x-tos-", "x-goog-", "x-oss-")
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _SIGNING_PARAMS and not k.lower().startswith(_SIGNING_PREFIXES)
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()[:32]
+
+
+class FetchJob:
+    """URL 1개 다운로드 (여러 요청자가 공유)"""
+
+    def __init__(self, key: str, url: str, part_path: str):
+        self.key = key
+        self.url = url
+        self.part_path = part_path
+        self.final_path: Optional[str] = None
+        self.sha256: Optional[str] = None
+        self.total_size: Optional[int] = None  # upstream Content-Length (모르면 None)
+        self.bytes_written = 0
+        self.done = False
+        self.error: Optional[str] = None
+        self.upstream_status: Optional[int] = None
+        self.consumers = 0
+        self.started = asyncio.Event()  # upstream 응답 헤더 확인 (또는 실패)
+        self._cond = asyncio.Condition()
+
+    async def _publish(self, nbytes: int = 0, done: bool = False, error: Optional[str] = None):
+        async with self._cond:
+            self.bytes_written += nbytes
+            if error:
+                self.error = error
+            if done or error:
+                self.done = True
+            self._cond.notify_all()
+
+    async def wait(self) -> str:
+        """다운로드 완료까지 대기 → 캐시 파일 경로 (render 입력 등 완성 파일이 필요한 경우)"""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.done)
+        if self.error:
+            raise RuntimeError(f"Fetch failed for {self.url[:80]}: {self.error}")
+        return self.final_path
+
+    async def stream(self, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """다운로드 중인 파일을 따라가며 읽기 (완료 후 호출되면 완성 파일 전체)"""
+        self.consumers += 1
+        offset = 0
+        f = None
+        try:
+            while True:
+                async with self._cond:
+                    await self._cond.wait_for(lambda: self.bytes_written > offset or self.done)
+                    available, done, error = self.bytes_written, self.done, self.error
+                if error:
+                    raise RuntimeError(f"Fetch failed for {self.url[:80]}: {error}")
+                if available > offset:
+                    if f is None:
+                        # rename 이후 들어온 요청자는 완성 파일을 연다 (열린 handle은 rename과 무관)
+                        try:
+                            f = open(self.part_path, "rb")
+                        except FileNotFoundError:
+                            f = open(self.final_path, "rb")
+                    f.seek(offset)
+                    while offset < available:
+                        chunk = f.read(min(chunk_size, available - offset))
+                        if not chunk:
+                            break
+                        offset += len(chunk)
+                        yield chunk
+                elif done:
+                    return
+        finally:
+            self.consumers -= 1
+            if f is not None:
+                f.close()
+
+
+class RemoteFetchCache:
+    """
+    Args:
+        index: 캐시 디렉터리 LRU 인덱스 (cache_dir / budget / volume commit)
+        client: upstream 다운로드에 쓸 httpx client를 돌려주는 함수 (앱 수명 keep-alive pool)
+        max_bytes: 파일 1개 크기 상한 (초과 시 다운로드 중단, 캐시 안 함)
+    """
+
+    def __init__(
+        self,
+        index: CacheIndex,
+        client: Callable[[], httpx.AsyncClient],
+        max_bytes: int = 1024 ** 3,
+    ):
+        self.index = index
+        self.cache_dir = index.cache_dir
+        self.urls_dir = os.path.join(self.cache_dir, "urls")
+        self.client = client
+        self.max_bytes = max_bytes
+        self._urls: Dict[str, dict] = {}
+        self._jobs: Dict[str, FetchJob] = {}
+        self._tasks: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+        self.fetched_bytes = 0
+        self.deduplicated = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    # ── 조회 ─────────────────────────────────────────────────────────────
+    def _read_url_meta(self, key: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.urls_dir, f"{key}.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_url_meta(self, key: str, meta: dict):
+        os.makedirs(self.urls_dir, exist_ok=True)
+        path = os.path.join(self.urls_dir, f"{key}.json")
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    async def lookup(self, url: str) -> Optional[Tuple[str, dict]]:
+        """캐시된 파일 (path, meta) 또는 None (LRU 갱신 + hit/miss 집계)"""
+        await self.index.ready()
+        key = url_key(url)
+        meta = self._urls.get(key)
+        if meta is None:
+            meta = await asyncio.to_thread(self._read_url_meta, key)
+            if meta is None:
+                self.misses += 1
+                return None
+            self._urls[key] = meta
+        path = self.index.lookup(f"{meta['sha256']}.mp4")
+        if path is None:
+            # LRU로 evict된 파일 → 다시 받음
+            self._urls.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path, meta
+
+    def forget(self, url: str, meta: dict):
+        """인덱스에는 있었지만 파일이 사라진 경우 (다른 컨테이너가 evict 등)"""
+        self._urls.pop(url_key(url), None)
+        self.index.forget(f"{meta['sha256']}.mp4")
+
+    def active(self, url: str) -> Optional[FetchJob]:
+        return self._jobs.get(url_key(url))
+
+    # ── 다운로드 ─────────────────────────────────────────────────────────
+    def get_or_fetch(self, url: str) -> FetchJob:
+        """진행 중인 다운로드가 있으면 합류, 없으면 새로 시작"""
+        key = url_key(url)
+        job = self._jobs.get(key)
+        if job is not None:
+            self.coalesced += 1
+            return job
+        os.makedirs(self.cache_dir, exist_ok=True)
+        job = FetchJob(key, url, os.path.join(self.cache_dir, f".{key}.{uuid.uuid4().hex[:8]}.part"))
+        self._jobs[key] = job
+        # 요청자 연결이 끊겨도 다운로드는 끝까지 진행 → 캐시에 남음
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: FetchJob):
+        digest = hashlib.sha256()
+        f = None
+        try:
+            client = self.client()
+            request = client.build_request("GET", job.url, headers={"Accept-Encoding": "identity"})
+            upstream = await client.send(request, stream=True, follow_redirects=True)
+            try:
+                job.upstream_status = upstream.status_code
+                if upstream.status_code != 200:
+                    raise RuntimeError(f"upstream HTTP {upstream.status_code}")
+                length = upstream.headers.get("Content-Length")
+                job.total_size = int(length) if length and length.isdigit() else None
+                if job.total_size is not None and job.total_size > self.max_bytes:
+                    raise RuntimeError(f"too large: {job.total_size} bytes")
+                f = await asyncio.to_thread(open, job.part_path, "wb")
+                job.started.set()
+                async for chunk in upstream.aiter_raw(CHUNK_SIZE):
+                    if job.bytes_written + len(chunk) > self.max_bytes:
+                        raise RuntimeError(f"too large: exceeds {self.max_bytes} bytes")
+                    digest.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+                    await asyncio.to_thread(f.flush)
+                    await job._publish(len(chunk))
+            finally:
+                await upstream.aclose()
+            await asyncio.to_thread(f.close)
+            if job.total_size is not None and job.bytes_written != job.total_size:
+                raise RuntimeError(f"truncated: {job.bytes_written}/{job.total_size} bytes")
+
+            job.sha256 = digest.hexdigest()
+            name = f"{job.sha256}.mp4"
+            job.final_path = self.index.path(name)
+            await self.index.ready()
+            if self.index.contains(name) and os.path.exists(job.final_path):
+                # 다른 URL로 이미 받은 같은 영상 → 파일 재사용
+                self.deduplicated += 1
+            else:
+                await asyncio.to_thread(os.replace, job.part_path, job.final_path)
+                self.index.add(job.final_path)
+            meta = {"sha256": job.sha256, "size": job.bytes_written, "url": normalize_url(job.url),
+                    "fetched_at": time.time()}
+            await asyncio.to_thread(self._write_url_meta, job.key, meta)
+            self._urls[job.key] = meta
+            self.index.mark_changed()
+            self.fetched += 1
+            self.fetched_bytes += job.bytes_written
+            print(f"[FETCH] Cached {job.url[:60]}... → {name} ({job.bytes_written / (1024 * 1024):.2f}MB)")
+            await job._publish(done=True)
+        except Exception as e:
+            self.failed += 1
+            print(f"[FETCH] Failed {job.url[:60]}...: {type(e).__name__}: {e}")
+            await job._publish(error=f"{type(e).__name__}: {e}")
+        finally:
+            job.started.set()
+            if f is not None and not f.closed:
+                f.close()
+            self._jobs.pop(job.key, None)
+            # 요청자가 아직 읽는 중이면 part 파일이 rename되었거나(완성 파일) 실패 → 정리
+            try:
+                os.unlink(job.part_path)
+            except FileNotFoundError:
+                pass
+
+    async def aclose(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "urls_cached": len(self._urls),
+            "in_flight": len(self._jobs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetched": self.fetched,
+            "fetched_bytes": self.fetched_bytes,
+            "deduplicated": self.deduplicated,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "index": self.index.stats(top=5),
+        }
@@ -0,0 +1,241 @@
+"""
+Upstream HTTP Client Pool
+- upstream(byteplus / evolink / imgur / video CDN)별 httpx.AsyncClient 1개를 앱 수명 동안 재사용
+  → 요청마다 DNS + TCP + TLS 재협상하던 비용 제거 (keep-alive)
+- upstream별 timeout / connection limit / HTTP/2 설정 분리
+- 통계: connection 재사용(hit) / 신규 연결(miss), 응답 헤더 수신까지 latency p50/p95
+- upstream host별 circuit breaker + 멱등 요청(GET / HEAD) jitter 재시도 (common.resilience)
+  → 장애 중에는 upstream을 두드리지 않고 CircuitOpenError로 즉시 실패
+"""
+
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from common import resilience
+from common.resilience import CircuitBreaker, RetryPolicy
+
+# upstream 장애로 보는 응답 (그 외 4xx는 요청 문제 → breaker 성공)
+# 429는 API 키별 제한 → host 공유 breaker에 넣지 않음 (키별 처리는 rate_limit.note_upstream_throttle)
+FAILURE_STATUS = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@dataclass
+class UpstreamConfig:
+    timeout: httpx.Timeout
+    max_connections: int = 50
+    max_keepalive: int = 20  # 동시 요청 수 이하면 전부 재사용됨
+    keepalive_expiry: float = 60.0
+    http2: bool = True  # 전역 HTTP/2 플래그가 켜졌을 때만 적용
+    retry: RetryPolicy = field(default_factory=lambda: RetryPolicy(attempts=3, base=0.2, cap=2.0))
+
+
+DEFAULT_UPSTREAMS: Dict[str, UpstreamConfig] = {
+    # 태스크 생성/조회: 응답이 작고 빠름
+    "byteplus": UpstreamConfig(httpx.Timeout(30.0, connect=5.0)),
+    "evolink": UpstreamConfig(httpx.Timeout(30.0, connect=5.0)),
+    "imgur": UpstreamConfig(httpx.Timeout(30.0, connect=5.0), max_connections=10, max_keepalive=5),
+    # 자체 Modal 생성 앱 job API (LTX / SeeDANCE): cold start 동안 /start 응답이 늦을 수 있음
+    "modal": UpstreamConfig(httpx.Timeout(60.0, connect=10.0), max_connections=20, max_keepalive=10),
+    # 비디오 CDN (volces / evolink / runware): 큰 응답, 긴 read timeout
+    "video": UpstreamConfig(
+        httpx.Timeout(120.0, connect=10.0), max_connections=100, max_keepalive=40, keepalive_expiry=30.0
+    ),
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@dataclass
+class _UpstreamStats:
+    requests: int = 0
+    responses: int = 0
+    pool_hits: int = 0      # 기존 keep-alive connection 재사용
+    pool_misses: int = 0    # 새 TCP(+TLS) 연결 수립
+    http_versions: Dict[str, int] = field(default_factory=dict)
+    latencies: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.latencies)
+
+        def _q(q: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 1)
+
+        handled = self.pool_hits + self.pool_misses
+        return {
+            "requests": self.requests,
+            "responses": self.responses,
+            "pool_hits": self.pool_hits,
+            "pool_misses": self.pool_misses,
+            "pool_hit_ratio": round(self.pool_hits / handled, 3) if handled else None,
+            "http_versions": dict(self.http_versions),
+            "latency_ms_p50": _q(0.50),
+            "latency_ms_p95": _q(0.95),
+        }
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """host별 breaker 확인 → 요청 → 실패(transport 에러 / 5xx)면 멱등 요청만 재시도"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, name: str, retry: RetryPolicy,
+                 failure_threshold: int, reset_timeout: float):
+        self.transport = transport
+        self.name = name
+        self.retry = retry
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(
+                f"{self.name}:{host}", self.failure_threshold, self.reset_timeout
+            )
+        return breaker
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async def _close(response: httpx.Response):
+            await response.aclose()
+
+        return await resilience.call(
+            self.breaker(request.url.host),
+            lambda: self.transport.handle_async_request(request),
+            self.retry if request.method in IDEMPOTENT_METHODS else resilience.NO_RETRY,
+            failure_of=lambda r: f"HTTP {r.status_code}" if r.status_code in FAILURE_STATUS else None,
+            is_failure=lambda e: isinstance(e, httpx.TransportError),
+            on_discard=_close,
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class UpstreamClients:
+    """
+    upstream 이름 → 공유 httpx.AsyncClient
+
+    Args:
+        upstreams: 이름 → UpstreamConfig (기본: DEFAULT_UPSTREAMS)
+        http2: None이면 ENV UPSTREAM_HTTP2=true 일 때만 사용 (h2 패키지 필요)
+        breaker_failures: 연속 실패 몇 번에 breaker open (ENV BREAKER_FAILURES)
+        breaker_reset_sec: open 유지 시간 (ENV BREAKER_RESET_SEC)
+        observer: 응답마다 (upstream 이름, status, 초) → /metrics histogram 등
+    """
+
+    def __init__(
+        self,
+        upstreams: Optional[Dict[str, UpstreamConfig]] = None,
+        http2: Optional[bool] = None,
+        breaker_failures: Optional[int] = None,
+        breaker_reset_sec: Optional[float] = None,
+        observer: Optional[Callable[[str, int, float], None]] = None,
+    ):
+        self.upstreams = dict(upstreams or DEFAULT_UPSTREAMS)
+        if http2 is None:
+            http2 = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+        if http2 and not _http2_available():
+            print("[HTTP_POOL] h2 not installed, falling back to HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.breaker_failures = breaker_failures or int(os.getenv("BREAKER_FAILURES", "5"))
+        self.breaker_reset_sec = breaker_reset_sec or float(os.getenv("BREAKER_RESET_SEC", "30"))
+        self.observer = observer
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, ResilientTransport] = {}
+        self._stats: Dict[str, _UpstreamStats] = {name: _UpstreamStats() for name in self.upstreams}
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """upstream 전용 client (첫 사용 시 생성, 이후 재사용)"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._build(name)
+        return client
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        cfg = self.upstreams[name]
+        stats = self._stats[name]
+
+        async def on_request(request: httpx.Request):
+            stats.requests += 1
+            request.extensions["pool_t0"] = time.perf_counter()
+            request.extensions["pool_new_conn"] = False
+
+            async def trace(event: str, info: dict):
+                if event == "connection.connect_tcp.started":
+                    request.extensions["pool_new_conn"] = True
+
+            request.extensions["trace"] = trace
+
+        async def on_response(response: httpx.Response):
+            request = response.request
+            stats.responses += 1
+            elapsed = time.perf_counter() - request.extensions.get("pool_t0", time.perf_counter())
+            stats.latencies.append(elapsed)
+            if self.observer is not None:
+                self.observer(name, response.status_code, elapsed)
+            if request.extensions.get("pool_new_conn"):
+                stats.pool_misses += 1
+            else:
+                stats.pool_hits += 1
+            version = response.http_version
+            stats.http_versions[version] = stats.http_versions.get(version, 0) + 1
+
+        print(f"[HTTP_POOL] Opening client '{name}' (http2={self.http2 and cfg.http2})")
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_keepalive,
+                keepalive_expiry=cfg.keepalive_expiry,
+            ),
+            http2=self.http2 and cfg.http2,
+        )
+        previous = self._transports.get(name)
+        resilient = ResilientTransport(transport, name, cfg.retry, self.breaker_failures, self.breaker_reset_sec)
+        if previous is not None:
+            resilient.breakers = previous.breakers  # client 재생성 후에도 breaker 상태 유지
+        self._transports[name] = resilient
+        return httpx.AsyncClient(
+            timeout=cfg.timeout,
+            transport=resilient,
+            event_hooks={"request": [on_request], "response": [on_response]},
+        )
+
+    async def aclose(self):
+        """앱 shutdown 시 모든 connection 정리"""
+        clients, self._clients = self._clients, {}
+        for name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                print(f"[HTTP_POOL] Close '{name}' failed: {type(e).__name__}: {e}")
+
+    def breaker_stats(self, name: str) -> dict:
+        transport = self._transports.get(name)
+        return {host: b.stats() for host, b in transport.breakers.items()} if transport else {}
+
+    def stats(self) -> dict:
+        return {
+            "http2": self.http2,
+            "upstreams": {
+                name: dict(
+                    stats.snapshot(),
+                    open=name in self._clients and not self._clients[name].is_closed,
+                    breakers=self.breaker_stats(name),
+                )
+                for name, stats in self._stats.items()
+            },
+        }
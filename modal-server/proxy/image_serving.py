@@ -0,0 +1,150 @@
+"""
+Upload Image Serving
+- /api/v3/uploads/{filename} 응답 생성: 파일 스트리밍 + content hash ETag + 304 / Range
+- {sha256}.{ext} / 파생본 {sha256}_{WxH}.png (content-addressed) 파일은 내용이 바뀌지 않음 → immutable Cache-Control
+  그 외(이전 방식 파일명)는 최초 1회 내용 hash 계산 후 ETag로 사용, 짧은 max-age
+- MIME은 확장자가 아닌 파일 시그니처로 판별, 이미지가 아니면 서빙하지 않음
+- 작은 이미지는 메모리 LRU(byte budget)에 보관 → 반복 요청 시 volume 읽기 없음
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Mapping, Optional
+
+from starlette.responses import Response
+
+from common.filestream import bytes_response, file_response, is_not_modified
+from proxy.uploads import sniff_image
+
+_HASHED_NAME_RE = re.compile(r"^([0-9a-f]{64}(?:_\d+x\d+)?)\.(png|jpg|webp)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=3600"
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class _ImageInfo:
+    __slots__ = ("path", "st", "mime", "etag", "immutable")
+
+    def __init__(self, path: str, st: os.stat_result, mime: str, etag: str, immutable: bool):
+        self.path = path
+        self.st = st
+        self.mime = mime
+        self.etag = etag
+        self.immutable = immutable
+
+
+class ImageServer:
+    """
+    Args:
+        upload_dir: 업로드 디렉터리 (volume mount)
+        memory_budget_bytes: 메모리 LRU 총 용량
+        max_item_bytes: 이 크기 이하 이미지만 메모리에 보관
+    """
+
+    def __init__(self, upload_dir: str, memory_budget_bytes: int = 64 * 1024 * 1024, max_item_bytes: int = 512 * 1024):
+        self.upload_dir = upload_dir
+        self.memory_budget_bytes = memory_budget_bytes
+        self.max_item_bytes = max_item_bytes
+        self._info: Dict[str, _ImageInfo] = {}
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self.memory_hits = 0
+        self.disk_reads = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def valid_name(filename: str) -> bool:
+        """하위 경로 / 숨김 파일(.part, meta 등) 접근 차단"""
+        return bool(filename) and "/" not in filename and "\\" not in filename and not filename.startswith(".")
+
+    def _load_info(self, filename: str) -> Optional[_ImageInfo]:
+        path = os.path.join(self.upload_dir, filename)
+        try:
+            st = os.stat(path)
+            with open(path, "rb") as f:
+                head = f.read(16)
+                sniffed = sniff_image(head)
+                if sniffed is None:
+                    return None
+                hashed = _HASHED_NAME_RE.match(filename)
+                if hashed:
+                    etag = f'"{hashed.group(1)}"'
+                else:
+                    # 이전 방식 파일명: 내용 hash를 1회 계산 (업로드 이미지는 수 MB 이하)
+                    digest = hashlib.sha256(head)
+                    for block in iter(lambda: f.read(256 * 1024), b""):
+                        digest.update(block)
+                    etag = f'"{digest.hexdigest()}"'
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return None
+        return _ImageInfo(path, st, sniffed[0], etag, bool(hashed))
+
+    async def info(self, filename: str) -> Optional[_ImageInfo]:
+        info = self._info.get(filename)
+        if info is None:
+            info = await asyncio.to_thread(self._load_info, filename)
+            if info is not None:
+                self._info[filename] = info
+        return info
+
+    def _remember(self, filename: str, data: bytes):
+        self._memory[filename] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_budget_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    async def response(self, filename: str, request_headers: Mapping[str, str]) -> Optional[Response]:
+        """이미지 응답 (없거나 이미지가 아니면 None → 404)"""
+        if not self.valid_name(filename):
+            return None
+        info = await self.info(filename)
+        if info is None:
+            return None
+
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if info.immutable else MUTABLE_CACHE_CONTROL,
+            "X-Content-Type-Options": "nosniff",
+        }
+
+        if is_not_modified(request_headers, info.etag, info.st.st_mtime):
+            # 조건부 요청은 파일을 읽지 않고 304
+            self.not_modified += 1
+            return bytes_response(b"", request_headers, info.mime, info.etag, info.st.st_mtime, headers)
+
+        data = self._memory.get(filename)
+        if data is not None:
+            self.memory_hits += 1
+            self._memory.move_to_end(filename)
+        elif info.st.st_size <= self.max_item_bytes:
+            try:
+                data = await asyncio.to_thread(_read_file, info.path)
+            except FileNotFoundError:
+                self._info.pop(filename, None)
+                return None
+            self.disk_reads += 1
+            self._remember(filename, data)
+
+        if data is not None:
+            return bytes_response(data, request_headers, info.mime, info.etag, info.st.st_mtime, headers)
+        self.disk_reads += 1
+        return file_response(info.path, request_headers, media_type=info.mime,
+                             extra_headers=headers, etag=info.etag, st=info.st)
+
+    def stats(self) -> dict:
+        return {
+            "known_files": len(self._info),
+            "memory_items": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_reads": self.disk_reads,
+            "not_modified": self.not_modified,
+        }
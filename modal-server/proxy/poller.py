@@ -0,0 +1,308 @@
+"""
+Task Poller
+- BytePlus / Evolink 등 진행 중인 upstream 태스크를 프록시 안에서 한 곳에서 폴링
+  (태스크마다 프론트/워커가 각자 주기로 폴링하던 것을 대체)
+- 태스크별 다음 조회 시각을 heap으로 관리 → 스케줄 루프 1개 + upstream 동시 조회 수 제한
+- 간격은 common.polling.PollSchedule (예상 완료 근처 촘촘, 에러 시 backoff)
+  예상 완료 시간은 provider별 실제 완료 시간 EMA로 갱신
+- 상태 변화는 구독자 queue로 push (SSE 라우트에서 사용)
+- upstream 조회 수 / 완료 인지 지연(time-to-notice) 측정
+"""
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from common.polling import PollSchedule
+
+# (status_code, payload) — payload: 200이면 dict, 아니면 에러 텍스트
+FetchResult = Tuple[int, Any]
+
+# 재시도해도 결과가 같은 응답 → 폴링 중단
+PERMANENT_ERRORS = {400, 401, 403, 404}
+
+
+@dataclass
+class PollProvider:
+    fetch: Callable[[str, str], Awaitable[FetchResult]]
+    schedule: PollSchedule = field(default_factory=PollSchedule)
+    success: Set[str] = field(default_factory=lambda: {"succeeded"})
+    failure: Set[str] = field(default_factory=lambda: {"failed", "cancelled", "expired"})
+
+    @property
+    def terminal(self) -> Set[str]:
+        return self.success | self.failure
+
+
+class _Tracked:
+    __slots__ = (
+        "provider", "task_id", "api_key", "created_at", "created_known", "next_due",
+        "errors", "polls", "status", "payload", "seq", "finished", "last_event",
+        "last_poll_at", "subscribers",
+    )
+
+    def __init__(self, provider: str, task_id: str, api_key: str, created_at: Optional[float]):
+        self.provider = provider
+        self.task_id = task_id
+        self.api_key = api_key
+        self.created_known = created_at is not None
+        self.created_at = created_at if created_at is not None else time.time()
+        self.next_due: Optional[float] = None
+        self.errors = 0
+        self.polls = 0
+        self.status: Optional[str] = None
+        self.payload: Optional[dict] = None
+        self.seq = 0
+        self.finished = False
+        self.last_event: Optional[dict] = None
+        self.last_poll_at: Optional[float] = None
+        self.subscribers: Set[asyncio.Queue] = set()
+
+
+class TaskPoller:
+    """
+    Args:
+        providers: provider 이름 → PollProvider
+        concurrency: upstream 동시 조회 상한
+        max_age: 이 시간(초) 넘게 끝나지 않으면 timeout 처리
+        retain_sec: 종료 후 늦게 온 구독자를 위해 마지막 상태를 보관하는 시간 (초)
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, PollProvider],
+        concurrency: int = 20,
+        max_age: float = 1800.0,
+        retain_sec: float = 600.0,
+    ):
+        self.providers = providers
+        self.max_age = max_age
+        self.retain_sec = retain_sec
+        self._concurrency = concurrency
+        self._gate: Optional[asyncio.Semaphore] = None
+        self._tracked: Dict[Tuple[str, str, str], _Tracked] = {}
+        self._heap: list = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._polls: Set[asyncio.Task] = set()
+
+        self.requests = {name: 0 for name in providers}
+        self.errors = {name: 0 for name in providers}
+        self.completed = 0
+        self.timeouts = 0
+        self._notice_delays: deque = deque(maxlen=1000)
+        self._polls_per_task: deque = deque(maxlen=1000)
+
+    @staticmethod
+    def _key(provider: str, api_key: str, task_id: str) -> Tuple[str, str, str]:
+        # 다른 API key 구독자와 상태를 공유하지 않음, 키 원문은 key에 넣지 않음
+        return provider, hashlib.sha256(api_key.encode()).hexdigest()[:16], task_id
+
+    # ── 등록 / 구독 ──────────────────────────────────────────────────────
+    def track(self, provider: str, task_id: str, api_key: str, created_at: Optional[float] = None) -> _Tracked:
+        """
+        태스크 폴링 등록 (이미 등록돼 있으면 기존 항목 반환)
+        created_at: 태스크 생성 시각 (unix time, 생성 직후 등록할 때 전달)
+        """
+        if provider not in self.providers:
+            raise ValueError(f"Unknown provider: {provider}")
+        key = self._key(provider, api_key, task_id)
+        t = self._tracked.get(key)
+        if t is not None:
+            return t
+        t = _Tracked(provider, task_id, api_key, created_at)
+        self._tracked[key] = t
+        schedule = self.providers[provider].schedule
+        self._schedule(t, time.monotonic() + schedule.next_interval(self._age(t)))
+        print(f"[POLL] Tracking {provider}/{task_id} (tracked={len(self._tracked)})")
+        return t
+
+    def subscribe(self, provider: str, task_id: str, api_key: str) -> Tuple[_Tracked, asyncio.Queue]:
+        """상태 변화 이벤트 queue 반환 (현재 상태가 있으면 바로 1건 들어 있음)"""
+        t = self.track(provider, task_id, api_key)
+        queue: asyncio.Queue = asyncio.Queue()
+        t.subscribers.add(queue)
+        if t.last_event is not None:
+            queue.put_nowait(t.last_event)
+        elif t.polls == 0 and not t.created_known:
+            # 생성 시점을 모르는 태스크 → 구독자에게 첫 상태를 바로 보여주도록 즉시 조회
+            self._schedule(t, time.monotonic())
+        return t, queue
+
+    def unsubscribe(self, t: _Tracked, queue: asyncio.Queue):
+        t.subscribers.discard(queue)
+
+    # ── 스케줄 루프 ──────────────────────────────────────────────────────
+    def _age(self, t: _Tracked) -> float:
+        return max(0.0, time.time() - t.created_at)
+
+    def _schedule(self, t: _Tracked, due: float):
+        t.next_due = due
+        heapq.heappush(self._heap, (due, next(self._counter), self._key(t.provider, t.api_key, t.task_id)))
+        self._ensure_loop()
+        self._wakeup.set()
+
+    def _ensure_loop(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._gate = asyncio.Semaphore(self._concurrency)
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while self._tracked:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, key = heapq.heappop(self._heap)
+                t = self._tracked.get(key)
+                if t is None or t.next_due != due:
+                    continue  # 재스케줄되어 무효가 된 항목
+                t.next_due = None
+                if t.finished:
+                    self._expire(key, t)
+                    continue
+                await self._gate.acquire()
+                task = asyncio.get_running_loop().create_task(self._poll(t))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+
+            timeout = max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _expire(self, key, t: _Tracked):
+        if t.subscribers:
+            self._schedule(t, time.monotonic() + self.retain_sec)
+        else:
+            self._tracked.pop(key, None)
+
+    async def _poll(self, t: _Tracked):
+        spec = self.providers[t.provider]
+        self.requests[t.provider] += 1
+        t.polls += 1
+        try:
+            status_code, payload = await spec.fetch(t.api_key, t.task_id)
+        except Exception as e:
+            status_code, payload = 0, f"{type(e).__name__}: {e}"
+        finally:
+            self._gate.release()
+
+        if status_code == 200 and isinstance(payload, dict):
+            t.errors = 0
+            self._observe(t, spec, payload)
+        elif status_code in PERMANENT_ERRORS:
+            self._finish(t, "poll_error", {"status": status_code, "error": payload})
+        else:
+            t.errors += 1
+            self.errors[t.provider] += 1
+            print(f"[POLL] {t.provider}/{t.task_id} error #{t.errors}: {status_code} {str(payload)[:200]}")
+        t.last_poll_at = time.time()
+
+        if t.finished:
+            return
+        age = self._age(t)
+        if age > self.max_age:
+            self.timeouts += 1
+            self._finish(t, "timeout", {"error": f"not finished after {int(age)}s"})
+            return
+        self._schedule(t, time.monotonic() + spec.schedule.next_interval(age, t.errors))
+
+    # ── 상태 반영 / push ─────────────────────────────────────────────────
+    def _observe(self, t: _Tracked, spec: PollProvider, payload: dict):
+        created = payload.get("created_at")
+        if isinstance(created, (int, float)) and created > 1e9:
+            t.created_at, t.created_known = float(created), True
+
+        status = payload.get("status")
+        if status is None and isinstance(payload.get("data"), dict):
+            status = payload["data"].get("status")
+        t.payload = payload
+        if status == t.status:
+            return
+        t.status = status
+        if status in spec.terminal:
+            self._record_completion(t, spec, payload)
+            self._finish(t, status, payload)
+        else:
+            self._publish(t, status, payload, terminal=False)
+
+    def _record_completion(self, t: _Tracked, spec: PollProvider, payload: dict):
+        now = time.time()
+        # upstream이 완료 시각을 주면 정확한 지연, 아니면 직전 조회 이후 경과 시간(상한)
+        updated = payload.get("updated_at")
+        if isinstance(updated, (int, float)) and 1e9 < updated <= now:
+            delay = now - updated
+        elif t.last_poll_at is not None:
+            delay = now - t.last_poll_at
+        else:
+            delay = None
+        if delay is not None:
+            self._notice_delays.append(delay)
+        self._polls_per_task.append(t.polls)
+        self.completed += 1
+
+        if t.created_known and t.status in spec.success:
+            # 예상 완료 시간 학습 (EMA) → 다음 태스크부터 촘촘한 구간이 실제 완료 시각에 맞춰짐
+            duration = (updated if isinstance(updated, (int, float)) and updated > 1e9 else now) - t.created_at
+            if 0 < duration < self.max_age:
+                spec.schedule.expected_sec = 0.8 * spec.schedule.expected_sec + 0.2 * duration
+
+    def _finish(self, t: _Tracked, status: str, payload: Any):
+        t.status = status
+        t.finished = True
+        self._publish(t, status, payload, terminal=True)
+        self._schedule(t, time.monotonic() + self.retain_sec)
+        print(f"[POLL] {t.provider}/{t.task_id} → {status} after {t.polls} polls")
+
+    def _publish(self, t: _Tracked, status: Optional[str], payload: Any, terminal: bool):
+        t.seq += 1
+        spec = self.providers[t.provider]
+        event = {
+            "provider": t.provider,
+            "task_id": t.task_id,
+            "status": status,
+            "seq": t.seq,
+            "terminal": terminal,
+            "success": terminal and status in spec.success,
+            "result": payload,
+        }
+        t.last_event = event
+        for queue in t.subscribers:
+            queue.put_nowait(event)
+
+    async def aclose(self):
+        if self._loop_task:
+            self._loop_task.cancel()
+        for task in list(self._polls):
+            task.cancel()
+
+    # ── 통계 ─────────────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        delays = sorted(self._notice_delays)
+        polls = list(self._polls_per_task)
+
+        def pct(p):
+            return round(delays[min(len(delays) - 1, int(len(delays) * p))], 3) if delays else None
+
+        active = [t for t in self._tracked.values() if not t.finished]
+        return {
+            "tracked": len(self._tracked),
+            "active": len(active),
+            "subscribers": sum(len(t.subscribers) for t in self._tracked.values()),
+            "upstream_requests": dict(self.requests),
+            "upstream_errors": dict(self.errors),
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "polls_per_task_avg": round(sum(polls) / len(polls), 2) if polls else None,
+            "notice_delay_sec": {"p50": pct(0.5), "p95": pct(0.95), "samples": len(delays)},
+            "expected_sec": {name: round(p.schedule.expected_sec, 1) for name, p in self.providers.items()},
+        }
@@ -0,0 +1,160 @@
+"""
+Rate Limiter
+- (provider, API key)별 token bucket: 초당 rate개 보충, 최대 burst개까지 모아둠
+- 토큰이 없으면 바로 거절하지 않고 예약 후 대기 (도착 순서대로, 최대 max_wait초)
+  → 배치 요청이 한꺼번에 와도 provider 한도 속도로 흘려보냄 (429 → 재시도 폭주 방지)
+- 대기 시간은 호출자가 응답 헤더로 전달 (X-RateLimit-Wait-Ms)
+- upstream이 그래도 429를 주면 throttled()로 bucket을 비워 이후 요청이 Retry-After만큼 기다림
+- 범위: bucket은 프로세스 메모리 → 프록시 web()은 max_containers=1 + @modal.concurrent로 고정해서 전역 한도
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class RateLimit:
+    rate: float         # 초당 허용 요청 수
+    burst: int          # 한 번에 허용하는 최대 요청 수 (bucket 크기)
+
+
+class RateLimited(Exception):
+    """max_wait 안에 토큰을 받을 수 없음 (라우트에서 429 + Retry-After)"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} rate limit: retry after {retry_after:.1f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "waiting")
+
+    def __init__(self, burst: int, now: float):
+        self.tokens = float(burst)
+        self.updated = now
+        self.waiting = 0
+
+
+class RateLimiter:
+    """
+    Args:
+        limits: provider 이름 → RateLimit (없는 provider는 제한 없음)
+        max_wait: 이보다 오래 기다려야 하면 대기 대신 RateLimited
+        idle_sec: 가득 찬 상태로 이 시간 지난 bucket은 정리
+    """
+
+    def __init__(self, limits: Dict[str, RateLimit], max_wait: float = 10.0, idle_sec: float = 600.0):
+        self.limits = limits
+        self.max_wait = max_wait
+        self.idle_sec = idle_sec
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self.granted = {name: 0 for name in limits}
+        self.queued = {name: 0 for name in limits}
+        self.rejected = {name: 0 for name in limits}
+        self.throttled_count = {name: 0 for name in limits}
+        self.wait_total = {name: 0.0 for name in limits}
+        self.wait_max = {name: 0.0 for name in limits}
+
+    @staticmethod
+    def _key(provider: str, api_key: str) -> Tuple[str, str]:
+        # 키 원문은 보관하지 않음
+        return provider, hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+
+    def _bucket(self, provider: str, api_key: str, now: float) -> _Bucket:
+        limit = self.limits[provider]
+        key = self._key(provider, api_key)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) > 1000:
+                self._sweep(now)
+            bucket = self._buckets[key] = _Bucket(limit.burst, now)
+        else:
+            bucket.tokens = min(limit.burst, bucket.tokens + (now - bucket.updated) * limit.rate)
+            bucket.updated = now
+        return bucket
+
+    def _sweep(self, now: float):
+        for key, bucket in list(self._buckets.items()):
+            limit = self.limits[key[0]]
+            full = bucket.tokens + (now - bucket.updated) * limit.rate >= limit.burst
+            if full and not bucket.waiting and now - bucket.updated > self.idle_sec:
+                del self._buckets[key]
+
+    async def acquire(self, provider: str, api_key: str) -> float:
+        """토큰 1개 확보 (필요하면 대기) → 대기한 시간(초)"""
+        if provider not in self.limits:
+            return 0.0
+        limit = self.limits[provider]
+        now = time.monotonic()
+        bucket = self._bucket(provider, api_key, now)
+        # 예약 방식: 토큰을 먼저 차감 (음수 = 앞선 대기자 몫) → 도착 순서대로 시각 배정
+        wait = max(0.0, (1.0 - bucket.tokens) / limit.rate)
+        if wait > self.max_wait:
+            self.rejected[provider] += 1
+            raise RateLimited(provider, wait)
+        bucket.tokens -= 1.0
+        self.granted[provider] += 1
+        if wait <= 0:
+            return 0.0
+
+        self.queued[provider] += 1
+        bucket.waiting += 1
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            bucket.tokens += 1.0  # 클라이언트가 끊김 → 예약 반환
+            self.granted[provider] -= 1
+            raise
+        finally:
+            bucket.waiting -= 1
+        self.wait_total[provider] += wait
+        self.wait_max[provider] = max(self.wait_max[provider], wait)
+        return wait
+
+    def throttled(self, provider: str, api_key: str, retry_after: Optional[float] = None):
+        """upstream 429 → bucket을 비워 이후 요청이 retry_after(없으면 토큰 1개 시간)만큼 대기"""
+        if provider not in self.limits:
+            return
+        limit = self.limits[provider]
+        bucket = self._bucket(provider, api_key, time.monotonic())
+        delay = retry_after if retry_after is not None else 1.0 / limit.rate
+        bucket.tokens = min(bucket.tokens, -delay * limit.rate + 1.0)
+        self.throttled_count[provider] += 1
+        print(f"[RATE] {provider} upstream 429 → next tokens in {delay:.1f}s")
+
+    def headers(self, provider: str, api_key: str, waited: float) -> Dict[str, str]:
+        """응답 헤더: 대기 시간 + 남은 토큰 (배치 클라이언트가 속도 조절에 사용)"""
+        if provider not in self.limits:
+            return {}
+        limit = self.limits[provider]
+        bucket = self._bucket(provider, api_key, time.monotonic())
+        return {
+            "X-RateLimit-Wait-Ms": str(round(waited * 1000)),
+            "X-RateLimit-Limit": f"{limit.rate:g}/s;burst={limit.burst}",
+            "X-RateLimit-Remaining": str(max(0, int(bucket.tokens))),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "max_wait_sec": self.max_wait,
+            "buckets": len(self._buckets),
+            "waiting": sum(b.waiting for b in self._buckets.values()),
+            "providers": {
+                name: {
+                    "rate": limit.rate,
+                    "burst": limit.burst,
+                    "granted": self.granted[name],
+                    "queued": self.queued[name],
+                    "rejected": self.rejected[name],
+                    "upstream_429": self.throttled_count[name],
+                    "wait_avg_ms": round(self.wait_total[name] / self.queued[name] * 1000, 1)
+                    if self.queued[name] else None,
+                    "wait_max_ms": round(self.wait_max[name] * 1000, 1),
+                }
+                for name, limit in self.limits.items()
+            },
+        }
@@ -0,0 +1,551 @@
+"""
+Render Service
+- 프론트 ffmpeg.wasm 단계(src/services/videoService.ts)를 서버 native ffmpeg로 실행
+  zoom: 이미지 1장 → 줌 / 패닝 영상 (generateSimpleZoomVideo: JPEG 프레임 시퀀스 대신 zoompan 필터 1회)
+  subtitle: 자막 PNG overlay 또는 drawtext (addSubtitleOverlay / addTextSubtitleToVideo)
+  audio: 오디오 합성, 오디오가 더 길면 마지막 프레임 줌인으로 연장 (addAudioToVideo, 인코딩 1회)
+  merge: 장면 영상 concat, 재인코딩 없음 (mergeVideos)
+- 입력은 참조 문자열: "upload:<sha256>" / "task:<provider>:<task_id>" / "render:<job_id>"
+  → 큰 영상이 브라우저를 왕복하지 않음, 앞 단계 render가 아직 진행 중이면 완료까지 기다렸다가 사용
+- job id = (op, 입력 참조, 파라미터) hash → 같은 요청은 결과 파일 재사용, 진행 중이면 합류
+- worker 슬롯(asyncio.Semaphore)으로 동시 ffmpeg 수 제한, 입력 준비(다운로드 / 앞 단계 대기)는 슬롯 밖에서
+- 진행률은 ffmpeg -progress 출력(out_time) / 예상 길이
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+OPS = ("zoom", "subtitle", "audio", "merge")
+REF_KINDS = ("upload", "task", "render")
+FPS = 24
+WIDTH, HEIGHT = 1920, 1080
+MAX_MERGE_INPUTS = 200
+
+_COLOR = re.compile(r"^#?[0-9A-Fa-f]{6}([0-9A-Fa-f]{2})?$|^[A-Za-z]{3,20}$")
+_JOB_ID = re.compile(r"^rd-[0-9a-f]{24}$")
+
+
+class RenderError(Exception):
+    """요청 문제 / 입력 없음 (라우트에서 HTTPException(status, detail)로 변환)"""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def parse_ref(ref) -> Tuple[str, str]:
+    """ "upload:<sha256>" → ("upload", "<sha256>") (형식이 틀리면 RenderError 400)"""
+    if not isinstance(ref, str):
+        raise RenderError(400, f"invalid_ref: expected string, got {type(ref).__name__}")
+    kind, _, value = ref.partition(":")
+    if kind not in REF_KINDS or not value:
+        raise RenderError(400, f"invalid_ref: {ref[:80]} (use upload:<sha256>, task:<provider>:<id>, render:<id>)")
+    if kind == "task" and ":" not in value:
+        raise RenderError(400, f"invalid_ref: {ref[:80]} (task:<provider>:<task_id>)")
+    if kind == "render" and not _JOB_ID.match(value):
+        raise RenderError(400, f"invalid_ref: {ref[:80]}")
+    return kind, value
+
+
+def zoom_duration(subtitle_length: int, intensity: int, audio_duration: Optional[float]) -> float:
+    """generateSimpleZoomVideo와 같은 길이: 오디오 길이 + 0.5초, 없으면 자막 길이 / 긴박도로 6~12초"""
+    if audio_duration and audio_duration > 0:
+        return audio_duration + 0.5
+    base = max(7.0, min(12.0, subtitle_length / 3.0)) if subtitle_length > 0 else 8.0
+    factor = 0.8 if intensity >= 7 else 1.3 if intensity <= 3 else 1.0
+    return max(6.0, min(12.0, base * factor))
+
+
+def _number(body: dict, name: str, default: float, low: float, high: float) -> float:
+    value = body.get(name, default)
+    try:
+        value = float(value if value is not None else default)
+    except (TypeError, ValueError):
+        raise RenderError(400, f"invalid_param: {name} must be a number")
+    return max(low, min(high, value))
+
+
+def _color(body: dict, name: str, default: str) -> str:
+    value = str(body.get(name) or default)
+    if not _COLOR.match(value):
+        raise RenderError(400, f"invalid_param: {name} must be #RRGGBB or a color name")
+    return value
+
+
+def _choice(body: dict, name: str, default: str, choices: Tuple[str, ...]) -> str:
+    value = body.get(name) or default
+    if value not in choices:
+        raise RenderError(400, f"invalid_param: {name} must be one of {list(choices)}")
+    return value
+
+
+def prepare(op: str, body: dict) -> Tuple[Dict[str, object], dict]:
+    """요청 body → (입력 참조, 정규화 파라미터) — 같은 요청이면 같은 job id"""
+    if op not in OPS:
+        raise RenderError(400, f"unknown_op: {op} (use {', '.join(OPS)})")
+    if op == "zoom":
+        inputs = {"image": body.get("image"), "subtitles": list(body.get("subtitles") or [])}
+        intensity = int(_number(body, "intensity", 5, 1, 10))
+        audio_duration = body.get("audio_duration")
+        params = {
+            "zoom_direction": _choice(body, "zoom_direction", "in", ("in", "out")),
+            "pan_direction": _choice(body, "pan_direction", "center", ("left", "right", "up", "down", "center")),
+            "intensity": intensity,
+            "duration": round(zoom_duration(
+                int(_number(body, "subtitle_length", 0, 0, 10000)), intensity,
+                _number(body, "audio_duration", 0, 0, 600) if audio_duration else None,
+            ), 3),
+        }
+    elif op == "subtitle":
+        inputs = {"video": body.get("video")}
+        if body.get("overlay"):
+            inputs["overlay"] = body["overlay"]
+            params = {}
+        elif body.get("text"):
+            params = {
+                "text": str(body["text"])[:500],
+                "font_size": int(_number(body, "font_size", 48, 8, 200)),
+                "text_color": _color(body, "text_color", "#FFFFFF"),
+                "stroke_color": _color(body, "stroke_color", "#000000"),
+                "stroke_width": int(_number(body, "stroke_width", 2, 0, 20)),
+                "position": _choice(body, "position", "bottom", ("top", "center", "bottom")),
+            }
+        else:
+            raise RenderError(400, "overlay_or_text_required")
+    elif op == "audio":
+        inputs = {"video": body.get("video"), "audio": body.get("audio")}
+        params = {"tail_zoom": _number(body, "tail_zoom", 0.15, 0.0, 0.5)}
+    else:
+        videos = list(body.get("videos") or [])
+        if not videos or len(videos) > MAX_MERGE_INPUTS:
+            raise RenderError(400, f"videos: 1-{MAX_MERGE_INPUTS} refs required")
+        inputs = {"videos": videos}
+        params = {}
+
+    for name, value in inputs.items():
+        if value is None:
+            raise RenderError(400, f"{name}_required")
+        for ref in value if isinstance(value, list) else [value]:
+            parse_ref(ref)
+    return inputs, params
+
+
+def job_id(op: str, inputs: dict, params: dict) -> str:
+    key = json.dumps({"op": op, "inputs": inputs, "params": params}, sort_keys=True)
+    return "rd-" + hashlib.sha256(key.encode()).hexdigest()[:24]
+
+
+def _ease(p: str) -> str:
+    """easeInOutCubic (프론트 프레임 렌더링과 같은 곡선)"""
+    return f"if(lt({p},0.5),4*pow({p},3),1-pow(-2*{p}+2,3)/2)"
+
+
+def zoom_filter(params: dict, frames: int, subtitle_count: int) -> str:
+    """
+    zoompan: 이미지를 2배(3840×2160)로 올려서 줌 → 1080p 출력 (정수 좌표 떨림 완화)
+    프론트와 같은 배율(1 + 0.08 + 긴박도/50) / 패닝(40px) / easing, 자막 PNG는 같은 길이 구간으로 나눠 overlay
+    """
+    amount = 0.08 + params["intensity"] / 50
+    p = f"(on/{frames})"
+    eased = _ease(p)
+    zoom = f"1+{amount:g}*{eased}" if params["zoom_direction"] == "in" else f"1+{amount:g}-{amount:g}*{eased}"
+    # 패닝 offset은 출력 px 기준 → 2배 입력 좌표로
+    dx, dy = {"left": (80, 0), "right": (-80, 0), "up": (0, 80), "down": (0, -80)}.get(params["pan_direction"], (0, 0))
+    x = "iw/2-iw/zoom/2" + (f"-({dx}*{p})/zoom" if dx else "")
+    y = "ih/2-ih/zoom/2" + (f"-({dy}*{p})/zoom" if dy else "")
+    graph = (f"[0:v]scale={WIDTH * 2}:{HEIGHT * 2},setsar=1,"
+             f"zoompan=z='{zoom}':x='{x}':y='{y}':d={frames}:s={WIDTH}x{HEIGHT}:fps={FPS},format=yuv420p")
+    if not subtitle_count:
+        return graph + "[v]"
+    graph += "[base]"
+    chunk = params["duration"] / subtitle_count
+    previous = "base"
+    for i in range(subtitle_count):
+        start, end = chunk * i, params["duration"] if i == subtitle_count - 1 else chunk * (i + 1)
+        label = "v" if i == subtitle_count - 1 else f"s{i}"
+        graph += f";[{previous}][{i + 1}:v]overlay=0:0:enable='between(t,{start:.3f},{end:.3f})'[{label}]"
+        previous = label
+    return graph
+
+
+def wrap_text(text: str, max_chars: int = 20) -> str:
+    """addTextSubtitleToVideo와 같은 줄바꿈 (단어 단위, 줄당 max_chars)"""
+    lines, current = [], ""
+    for word in text.split(" "):
+        if len((current + " " + word).strip()) <= max_chars:
+            current = (current + " " + word).strip()
+        else:
+            if current:
+                lines.append(current)
+            current = word
+    if current:
+        lines.append(current)
+    return "\n".join(lines)
+
+
+class RenderJob:
+    def __init__(self, id: str, op: str, inputs: dict, params: dict, api_keys: dict):
+        self.id = id
+        self.op = op
+        self.inputs = inputs
+        self.params = params
+        self.api_keys = api_keys
+        self.status = "queued"
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.size: Optional[int] = None
+        self.cached = False
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "op": self.op,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "size": self.size,
+            "cached": self.cached,
+            "inputs": self.inputs,
+            "created_at": self.created_at,
+            "render_sec": round(self.finished_at - self.started_at, 2)
+            if self.finished_at and self.started_at else None,
+            "result_ref": f"render:{self.id}",
+        }
+
+
+class RenderService:
+    """
+    Args:
+        output_dir: 결과 저장 디렉터리 ({job_id}.mp4, Modal volume mount)
+        resolve: (입력 참조, api_keys) → 로컬 파일 경로 (upload / task 참조, render 참조는 서비스가 직접 처리)
+        max_workers: 동시에 실행할 ffmpeg 프로세스 수
+        font_file: drawtext 자막 폰트 (한글 포함 폰트)
+        on_complete: 결과 파일 확정 후 호출 (path) → 캐시 인덱스 등록 등
+        on_render: ffmpeg 작업 종료마다 (op, "completed" / "failed", 초) → /metrics
+        retain_sec: 끝난 job 상태를 메모리에 유지하는 시간 (결과 파일은 캐시 budget 따름)
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        resolve: Callable[[str, dict], Awaitable[str]],
+        max_workers: int = 2,
+        ffmpeg: str = "ffmpeg",
+        ffprobe: str = "ffprobe",
+        font_file: Optional[str] = None,
+        on_complete: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_render: Optional[Callable[[str, str, float], None]] = None,
+        retain_sec: float = 3600.0,
+    ):
+        self.output_dir = output_dir
+        self.work_dir = os.path.join(output_dir, ".work")
+        self.resolve = resolve
+        self.max_workers = max_workers
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+        self.font_file = font_file
+        self.on_complete = on_complete
+        self.on_render = on_render
+        self.retain_sec = retain_sec
+        self._slots = asyncio.Semaphore(max_workers)
+        self._jobs: Dict[str, RenderJob] = {}
+        self._tasks: set = set()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    def output_path(self, job_id: str) -> str:
+        return os.path.join(self.output_dir, f"{job_id}.mp4")
+
+    # ── 접수 / 조회 ──────────────────────────────────────────────────────
+    def submit(self, op: str, body: dict, api_keys: Optional[dict] = None) -> RenderJob:
+        """검증 → 같은 job이 있으면 합류 / 결과 파일이 있으면 즉시 완료, 아니면 백그라운드 실행"""
+        inputs, params = prepare(op, body)
+        if op == "subtitle" and "text" in params and not (self.font_file and os.path.exists(self.font_file)):
+            raise RenderError(501, "drawtext_font_missing: set RENDER_FONT_FILE to a CJK font, or send an overlay PNG")
+        for ref in self._refs(inputs):
+            kind, value = parse_ref(ref)
+            if kind == "render" and self.get(value) is None:
+                raise RenderError(404, f"render_not_found: {value}")
+        self._prune()
+
+        id = job_id(op, inputs, params)
+        existing = self.get(id)
+        if existing is not None and existing.status != "failed":
+            if existing.cached:
+                self.cache_hits += 1
+            else:
+                self.coalesced += 1
+            return existing
+
+        job = RenderJob(id, op, inputs, params, api_keys or {})
+        self._jobs[id] = job
+        self.submitted += 1
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, id: str) -> Optional[RenderJob]:
+        """진행 / 최근 job, 메모리에 없으면 결과 파일로 복원 (재시작 / 다른 컨테이너)"""
+        job = self._jobs.get(id)
+        if job is not None:
+            if job.status == "completed" and not os.path.exists(self.output_path(id)):
+                # 캐시 budget으로 evict된 결과 → 다시 렌더링해야 함
+                del self._jobs[id]
+                return None
+            return job
+        if not _JOB_ID.match(id):
+            return None
+        path = self.output_path(id)
+        if not os.path.exists(path):
+            return None
+        job = RenderJob(id, "unknown", {}, {}, {})
+        job.status, job.progress, job.cached = "completed", 1.0, True
+        job.size = os.path.getsize(path)
+        job.finished_at = os.path.getmtime(path)
+        job.done.set()
+        self._jobs[id] = job
+        return job
+
+    async def wait(self, job: RenderJob, timeout: float) -> RenderJob:
+        if timeout > 0 and not job.done.is_set():
+            try:
+                await asyncio.wait_for(asyncio.shield(job.done.wait()), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - self.retain_sec
+        for id, job in list(self._jobs.items()):
+            if job.done.is_set() and (job.finished_at or 0) < cutoff:
+                del self._jobs[id]
+
+    @staticmethod
+    def _refs(inputs: dict) -> List[str]:
+        refs = []
+        for value in inputs.values():
+            refs.extend(value if isinstance(value, list) else [value])
+        return refs
+
+    # ── 실행 ─────────────────────────────────────────────────────────────
+    async def _input(self, ref: str, api_keys: dict) -> str:
+        kind, value = parse_ref(ref)
+        if kind != "render":
+            return await self.resolve(ref, api_keys)
+        upstream = self.get(value)
+        if upstream is None:
+            raise RenderError(404, f"render_not_found: {value}")
+        await upstream.done.wait()
+        if upstream.status != "completed":
+            raise RenderError(424, f"input render {value} failed: {upstream.error}")
+        path = self.output_path(value)
+        if not os.path.exists(path):
+            raise RenderError(410, f"input render {value} was evicted, submit it again")
+        return path
+
+    async def _resolve_inputs(self, job: RenderJob) -> Dict[str, object]:
+        """참조 → 로컬 경로 (병렬: 다운로드 / 앞 단계 render 대기)"""
+        names, refs = [], []
+        for name, value in job.inputs.items():
+            for i, ref in enumerate(value if isinstance(value, list) else [value]):
+                names.append((name, i if isinstance(value, list) else None))
+                refs.append(ref)
+        paths = await asyncio.gather(*(self._input(ref, job.api_keys) for ref in refs))
+        resolved: Dict[str, object] = {name: [] for name, value in job.inputs.items() if isinstance(value, list)}
+        for (name, index), path in zip(names, paths):
+            if index is None:
+                resolved[name] = path
+            else:
+                resolved[name].append(path)
+        return resolved
+
+    async def _run(self, job: RenderJob):
+        work = os.path.join(self.work_dir, f"{job.id}.{uuid.uuid4().hex[:8]}")
+        started = None
+        try:
+            inputs = await self._resolve_inputs(job)
+            async with self._slots:
+                job.status, job.started_at = "running", time.time()
+                started = time.perf_counter()
+                print(f"[RENDER {job.id}] {job.op} started")
+                os.makedirs(work, exist_ok=True)
+                output = os.path.join(work, "out.mp4")
+                await getattr(self, f"_render_{job.op}")(job, inputs, work, output)
+            final = self.output_path(job.id)
+            os.replace(output, final)
+            job.size = os.path.getsize(final)
+            if self.on_complete:
+                await self.on_complete(final)
+            job.status, job.progress = "completed", 1.0
+            self.completed += 1
+            print(f"[RENDER {job.id}] {job.op} done in {time.perf_counter() - started:.1f}s "
+                  f"({job.size / (1024 * 1024):.2f}MB)")
+            if self.on_render:
+                self.on_render(job.op, "completed", time.perf_counter() - started)
+        except Exception as e:
+            job.status = "failed"
+            job.error = e.detail if isinstance(e, RenderError) else f"{type(e).__name__}: {e}"
+            self.failed += 1
+            print(f"[RENDER {job.id}] {job.op} failed: {job.error}")
+            if self.on_render and started is not None:
+                self.on_render(job.op, "failed", time.perf_counter() - started)
+        finally:
+            job.finished_at = time.time()
+            job.done.set()
+            shutil.rmtree(work, ignore_errors=True)
+
+    async def _exec(self, job: Optional[RenderJob], args: List[str], expected_sec: Optional[float] = None):
+        """ffmpeg 실행 (stdout: -progress key=value → job.progress, stderr는 에러 메시지용 tail만 보관)"""
+        proc = await asyncio.create_subprocess_exec(
+            self.ffmpeg, "-hide_banner", "-nostdin", "-y", "-progress", "pipe:1", "-nostats", *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stderr_tail: deque = deque(maxlen=20)
+
+        async def drain_stderr():
+            async for line in proc.stderr:
+                stderr_tail.append(line.decode(errors="replace").rstrip())
+
+        stderr_task = asyncio.create_task(drain_stderr())
+        try:
+            async for line in proc.stdout:
+                key, _, value = line.decode(errors="replace").strip().partition("=")
+                if job is not None and expected_sec and key == "out_time_us" and value.isdigit():
+                    job.progress = min(0.99, int(value) / 1e6 / expected_sec)
+            returncode = await proc.wait()
+            await stderr_task
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            stderr_task.cancel()
+            raise
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg exited {returncode}: {' | '.join(stderr_tail)[-300:]}")
+
+    async def probe(self, path: str) -> dict:
+        """ffprobe → {"duration", "width", "height", "has_audio"}"""
+        proc = await asyncio.create_subprocess_exec(
+            self.ffprobe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffprobe failed for {os.path.basename(path)}: {stderr.decode(errors='replace')[-200:]}")
+        info = json.loads(stdout or b"{}")
+        video = next((s for s in info.get("streams", []) if s.get("codec_type") == "video"), {})
+        return {
+            "duration": float(info.get("format", {}).get("duration") or 0),
+            "width": int(video.get("width") or WIDTH),
+            "height": int(video.get("height") or HEIGHT),
+            "has_audio": any(s.get("codec_type") == "audio" for s in info.get("streams", [])),
+        }
+
+    # ── op별 ffmpeg ──────────────────────────────────────────────────────
+    async def _render_zoom(self, job: RenderJob, inputs: dict, work: str, output: str):
+        frames = max(1, round(job.params["duration"] * FPS))
+        args = ["-i", inputs["image"]]
+        for path in inputs["subtitles"]:
+            args += ["-i", path]
+        args += [
+            "-filter_complex", zoom_filter(job.params, frames, len(inputs["subtitles"])),
+            "-map", "[v]", "-frames:v", str(frames),
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart", output,
+        ]
+        await self._exec(job, args, job.params["duration"])
+
+    async def _render_subtitle(self, job: RenderJob, inputs: dict, work: str, output: str):
+        source = await self.probe(inputs["video"])
+        if "overlay" in inputs:
+            args = ["-i", inputs["video"], "-i", inputs["overlay"],
+                    "-filter_complex", "[0:v][1:v]overlay=0:0,format=yuv420p[v]"]
+        else:
+            p = job.params
+            text_path = os.path.join(work, "subtitle.txt")
+            with open(text_path, "w") as f:
+                f.write(wrap_text(p["text"]))
+            y = {"top": "50", "center": "(h-text_h)/2", "bottom": "h-th-80"}[p["position"]]
+            # textfile= → 따옴표 / 콜론 escaping 불필요
+            drawtext = (f"drawtext=fontfile='{self.font_file}':textfile='{text_path}':fontsize={p['font_size']}:"
+                        f"fontcolor={p['text_color']}:borderw={p['stroke_width']}:bordercolor={p['stroke_color']}:"
+                        f"x=(w-text_w)/2:y={y}")
+            args = ["-i", inputs["video"], "-filter_complex", f"[0:v]{drawtext},format=yuv420p[v]"]
+        args += ["-map", "[v]", "-map", "0:a?", "-c:v", "libx264", "-preset", "fast", "-crf", "18",
+                 "-c:a", "copy", "-movflags", "+faststart", output]
+        await self._exec(job, args, source["duration"])
+
+    async def _render_audio(self, job: RenderJob, inputs: dict, work: str, output: str):
+        video, audio = await asyncio.gather(self.probe(inputs["video"]), self.probe(inputs["audio"]))
+        extra = audio["duration"] - video["duration"] + 0.5
+        if extra <= 0.5:
+            # 오디오가 짧거나 같음 → 영상 stream copy + 오디오만 인코딩
+            args = ["-i", inputs["video"], "-i", inputs["audio"], "-map", "0:v", "-map", "1:a",
+                    "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", "-movflags", "+faststart", output]
+            await self._exec(job, args, video["duration"])
+            return
+
+        # 마지막 프레임 → 줌인 tail → 원본 뒤에 이어 붙이고 오디오 합성 (프론트의 3단계 + concat copy를 인코딩 1회로)
+        last_frame = os.path.join(work, "lastframe.jpg")
+        await self._exec(None, ["-sseof", "-0.1", "-i", inputs["video"], "-frames:v", "1", "-q:v", "2", last_frame])
+        w, h = video["width"], video["height"]
+        frames = max(1, round(extra * FPS))
+        tail_zoom = job.params["tail_zoom"]
+        graph = (f"[1:v]scale={w}:{h},setsar=1,zoompan=z='1+{tail_zoom:g}*on/{frames}':"
+                 f"x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':d={frames}:s={w}x{h}:fps={FPS}[tail];"
+                 f"[0:v]fps={FPS},scale={w}:{h},setsar=1[main];"
+                 f"[main][tail]concat=n=2:v=1:a=0,format=yuv420p[v]")
+        args = ["-i", inputs["video"], "-i", last_frame, "-i", inputs["audio"],
+                "-filter_complex", graph, "-map", "[v]", "-map", "2:a",
+                "-c:v", "libx264", "-preset", "fast", "-crf", "20", "-c:a", "aac", "-b:a", "192k",
+                "-shortest", "-movflags", "+faststart", output]
+        await self._exec(job, args, video["duration"] + extra)
+
+    async def _render_merge(self, job: RenderJob, inputs: dict, work: str, output: str):
+        list_path = os.path.join(work, "concat.txt")
+        with open(list_path, "w") as f:
+            for path in inputs["videos"]:
+                f.write("file '{}'\n".format(path.replace("'", "'\\''")))
+        await self._exec(job, ["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy",
+                               "-movflags", "+faststart", output])
+
+    # ── 정리 / 통계 ──────────────────────────────────────────────────────
+    async def aclose(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        states: Dict[str, int] = {}
+        for job in self._jobs.values():
+            states[job.status] = states.get(job.status, 0) + 1
+        return {
+            "max_workers": self.max_workers,
+            "jobs": states,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,464 @@
+"""
+Provider Router
+- 영상 생성 backend(BytePlus / Evolink / Runware / LTX / SeeDANCE)를 submit / status / result 하나로 통일
+- provider별 rolling window: 완료 지연 p50 / p95, 에러율, 비용
+- 정책(latency / cost / reliability / order)으로 healthy provider부터 순서를 정해 접수
+  접수 실패 → 다음 provider로 failover, 태스크 실패 → 남은 provider로 1회 재접수
+- 선택: hedge_after_sec 동안 끝나지 않으면 다음 provider에도 접수 → 먼저 끝난 결과 사용
+- 완료 감지는 호출자가 주는 watch (프록시에서는 TaskPoller 구독) → 별도 폴링 루프 없음
+- job 상태는 바뀔 때마다 snapshot(to_dict)을 save로 저장 (프록시: modal.Dict)
+  → 접수한 컨테이너가 아니어도 / 재시작 후에도 lookup으로 상태·결과 조회 (watch / hedge는 접수한 컨테이너만)
+- 라우팅 통계(p50 / p95 / 에러율 / 비용)는 프로세스 메모리 → 컨테이너별, 재시작 시 초기화
+"""
+
+import asyncio
+import re
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+POLICIES = ("latency", "cost", "reliability", "order")
+JOB_ID_RE = re.compile(r"^rt-[0-9a-f]{12}$")
+
+
+class RouterError(Exception):
+    """접수 가능한 provider가 없거나 모두 접수 실패 (라우트에서 HTTPException으로 변환)"""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+@dataclass
+class RouteProvider:
+    """
+    submit: (spec, api_key) → provider 태스크 ID
+    video_url: 완료 payload → 결과 영상 URL
+    cost_per_job: payload에 cost가 없을 때 쓰는 1건 비용 추정 (USD)
+    expected_sec: 지연 표본이 모이기 전 사용하는 예상 완료 시간 (초)
+    default_key: 요청에 key가 없을 때 쓰는 key (환경변수 등)
+    enabled: feature flag
+    """
+    submit: Callable[[dict, str], Awaitable[str]]
+    video_url: Callable[[dict], Optional[str]]
+    cost_per_job: float = 0.0
+    expected_sec: float = 60.0
+    default_key: Callable[[], Optional[str]] = lambda: None
+    enabled: Callable[[], bool] = lambda: True
+
+
+class ProviderStats:
+    """최근 window건 기준 지연 / 에러율 / 비용"""
+
+    def __init__(self, window: int = 100):
+        self.latencies: deque = deque(maxlen=window)   # 접수 → 성공 완료 (초)
+        self.outcomes: deque = deque(maxlen=window)    # True: 성공, False: 접수 실패 / 태스크 실패
+        self.costs: deque = deque(maxlen=window)
+        self.inflight = 0
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.submit_errors = 0
+        self.total_cost = 0.0
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(len(values) * p))]
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    @property
+    def avg_cost(self) -> Optional[float]:
+        return sum(self.costs) / len(self.costs) if self.costs else None
+
+    def record(self, success: bool, latency: Optional[float] = None, cost: Optional[float] = None):
+        self.outcomes.append(success)
+        if success:
+            self.succeeded += 1
+            if latency is not None:
+                self.latencies.append(latency)
+        else:
+            self.failed += 1
+        if cost is not None:
+            self.costs.append(cost)
+            self.total_cost += cost
+
+    def to_dict(self) -> dict:
+        def r(v):
+            return round(v, 3) if v is not None else None
+
+        return {
+            "p50_sec": r(self.percentile(0.5)),
+            "p95_sec": r(self.percentile(0.95)),
+            "error_rate": round(self.error_rate, 3),
+            "avg_cost": r(self.avg_cost),
+            "total_cost": round(self.total_cost, 4),
+            "samples": len(self.outcomes),
+            "inflight": self.inflight,
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "submit_errors": self.submit_errors,
+        }
+
+
+class Attempt:
+    __slots__ = ("provider", "task_id", "api_key", "submitted_at", "finished_at", "status", "video_url",
+                 "cost", "error", "hedge")
+
+    def __init__(self, provider: str, task_id: str, api_key: str, hedge: bool = False):
+        self.provider = provider
+        self.task_id = task_id
+        self.api_key = api_key
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.status = "processing"
+        self.video_url: Optional[str] = None
+        self.cost: Optional[float] = None
+        self.error: Optional[str] = None
+        self.hedge = hedge
+
+    def to_dict(self) -> dict:
+        return {
+            "provider": self.provider,
+            "task_id": self.task_id,
+            "status": self.status,
+            "hedge": self.hedge,
+            "latency_sec": round(self.finished_at - self.submitted_at, 3) if self.finished_at else None,
+            "cost": self.cost,
+            "error": self.error,
+        }
+
+
+@dataclass
+class RouteJob:
+    id: str
+    spec: dict
+    api_keys: Dict[str, str]
+    candidates: List[str]
+    policy: str
+    hedge_after_sec: Optional[float]
+    attempts: List[Attempt] = field(default_factory=list)
+    status: str = "processing"
+    winner: Optional[Attempt] = None
+    error: Optional[str] = None
+    failovers: int = 0
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    persist_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def active(self) -> List[Attempt]:
+        return [a for a in self.attempts if a.status == "processing"]
+
+    def to_dict(self) -> dict:
+        primary = self.winner or next((a for a in self.attempts if a.task_id), None)
+        return {
+            "id": self.id,
+            "status": self.status,
+            "provider": primary.provider if primary else None,
+            "provider_task_id": primary.task_id if primary else None,
+            "result": {"video_url": self.winner.video_url} if self.winner else None,
+            "cost": round(sum(a.cost or 0.0 for a in self.attempts), 4),
+            "error": self.error,
+            "policy": self.policy,
+            "hedged": any(a.hedge for a in self.attempts),
+            "attempts": [a.to_dict() for a in self.attempts],
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ProviderRouter:
+    """
+    Args:
+        providers: provider 이름 → RouteProvider
+        watch: (provider, task_id, api_key) → 종료 이벤트 {"success", "status", "result"} 까지 대기
+        policy: 기본 정책 (POLICIES)
+        order: "order" 정책 / 동점 시 우선순위 (None이면 providers 순서)
+        hedge_after_sec: 기본 hedge 기준 (None이면 hedge 안 함)
+        max_error_rate: 이보다 에러율이 높으면 unhealthy (후보 맨 뒤로)
+        min_samples: 표본이 이보다 적으면 에러율 / 지연 대신 기본값 사용
+        max_failovers: 태스크 실패 후 다른 provider 재접수 상한
+        retain_sec: 종료된 job 보관 시간 (초, 이 컨테이너 메모리)
+        save: (job id, snapshot) → 공유 저장소에 기록 (None이면 메모리만)
+        load: job id → 저장된 snapshot 또는 None
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, RouteProvider],
+        watch: Callable[[str, str, str], Awaitable[dict]],
+        policy: str = "latency",
+        order: Optional[List[str]] = None,
+        hedge_after_sec: Optional[float] = None,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+        max_failovers: int = 1,
+        window: int = 100,
+        retain_sec: float = 3600.0,
+        save: Optional[Callable[[str, dict], Awaitable[Any]]] = None,
+        load: Optional[Callable[[str], Awaitable[Optional[dict]]]] = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.providers = providers
+        self.watch = watch
+        self.policy = policy
+        listed = [p for p in (order or []) if p in providers]
+        self.order = listed + [p for p in providers if p not in listed]
+        self.hedge_after_sec = hedge_after_sec
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.max_failovers = max_failovers
+        self.retain_sec = retain_sec
+        self.save = save
+        self.load = load
+        self.snapshot_errors = 0
+        self.stats_by_provider = {name: ProviderStats(window) for name in providers}
+        self._jobs: Dict[str, RouteJob] = {}
+        self._tasks: set = set()
+        self.jobs_total = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    # ── 후보 선정 ────────────────────────────────────────────────────────
+    def healthy(self, name: str) -> bool:
+        s = self.stats_by_provider[name]
+        return len(s.outcomes) < self.min_samples or s.error_rate <= self.max_error_rate
+
+    def expected_latency(self, name: str) -> float:
+        """p95 (표본 부족 시 예상 완료 시간) / 성공률 → 재시도를 감안한 기대 완료 시간"""
+        s = self.stats_by_provider[name]
+        p95 = s.percentile(0.95) if len(s.latencies) >= self.min_samples else None
+        base = p95 if p95 is not None else self.providers[name].expected_sec
+        return base / max(0.05, 1.0 - s.error_rate)
+
+    def expected_cost(self, name: str) -> float:
+        s = self.stats_by_provider[name]
+        return s.avg_cost if s.avg_cost is not None else self.providers[name].cost_per_job
+
+    def rank(self, policy: Optional[str] = None, allowed: Optional[List[str]] = None,
+             api_keys: Optional[Dict[str, str]] = None) -> List[str]:
+        """접수 순서 (healthy 먼저, 그 안에서 정책 순) — key가 없거나 꺼진 provider 제외"""
+        policy = policy or self.policy
+        if policy not in POLICIES:
+            raise RouterError(400, f"unknown_policy: {policy} (one of {', '.join(POLICIES)})")
+        names = [n for n in self.order if allowed is None or n in allowed]
+        names = [n for n in names if self.providers[n].enabled() and self._key(n, api_keys or {})]
+        position = {n: i for i, n in enumerate(self.order)}
+
+        def score(n):
+            if policy == "latency":
+                primary = self.expected_latency(n)
+            elif policy == "cost":
+                primary = self.expected_cost(n)
+            elif policy == "reliability":
+                primary = self.stats_by_provider[n].error_rate
+            else:
+                primary = 0.0
+            return (not self.healthy(n), primary, position[n])
+
+        return sorted(names, key=score)
+
+    def _key(self, name: str, api_keys: Dict[str, str]) -> Optional[str]:
+        return api_keys.get(name) or self.providers[name].default_key()
+
+    # ── 접수 ─────────────────────────────────────────────────────────────
+    async def submit(self, spec: dict, api_keys: Dict[str, str], policy: Optional[str] = None,
+                     providers: Optional[List[str]] = None, hedge_after_sec: Optional[float] = None) -> RouteJob:
+        candidates = self.rank(policy, providers, api_keys)
+        if not candidates:
+            raise RouterError(503, "no_provider_available: no enabled provider with an API key")
+        job = RouteJob(
+            id=f"rt-{uuid.uuid4().hex[:12]}",
+            spec=spec,
+            api_keys=api_keys,
+            candidates=candidates,
+            policy=policy or self.policy,
+            hedge_after_sec=hedge_after_sec if hedge_after_sec is not None else self.hedge_after_sec,
+        )
+        attempt = await self._submit_next(job)
+        if attempt is None:
+            raise RouterError(502, f"all_providers_failed: {job.error}")
+        self._jobs[job.id] = job
+        self.jobs_total += 1
+        await self._persist(job)
+        if job.hedge_after_sec and len(candidates) > 1:
+            self._spawn(self._hedge_timer(job))
+        return job
+
+    async def _persist(self, job: RouteJob):
+        """현재 상태 snapshot 저장 (job별 lock 안에서 직렬화 → 마지막 기록이 항상 최신 상태)"""
+        if self.save is None:
+            return
+        async with job.persist_lock:
+            try:
+                await self.save(job.id, job.to_dict())
+            except Exception as e:
+                self.snapshot_errors += 1
+                print(f"[ROUTER] {job.id} snapshot save failed: {type(e).__name__}: {e}")
+
+    async def _submit_next(self, job: RouteJob, hedge: bool = False) -> Optional[Attempt]:
+        """아직 시도하지 않은 다음 후보에 접수 (접수 실패 시 그다음 후보)"""
+        tried = {a.provider for a in job.attempts}
+        for name in [n for n in job.candidates if n not in tried]:
+            tried.add(name)
+            api_key = self._key(name, job.api_keys)
+            stats = self.stats_by_provider[name]
+            try:
+                task_id = await self.providers[name].submit(job.spec, api_key)
+            except Exception as e:
+                stats.submit_errors += 1
+                stats.record(False)
+                job.error = f"{name}: {type(e).__name__}: {e}"
+                print(f"[ROUTER] {job.id} submit to {name} failed: {type(e).__name__}: {str(e)[:200]}")
+                failed = Attempt(name, "", api_key, hedge=hedge)
+                failed.status, failed.error = "failed", job.error
+                job.attempts.append(failed)
+                continue
+            attempt = Attempt(name, task_id, api_key, hedge=hedge)
+            job.attempts.append(attempt)
+            stats.submitted += 1
+            stats.inflight += 1
+            print(f"[ROUTER] {job.id} → {name}/{task_id}{' (hedge)' if hedge else ''} "
+                  f"[policy={job.policy}, candidates={job.candidates}]")
+            self._spawn(self._watch_attempt(job, attempt))
+            return attempt
+        return None
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _hedge_timer(self, job: RouteJob):
+        await asyncio.sleep(job.hedge_after_sec)
+        if job.status != "processing" or len(job.active()) != 1:
+            return
+        if await self._submit_next(job, hedge=True) is not None:
+            self.hedges += 1
+            await self._persist(job)
+
+    # ── 완료 감지 ────────────────────────────────────────────────────────
+    async def _watch_attempt(self, job: RouteJob, attempt: Attempt):
+        name = attempt.provider
+        stats = self.stats_by_provider[name]
+        try:
+            event = await self.watch(name, attempt.task_id, attempt.api_key)
+        except Exception as e:
+            event = {"success": False, "status": "watch_error", "result": f"{type(e).__name__}: {e}"}
+        finally:
+            stats.inflight -= 1
+
+        attempt.finished_at = time.time()
+        payload: Any = event.get("result")
+        if isinstance(payload, dict) and isinstance(payload.get("cost"), (int, float)):
+            attempt.cost = float(payload["cost"])
+        video_url = self.providers[name].video_url(payload) if event.get("success") and isinstance(payload, dict) else None
+        if video_url:
+            attempt.status, attempt.video_url = "completed", video_url
+            if attempt.cost is None:
+                attempt.cost = self.providers[name].cost_per_job
+            stats.record(True, attempt.finished_at - attempt.submitted_at, attempt.cost)
+        else:
+            attempt.status = "failed"
+            attempt.error = f"{event.get('status')}: {str(payload)[:300]}"
+            stats.record(False, cost=attempt.cost)
+
+        await self._settle(job, attempt)
+        await self._persist(job)
+
+    async def _settle(self, job: RouteJob, attempt: Attempt):
+        """끝난 시도 → job 완료 / 다른 시도 대기 / failover / 실패"""
+        if job.status != "processing":
+            return  # hedge에서 진 쪽 → 통계만 반영
+        if attempt.status == "completed":
+            self._finish(job, "completed", winner=attempt)
+            if attempt.hedge:
+                self.hedge_wins += 1
+            return
+        if job.active():
+            return  # 다른 시도가 아직 진행 중
+        if job.failovers < self.max_failovers:
+            job.failovers += 1
+            self.failovers += 1
+            if await self._submit_next(job) is not None:
+                return
+        self._finish(job, "failed", error=attempt.error)
+
+    def _finish(self, job: RouteJob, status: str, winner: Optional[Attempt] = None, error: Optional[str] = None):
+        job.status = status
+        job.winner = winner
+        job.error = None if winner else error
+        job.finished_at = time.time()
+        job.done.set()
+        latency = job.finished_at - job.created_at
+        print(f"[ROUTER] {job.id} {status} via {winner.provider if winner else '-'} in {latency:.1f}s "
+              f"({len(job.attempts)} attempts)")
+        self._sweep()
+
+    def _sweep(self):
+        cutoff = time.time() - self.retain_sec
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            self._jobs.pop(job_id, None)
+
+    # ── 조회 ─────────────────────────────────────────────────────────────
+    def get(self, job_id: str) -> Optional[RouteJob]:
+        return self._jobs.get(job_id)
+
+    async def lookup(self, job_id: str) -> Optional[dict]:
+        """job snapshot: 이 컨테이너가 접수한 job이면 메모리, 아니면 공유 저장소"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.load is None or not JOB_ID_RE.match(job_id):
+            return None
+        try:
+            return await self.load(job_id)
+        except Exception as e:
+            self.snapshot_errors += 1
+            print(f"[ROUTER] {job_id} snapshot load failed: {type(e).__name__}: {e}")
+            return None
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[RouteJob]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        return job
+
+    async def aclose(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "hedge_after_sec": self.hedge_after_sec,
+            "jobs_total": self.jobs_total,
+            "jobs_active": sum(1 for j in self._jobs.values() if j.status == "processing"),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "snapshot_errors": self.snapshot_errors,
+            "stats_scope": "container",
+            "providers": {
+                name: {
+                    **s.to_dict(),
+                    "enabled": self.providers[name].enabled(),
+                    "healthy": self.healthy(name),
+                    "expected_latency_sec": round(self.expected_latency(name), 1),
+                    "expected_cost": round(self.expected_cost(name), 4),
+                }
+                for name, s in self.stats_by_provider.items()
+            },
+        }
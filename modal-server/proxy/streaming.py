@@ -0,0 +1,111 @@
+"""
+Upstream → 클라이언트 스트리밍 relay
+- 클라이언트 Range 헤더를 upstream에 그대로 전달 → 206 + Content-Range/Content-Length 그대로 relay
+- upstream이 Range를 무시하고 200 전체를 주면 앞부분은 버리고 요청 구간만 전달
+- body는 chunk 단위로 흘려보냄 (StreamingResponse가 send마다 await → 다운로드당 메모리 = chunk 1개)
+"""
+
+from typing import AsyncIterator, Optional
+
+import httpx
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, Response, StreamingResponse
+
+from common.filestream import parse_range
+
+CHUNK_SIZE = 256 * 1024  # 256KB
+
+
+async def open_upstream(client: httpx.AsyncClient, url: str, range_header: Optional[str] = None) -> httpx.Response:
+    """헤더까지만 받고 body는 열어둔 upstream 응답 (호출자가 relay 또는 aclose 책임)"""
+    headers = {"Accept-Encoding": "identity"}  # raw byte 그대로 relay (Content-Length 유지)
+    if range_header:
+        headers["Range"] = range_header
+    request = client.build_request("GET", url, headers=headers)
+    return await client.send(request, stream=True, follow_redirects=True)
+
+
+async def iter_upstream(upstream: httpx.Response, skip: int = 0,
+                        limit: Optional[int] = None) -> AsyncIterator[bytes]:
+    """upstream body를 chunk 단위로 전달 (앞 skip 바이트 버림, limit 바이트 이후 중단)"""
+    try:
+        async for chunk in upstream.aiter_raw(CHUNK_SIZE):
+            if skip:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            if limit is not None:
+                if len(chunk) >= limit:
+                    yield chunk[:limit]
+                    return
+                limit -= len(chunk)
+            yield chunk
+    finally:
+        await upstream.aclose()
+
+
+def relay_response(
+    upstream: httpx.Response,
+    range_header: Optional[str],
+    filename: str,
+    request_id: str,
+    media_type: str = "video/mp4",
+) -> Response:
+    """열린 upstream 응답 → 200 / 206 / 416 StreamingResponse"""
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Type": media_type,
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Access-Control-Allow-Origin": "*",
+    }
+    for name in ("ETag", "Last-Modified"):
+        if upstream.headers.get(name):
+            headers[name] = upstream.headers[name]
+    content_length = upstream.headers.get("Content-Length")
+    close = BackgroundTask(upstream.aclose)
+
+    if upstream.status_code == 206:
+        # upstream이 Range 처리 → 그대로 relay
+        headers["Content-Range"] = upstream.headers.get("Content-Range", "")
+        if content_length:
+            headers["Content-Length"] = content_length
+        print(f"[{request_id}] Relaying upstream 206: {headers['Content-Range']}")
+        return StreamingResponse(iter_upstream(upstream), status_code=206,
+                                 media_type=media_type, headers=headers, background=close)
+
+    if upstream.status_code == 416:
+        headers["Content-Range"] = upstream.headers.get("Content-Range", "bytes */*")
+        return Response(status_code=416, headers=headers, background=close)
+
+    if upstream.status_code != 200:
+        # HTTPException(502)와 같은 응답 형태, upstream connection은 background로 반환
+        status = upstream.status_code
+        return JSONResponse(
+            {"detail": f"Upstream video download failed (request_id={request_id}): HTTP {status}"},
+            status_code=502,
+            background=close,
+        )
+
+    if range_header and content_length:
+        # upstream이 Range 미지원 → 전체 스트림에서 요청 구간만 잘라서 전달
+        total_size = int(content_length)
+        try:
+            start, end = parse_range(range_header, total_size)
+        except ValueError as e:
+            headers["Content-Range"] = f"bytes */{total_size}"
+            print(f"[{request_id}] Range not satisfiable: {e}")
+            return Response(status_code=416, headers=headers, background=close)
+        headers["Content-Range"] = f"bytes {start}-{end}/{total_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        print(f"[{request_id}] Upstream ignored Range, slicing stream: {start}-{end}/{total_size}")
+        return StreamingResponse(iter_upstream(upstream, skip=start, limit=end - start + 1), status_code=206,
+                                 media_type=media_type, headers=headers, background=close)
+
+    # 전체 파일 (Range 없음, 또는 크기를 모르는 upstream → Range 무시하고 200)
+    if content_length:
+        headers["Content-Length"] = content_length
+    return StreamingResponse(iter_upstream(upstream), status_code=200,
+                             media_type=media_type, headers=headers, background=close)
+
@@ -0,0 +1,109 @@
+"""
+Task Status Cache
+- (API key, task_id)별 upstream 태스크 조회 결과를 짧게 캐시
+  진행 중(queued/running): 짧은 TTL, 종료(succeeded/failed/...): 길게 보관
+- 같은 태스크 동시 조회는 upstream 호출 1회로 합침 (single-flight)
+- 200 응답만 캐시, 에러는 동시 대기자에게만 공유
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+TERMINAL_STATUSES = {"succeeded", "failed", "cancelled", "expired"}
+
+# (status_code, payload) — payload: 200이면 dict, 아니면 에러 텍스트
+FetchResult = Tuple[int, Any]
+
+
+class TaskStatusCache:
+    """
+    Args:
+        fetch: (api_key, task_id) → (status_code, payload) upstream 조회 coroutine
+        ttl_active: 진행 중 상태 캐시 시간 (초)
+        ttl_terminal: 종료 상태 캐시 시간 (초)
+        max_entries: 캐시 엔트리 상한 (LRU)
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, str], Awaitable[FetchResult]],
+        ttl_active: float = 2.0,
+        ttl_terminal: float = 3600.0,
+        max_entries: int = 5000,
+    ):
+        self.fetch = fetch
+        self.ttl_active = ttl_active
+        self.ttl_terminal = ttl_terminal
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _key(api_key: str, task_id: str) -> Tuple[str, str]:
+        # 다른 API key로는 같은 task_id라도 캐시 공유 X (권한 우회 방지), 키 원문은 보관하지 않음
+        return hashlib.sha256(api_key.encode()).hexdigest()[:16], task_id
+
+    def _ttl(self, payload: dict) -> float:
+        return self.ttl_terminal if payload.get("status") in TERMINAL_STATUSES else self.ttl_active
+
+    def peek(self, api_key: str, task_id: str) -> Optional[dict]:
+        entry = self._entries.get(self._key(api_key, task_id))
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def put(self, api_key: str, task_id: str, payload: dict):
+        key = self._key(api_key, task_id)
+        self._entries[key] = (time.monotonic() + self._ttl(payload), payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, api_key: str, task_id: str) -> Tuple[int, Any, str]:
+        """
+        Returns:
+            (status_code, payload, source) — source: hit / coalesced / miss
+        """
+        key = self._key(api_key, task_id)
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return 200, entry[1], "hit"
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            status_code, payload = await asyncio.shield(task)
+            return status_code, payload, "coalesced"
+
+        # upstream 조회는 별도 task → 먼저 온 요청이 끊겨도 합류한 요청들은 결과를 받음
+        self.misses += 1
+        task = asyncio.get_running_loop().create_task(self._fetch(api_key, task_id))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        status_code, payload = await asyncio.shield(task)
+        return status_code, payload, "miss"
+
+    async def _fetch(self, api_key: str, task_id: str) -> FetchResult:
+        status_code, payload = await self.fetch(api_key, task_id)
+        if status_code == 200 and isinstance(payload, dict):
+            self.put(api_key, task_id, payload)
+        return status_code, payload
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "upstream_saved_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+        }
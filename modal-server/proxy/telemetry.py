@@ -0,0 +1,117 @@
+"""
+Proxy Metrics (/metrics, Prometheus text format)
+- 라우트별 응답 헤더까지 latency histogram + 응답 바이트 (ASGI middleware, label은 route template)
+- upstream별 응답 헤더까지 latency histogram (UpstreamClients observer)
+- 1080p export / render(ffmpeg) 소요 시간, provider rate limit 대기 시간
+- 캐시 hit/miss, breaker, 폴러 등은 각 컴포넌트 stats() 값을 스크레이프 시점에만 읽음
+  → 요청 경로에서는 histogram / counter 덧셈 몇 번뿐
+"""
+
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from common.metrics import Counter, Gauge, Registry
+
+_STATUS_CLASS = {1: "1xx", 2: "2xx", 3: "3xx", 4: "4xx", 5: "5xx"}
+
+# ffmpeg 1080p 변환: 수 초 ~ 수 분
+EXPORT_BUCKETS = (2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0, 300.0, 600.0)
+# rate limit 대기: 0 ~ max_wait
+WAIT_BUCKETS = (0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+
+
+def status_class(status: int) -> str:
+    return _STATUS_CLASS.get(status // 100, "other")
+
+
+def snapshot(kind: str, name: str, help_text: str, labelnames: Sequence[str],
+             rows: Dict[Tuple[str, ...], float]):
+    """stats() 값 → 스크레이프 1회용 Counter / Gauge (registry에 등록하지 않음)"""
+    metric = Counter(name, help_text, labelnames) if kind == "counter" else Gauge(name, help_text, labelnames)
+    for labels, value in rows.items():
+        if value is not None:
+            metric.inc(float(value), *labels)
+    return metric
+
+
+class ProxyMetrics:
+    """요청 경로에서 갱신하는 메트릭 + 스크레이프 시점 collector"""
+
+    def __init__(self, prefix: str = "proxy"):
+        self.registry = Registry()
+        self.requests = self.registry.histogram(
+            f"{prefix}_request_seconds", "Route latency until response headers", ("route", "method", "status"))
+        self.response_bytes = self.registry.counter(
+            f"{prefix}_response_bytes_total", "Response body bytes sent to clients", ("route",))
+        self.upstream = self.registry.histogram(
+            f"{prefix}_upstream_seconds", "Upstream latency until response headers", ("upstream", "status"))
+        self.export = self.registry.histogram(
+            f"{prefix}_export_1080p_seconds", "ffmpeg 1080p transcode duration", ("outcome",),
+            buckets=EXPORT_BUCKETS)
+        self.renders = self.registry.histogram(
+            f"{prefix}_render_seconds", "Server-side render (ffmpeg) duration", ("op", "outcome"),
+            buckets=EXPORT_BUCKETS)
+        self.rate_limit_wait = self.registry.histogram(
+            f"{prefix}_rate_limit_wait_seconds", "Queue wait before provider submit", ("provider",),
+            buckets=WAIT_BUCKETS)
+        self._collectors: List[Callable[[], Iterable]] = []
+
+    def observe_upstream(self, name: str, status: int, seconds: float):
+        self.upstream.observe(seconds, name, status_class(status))
+
+    def collector(self, fn: Callable[[], Iterable]):
+        """스크레이프 시 호출 → snapshot 메트릭 목록"""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        extra = []
+        for fn in self._collectors:
+            try:
+                extra.extend(fn())
+            except Exception as e:
+                print(f"[METRICS] Collector {getattr(fn, '__name__', fn)} failed: {type(e).__name__}: {e}")
+        return self.registry.render(extra)
+
+
+class MetricsMiddleware:
+    """
+    순수 ASGI middleware (BaseHTTPMiddleware와 달리 streaming body를 버퍼링하지 않음)
+    - latency: 요청 시작 → http.response.start (대용량 다운로드의 전송 시간은 제외)
+    - route label: 매칭된 route의 path template (미매칭 404는 "unmatched" → label 수 고정)
+    """
+
+    def __init__(self, app, metrics: ProxyMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        state = [0, 0]  # status, body bytes
+        metrics = self.metrics
+
+        async def _send(message):
+            if message["type"] == "http.response.body":
+                state[1] += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                state[0] = message["status"]
+                metrics.requests.observe(
+                    time.perf_counter() - t0, _route(scope), scope["method"], status_class(state[0]))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            if not state[0]:
+                # 응답 전에 예외 → ServerErrorMiddleware가 500 처리
+                metrics.requests.observe(time.perf_counter() - t0, _route(scope), scope["method"], "5xx")
+            if state[1]:
+                metrics.response_bytes.inc(state[1], _route(scope))
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
@@ -0,0 +1,337 @@
+"""
+Upload Store
+- 업로드 이미지를 content hash(sha256)로 저장: {sha256}.{ext} (같은 이미지는 파일 1개)
+- body를 chunk 단위로 받아 디스크에 쓰면서 hash 계산 + 크기 제한 즉시 검사 (전체 디코딩 X)
+- 포맷은 확장자/헤더가 아닌 파일 시그니처로 판별 (png / jpeg / webp, render 입력용 저장소는 영상 / 오디오도)
+- 메타데이터는 meta/{sha256}.json (mime, size, mirror URL, 파생본 등)
+- 저장 시 generator 입력 해상도 파생본도 1회 생성 (common.renditions)
+- multipart/form-data는 python-multipart streaming parser로 파일 part만 흘려보냄
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from common.renditions import DERIVED_DIR, RENDITIONS, render_all, rendition_filename
+
+CHUNK_SIZE = 256 * 1024
+
+# 시그니처 → (mime, 확장자)
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+)
+
+
+class UploadRejected(Exception):
+    """클라이언트 입력 문제 (라우트에서 HTTPException(status, detail)로 변환)"""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def sniff_image(head: bytes) -> Optional[Tuple[str, str]]:
+    """앞부분 바이트로 (mime, ext) 판별, 지원하지 않는 포맷이면 None"""
+    for signature, mime, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mime, ext
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return None
+
+
+def sniff_media(head: bytes) -> Optional[Tuple[str, str]]:
+    """render 입력: 이미지 + mp4 / mov / webm 영상 + mp3 / wav / m4a 오디오"""
+    image = sniff_image(head)
+    if image is not None:
+        return image
+    if len(head) >= 12 and head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand == b"M4A ":
+            return "audio/mp4", "m4a"
+        if brand == b"qt  ":
+            return "video/quicktime", "mov"
+        return "video/mp4", "mp4"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video/webm", "webm"
+    if head.startswith(b"ID3") or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "audio/mpeg", "mp3"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "audio/wav", "wav"
+    return None
+
+
+def _mime_matches(declared: str, sniffed: str) -> bool:
+    declared = declared.replace("image/jpg", "image/jpeg")
+    if declared in (sniffed, "application/octet-stream"):
+        return True
+    # 영상 / 오디오는 브라우저마다 선언 mime이 제각각 (audio/mp3, video/quicktime 등) → 대분류만 확인
+    return not sniffed.startswith("image/") and declared.split("/")[0] in ("audio", "video")
+
+
+async def iter_multipart_file(chunks: AsyncIterator[bytes], content_type: str, field: str = "file") -> AsyncIterator[bytes]:
+    """multipart body에서 field 이름의 파일 part 데이터만 순서대로 yield (메모리에 전체를 모으지 않음)"""
+    from python_multipart.multipart import MultipartParser, parse_options_header
+
+    _, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise UploadRejected(400, "invalid_multipart: missing boundary")
+
+    state = {"header_field": b"", "header_value": b"", "target": False, "found": False, "done": False}
+    pending = []
+
+    def on_part_begin():
+        state["target"] = False
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        if state["header_field"].lower() == b"content-disposition":
+            _, disp = parse_options_header(state["header_value"])
+            state["target"] = disp.get(b"name") == field.encode() and not state["found"]
+        state["header_field"], state["header_value"] = b"", b""
+
+    def on_part_data(data, start, end):
+        if state["target"]:
+            pending.append(bytes(data[start:end]))
+
+    def on_part_end():
+        if state["target"]:
+            state["found"], state["done"], state["target"] = True, True, False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    async for chunk in chunks:
+        parser.write(chunk)
+        if pending:
+            for data in pending:
+                yield data
+            pending.clear()
+        if state["done"]:
+            return  # 파일 part 이후 나머지 field는 읽지 않음
+    if not state["found"]:
+        raise UploadRejected(400, f"invalid_multipart: no '{field}' file part")
+
+
+class UploadStore:
+    """
+    Args:
+        upload_dir: 업로드 디렉터리 (volume mount)
+        max_bytes: 이미지 1개 크기 상한
+        commit: 새 파일을 volume에 반영하는 coroutine (None이면 로컬 디스크로 간주)
+        renditions: 저장 시 파생본 생성 여부 (Pillow 필요)
+        sniff: 허용 포맷 판별 (기본: 이미지만, render 입력용은 sniff_media)
+        formats: 거절 메시지에 표시할 허용 포맷
+    """
+
+    def __init__(
+        self,
+        upload_dir: str,
+        max_bytes: int = 5 * 1024 * 1024,
+        commit: Optional[Callable[[], Awaitable[None]]] = None,
+        renditions: bool = False,
+        sniff: Callable[[bytes], Optional[Tuple[str, str]]] = sniff_image,
+        formats: str = "png/jpeg/webp",
+    ):
+        self.upload_dir = upload_dir
+        self.meta_dir = os.path.join(upload_dir, "meta")
+        self.derived_dir = os.path.join(upload_dir, DERIVED_DIR)
+        self.renditions = renditions
+        self.sniff = sniff
+        self.formats = formats
+        self.max_bytes = max_bytes
+        self.commit = commit
+        self._meta: Dict[str, dict] = {}
+        self.stored = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.renditions_built = 0
+
+    # ── 조회 ─────────────────────────────────────────────────────────────
+    def _meta_path(self, sha256: str) -> str:
+        return os.path.join(self.meta_dir, f"{sha256}.json")
+
+    def _read_meta(self, sha256: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(sha256)) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not os.path.exists(os.path.join(self.upload_dir, meta["filename"])):
+            return None
+        return meta
+
+    async def find(self, sha256: str) -> Optional[dict]:
+        """이미 저장된 이미지 메타데이터 (없으면 None)"""
+        sha256 = sha256.lower()
+        if len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256):
+            return None
+        meta = self._meta.get(sha256)
+        if meta is None:
+            meta = await asyncio.to_thread(self._read_meta, sha256)
+            if meta is not None:
+                self._meta[sha256] = meta
+        return meta
+
+    def _write_meta(self, meta: dict):
+        os.makedirs(self.meta_dir, exist_ok=True)
+        tmp = f"{self._meta_path(meta['sha256'])}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(meta["sha256"]))
+
+    async def update_meta(self, sha256: str, **fields):
+        """메타데이터 필드 추가 (mirror URL 등) + volume commit"""
+        meta = await self.find(sha256)
+        if meta is None:
+            return
+        meta = {**meta, **fields}
+        await asyncio.to_thread(self._write_meta, meta)
+        self._meta[sha256] = meta
+        if self.commit:
+            await self.commit()
+
+    # ── 파생본 ───────────────────────────────────────────────────────────
+    def _write_renditions(self, meta: dict) -> dict:
+        with open(os.path.join(self.upload_dir, meta["filename"]), "rb") as f:
+            source = f.read()
+        os.makedirs(self.derived_dir, exist_ok=True)
+        info = {}
+        for name, r in render_all(source).items():
+            filename = rendition_filename(meta["sha256"], name)
+            tmp = os.path.join(self.derived_dir, f".{filename}.{uuid.uuid4().hex[:8]}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(r["png"])
+            os.replace(tmp, os.path.join(self.derived_dir, filename))
+            info[name] = {k: r[k] for k in ("sha256", "pixel_md5", "width", "height")}
+            info[name]["filename"] = filename
+        return info
+
+    def _needs_renditions(self, meta: dict) -> bool:
+        return self.renditions and not set(RENDITIONS) <= set(meta.get("renditions", {}))
+
+    async def _with_renditions(self, meta: dict) -> dict:
+        """파생본 생성 후 반영한 meta 사본 (디코딩 실패 시 원본 meta 그대로, 업로드는 실패시키지 않음)"""
+        try:
+            info = await asyncio.to_thread(self._write_renditions, meta)
+        except Exception as e:
+            print(f"[UPLOAD] Renditions failed for {meta['sha256'][:12]}: {type(e).__name__}: {e}")
+            return meta
+        self.renditions_built += 1
+        return {**meta, "renditions": info}
+
+    async def ensure_renditions(self, meta: dict) -> dict:
+        """이전에 저장된 이미지에 파생본이 없으면 생성 + meta 갱신 + volume commit"""
+        if not self._needs_renditions(meta):
+            return meta
+        updated = await self._with_renditions(meta)
+        if updated is not meta:
+            await asyncio.to_thread(self._write_meta, updated)
+            self._meta[updated["sha256"]] = updated
+            if self.commit:
+                await self.commit()
+        return updated
+
+    # ── 저장 ─────────────────────────────────────────────────────────────
+    async def save_stream(self, chunks: AsyncIterator[bytes], declared_mime: Optional[str] = None) -> Tuple[dict, bool]:
+        """
+        chunk를 임시 파일에 쓰면서 hash / 크기 / 시그니처 검사 → {sha256}.{ext}로 확정
+
+        Returns:
+            (meta, deduplicated) — deduplicated면 기존 파일을 그대로 사용
+        """
+        os.makedirs(self.upload_dir, exist_ok=True)
+        part_path = os.path.join(self.upload_dir, f".{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        f = await asyncio.to_thread(open, part_path, "wb")
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise UploadRejected(
+                        413, f"file_too_large: exceeds {self.max_bytes / (1024 * 1024):.0f}MB limit"
+                    )
+                if len(head) < 16:
+                    head += chunk[:16 - len(head)]
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+            await asyncio.to_thread(f.close)
+
+            if size == 0:
+                raise UploadRejected(400, "empty_upload")
+            sniffed = self.sniff(head)
+            if sniffed is None:
+                raise UploadRejected(400, f"unsupported_format: Only {self.formats} allowed")
+            mime, ext = sniffed
+            if declared_mime and not _mime_matches(declared_mime, mime):
+                raise UploadRejected(400, f"mime_mismatch: declared {declared_mime}, content is {mime}")
+
+            sha256 = digest.hexdigest()
+            existing = await self.find(sha256)
+            if existing is not None:
+                self.deduplicated += 1
+                return await self.ensure_renditions(existing), True
+
+            meta = {
+                "sha256": sha256,
+                "filename": f"{sha256}.{ext}",
+                "mime": mime,
+                "size": size,
+                "created_at": time.time(),
+            }
+            await asyncio.to_thread(os.replace, part_path, os.path.join(self.upload_dir, meta["filename"]))
+            if self._needs_renditions(meta):
+                meta = await self._with_renditions(meta)
+            await asyncio.to_thread(self._write_meta, meta)
+            self._meta[sha256] = meta
+            self.stored += 1
+            if self.commit:
+                await self.commit()
+            return meta, False
+        except UploadRejected:
+            self.rejected += 1
+            raise
+        finally:
+            if not f.closed:
+                await asyncio.to_thread(f.close)
+            try:
+                os.unlink(part_path)
+            except FileNotFoundError:
+                pass
+
+    async def save_bytes(self, data: bytes, declared_mime: Optional[str] = None) -> Tuple[dict, bool]:
+        async def _chunks():
+            for i in range(0, len(data), CHUNK_SIZE):
+                yield data[i:i + CHUNK_SIZE]
+
+        return await self.save_stream(_chunks(), declared_mime)
+
+    def stats(self) -> dict:
+        return {
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+            "renditions_built": self.renditions_built,
+            "meta_cached": len(self._meta),
+        }
@@ -0,0 +1,169 @@
+"""
+User Store
+- users 테이블 스키마는 시작 시 1회만 생성 (요청마다 CREATE TABLE IF NOT EXISTS X)
+- 워커(컨테이너)당 SQLite 연결 1개 유지, WAL 저널 + synchronous=NORMAL
+- 쿼리는 전용 스레드 1개에서 실행 → event loop 블로킹 없음, 연결 공유도 안전
+- 쓰기 후 volume commit은 타이머로 모아서 1회 (commit 전 WAL checkpoint로 DB 파일에 반영)
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        email TEXT,
+        approved INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class UserStore:
+    """
+    Args:
+        db_path: SQLite 파일 경로 (volume mount 안)
+        commit: 변경사항을 volume에 반영하는 coroutine (None이면 로컬 디스크로 간주)
+        commit_interval: 첫 쓰기 후 volume commit까지 모으는 시간 (초)
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        commit: Optional[Callable[[], Awaitable[None]]] = None,
+        commit_interval: float = 5.0,
+    ):
+        self.db_path = db_path
+        self.commit = commit
+        self.commit_interval = commit_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._init_lock: Optional[asyncio.Lock] = None
+        self._commit_task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self.queries = 0
+        self.writes = 0
+        self.commits = 0
+
+    # ── 연결 / 스키마 ────────────────────────────────────────────────────
+    def _open(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute(SCHEMA)
+        self._conn = conn
+        print(f"[USERDB] Opened {self.db_path} (WAL)")
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """전용 스레드에서 실행 (연결은 이 스레드만 사용)"""
+        if self._conn is None:
+            await self.init()
+        self.queries += 1
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, self._conn)
+
+    async def init(self):
+        """연결 열기 + 스키마 생성 (프로세스당 1회)"""
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            if self._conn is None:
+                await asyncio.get_running_loop().run_in_executor(self._executor, self._open)
+
+    # ── 쿼리 ─────────────────────────────────────────────────────────────
+    async def register(self, username: str, password_hash: str, email: str) -> bool:
+        """승인 대기 상태로 추가 (username 중복이면 False)"""
+        def _insert(conn):
+            try:
+                conn.execute(
+                    "INSERT INTO users (username, password_hash, email, approved) VALUES (?, ?, ?, 0)",
+                    (username, password_hash, email)
+                )
+                return True
+            except sqlite3.IntegrityError:
+                return False
+
+        created = await self._run(_insert)
+        if created:
+            self._mark_dirty()
+        return created
+
+    async def authenticate(self, username: str, password_hash: str) -> Optional[tuple]:
+        """(id, username, email, approved) 또는 None"""
+        return await self._run(lambda conn: conn.execute(
+            "SELECT id, username, email, approved FROM users WHERE username = ? AND password_hash = ?",
+            (username, password_hash)
+        ).fetchone())
+
+    async def list_users(self) -> List[dict]:
+        rows = await self._run(lambda conn: conn.execute(
+            "SELECT id, username, email, approved, created_at FROM users ORDER BY created_at DESC"
+        ).fetchall())
+        return [{"id": r[0], "username": r[1], "email": r[2], "approved": r[3], "created_at": r[4]} for r in rows]
+
+    async def set_approved(self, user_id: int, approved: int):
+        await self._run(lambda conn: conn.execute(
+            "UPDATE users SET approved = ? WHERE id = ?", (approved, user_id)
+        ))
+        self._mark_dirty()
+
+    async def update_password(self, username: str, old_hash: str, new_hash: str) -> bool:
+        """기존 비밀번호가 맞을 때만 변경 (틀리면 False)"""
+        cursor = await self._run(lambda conn: conn.execute(
+            "UPDATE users SET password_hash = ? WHERE username = ? AND password_hash = ?",
+            (new_hash, username, old_hash)
+        ))
+        if cursor.rowcount == 0:
+            return False
+        self._mark_dirty()
+        return True
+
+    # ── volume commit (타이머 배치) ──────────────────────────────────────
+    def _mark_dirty(self):
+        self.writes += 1
+        self._dirty = True
+        if self._commit_task is None or self._commit_task.done():
+            self._commit_task = asyncio.get_running_loop().create_task(self._commit_later())
+
+    async def _commit_later(self):
+        await asyncio.sleep(self.commit_interval)
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"[USERDB] Commit failed: {type(e).__name__}: {e}")
+
+    async def flush(self):
+        """WAL을 DB 파일에 합친 뒤 volume commit 1회 (다른 컨테이너는 DB 파일만 보면 됨)"""
+        if not self._dirty or self._conn is None:
+            return
+        self._dirty = False
+        await self._run(lambda conn: conn.execute("PRAGMA wal_checkpoint(TRUNCATE)"))
+        if self.commit:
+            t0 = time.perf_counter()
+            await self.commit()
+            self.commits += 1
+            print(f"[USERDB] Volume commit ({(time.perf_counter() - t0) * 1000:.0f}ms)")
+
+    async def aclose(self):
+        if self._commit_task and not self._commit_task.done():
+            self._commit_task.cancel()
+        await self.flush()
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await asyncio.get_running_loop().run_in_executor(self._executor, conn.close)
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "queries": self.queries,
+            "writes": self.writes,
+            "volume_commits": self.commits,
+            "pending_commit": self._dirty,
+        }
@@ -0,0 +1,136 @@
+"""DemandPredictor / Prometheus text 출력 로컬 테스트 (가상 시계, 외부 의존성 없음)
+
+- 알려진 도착 이력 → EWMA / p95 / keep_warm / max_containers 계산값
+- window 밖 도착은 제외, max_cap 상한
+- exposition: label escaping, histogram _bucket(누적, le 포함) / _sum / _count, HELP / TYPE
+- GPU 쪽 telemetry 전송은 queue가 가득 차도 block 없이 버림 (main._emit_telemetry, queue는 stand-in)
+"""
+import io
+import math
+import sys
+import time
+from contextlib import redirect_stdout
+from queue import Full
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from common import autoscale
+from common.autoscale import DemandPredictor
+from common.metrics import Counter, Histogram, Registry
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+NOW = 60 * 28_000_000 + 30.0  # 분 중간
+autoscale.time = FakeClock(NOW)
+
+
+def minute_ago(k):
+    return NOW - 60 * k
+
+
+# 1. 60분 동안 분당 2건, 처리시간 기본 90s → Little's law
+predictor = DemandPredictor()
+for k in range(60):
+    predictor.record_arrival(minute_ago(k))
+    predictor.record_arrival(minute_ago(k))
+rec = predictor.recommend()
+ewma = sum(0.3 * 2 * 0.7 ** i for i in range(60))
+assert rec["arrivals_per_min_ewma"] == round(ewma, 3) == 2.0, rec
+assert rec["arrivals_per_min_p95"] == 2 and rec["mean_service_sec"] == 90.0
+assert rec["keep_warm"] == math.ceil(ewma / 60 * 90) == 3
+assert rec["max_containers"] == math.ceil(2 / 60 * 90 * 1.2) == 4
+print(f"[OK] steady 2/min × 90s: {rec}")
+
+# 2. 조용하다가 마지막 1분에 30건 버스트, 실측 처리시간 60s
+predictor = DemandPredictor()
+for _ in range(30):
+    predictor.record_arrival(NOW)
+for seconds in (50, 60, 70):
+    predictor.record_service(seconds)
+rec = predictor.recommend()
+assert rec["arrivals_per_min_ewma"] == 9.0 and rec["arrivals_per_min_p95"] == 0, rec
+assert rec["mean_service_sec"] == 60.0
+assert rec["keep_warm"] == 9 and rec["max_containers"] == math.ceil(9 / 60 * 60 * 1.2) == 11
+assert DemandPredictor(max_cap=5).recommend()["max_containers"] == 1
+capped = DemandPredictor(max_cap=5)
+for _ in range(30):
+    capped.record_arrival(NOW)
+assert capped.recommend()["keep_warm"] == 5 and capped.recommend()["max_containers"] == 5
+print(f"[OK] burst of 30 in the last minute: {rec}, capped at max_cap")
+
+# 3. window 밖 도착은 무시
+predictor = DemandPredictor(window_min=60)
+for k in (60, 75, 120):
+    predictor.record_arrival(minute_ago(k))
+rec = predictor.recommend()
+assert rec["arrivals_per_min_ewma"] == 0 and rec["keep_warm"] == 0 and rec["max_containers"] == 1, rec
+print("[OK] arrivals older than the window are dropped")
+
+# 4. Prometheus text format
+registry = Registry()
+jobs = registry.counter("ltx_jobs_total", "Jobs by outcome", ("outcome", "priority"))
+jobs.inc(1, "completed", "interactive")
+jobs.inc(2, "completed", "interactive")
+jobs.inc(1, 'bad "quote"\\path\nnewline', "batch")
+latency = registry.histogram("ltx_stage_seconds", "Stage duration", ("stage",), buckets=(0.1, 1.0))
+for value in (0.05, 0.5, 1.0, 5.0):
+    latency.observe(value, "denoise")
+queue = registry.gauge("ltx_queue_depth", "Waiting jobs")
+queue.set(3)
+queue.dec(1)
+text = registry.render()
+lines = text.splitlines()
+
+assert text.endswith("\n")
+assert "# HELP ltx_jobs_total Jobs by outcome" in lines and "# TYPE ltx_jobs_total counter" in lines
+assert 'ltx_jobs_total{outcome="completed",priority="interactive"} 3' in lines
+assert 'ltx_jobs_total{outcome="bad \\"quote\\"\\\\path\\nnewline",priority="batch"} 1' in lines, text
+assert "# TYPE ltx_stage_seconds histogram" in lines
+assert 'ltx_stage_seconds_bucket{stage="denoise",le="0.1"} 1' in lines
+assert 'ltx_stage_seconds_bucket{stage="denoise",le="1"} 3' in lines  # 경계값 1.0은 le="1"에 포함
+assert 'ltx_stage_seconds_bucket{stage="denoise",le="+Inf"} 4' in lines
+assert 'ltx_stage_seconds_sum{stage="denoise"} 6.55' in lines
+assert 'ltx_stage_seconds_count{stage="denoise"} 4' in lines
+assert "# TYPE ltx_queue_depth gauge" in lines and "ltx_queue_depth 2" in lines
+assert latency.quantile(0.5, "denoise") == 1.0 and latency.quantile(0.99, "denoise") == math.inf
+
+# scrape 시점 snapshot 메트릭 (registry 밖) 도 같이 출력
+extra = Counter("ltx_snapshot_total", "Snapshot", ())
+extra.inc(5)
+assert "ltx_snapshot_total 5" in registry.render([extra]).splitlines()
+assert Histogram("h", "x").render() == ["# HELP h x", "# TYPE h histogram"]
+print("[OK] exposition: escaped labels, cumulative buckets with +Inf, _sum / _count, gauges, extra metrics")
+
+# 5. telemetry queue 가득 참 (스크레이프 없음) → put은 block 없이 실패, 예외 전파 없음
+import main  # noqa: E402
+
+
+class FullQueue:
+    """Modal Queue stand-in: block=True면 영원히 기다리는 상황 → 호출 자체를 실패로 간주"""
+
+    def __init__(self):
+        self.calls = []
+
+    def put(self, event, block=True, timeout=None):
+        self.calls.append((block, timeout))
+        if block and timeout is None:
+            raise AssertionError("blocking put would hang the GPU path")
+        raise Full
+
+
+main.telemetry_queue = FullQueue()
+out = io.StringIO()
+t0 = time.perf_counter()
+with redirect_stdout(out):
+    main._emit_telemetry({"type": "job", "gpu_sec": 1.0})
+assert main.telemetry_queue.calls == [(False, None)] and time.perf_counter() - t0 < 0.1
+assert "queue full, dropped job event" in out.getvalue(), out.getvalue()
+print("[OK] full telemetry queue → event dropped without blocking")
+print("OK")
@@ -0,0 +1,70 @@
+"""1080p 캐시 LRU 인덱스 로컬 테스트 (임시 디렉터리, 외부 호출 없음)
+
+- byte budget 초과 → 가장 오래 안 쓰인 파일부터 low watermark까지 삭제
+- 여러 변경이 flush 1회(SQLite 1 트랜잭션 + commit 1회)로 묶임
+- 재시작 시 SQLite + 디렉터리 대조로 복원 (외부에서 지운 파일 제거, 인덱스 밖 파일 편입)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from proxy.cache_index import CacheIndex
+
+MB = 1024 * 1024
+
+
+def write(cache_dir, name, size):
+    path = os.path.join(cache_dir, name)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+async def main():
+    cache_dir = tempfile.mkdtemp()
+    commits = []
+
+    async def commit():
+        commits.append(time.time())
+
+    index = CacheIndex(cache_dir, budget_bytes=10 * MB, commit=commit, flush_interval=3600)
+    await index.ready()
+
+    for i in range(4):
+        index.add(write(cache_dir, f"cgt-{i}_1080p.mp4", 3 * MB))
+        if i == 2:
+            # cgt-0을 다시 조회 → cgt-1이 가장 오래된 항목이 됨
+            assert index.lookup("cgt-0_1080p.mp4")
+    assert index.lookup("cgt-1_1080p.mp4") is None
+    assert not os.path.exists(os.path.join(cache_dir, "cgt-1_1080p.mp4"))
+    assert index.total_bytes <= 10 * MB
+    print(f"[OK] LRU eviction under 10MB budget: {sorted(index._entries)}")
+
+    await index.flush()
+    await index.flush()  # 변경 없음 → no-op
+    assert len(commits) == 1, commits
+    print("[OK] 5 changes → 1 SQLite transaction + 1 volume commit")
+
+    os.unlink(os.path.join(cache_dir, "cgt-2_1080p.mp4"))  # 다른 컨테이너가 evict
+    write(cache_dir, "cgt-9_1080p.mp4", 1 * MB)            # 다른 컨테이너가 추가
+    write(cache_dir, ".cgt-8_1080p.mp4.part", 1 * MB)       # 진행 중 export는 제외
+    await index.aclose()
+
+    reloaded = CacheIndex(cache_dir, budget_bytes=10 * MB)
+    await reloaded.ready()
+    names = sorted(reloaded._entries)
+    assert names == ["cgt-0_1080p.mp4", "cgt-3_1080p.mp4", "cgt-9_1080p.mp4"], names
+    assert reloaded._entries["cgt-0_1080p.mp4"].hits == 1
+    print(f"[OK] reload reconciled with directory: {names}")
+
+    stats = reloaded.stats()
+    print(f"stats: files={stats['files']} total={stats['total_bytes']} pending={stats['pending_rows']}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""캐시 파일 서빙 로컬 테스트 (common.filestream.file_response, 외부 호출 없음)
+
+200 / 단일·suffix·다중 Range 206 / If-None-Match·If-Modified-Since 304 / If-Range 불일치 200 / 416
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from common.filestream import file_response
+
+DATA = os.urandom(3 * 1024 * 1024 + 17)
+path = os.path.join(tempfile.mkdtemp(), "cgt-1_1080p.mp4")
+with open(path, "wb") as f:
+    f.write(DATA)
+
+app = FastAPI()
+
+
+@app.get("/file")
+async def serve(request: Request):
+    return file_response(path, request.headers, media_type="video/mp4", filename="cgt-1_1080p.mp4")
+
+
+client = TestClient(app)
+
+r = client.get("/file")
+assert r.status_code == 200 and r.content == DATA
+etag, last_modified = r.headers["etag"], r.headers["last-modified"]
+assert r.headers["content-length"] == str(len(DATA))
+print(f"[OK] 200 full, ETag={etag}")
+
+r = client.get("/file", headers={"Range": "bytes=100-199"})
+assert r.status_code == 206 and r.content == DATA[100:200]
+assert r.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+print("[OK] 206 single range")
+
+r = client.get("/file", headers={"Range": "bytes=-500"})
+assert r.status_code == 206 and r.content == DATA[-500:]
+print("[OK] 206 suffix range")
+
+r = client.get("/file", headers={"Range": "bytes=0-9, 1000-1009"})
+assert r.status_code == 206 and r.headers["content-type"].startswith("multipart/byteranges")
+assert DATA[0:10] in r.content and DATA[1000:1010] in r.content
+assert int(r.headers["content-length"]) == len(r.content)
+print("[OK] 206 multipart/byteranges")
+
+r = client.get("/file", headers={"If-None-Match": etag})
+assert r.status_code == 304 and not r.content
+r = client.get("/file", headers={"If-Modified-Since": last_modified})
+assert r.status_code == 304
+print("[OK] 304 via If-None-Match / If-Modified-Since")
+
+r = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": etag})
+assert r.status_code == 206
+r = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+assert r.status_code == 200 and len(r.content) == len(DATA)
+print("[OK] If-Range honoured (match → 206, stale → 200)")
+
+r = client.get("/file", headers={"Range": f"bytes={len(DATA)}-"})
+assert r.status_code == 416 and r.headers["content-range"] == f"bytes */{len(DATA)}"
+print("[OK] 416 unsatisfiable")
+print("OK")
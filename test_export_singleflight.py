@@ -0,0 +1,103 @@
+"""1080p export worker 로컬 테스트 (ffmpeg 대신 stand-in 변환 프로세스, 외부 호출 없음)
+
+- 같은 task_id 동시 요청 3건 → 변환 프로세스 1회, 세 요청 모두 동일한 전체 바이트 수신
+- 변환 중 스트리밍 + CACHE_DIR 기록 → 완료 후 {task_id}_1080p.mp4 + on_complete 1회
+- 변환 실패 → 요청자 스트림 에러, .part 파일 정리
+- prefetch: 동시 실행 상한 + 중복 제거, 대기 중 prefetch에 실제 요청이 합류하면 즉시 시작
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from proxy.export import ExportManager
+
+CHUNKS = 20
+CHUNK = 64 * 1024
+
+# stand-in: 천천히 stdout으로 바이트를 내보내는 "변환기", 실행될 때마다 launches 파일에 한 줄 추가
+STAND_IN = f"""
+import sys, time
+open(sys.argv[2], "a").write("x\\n")
+if sys.argv[1] == "fail":
+    sys.stderr.write("stand-in failure\\n")
+    sys.exit(1)
+for i in range({CHUNKS}):
+    sys.stdout.buffer.write(bytes([i]) * {CHUNK})
+    sys.stdout.buffer.flush()
+    time.sleep(0.02)
+"""
+
+
+async def collect(job):
+    return b"".join([chunk async for chunk in job.stream()])
+
+
+async def main():
+    cache_dir = tempfile.mkdtemp()
+    launches = os.path.join(cache_dir, "launches.txt")
+    commits = []
+
+    async def on_complete(path):
+        commits.append(path)
+
+    manager = ExportManager(
+        cache_dir,
+        max_workers=1,
+        on_complete=on_complete,
+        build_command=lambda source: [sys.executable, "-c", STAND_IN, source, launches],
+    )
+    expected = b"".join(bytes([i]) * CHUNK for i in range(CHUNKS))
+
+    jobs = [manager.get_or_start("cgt-1", "ok") for _ in range(3)]
+    assert all(job is jobs[0] for job in jobs)
+    results = await asyncio.gather(*(collect(job) for job in jobs))
+    await asyncio.sleep(0.05)
+    assert all(r == expected for r in results), [len(r) for r in results]
+    assert open(launches).read().count("x") == 1
+    final = manager.final_path("cgt-1")
+    assert open(final, "rb").read() == expected
+    assert commits == [final]
+    assert manager.active("cgt-1") is None
+    print(f"[OK] 3 concurrent requests → 1 transcode, {len(expected)} bytes each, cached + committed once")
+
+    failed = manager.get_or_start("cgt-2", "fail")
+    try:
+        await collect(failed)
+        raise AssertionError("stream should fail")
+    except RuntimeError as e:
+        error = str(e)
+    assert "stand-in failure" in error, error
+    assert not os.path.exists(failed.part_path) and not os.path.exists(manager.final_path("cgt-2"))
+    print(f"[OK] failed export surfaces error: {error[:80]}")
+
+    assert manager.stats()["coalesced"] == 2
+
+    speculative = ExportManager(
+        cache_dir,
+        max_workers=2,
+        max_speculative=1,
+        build_command=lambda source: [sys.executable, "-c", STAND_IN, source, launches],
+    )
+    assert speculative.prefetch("cgt-10", "ok") and speculative.prefetch("cgt-11", "ok")
+    assert not speculative.prefetch("cgt-10", "ok")  # 중복
+    first = speculative.active("cgt-10")
+    assert speculative.stats()["speculative"]["running"] == 1
+    assert speculative.stats()["speculative"]["pending"] == 1
+    promoted = speculative.get_or_start("cgt-11", "ok")  # 대기 중 → 즉시 시작
+    assert speculative.stats()["speculative"]["pending"] == 0
+    assert await collect(promoted) == expected
+    assert await collect(first) == expected
+    await asyncio.sleep(0.1)
+    assert os.path.exists(speculative.final_path("cgt-10"))
+    assert not speculative.prefetch("cgt-10", "ok")  # 이미 시도한 태스크
+    print(f"[OK] prefetch budget + dedup + promotion: {speculative.stats()['speculative']}")
+
+    print(f"stats: {manager.stats()}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
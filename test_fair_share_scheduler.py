@@ -0,0 +1,122 @@
+"""우선순위 + fair-share 스케줄러 로컬 테스트 (GPU 없음, job은 asyncio stand-in)
+
+- interactive가 먼저 대기 중인 batch보다 먼저 실행
+- 같은 클래스 안에서는 유저별 round-robin (먼저 몰아 넣은 유저가 독점하지 않음)
+- aging: 오래 기다린 batch job은 승격되어 새 interactive보다 먼저 실행
+- 대기 중 취소 → 대기열에서 빠짐, 슬롯을 받은 직후 취소 → 슬롯 반환
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from common.scheduler import FairShareScheduler
+
+
+async def occupy(scheduler):
+    """슬롯 1개를 잡아 두고 반환용 Event 돌려줌"""
+    gate = asyncio.Event()
+    task = asyncio.create_task(scheduler.run("holder", "holder", "interactive", gate.wait))
+    await asyncio.sleep(0)
+    assert scheduler.inflight == 1
+    return gate, task
+
+
+async def run_all(scheduler, jobs, order):
+    """jobs: [(job_id, user, priority)] 순서대로 접수 → 실행 순서를 order에 기록"""
+    async def job(job_id):
+        order.append(job_id)
+        await asyncio.sleep(0)
+
+    tasks = []
+    for job_id, user, priority in jobs:
+        tasks.append(asyncio.create_task(scheduler.run(job_id, user, priority, lambda j=job_id: job(j))))
+        await asyncio.sleep(0)
+    return tasks
+
+
+async def test_priority_classes():
+    scheduler = FairShareScheduler(max_inflight=1)
+    gate, holder = await occupy(scheduler)
+    order = []
+    tasks = await run_all(scheduler, [("b1", "u1", "batch"), ("s1", "u1", "sweep"), ("i1", "u2", "interactive"),
+                                      ("b2", "u2", "batch")], order)
+    assert scheduler.position("i1") == 1 and scheduler.position("s1") == 4
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+    assert order == ["i1", "b1", "b2", "s1"], order
+    assert scheduler.inflight == 0
+    print(f"[OK] priority classes: {order}")
+
+
+async def test_round_robin():
+    scheduler = FairShareScheduler(max_inflight=1)
+    gate, holder = await occupy(scheduler)
+    order = []
+    jobs = [(f"a{i}", "alice", "batch") for i in range(4)] + [(f"b{i}", "bob", "batch") for i in range(2)]
+    tasks = await run_all(scheduler, jobs, order)
+    assert scheduler.position("b0") == 2  # FIFO였다면 5번째
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+    assert order == ["a0", "b0", "a1", "b1", "a2", "a3"], order
+    print(f"[OK] per-user round-robin: {order}")
+
+
+async def test_aging():
+    scheduler = FairShareScheduler(max_inflight=1, aging_sec={"batch": 0.05})
+    gate, holder = await occupy(scheduler)
+    order = []
+    tasks = await run_all(scheduler, [("old-batch", "u1", "batch")], order)
+    await asyncio.sleep(0.15)  # aging 간격 3배 대기 → interactive로 승격
+    tasks += await run_all(scheduler, [("new-interactive", "u2", "interactive")], order)
+    assert scheduler.position("old-batch") == 1
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+    assert order == ["old-batch", "new-interactive"], order
+
+    # aging 전에는 그대로 interactive 우선
+    scheduler = FairShareScheduler(max_inflight=1, aging_sec={"batch": 60})
+    gate, holder = await occupy(scheduler)
+    order = []
+    tasks = await run_all(scheduler, [("batch", "u1", "batch"), ("interactive", "u2", "interactive")], order)
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+    assert order == ["interactive", "batch"], order
+    print("[OK] aged batch job runs before a newer interactive job")
+
+
+async def test_cancellation():
+    scheduler = FairShareScheduler(max_inflight=1)
+    gate, holder = await occupy(scheduler)
+    order = []
+    tasks = await run_all(scheduler, [("cancelled", "u1", "interactive"), ("next", "u2", "interactive")], order)
+    tasks[0].cancel()
+    await asyncio.sleep(0)
+    assert scheduler.position("cancelled") is None and scheduler.position("next") == 1
+    assert scheduler.stats()["queued"]["interactive"] == 1
+    gate.set()
+    await asyncio.gather(holder, tasks[1])
+    assert order == ["next"] and scheduler.inflight == 0, (order, scheduler.inflight)
+
+    # 슬롯을 받은 직후(job 시작 전) 취소 → 슬롯 반환 후 다음 job 진행
+    await scheduler.acquire("holder", "holder", "interactive")
+    order = []
+    tasks = await run_all(scheduler, [("granted", "u1", "interactive"), ("after", "u2", "interactive")], order)
+    scheduler.release()  # → "granted"에 슬롯 배정, task는 아직 재개 전
+    assert scheduler.inflight == 1 and scheduler.position("granted") is None
+    tasks[0].cancel()
+    await asyncio.wait_for(tasks[1], 1)
+    assert order == ["after"] and scheduler.inflight == 0, (order, scheduler.inflight)
+    print("[OK] cancelled waiter leaves the queue, cancelled grantee returns its slot")
+
+
+async def main():
+    await test_priority_classes()
+    await test_round_robin()
+    await test_aging()
+    await test_cancellation()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    print("OK")
@@ -0,0 +1,85 @@
+"""업로드 이미지 서빙 로컬 테스트 (임시 디렉터리, 외부 호출 없음)
+
+- content hash ETag + immutable Cache-Control, If-None-Match → 304 (파일 읽기 없음)
+- Range 206 / 416, 작은 이미지는 메모리 LRU hit, 큰 이미지는 파일 스트리밍
+- 시그니처로 MIME 판별, 이미지 아님 / 숨김 파일 / 경로 조작 → 404
+"""
+import hashlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["EXPORT_PREFETCH"] = "false"
+import main_byteplus
+
+upload_dir = tempfile.mkdtemp()
+server = main_byteplus.image_server
+server.upload_dir = upload_dir
+main_byteplus.user_store.db_path = os.path.join(upload_dir, "users.db")
+
+
+def save(name, data):
+    with open(os.path.join(upload_dir, name), "wb") as f:
+        f.write(data)
+
+
+buf = io.BytesIO()
+Image.new("RGB", (32, 32), color=(1, 2, 3)).save(buf, format="JPEG")
+SMALL = buf.getvalue()
+SMALL_SHA = hashlib.sha256(SMALL).hexdigest()
+save(f"{SMALL_SHA}.jpg", SMALL)
+
+LARGE = b"\x89PNG\r\n\x1a\n" + os.urandom(2 * 1024 * 1024)
+LARGE_SHA = hashlib.sha256(LARGE).hexdigest()
+save(f"{LARGE_SHA}.png", LARGE)
+
+save("legacy-upload.png", SMALL)       # 이전 방식 파일명 + 확장자와 다른 실제 포맷
+save("notes.png", b"not an image at all")
+save(".secret.part", SMALL)
+
+with TestClient(main_byteplus.fast_app) as client:
+    r = client.get(f"/api/v3/uploads/{SMALL_SHA}.jpg")
+    assert r.status_code == 200 and r.content == SMALL
+    assert r.headers["content-type"] == "image/jpeg"
+    assert r.headers["etag"] == f'"{SMALL_SHA}"'
+    assert "immutable" in r.headers["cache-control"]
+    reads = server.disk_reads
+    for _ in range(20):
+        assert client.get(f"/api/v3/uploads/{SMALL_SHA}.jpg").content == SMALL
+    assert server.disk_reads == reads and server.memory_hits >= 20
+    print("[OK] small image: hash ETag, immutable, 20 repeats served from memory")
+
+    r = client.get(f"/api/v3/uploads/{SMALL_SHA}.jpg", headers={"If-None-Match": f'"{SMALL_SHA}"'})
+    assert r.status_code == 304 and not r.content
+    r = client.get(f"/api/v3/uploads/{LARGE_SHA}.png", headers={"If-None-Match": f'W/"{LARGE_SHA}"'})
+    assert r.status_code == 304
+    print("[OK] 304 via If-None-Match (strong / weak)")
+
+    r = client.get(f"/api/v3/uploads/{SMALL_SHA}.jpg", headers={"Range": "bytes=0-99"})
+    assert r.status_code == 206 and r.content == SMALL[:100]
+    r = client.get(f"/api/v3/uploads/{LARGE_SHA}.png", headers={"Range": "bytes=1000-1999"})
+    assert r.status_code == 206 and r.content == LARGE[1000:2000]
+    assert r.headers["etag"] == f'"{LARGE_SHA}"'
+    r = client.get(f"/api/v3/uploads/{LARGE_SHA}.png", headers={"Range": f"bytes={len(LARGE)}-"})
+    assert r.status_code == 416
+    r = client.get(f"/api/v3/uploads/{LARGE_SHA}.png")
+    assert r.status_code == 200 and r.content == LARGE and server.stats()["memory_items"] == 1
+    print("[OK] Range 206 (memory + file), 416, large image streamed from file (not cached in memory)")
+
+    r = client.get("/api/v3/uploads/legacy-upload.png")
+    assert r.status_code == 200 and r.headers["content-type"] == "image/jpeg"
+    assert r.headers["etag"] == f'"{SMALL_SHA}"' and "immutable" not in r.headers["cache-control"]
+    print("[OK] legacy name: MIME from signature, content-hash ETag, short max-age")
+
+    for name in ["notes.png", ".secret.part", "missing.png", "..%2Fusers.db"]:
+        assert client.get(f"/api/v3/uploads/{name}").status_code == 404, name
+    assert client.head(f"/api/v3/uploads/{SMALL_SHA}.jpg").status_code == 200
+    print("[OK] non-image / hidden / missing / traversal → 404, HEAD supported")
+    print(f"stats: {server.stats()}")
+print("OK")
@@ -0,0 +1,140 @@
+"""/result 결과 저장소 로컬 테스트 (common.results.ResultStore, volume은 임시 디렉터리 + stand-in reload/commit)
+
+- save: 파일 쓰기 + sweep은 스레드에서, 이후 commit 1회
+- /result 라우트(main.py와 같은 흐름): Range 206 / ETag 304 / TTL 지난 결과 410 → sweep 후 404
+- 미확인 job_id: 동시 miss는 reload 1회 공유, reload_interval 안의 반복 조회는 reload 없음
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from common import results as results_module
+from common.filestream import file_response
+from common.results import ResultStore
+
+TTL = 3600
+DATA = os.urandom(2 * 1024 * 1024 + 5)
+root = tempfile.mkdtemp()
+remote = {}  # 다른 컨테이너가 volume에 commit한 결과 (reload 시 로컬에 나타남)
+events = {"reload": 0, "commit": 0}
+write_threads = []
+
+
+async def stand_in_reload():
+    events["reload"] += 1
+    await asyncio.sleep(0.05)
+    for job_id, data in remote.items():
+        with open(f"{root}/{job_id}.mp4", "wb") as f:
+            f.write(data)
+
+
+async def stand_in_commit():
+    events["commit"] += 1
+
+
+store = ResultStore(root, TTL, reload=stand_in_reload, commit=stand_in_commit, reload_interval=0.3)
+original_write = store._write
+
+
+def recording_write(path, data):
+    write_threads.append(threading.current_thread() is threading.main_thread())
+    original_write(path, data)
+
+
+store._write = recording_write
+
+app = FastAPI()
+jobs = {}
+
+
+@app.get("/result/{job_id}")
+async def job_result(job_id: str, request: Request):
+    status, path, st = await store.lookup(job_id, known=job_id in jobs)
+    if status != "hit":
+        return Response(content=json.dumps({"error": status}),
+                        status_code=404 if status == "not_found" else 410, media_type="application/json")
+    return file_response(path, request.headers, media_type="video/mp4",
+                         extra_headers={"Cache-Control": f"private, max-age={TTL}"}, st=st)
+
+
+async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # 1. 저장: 스레드에서 쓰기, commit 1회
+        path = await store.save("abcd0001", DATA)
+        jobs["abcd0001"] = {"status": "complete"}
+        assert write_threads == [False] and events["commit"] == 1
+        assert open(path, "rb").read() == DATA
+        print("[OK] save writes in a worker thread, then one volume commit")
+
+        # 2. Range / ETag
+        r = await client.get("/result/abcd0001")
+        assert r.status_code == 200 and r.content == DATA and r.headers["accept-ranges"] == "bytes"
+        etag = r.headers["etag"]
+        r = await client.get("/result/abcd0001", headers={"Range": "bytes=1000-1999"})
+        assert r.status_code == 206 and r.content == DATA[1000:2000]
+        assert r.headers["content-range"] == f"bytes 1000-1999/{len(DATA)}"
+        r = await client.get("/result/abcd0001", headers={"Range": "bytes=-10"})
+        assert r.status_code == 206 and r.content == DATA[-10:]
+        r = await client.get("/result/abcd0001", headers={"If-None-Match": etag})
+        assert r.status_code == 304 and not r.content and r.headers["etag"] == etag
+        r = await client.get("/result/abcd0001", headers={"Range": f"bytes={len(DATA)}-"})
+        assert r.status_code == 416
+        assert events["reload"] == 0  # 이 컨테이너가 아는 job → reload 없음
+        print("[OK] /result: 200, Range 206 (+suffix), If-None-Match 304, 416")
+
+        # 3. TTL 지남 → 410, sweep 후 파일 삭제 → 404
+        old = time.time() - TTL - 60
+        os.utime(path, (old, old))
+        r = await client.get("/result/abcd0001")
+        assert r.status_code == 410 and r.json() == {"error": "expired"}
+        assert store.sweep() == 0 and os.path.exists(path)  # save 때 sweep 했음 → interval 안에서는 건너뜀
+        assert store.sweep(now=time.time() + store.sweep_interval) == 1 and not os.path.exists(path)
+        r = await client.get("/result/abcd0001")
+        assert r.status_code == 404 and events["reload"] == 0
+        print("[OK] expired result → 410, swept file → 404")
+
+        # 4. 미확인 id 동시 조회 → reload 1회 공유, interval 안에서는 reload 없음
+        responses = await asyncio.gather(*[client.get(f"/result/{i:08x}") for i in range(50)])
+        assert all(r.status_code == 404 for r in responses)
+        assert events["reload"] == 1, events
+        for i in range(50):
+            assert (await client.get(f"/result/{i:08x}")).status_code == 404
+        assert events["reload"] == 1, events
+        r = await client.get("/result/..%2F..%2Fetc")
+        assert r.status_code == 404 and events["reload"] == 1
+        print(f"[OK] 100 unknown-id lookups → {events['reload']} volume reload")
+
+        # 다른 컨테이너가 만든 결과: interval 지나면 reload 후 서빙
+        remote["beef0002"] = DATA[:1000]
+        r = await client.get("/result/beef0002")
+        assert r.status_code == 404 and events["reload"] == 1  # interval 안 → 아직 reload 안 함
+        await asyncio.sleep(0.35)
+        r = await client.get("/result/beef0002")
+        assert r.status_code == 200 and r.content == DATA[:1000] and events["reload"] == 2
+        r = await client.get("/result/beef0002", headers={"Range": "bytes=0-9"})
+        assert r.status_code == 206 and events["reload"] == 2  # 이제 로컬에 있음 → reload 없음
+        print("[OK] result committed by another container served after the next reload")
+
+    # reload 실패는 miss로 처리 (예외 전파 X)
+    async def failing_reload():
+        raise RuntimeError("volume busy")
+
+    broken = ResultStore(tempfile.mkdtemp(), TTL, reload=failing_reload)
+    assert await broken.lookup("cafe0003") == ("not_found", None, None) and broken.reloads == 1
+    print("[OK] reload failure → not_found")
+
+
+asyncio.run(main())
+assert results_module.JOB_ID_RE.match("abcd0001") and not results_module.JOB_ID_RE.match("../x")
+print("OK")
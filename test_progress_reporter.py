@@ -0,0 +1,102 @@
+"""ProgressReporter 로컬 테스트 (GPU 없음, 가상 시계로 stage / step 진행 재현)
+
+- 전체 진행률(prior 가중치)은 stage 전환 / step 진행 동안 단조 증가, done에서 1.0
+- ETA: 현재 stage는 실측 step 속도, 이후 stage는 prior 합 → 예상대로 진행하면 단조 감소
+- skip한 stage는 ETA / 진행률에서 제외, min_interval 안의 step 기록은 묶임
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from common import progress
+from common.progress import ProgressReporter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+clock = FakeClock()
+progress.time = clock  # 모듈의 time.time()만 가상 시계로
+
+STAGES = [("load", 10.0), ("encode", 5.0), ("denoise", 60.0), ("decode", 15.0), ("upload", 10.0)]
+
+# 1. 예상 소요시간대로 진행 → 진행률 단조 증가, ETA 단조 감소
+store = {}
+reporter = ProgressReporter(store, "job-1", STAGES, min_interval=0.0)
+samples = []
+
+
+def sample():
+    snap = reporter.snapshot()
+    samples.append((snap["stage"], snap["fraction"], snap["eta_sec"]))
+
+
+for name, prior in STAGES:
+    if name == "denoise":
+        reporter.stage(name, total_steps=30)
+        sample()
+        for step in range(1, 31):
+            clock.advance(prior / 30)
+            reporter.update_step(step)
+            sample()
+    else:
+        reporter.stage(name)
+        sample()
+        for _ in range(4):
+            clock.advance(prior / 4)
+            sample()
+reporter.finish()
+sample()
+
+fractions = [f for _, f, _ in samples]
+etas = [e for _, _, e in samples]
+assert all(b >= a for a, b in zip(fractions, fractions[1:])), fractions
+assert all(b <= a + 1e-9 for a, b in zip(etas, etas[1:])), etas
+assert fractions[0] == 0.0 and fractions[-1] == 1.0 and max(fractions[:-1]) <= 0.99
+assert etas[0] == 100.0 and etas[-1] == 0.0
+# denoise 절반 = load + encode + denoise/2 = 45 / 100
+half = next(f for stage, f, _ in samples if stage == "denoise" and abs(f - 0.45) < 1e-9)
+assert store["job-1"]["stage"] == "done" and store["job-1"]["fraction"] == 1.0
+assert set(reporter.durations) == {name for name, _ in STAGES}
+print(f"[OK] {len(samples)} samples: fraction 0 → {half} (denoise 15/30) → 1.0 monotonic, ETA 100s → 0 monotonic")
+
+# 2. step 속도가 prior보다 2배 느림 → ETA는 실측 속도 기준
+reporter = ProgressReporter({}, "job-2", STAGES)
+reporter.stage("denoise", total_steps=30)
+clock.advance(20.0)
+reporter.update_step(5)  # 4s/step → 남은 25 step = 100s
+assert reporter.eta_seconds() == 100.0 + 15.0 + 10.0, reporter.eta_seconds()
+assert reporter.snapshot()["fraction"] == round((10 + 5 + 60 * 5 / 30) / 100, 3)
+print(f"[OK] measured step speed drives the current stage ETA ({reporter.eta_seconds()}s)")
+
+# 3. skip → 전체 합에서 제외
+reporter = ProgressReporter({}, "job-3", STAGES)
+reporter.skip("upload")
+reporter.stage("decode")
+assert reporter.eta_seconds() == 15.0
+assert reporter.snapshot()["fraction"] == round(75 / 90, 3)
+print("[OK] skipped stage excluded from ETA and weights")
+
+# 4. min_interval: step 기록은 묶이고 stage 전환 / 마지막 step은 항상 기록
+store = {}
+reporter = ProgressReporter(store, "job-4", STAGES, min_interval=1.0)
+reporter.stage("denoise", total_steps=10)
+seq = store["job-4"]["seq"]
+for step in range(1, 10):
+    clock.advance(0.1)
+    reporter.update_step(step)
+assert store["job-4"]["seq"] == seq and store["job-4"]["step"] == 0  # 0.9s 동안 step 기록 없음
+clock.advance(0.1)
+reporter.update_step(10)
+assert store["job-4"]["seq"] == seq + 1 and store["job-4"]["step"] == 10
+assert ProgressReporter(None, "x", STAGES).enabled is False and ProgressReporter({}, None, STAGES).enabled is False
+print("[OK] step writes throttled by min_interval, final step always written, no-op without store/job id")
+print("OK")
@@ -0,0 +1,243 @@
+"""Provider router 로컬 테스트 (in-process stand-in backend + 로컬 Runware stand-in, 외부 호출 없음)
+
+- latency 정책: 표본이 모이면 p95가 낮은 provider 우선, 에러율 높은 provider는 후보 맨 뒤
+- cost 정책: 완료 응답의 비용(없으면 추정치) 기준
+- 접수 실패 / 태스크 실패 → 다음 provider로 failover
+- hedge: 기준 시간 안에 안 끝나면 두 번째 provider에도 접수 → 먼저 끝난 결과 사용
+- job snapshot 공유 저장소: 다른 router 인스턴스(= 다른 컨테이너 / 재시작)도 status / result 조회
+- /api/v3/router/jobs: 폴러 경유 완료 감지 → 같은 형태로 status / result
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from proxy.router import ProviderRouter, RouteProvider, RouterError
+
+
+class StandInBackend:
+    """접수 즉시 task id, latency초 후 완료 (fail_rate 확률로 실패)"""
+
+    def __init__(self, name, latency, cost=None, fail_rate=0.0, submit_fails=False):
+        self.name = name
+        self.latency = latency
+        self.cost = cost
+        self.fail_rate = fail_rate
+        self.submit_fails = submit_fails
+        self.submitted = 0
+
+    async def submit(self, spec, api_key):
+        if self.submit_fails:
+            raise RuntimeError("HTTP 503: upstream overloaded")
+        self.submitted += 1
+        return f"{self.name}-{self.submitted}"
+
+    async def watch(self, task_id):
+        await asyncio.sleep(self.latency * random.uniform(0.9, 1.1))
+        if random.random() < self.fail_rate:
+            return {"success": False, "status": "failed", "result": {"status": "failed", "error": "content filter"}}
+        result = {"status": "completed", "result": {"video_url": f"https://cdn.example/{task_id}.mp4"}}
+        if self.cost is not None:
+            result["cost"] = self.cost
+        return {"success": True, "status": "completed", "result": result}
+
+
+def make_router(backends, **kwargs):
+    by_name = {b.name: b for b in backends}
+    providers = {
+        b.name: RouteProvider(b.submit, lambda p: p["result"]["video_url"], cost_per_job=0.1, expected_sec=b.latency,
+                              default_key=lambda: "k")
+        for b in backends
+    }
+    return ProviderRouter(providers, lambda name, task_id, key: by_name[name].watch(task_id), min_samples=3, **kwargs)
+
+
+SPEC = {"image_url": "https://example.com/a.png", "prompt": "blink only"}
+
+
+async def run_jobs(router, n, **kwargs):
+    jobs = [await router.submit(SPEC, {}, **kwargs) for _ in range(n)]
+    await asyncio.gather(*(j.done.wait() for j in jobs))
+    return jobs
+
+
+async def main():
+    random.seed(7)
+
+    # latency: prior(expected_sec)가 틀려도 실제 p95를 학습해서 빠른 쪽으로
+    slow, fast = StandInBackend("slow", 0.05), StandInBackend("fast", 0.02)
+    slow.latency = 0.25  # prior는 0.05 → 처음에는 slow가 먼저 선택됨
+    router = make_router([slow, fast], policy="latency")
+    await run_jobs(router, 3, policy="order")
+    await run_jobs(router, 3, providers=["fast"])
+    assert router.rank() == ["fast", "slow"], router.stats()
+    jobs = await run_jobs(router, 10)
+    assert all(j.winner.provider == "fast" for j in jobs)
+    s = router.stats()["providers"]
+    print(f"[OK] latency policy: fast p95={s['fast']['p95_sec']}s < slow p95={s['slow']['p95_sec']}s → fast first")
+
+    # 에러율 높은 provider → unhealthy → 후보 맨 뒤, 그래도 job은 failover로 완료
+    flaky, steady = StandInBackend("flaky", 0.01, fail_rate=0.9), StandInBackend("steady", 0.03)
+    router = make_router([flaky, steady], policy="latency", max_error_rate=0.5)
+    jobs = await run_jobs(router, 8, policy="order")
+    assert all(j.status == "completed" for j in jobs), [j.to_dict() for j in jobs]
+    assert not router.healthy("flaky") and router.rank() == ["steady", "flaky"]
+    assert router.failovers > 0
+    print(f"[OK] flaky provider (error_rate={router.stats_by_provider['flaky'].error_rate:.2f}) → unhealthy, "
+          f"{router.failovers} task failures recovered by failover")
+
+    # 접수 실패 → 즉시 다음 provider
+    down, up = StandInBackend("down", 0.01, submit_fails=True), StandInBackend("up", 0.01)
+    router = make_router([down, up])
+    job = (await run_jobs(router, 1, policy="order"))[0]
+    assert job.status == "completed" and job.winner.provider == "up"
+    assert [a["status"] for a in job.to_dict()["attempts"]] == ["failed", "completed"]
+    try:
+        await make_router([StandInBackend("down", 0.01, submit_fails=True)]).submit(SPEC, {})
+        raise AssertionError("expected RouterError")
+    except RouterError as e:
+        assert e.status == 502 and "HTTP 503" in e.detail
+    print("[OK] submit failure → next provider, all down → RouterError 502")
+
+    # cost: 응답 비용을 학습 (추정치 0.1보다 실제가 비싼 provider는 뒤로)
+    pricey, cheap = StandInBackend("pricey", 0.01, cost=0.4), StandInBackend("cheap", 0.01, cost=0.05)
+    router = make_router([pricey, cheap], policy="cost")
+    await run_jobs(router, 3, policy="order")
+    await run_jobs(router, 3, providers=["cheap"])
+    assert router.rank() == ["cheap", "pricey"]
+    job = (await run_jobs(router, 1))[0]
+    assert job.winner.provider == "cheap" and job.to_dict()["cost"] == 0.05
+    print("[OK] cost policy uses observed cost per job")
+
+    # hedge: primary가 느리면 hedge_after_sec 후 두 번째에도 접수 → 빠른 쪽 결과
+    stuck, backup = StandInBackend("stuck", 0.6), StandInBackend("backup", 0.05)
+    router = make_router([stuck, backup], policy="order", hedge_after_sec=0.1)
+    t0 = time.perf_counter()
+    job = (await run_jobs(router, 1))[0]
+    elapsed = time.perf_counter() - t0
+    assert job.winner.provider == "backup" and job.to_dict()["hedged"] and elapsed < 0.4, (elapsed, job.to_dict())
+    assert router.hedges == 1 and router.hedge_wins == 1
+    await asyncio.sleep(0.7)
+    assert router.stats_by_provider["stuck"].succeeded == 1  # 진 쪽도 지연 통계에는 반영
+    print(f"[OK] hedge after 0.1s → backup won in {elapsed:.2f}s (primary alone: ~0.6s)")
+
+    fast_only = make_router([StandInBackend("quick", 0.01), StandInBackend("other", 0.01)], hedge_after_sec=0.5)
+    await run_jobs(fast_only, 5)
+    assert fast_only.hedges == 0
+    print("[OK] no hedge when primary finishes before threshold")
+
+    # snapshot 공유 저장소 (modal.Dict stand-in): 접수한 router가 아닌 인스턴스도 조회
+    shared, loads = {}, []
+
+    async def save(job_id, snapshot):
+        await asyncio.sleep(0.001)
+        shared[job_id] = snapshot
+
+    async def load(job_id):
+        loads.append(job_id)
+        return shared.get(job_id)
+
+    owner = make_router([StandInBackend("slow", 0.1)], save=save, load=load)
+    replica = make_router([StandInBackend("slow", 0.1)], save=save, load=load)
+    job = await owner.submit(SPEC, {})
+    remote = await replica.lookup(job.id)
+    assert remote["status"] == "processing" and remote["provider_task_id"] == "slow-1", remote
+    await job.done.wait()
+    await asyncio.sleep(0.01)
+    remote = await replica.lookup(job.id)
+    assert remote == job.to_dict() and remote["result"]["video_url"] == "https://cdn.example/slow-1.mp4"
+    assert "api_key" not in str(remote)
+    assert await replica.lookup("rt-000000000000") is None
+    loads.clear()
+    assert await replica.lookup("../etc/passwd") is None and not loads  # 형식 검사 → 저장소 조회 없음
+    assert await owner.lookup(job.id) == job.to_dict() and not loads  # 접수한 인스턴스는 메모리
+
+    # 저장 실패는 접수 / 완료에 영향 없음
+    async def broken_save(job_id, snapshot):
+        raise ConnectionError("dict unavailable")
+
+    flaky = make_router([StandInBackend("ok", 0.01)], save=broken_save)
+    job = (await run_jobs(flaky, 1))[0]
+    assert job.status == "completed" and flaky.stats()["snapshot_errors"] == 2
+    print("[OK] job snapshots: another router instance sees processing → completed, save failures tolerated")
+
+
+def http_route():
+    """메인 프록시 라우트: Runware stand-in → 폴러가 완료 감지 → router job completed"""
+    os.environ["EXPORT_PREFETCH"] = "false"
+    os.environ["RUNWARE_ENABLED"] = "true"
+    import websockets
+    from fastapi.testclient import TestClient
+
+    import main_byteplus
+    from common.polling import PollSchedule
+    from test_runware_pool import GEN_SEC, StandIn
+
+    stand_in, ready, server_url = StandIn(), threading.Event(), {}
+
+    def serve():
+        async def run():
+            async with websockets.serve(stand_in.handler, "127.0.0.1", 0) as server:
+                server_url["url"] = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+                ready.set()
+                await asyncio.Future()
+
+        asyncio.run(run())
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait(5)
+    main_byteplus.runware_pool.url = server_url["url"]
+    main_byteplus.task_poller.providers["runware"].schedule = PollSchedule(
+        expected_sec=GEN_SEC, min_interval=0.05, max_interval=0.1
+    )
+
+    # modal.Dict 대신 in-memory 저장소
+    shared = {}
+
+    async def save(job_id, snapshot):
+        shared[job_id] = snapshot
+
+    async def load(job_id):
+        return shared.get(job_id)
+
+    main_byteplus.provider_router.save = save
+    main_byteplus.provider_router.load = load
+
+    with TestClient(main_byteplus.fast_app) as client:
+        r = client.post("/api/v3/router/jobs", json={**SPEC, "api_keys": {"runware": "key-router"},
+                                                      "providers": ["byteplus", "runware"]})
+        assert r.status_code == 200, r.text
+        job = r.json()
+        # byteplus key 없음 → runware만 후보
+        assert job["provider"] == "runware" and job["status"] == "processing", job
+        r = client.get(f"/api/v3/router/jobs/{job['id']}?wait=5")
+        body = r.json()
+        assert body["status"] == "completed" and body["result"]["video_url"].startswith("https://vm.runware.ai/"), body
+        assert body["cost"] == 0.14
+        assert client.get("/api/v3/router/jobs/rt-unknown/result").status_code == 404
+        assert shared[job["id"]] == body
+
+        # 다른 컨테이너가 접수한 job (이 컨테이너 메모리에 없음) → snapshot으로 응답
+        shared["rt-0123456789ab"] = {**body, "id": "rt-0123456789ab", "status": "processing", "result": None}
+        r = client.get("/api/v3/router/jobs/rt-0123456789ab")
+        assert r.status_code == 200 and r.json()["status"] == "processing"
+        r = client.get("/api/v3/router/jobs/rt-0123456789ab/result")
+        assert r.status_code == 409 and r.json()["status"] == "processing"
+        assert client.get("/api/v3/router/jobs/rt-ffffffffffff").status_code == 404
+        r = client.post("/api/v3/router/jobs", json={**SPEC, "providers": ["byteplus"]})
+        assert r.status_code == 503, r.text
+        stats = client.get("/api/v3/router/providers").json()
+        assert stats["providers"]["runware"]["succeeded"] == 1
+        print(f"[OK] /api/v3/router/jobs → runware → completed via poller "
+              f"(runware p50={stats['providers']['runware']['p50_sec']}s), no key → 503")
+        print(f"ranking: {stats['ranking']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    http_route()
+    print("OK")
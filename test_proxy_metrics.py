@@ -0,0 +1,133 @@
+"""BytePlus proxy /metrics 로컬 테스트 (로컬 stand-in upstream + stand-in 변환 프로세스, 외부 호출 없음)
+
+- 라우트 latency histogram: route template label (task id가 label로 새지 않음), 미매칭은 "unmatched"
+- 응답 바이트 counter = 실제 전송한 body 크기
+- upstream latency histogram (BytePlus 조회), 1080p 변환 시간 (completed / failed)
+- 캐시 / breaker / rate limit / 폴러 통계는 스크레이프 시점 snapshot
+"""
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["EXPORT_PREFETCH"] = "false"
+import httpx
+
+import main_byteplus
+from proxy.telemetry import ProxyMetrics
+
+
+class StandInBytePlus(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(0.02)
+        body = b'{"id": "cgt-m", "status": "running"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+STAND_IN = """
+import sys, time
+if sys.argv[1] == "fail":
+    sys.exit(1)
+time.sleep(0.1)
+sys.stdout.buffer.write(b"v" * 65536)
+"""
+
+
+def sample(text, name, **labels):
+    """exposition text에서 한 줄 값 찾기"""
+    for line in text.splitlines():
+        if not line.startswith(name + "{") and not line.startswith(name + " "):
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', line.split(" ")[0]))
+        if all(found.get(k) == v for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+async def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInBytePlus)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    main_byteplus.BYTEPLUS_TASKS_ENDPOINT = f"http://127.0.0.1:{server.server_port}/tasks"
+    exports = main_byteplus.exports
+    exports.cache_dir = tempfile.mkdtemp()
+    exports.build_command = lambda url: [sys.executable, "-c", STAND_IN, url]
+
+    transport = httpx.ASGITransport(app=main_byteplus.fast_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://proxy") as client:
+        auth = {"Authorization": "Bearer key-m"}
+        for task_id in ("cgt-1", "cgt-2", "cgt-3"):
+            r = await client.get(f"/api/v3/content_generation/tasks/{task_id}", headers=auth)
+            assert r.status_code == 200, r.text
+        health = await client.get("/health/upstreams")
+        assert (await client.get("/no/such/route")).status_code == 404
+
+        ok = exports.get_or_start("t-ok", "ok")
+        assert len(b"".join([c async for c in ok.stream()])) == 65536
+        failed = exports.get_or_start("t-fail", "fail")
+        try:
+            async for _ in failed.stream():
+                pass
+        except Exception:
+            pass
+
+        r = await client.get("/metrics")
+        assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = r.text
+
+    route = "/api/v3/content_generation/tasks/{task_id}"
+    assert sample(text, "proxy_request_seconds_count", route=route, method="GET", status="2xx") == 3
+    assert "cgt-1" not in text
+    assert sample(text, "proxy_request_seconds_count", route="unmatched", status="4xx") == 1
+    assert sample(text, "proxy_response_bytes_total", route="/health/upstreams") == len(health.content)
+    print(f"[OK] route histogram by template (3 × {route}), 404 → unmatched, "
+          f"bytes counter = {len(health.content)} body bytes")
+
+    assert sample(text, "proxy_upstream_seconds_count", upstream="byteplus", status="2xx") >= 1
+    fast_bucket = sample(text, "proxy_upstream_seconds_bucket", upstream="byteplus", le="0.01")
+    assert fast_bucket == 0  # stand-in이 20ms 지연 → 10ms 버킷에는 없음
+    print("[OK] upstream latency histogram for byteplus (20ms stand-in lands above the 10ms bucket)")
+
+    assert sample(text, "proxy_export_1080p_seconds_count", outcome="completed") == 1
+    assert sample(text, "proxy_export_1080p_seconds_count", outcome="failed") == 1
+    assert sample(text, "proxy_export_1080p_seconds_sum", outcome="completed") >= 0.1
+    print("[OK] 1080p transcode histogram: completed + failed")
+
+    assert sample(text, "proxy_cache_requests_total", cache="task_status", result="miss") is not None
+    assert sample(text, "proxy_upstream_breaker_open", upstream="byteplus", host="127.0.0.1") == 0
+    assert sample(text, "proxy_rate_limit_requests_total", provider="byteplus", result="rejected") == 0
+    assert sample(text, "proxy_tasks_tracked", state="tracked") is not None
+    print("[OK] scrape-time snapshots: cache lookups, breaker state, rate limit outcomes, poller")
+    server.shutdown()
+
+
+def observe_cost():
+    """요청 경로 비용: 라우트 histogram observe 1회"""
+    metrics = ProxyMetrics()
+    n = 100_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        metrics.requests.observe(0.012, "/api/v3/content_generation/tasks/{task_id}", "GET", "2xx")
+    per_call_us = (time.perf_counter() - t0) / n * 1e6
+    assert per_call_us < 20, per_call_us
+    print(f"[OK] histogram observe: {per_call_us:.2f}µs per request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    observe_cost()
+    print("OK")
@@ -0,0 +1,141 @@
+"""Provider rate limiter 로컬 테스트 (로컬 stand-in upstream, 외부 호출 없음)
+
+- burst까지는 즉시, 그 이후는 거절 대신 도착 순서대로 rate 간격으로 대기
+- max_wait 넘게 기다려야 하면 RateLimited (라우트는 429 + Retry-After)
+- 키 / provider별 bucket 분리, 대기 중 취소 → 예약 반환, upstream 429 → bucket 비움
+- Evolink 생성 라우트: 동시 배치가 upstream에 rate 이하로 도착, X-RateLimit-Wait-Ms 헤더
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["EXPORT_PREFETCH"] = "false"
+from proxy.rate_limit import RateLimit, RateLimited, RateLimiter
+
+arrivals = []
+
+
+class StandInEvolink(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        arrivals.append(time.monotonic())
+        body = json.dumps({"id": f"task-{len(arrivals)}", "status": "pending"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def limiter_behaviour():
+    limiter = RateLimiter({"byteplus": RateLimit(rate=20, burst=3)}, max_wait=0.5)
+
+    # burst 3개 즉시, 이후 0.05초 간격 (도착 순서대로)
+    t0 = time.monotonic()
+    done = []
+
+    async def one(i):
+        waited = await limiter.acquire("byteplus", "key-a")
+        done.append((i, time.monotonic() - t0, waited))
+
+    await asyncio.gather(*(one(i) for i in range(9)))
+    order = [i for i, _, _ in sorted(done, key=lambda d: d[1])]
+    waits = sorted(w for _, _, w in done)
+    assert waits[:3] == [0.0, 0.0, 0.0] and order == list(range(9)), (order, waits)
+    assert abs(waits[-1] - 6 / 20) < 0.01 and max(t for _, t, _ in done) >= 0.29
+    print(f"[OK] burst 3 immediate, 6 queued FIFO at 20/s (last waited {waits[-1] * 1000:.0f}ms, none rejected)")
+
+    # 다른 키 / 제한 없는 provider는 영향 없음
+    assert await limiter.acquire("byteplus", "key-b") == 0.0
+    assert await limiter.acquire("modal", "key-a") == 0.0
+
+    # max_wait 초과 → 대기 없이 RateLimited
+    pending = [asyncio.ensure_future(limiter.acquire("byteplus", "key-c")) for _ in range(13)]
+    await asyncio.sleep(0)
+    try:
+        await limiter.acquire("byteplus", "key-c")
+        raise AssertionError("expected RateLimited")
+    except RateLimited as e:
+        retry_after = e.retry_after
+        assert 0.5 < retry_after <= 0.6, retry_after
+    # 대기 중 취소 → 예약 반환 → 다음 요청은 다시 한도 안
+    for task in pending[3:]:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    assert await limiter.acquire("byteplus", "key-c") <= 0.05 + 0.01
+    stats = limiter.stats()["providers"]["byteplus"]
+    assert stats["rejected"] == 1 and stats["queued"] >= 6
+    print(f"[OK] over max_wait → RateLimited(retry_after={retry_after:.2f}s); cancelled waiters refund tokens")
+
+    # upstream 429 → bucket 비움 → 다음 요청은 Retry-After만큼 대기
+    limiter.throttled("byteplus", "key-d", 0.2)
+    waited = await limiter.acquire("byteplus", "key-d")
+    assert 0.15 < waited <= 0.21, waited
+    headers = limiter.headers("byteplus", "key-d", waited)
+    assert headers["X-RateLimit-Limit"] == "20/s;burst=3" and int(headers["X-RateLimit-Wait-Ms"]) >= 150
+    print(f"[OK] upstream 429 (Retry-After 0.2s) → next request waited {waited * 1000:.0f}ms")
+
+
+async def route_behaviour():
+    """Evolink 생성 라우트: 동시 12건 → upstream 도착 간격이 rate 이하, 초과분은 429"""
+    import httpx
+
+    import main_byteplus
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInEvolink)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["EVOLINK_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    main_byteplus.track_task = lambda *args: None
+    limiter = main_byteplus.rate_limiter
+    limiter.limits["evolink"] = RateLimit(rate=10, burst=3)
+    limiter.max_wait = 1.0
+
+    transport = httpx.ASGITransport(app=main_byteplus.fast_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://proxy") as client:
+        async def create(key):
+            return await client.post("/api/v3/evolink/videos/generations",
+                                     json={"api_key": key, "prompt": "blink", "image_urls": ["https://x/a.png"]})
+
+        t0 = time.monotonic()
+        responses = await asyncio.gather(*(create("key-batch") for _ in range(12)))
+        assert all(r.status_code == 200 for r in responses), [r.text for r in responses]
+        waits = sorted(int(r.headers["x-ratelimit-wait-ms"]) for r in responses)
+        # burst 이후는 대기 (요청이 조금씩 늦게 도착하면 그 사이 보충된 만큼 덜 기다림)
+        assert waits[:3] == [0, 0, 0] and 600 <= waits[-1] <= 1000, waits
+        # upstream 도착: 어느 시점이든 burst + rate × 경과시간 이하
+        for n, at in enumerate(sorted(arrivals), start=1):
+            assert n <= 3 + 10 * (at - t0) + 1, (n, at - t0)
+        print(f"[OK] 12 concurrent creates → all 200, upstream paced at 10/s "
+              f"(wait headers {waits[0]}..{waits[-1]}ms, batch took {time.monotonic() - t0:.2f}s)")
+
+        responses = await asyncio.gather(*(create("key-flood") for _ in range(16)))
+        codes = [r.status_code for r in responses]
+        accepted = codes.count(200)
+        assert 13 <= accepted < 16 and codes.count(429) == 16 - accepted, codes
+        assert all(int(r.headers["x-ratelimit-wait-ms"]) <= 1000 for r in responses if r.status_code == 200)
+        rejected = next(r for r in responses if r.status_code == 429)
+        assert int(rejected.headers["retry-after"]) >= 1 and "rate_limited" in rejected.text
+        print(f"[OK] 16 at once → {accepted} queued within max_wait, {16 - accepted} × 429 "
+              f"Retry-After={rejected.headers['retry-after']}s")
+
+        stats = (await client.get("/health/upstreams")).json()["rate_limits"]["providers"]["evolink"]
+        assert stats["granted"] == 12 + accepted and stats["rejected"] == 16 - accepted
+        print(f"rate limit stats: {stats}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(limiter_behaviour())
+    asyncio.run(route_behaviour())
+    print("OK")
@@ -0,0 +1,129 @@
+"""Evolink / Runware 다운로드 프록시 fetch 캐시 로컬 테스트 (로컬 stand-in CDN, 외부 호출 없음)
+
+- miss: upstream 1회 다운로드하면서 바로 스트리밍 → 캐시에 기록, 이후 hit는 upstream 호출 없음
+- hit: Range 206 / content hash ETag → If-None-Match 304
+- 재서명된 URL(서명·만료 query만 다름) → 같은 캐시 항목
+- 같은 URL 동시 miss → upstream 다운로드 1회 공유
+- 작은 budget → LRU evict, upstream 404 → 502
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["EXPORT_PREFETCH"] = "false"
+import main_byteplus
+from proxy.cache_index import CacheIndex
+from proxy.fetch_cache import RemoteFetchCache, normalize_url
+
+VIDEOS = {f"/vm.runware.ai/video/{i}.mp4": os.urandom(2 * 1024 * 1024 + i) for i in range(4)}
+VIDEOS["/cdn.evolink.ai/v/a.mp4"] = VIDEOS["/vm.runware.ai/video/0.mp4"]  # 같은 영상, 다른 URL
+SLOW_SEC = 0.3  # 느린 CDN 흉내 (동시 miss 합치기 확인용)
+hits = Counter()
+
+
+class StandInCDN(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        hits[path] += 1
+        data = VIDEOS.get(path)
+        if data is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        half = len(data) // 2
+        self.wfile.write(data[:half])
+        time.sleep(SLOW_SEC)
+        self.wfile.write(data[half:])
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StandInCDN)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+BASE = f"http://127.0.0.1:{server.server_port}"
+
+# 캐시 디렉터리를 임시 폴더로 (budget: 영상 2개 반)
+cache_dir = tempfile.mkdtemp()
+remote_index = CacheIndex(cache_dir, budget_bytes=5 * 1024 * 1024 + 512 * 1024, flush_interval=0.05)
+main_byteplus.remote_videos = RemoteFetchCache(remote_index, lambda: main_byteplus.upstreams.client("video"))
+
+
+def runware(i, query=""):
+    return f"/api/v3/runware/download?url={BASE}/vm.runware.ai/video/{i}.mp4{query}"
+
+
+assert normalize_url("HTTPS://CDN.x/v.mp4?b=2&X-Amz-Signature=s&a=1&Expires=9#t") == "https://cdn.x/v.mp4?a=1&b=2"
+
+with TestClient(main_byteplus.fast_app) as client:
+    # miss → write-through, 두 번째는 upstream 호출 없이 캐시
+    t0 = time.perf_counter()
+    r = client.get(runware(1, "?Expires=1&Signature=a"))
+    miss_sec = time.perf_counter() - t0
+    assert r.status_code == 200 and r.content == VIDEOS["/vm.runware.ai/video/1.mp4"], r.status_code
+    assert r.headers["content-length"] == str(len(r.content))
+    assert hits["/vm.runware.ai/video/1.mp4"] == 1
+
+    t0 = time.perf_counter()
+    r = client.get(runware(1, "?Expires=2&Signature=b"))  # 재서명된 URL
+    hit_sec = time.perf_counter() - t0
+    assert r.status_code == 200 and r.content == VIDEOS["/vm.runware.ai/video/1.mp4"]
+    assert hits["/vm.runware.ai/video/1.mp4"] == 1, hits
+    etag = r.headers["etag"]
+    print(f"[OK] miss {miss_sec * 1000:.0f}ms → re-signed URL hit {hit_sec * 1000:.0f}ms, upstream fetched once")
+
+    r = client.get(runware(1), headers={"Range": "bytes=1000-1999"})
+    assert r.status_code == 206 and r.content == VIDEOS["/vm.runware.ai/video/1.mp4"][1000:2000]
+    r = client.get(runware(1), headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    print(f"[OK] hit: Range 206, If-None-Match {etag[:14]}...\" → 304")
+
+    # 같은 URL 동시 miss → upstream 1회
+    with ThreadPoolExecutor(8) as ex:
+        results = list(ex.map(lambda _: client.get(runware(2)), range(8)))
+    assert all(r.status_code == 200 and r.content == VIDEOS["/vm.runware.ai/video/2.mp4"] for r in results)
+    assert hits["/vm.runware.ai/video/2.mp4"] == 1, hits
+    print(f"[OK] 8 concurrent misses → 1 upstream fetch (coalesced={main_byteplus.remote_videos.coalesced})")
+
+    # Evolink URL이지만 내용이 같은 영상 → content hash로 파일 1개
+    client.get(runware(0))
+    r = client.get(f"/api/v3/evolink/download?url={BASE}/cdn.evolink.ai/v/a.mp4")
+    assert r.status_code == 200 and r.content == VIDEOS["/cdn.evolink.ai/v/a.mp4"]
+    assert main_byteplus.remote_videos.deduplicated == 1
+    assert 'filename="evolink_video.mp4"' in r.headers["content-disposition"]
+    print("[OK] same bytes under a different URL stored once (content hash)")
+
+    # budget 초과 → LRU(가장 오래 안 쓴 1번 영상부터) evict → 다시 받음
+    client.get(runware(3))
+    time.sleep(0.2)
+    assert remote_index.total_bytes <= remote_index.budget_bytes
+    r = client.get(runware(1))
+    assert r.status_code == 200 and hits["/vm.runware.ai/video/1.mp4"] == 2, hits
+    print(f"[OK] LRU eviction under budget (evictions={remote_index.evictions})")
+
+    # upstream 404 → 502, 캐시에 남지 않음
+    r = client.get(runware(99))
+    assert r.status_code == 502 and "404" in r.text, r.text
+    assert not any(name.endswith(".part") for name in os.listdir(cache_dir))
+    print("[OK] upstream 404 → 502, no partial files left")
+
+    stats = client.get("/api/v3/admin/cache/stats", headers={"X-Admin-Key": os.getenv("ADMIN_KEY", "admin123")}).json()
+    print(f"remote_videos: { {k: v for k, v in stats['remote_videos'].items() if k != 'index'} }")
+print("OK")
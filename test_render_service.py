@@ -0,0 +1,274 @@
+"""서버 렌더링 (/api/v3/render) 로컬 테스트 (stand-in ffmpeg / ffprobe 실행 파일 + stand-in CDN, 외부 호출 없음)
+
+- 입력 업로드: 영상 / 오디오 / PNG는 시그니처로 판별, 텍스트는 400
+- zoom: zoompan 1회 + 자막 PNG 구간 overlay, subtitle: drawtext textfile 줄바꿈, merge: concat copy
+- audio: 오디오가 길면 마지막 프레임 줌인 tail + concat을 인코딩 1회로, 짧으면 영상 stream copy
+- render: 참조 체이닝 (앞 단계가 끝나기 전에 다음 단계 접수 가능), 같은 요청은 캐시 hit / 합류
+- worker 수 제한, ffmpeg 실패 → failed + stderr, 실패한 입력을 쓰는 단계 → failed (424)
+- 결과: Range 206 / ETag, 진행 중이면 409, task: 참조는 fetch 캐시 경유
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["EXPORT_PREFETCH"] = "false"
+import httpx
+
+import main_byteplus
+from proxy.cache_index import CacheIndex
+from proxy.fetch_cache import RemoteFetchCache
+from proxy.render import RenderService, wrap_text, zoom_duration
+from proxy.uploads import UploadStore, sniff_media
+
+FFMPEG = """#!{python}
+import json, os, re, sys, time
+args = sys.argv[1:]
+inputs = [args[i + 1] for i, a in enumerate(args) if a == "-i"]
+texts = {{p: open(p).read() for p in inputs if p.endswith(".txt")}}
+for a in args:
+    for p in re.findall(r"textfile='([^']+)'", a):
+        texts[p] = open(p).read()
+start = time.time()
+for p in inputs:
+    if not p.endswith(".txt") and b"FAIL" in open(p, "rb").read():
+        print("Invalid data found when processing input", file=sys.stderr)
+        sys.exit(1)
+time.sleep(float(os.environ.get("RENDER_SLEEP", "0.2")))
+print("out_time_us=2500000", flush=True)
+print("progress=end", flush=True)
+with open(args[-1], "wb") as f:
+    f.write(b"\\0\\0\\0\\x18ftypisom" + b"dur=5.0;" + os.urandom(4096))
+with open(os.environ["RENDER_LOG"], "a") as f:
+    f.write(json.dumps({{"args": args, "texts": texts, "start": start, "end": time.time()}}) + "\\n")
+"""
+
+FFPROBE = """#!{python}
+import json, re, sys
+data = open(sys.argv[-1], "rb").read()
+m = re.search(rb"dur=([0-9.]+)", data)
+streams = [{{"codec_type": "video", "width": 1920, "height": 1080}}]
+if data.startswith(b"ID3"):
+    streams = [{{"codec_type": "audio"}}]
+print(json.dumps({{"format": {{"duration": m.group(1).decode() if m else "0"}}, "streams": streams}}))
+"""
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+VIDEO = b"\0\0\0\x18ftypisom" + b"dur=4.0;" + os.urandom(2048)
+EVOLINK_VIDEO = b"\0\0\0\x18ftypmp42" + b"dur=6.0;" + os.urandom(4096)
+cdn_hits = []
+
+
+class StandInEvolink(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.startswith("/v1/tasks/"):
+            base = f"http://127.0.0.1:{self.server.server_port}"
+            body = json.dumps({"id": "ev-1", "status": "completed",
+                               "result": {"video_url": f"{base}/cdn.evolink.ai/v/ev-1.mp4"}}).encode()
+            content_type = "application/json"
+        else:
+            cdn_hits.append(self.path)
+            body, content_type = EVOLINK_VIDEO, "video/mp4"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def executable(directory, name, source):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(source.format(python=sys.executable))
+    os.chmod(path, 0o755)
+    return path
+
+
+def runs():
+    with open(os.environ["RENDER_LOG"]) as f:
+        return [json.loads(line) for line in f]
+
+
+def filter_graph(run):
+    return run["args"][run["args"].index("-filter_complex") + 1]
+
+
+async def main():
+    tmp = tempfile.mkdtemp()
+    os.environ["RENDER_LOG"] = os.path.join(tmp, "ffmpeg.log")
+    open(os.environ["RENDER_LOG"], "w").close()
+    font = os.path.join(tmp, "font.ttc")
+    open(font, "wb").close()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInEvolink)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["EVOLINK_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+
+    main_byteplus.upload_store = UploadStore(os.path.join(tmp, "uploads"))
+    main_byteplus.media_store = UploadStore(os.path.join(tmp, "media"), sniff=sniff_media, formats="media")
+    main_byteplus.remote_videos = RemoteFetchCache(
+        CacheIndex(os.path.join(tmp, "remote"), budget_bytes=1024 ** 3),
+        lambda: main_byteplus.upstreams.client("video"))
+    main_byteplus.render_index = CacheIndex(os.path.join(tmp, "renders"), budget_bytes=1024 ** 3)
+    outcomes = []
+    service = main_byteplus.render_service = RenderService(
+        main_byteplus.render_index.cache_dir,
+        main_byteplus.resolve_render_input,
+        max_workers=2,
+        ffmpeg=executable(tmp, "ffmpeg", FFMPEG),
+        ffprobe=executable(tmp, "ffprobe", FFPROBE),
+        font_file=font,
+        on_complete=main_byteplus._on_render_complete,
+        on_render=lambda op, outcome, seconds: outcomes.append((op, outcome)),
+    )
+
+    transport = httpx.ASGITransport(app=main_byteplus.fast_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://proxy", timeout=30) as client:
+        async def upload(data, content_type="application/octet-stream"):
+            r = await client.post("/api/v3/render/uploads", content=data, headers={"Content-Type": content_type})
+            assert r.status_code == 200, r.text
+            return r.json()["ref"]
+
+        image = await upload(PNG, "image/png")
+        subs = [await upload(PNG + bytes([i])) for i in range(2)]
+        long_audio = await upload(b"ID3" + b"dur=9.0;" + os.urandom(512), "audio/mpeg")
+        short_audio = await upload(b"ID3" + b"dur=3.0;" + os.urandom(512), "audio/mp3")
+        scene = await upload(VIDEO, "video/mp4")
+        broken = await upload(b"\0\0\0\x18ftypisom" + b"FAIL" + os.urandom(256))
+        r = await client.post("/api/v3/render/uploads", content=b"hello world, not media")
+        assert r.status_code == 400 and "unsupported_format" in r.text
+        r = await client.post("/api/v3/render/uploads", content=b"ignored",
+                              headers={"X-Content-SHA256": scene.split(":")[1]})
+        assert r.json()["deduplicated"] and r.json()["ref"] == scene
+        print("[OK] render uploads: png / mp4 / mp3 sniffed, text rejected (400), hash shortcut skips body")
+
+        # zoom → audio 체이닝: zoom이 끝나기 전에 audio 접수
+        zoom_body = {"image": image, "subtitles": subs, "zoom_direction": "in", "pan_direction": "left",
+                     "intensity": 7, "subtitle_length": 30}
+        r = await client.post("/api/v3/render/zoom", json=zoom_body)
+        assert r.status_code == 202, r.text
+        zoom = r.json()
+        r = await client.post("/api/v3/render/audio", json={"video": zoom["result_ref"], "audio": long_audio})
+        assert r.status_code == 202 and r.json()["status"] == "queued", r.text
+        audio = r.json()
+        r = await client.get(f"/api/v3/render/jobs/{audio['id']}/result")
+        assert r.status_code == 409
+        r = await client.get(f"/api/v3/render/jobs/{audio['id']}", params={"wait": 10})
+        assert r.json()["status"] == "completed" and r.json()["progress"] == 1.0, r.json()
+
+        zoom_run, last_frame_run, audio_run = runs()
+        graph = filter_graph(zoom_run)
+        duration = zoom_duration(30, 7, None)
+        frames = round(duration * 24)
+        assert "scale=3840:2160" in graph and f"d={frames}:s=1920x1080:fps=24" in graph, graph
+        assert "z='1+0.22*" in graph and "-(80*(on/" in graph
+        assert f"between(t,0.000,{duration / 2:.3f})" in graph and f"between(t,{duration / 2:.3f},{duration:.3f})" in graph
+        assert zoom_run["args"].count("-i") == 3 and zoom_run["args"][-1].endswith("out.mp4")
+        assert "-sseof" in last_frame_run["args"]
+        graph = filter_graph(audio_run)
+        assert "zoompan=z='1+0.15*on/108'" in graph and "concat=n=2:v=1:a=0" in graph, graph  # (9 - 5 + 0.5) × 24
+        assert "-shortest" in audio_run["args"] and audio_run["args"].count("-i") == 3
+        assert audio_run["start"] >= zoom_run["end"]
+        print(f"[OK] zoom ({duration:.1f}s, {frames} frames, 2 subtitle slices) → audio chained by render ref: "
+              f"tail zoom + concat in one encode")
+
+        r = await client.post("/api/v3/render/audio", json={"video": scene, "audio": short_audio, "wait": 0},
+                              params={"wait": 10})
+        assert r.status_code == 200 and r.json()["status"] == "completed"
+        copy_run = runs()[-1]
+        assert copy_run["args"][copy_run["args"].index("-c:v") + 1] == "copy" and "-filter_complex" not in copy_run["args"]
+        print("[OK] shorter audio → video stream copy + aac")
+
+        # 같은 요청: 캐시 hit (ffmpeg 실행 없음)
+        n_runs = len(runs())
+        r = await client.post("/api/v3/render/zoom", json=zoom_body)
+        assert r.status_code == 200 and r.json()["id"] == zoom["id"] and r.json()["status"] == "completed"
+        assert len(runs()) == n_runs and service.stats()["coalesced"] + service.stats()["cache_hits"] == 1
+        print("[OK] identical render request → existing result, no ffmpeg run")
+
+        r = await client.post("/api/v3/render/subtitle", params={"wait": 10}, json={
+            "video": audio["result_ref"], "text": "오늘 우리는 아주 긴 자막을 줄바꿈 해서 화면 아래에 표시합니다",
+            "position": "bottom", "text_color": "#FFFF00"})
+        assert r.json()["status"] == "completed", r.json()
+        drawtext_run = runs()[-1]
+        graph = filter_graph(drawtext_run)
+        assert "drawtext=fontfile=" in graph and "fontcolor=#FFFF00" in graph and "y=h-th-80" in graph
+        text = next(iter(drawtext_run["texts"].values()))
+        assert text == wrap_text("오늘 우리는 아주 긴 자막을 줄바꿈 해서 화면 아래에 표시합니다") and "\n" in text
+        r = await client.post("/api/v3/render/subtitle", json={"video": scene, "text": "x", "text_color": "red;x"})
+        assert r.status_code == 400
+        print(f"[OK] drawtext subtitle via textfile ({text.count(chr(10)) + 1} lines), bad color rejected")
+
+        # task: 참조 → Evolink 조회 + fetch 캐시, merge는 concat copy
+        r = await client.post("/api/v3/render/merge", params={"wait": 10}, json={
+            "videos": [scene, "task:evolink:ev-1", audio["result_ref"]], "api_keys": {"evolink": "ek"}})
+        assert r.json()["status"] == "completed", r.json()
+        merge_run = runs()[-1]
+        concat = next(iter(merge_run["texts"].values())).splitlines()
+        assert len(concat) == 3 and merge_run["args"][merge_run["args"].index("-c") + 1] == "copy"
+        cached = await main_byteplus.remote_videos.lookup(f"{os.environ['EVOLINK_BASE_URL']}/cdn.evolink.ai/v/ev-1.mp4")
+        assert cached and concat[1] == f"file '{cached[0]}'" and len(cdn_hits) == 1
+        print("[OK] merge: upload + task:evolink (downloaded once into fetch cache) + render ref, concat copy")
+
+        # worker 제한: merge 5개 동시 접수 → ffmpeg 동시 실행 최대 2
+        n_runs = len(runs())
+        ids = []
+        for i in range(5):
+            extra = await upload(VIDEO + bytes([i]))
+            r = await client.post("/api/v3/render/merge", json={"videos": [scene, extra]})
+            ids.append(r.json()["id"])
+        for id in ids:
+            await client.get(f"/api/v3/render/jobs/{id}", params={"wait": 10})
+        batch = runs()[n_runs:]
+        peak = max(sum(1 for o in batch if o["start"] < b["end"] and b["start"] < o["end"]) for b in batch)
+        assert len(batch) == 5 and peak <= 2, peak
+        print(f"[OK] 5 merges with max_workers=2 → peak {peak} concurrent ffmpeg")
+
+        # 실패 + 실패한 입력을 쓰는 다음 단계
+        r = await client.post("/api/v3/render/audio", json={"video": broken, "audio": short_audio}, params={"wait": 10})
+        failed = r.json()
+        assert failed["status"] == "failed" and "Invalid data found" in failed["error"], failed
+        r = await client.post("/api/v3/render/merge", json={"videos": [failed["result_ref"], scene]}, params={"wait": 10})
+        assert r.json()["status"] == "failed" and "failed" in r.json()["error"]
+        assert ("audio", "failed") in outcomes and ("zoom", "completed") in outcomes
+        print("[OK] ffmpeg failure → failed with stderr tail, dependent render fails without running ffmpeg")
+
+        r = await client.post("/api/v3/render/merge", json={"videos": ["render:rd-" + "0" * 24]})
+        assert r.status_code == 404
+        r = await client.post("/api/v3/render/merge", json={"videos": ["http://example.com/a.mp4"]})
+        assert r.status_code == 400
+        r = await client.post("/api/v3/render/blur", json={})
+        assert r.status_code == 400
+        r = await client.post("/api/v3/render/merge", json={"videos": ["upload:" + "a" * 64]}, params={"wait": 10})
+        assert r.json()["status"] == "failed" and "upload_not_found" in r.json()["error"]
+        print("[OK] unknown render ref 404, raw URL / unknown op 400, missing upload → failed")
+
+        r = await client.get(f"/api/v3/render/jobs/{zoom['id']}/result", headers={"Range": "bytes=0-99"})
+        assert r.status_code == 206 and len(r.content) == 100 and r.headers["etag"] == f'"{zoom["id"]}"'
+        r = await client.get(f"/api/v3/render/jobs/{zoom['id']}/result")
+        assert r.status_code == 200 and r.content.startswith(b"\0\0\0\x18ftyp")
+        assert (await client.get("/api/v3/render/jobs/rd-unknown/result")).status_code == 404
+
+        # 다른 컨테이너 / 재시작: 메모리에 없어도 결과 파일로 복원
+        service._jobs.clear()
+        r = await client.get(f"/api/v3/render/jobs/{zoom['id']}")
+        assert r.json()["status"] == "completed" and r.json()["cached"]
+        print("[OK] result: Range 206 + ETag, unknown 404, completed job restored from the volume file")
+
+    await service.aclose()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    print("OK")
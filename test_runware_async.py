@@ -0,0 +1,111 @@
+"""Runware async 모드 로컬 테스트 (로컬 WebSocket stand-in 서버, 외부 호출 없음)
+
+- mode=async: 접수 즉시 {"id", "status": "processing"} 반환 (완료까지 HTTP 요청을 잡고 있지 않음)
+- GET /api/v3/runware/tasks/{id}: Evolink 조회와 같은 형태 (processing → completed + result.video_url)
+- /api/v3/tasks/runware/{id}/events: 폴러가 완료를 감지해서 complete 이벤트
+- 기존 sync 모드(기본)는 그대로 result.video_url 반환
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import websockets
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["EXPORT_PREFETCH"] = "false"
+os.environ["RUNWARE_ENABLED"] = "true"
+import main_byteplus
+from common.polling import PollSchedule
+from providers import runware_client
+from providers.runware_pool import key_fingerprint
+from proxy.rate_limit import RateLimit
+from test_runware_pool import GEN_SEC, StandIn
+
+N_JOBS = 30
+KEY = "key-async"
+
+# stand-in 서버는 별도 스레드의 event loop에서 실행 (TestClient는 자기 loop 사용)
+stand_in = StandIn()
+ready = threading.Event()
+server_url = {}
+
+
+def serve():
+    async def main():
+        async with websockets.serve(stand_in.handler, "127.0.0.1", 0) as server:
+            server_url["url"] = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            ready.set()
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+threading.Thread(target=serve, daemon=True).start()
+ready.wait(5)
+main_byteplus.runware_pool.url = server_url["url"]
+main_byteplus.task_poller.providers["runware"].schedule = PollSchedule(
+    expected_sec=GEN_SEC, min_interval=0.05, max_interval=0.1
+)
+runware_client.RUNWARE_POLL_SCHEDULE = PollSchedule(expected_sec=GEN_SEC, min_interval=0.05, max_interval=0.1)
+# 접수 지연만 측정 (rate limit 대기는 test_rate_limiter에서)
+main_byteplus.rate_limiter.limits["runware"] = RateLimit(rate=1000, burst=N_JOBS)
+
+BODY = {"api_key": KEY, "image_url": "https://example.com/a.png", "prompt": "blink only", "resolution": "720p"}
+
+with TestClient(main_byteplus.fast_app) as client:
+    # async: 동시에 N개 접수 → 모두 생성 시간보다 빨리 반환
+    def submit(i):
+        t0 = time.perf_counter()
+        r = client.post("/api/v3/runware/videos/generations?mode=async",
+                        json={**BODY, "image_url": f"https://example.com/{i}.png"})
+        return r, time.perf_counter() - t0
+
+    with ThreadPoolExecutor(10) as ex:
+        submitted = list(ex.map(submit, range(N_JOBS)))
+    for r, _ in submitted:
+        assert r.status_code == 200, r.text
+        assert r.json()["status"] == "processing" and r.json()["result"] is None
+    slowest = max(t for _, t in submitted)
+    assert slowest < GEN_SEC, slowest
+    print(f"[OK] {N_JOBS} async submits returned immediately (slowest {slowest * 1000:.0f}ms < {GEN_SEC}s generation)")
+
+    task_id = submitted[0][0].json()["id"]
+    r = client.get(f"/api/v3/runware/tasks/{task_id}", headers={"Authorization": f"Bearer {KEY}"})
+    assert r.status_code == 200 and r.json()["status"] in ("processing", "completed")
+
+    # SSE: 폴러가 완료 감지 → complete
+    with client.stream("GET", f"/api/v3/tasks/runware/{submitted[1][0].json()['id']}/events?api_key={KEY}") as stream:
+        events = [line for line in stream.iter_lines() if line.startswith("event:")]
+    assert events[-1] == "event: complete", events
+    print(f"[OK] SSE events for async task: {events}")
+
+    time.sleep(GEN_SEC)
+    for r, _ in submitted:
+        q = client.get(f"/api/v3/runware/tasks/{r.json()['id']}", headers={"Authorization": f"Bearer {KEY}"})
+        body = q.json()
+        assert body["status"] == "completed" and body["result"]["video_url"].endswith(".mp4"), body
+    print("[OK] status route: all tasks completed with result.video_url (Evolink-compatible shape)")
+
+    r = client.get("/api/v3/runware/tasks/00000000-0000-0000-0000-000000000000", headers={"Authorization": f"Bearer {KEY}"})
+    assert r.status_code == 404, r.text
+    r = client.get(f"/api/v3/runware/tasks/{task_id}", headers={"Authorization": "Bearer bad-key"})
+    assert r.status_code == 401, r.text
+    print("[OK] unknown task → 404, bad key → 401")
+
+    # sync (기본): 기존 응답 형태 유지
+    t0 = time.perf_counter()
+    r = client.post("/api/v3/runware/videos/generations", json=BODY)
+    assert r.status_code == 200 and r.json()["status"] == "success" and r.json()["result"]["video_url"]
+    assert time.perf_counter() - t0 >= GEN_SEC
+    print("[OK] default sync mode still waits and returns result.video_url")
+
+    stats = main_byteplus.runware_pool.stats()
+    assert stats[key_fingerprint(KEY)]["connects"] == 1  # 모든 submit / 조회 / 폴링이 연결 1개 공유
+    print(f"runware pool: {stats}")
+    print(f"poller: {main_byteplus.task_poller.stats()}")
+print("OK")
@@ -0,0 +1,176 @@
+"""Runware WebSocket session pool 로컬 테스트 (로컬 WebSocket stand-in 서버, 외부 호출 없음)
+
+stand-in은 Runware 프로토콜(authentication / videoInference async / getResponse / ping)만 흉내냄
+- 연결 + 인증 비용은 AUTH_DELAY로 흉내
+- 요청마다 connect/disconnect 하던 기존 방식 vs API key별 연결 재사용 + multiplexing
+- 서버가 연결을 끊어도 진행 중 요청은 재연결(세션 이어받기) 후 완료
+- pong이 끊기면 heartbeat가 감지해서 재연결, API key는 환경변수에 쓰지 않음
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["RUNWARE_ENABLED"] = "true"
+os.environ.pop("RUNWARE_API_KEY", None)
+from common.polling import PollSchedule
+from providers import runware_client
+from providers.runware_client import runware_generate_video
+from providers.runware_pool import RunwareError, RunwareSessionPool
+
+AUTH_DELAY = 0.08   # stand-in 연결 + 인증 비용 (초)
+GEN_SEC = 0.3       # stand-in 영상 생성 시간 (초)
+N_REQUESTS = 40
+CONCURRENCY = 20
+
+runware_client.RUNWARE_POLL_SCHEDULE = PollSchedule(expected_sec=GEN_SEC, min_interval=0.05, max_interval=0.1)
+
+
+class StandIn:
+    def __init__(self):
+        self.connections = set()
+        self.auths = []          # (api_key, resumed)
+        self.tasks = {}          # taskUUID → 완료 시각
+        self.mute_pongs = False
+        self.max_inflight = 0
+
+    async def handler(self, ws):
+        self.connections.add(ws)
+        try:
+            async for raw in ws:
+                for item in json.loads(raw):
+                    await self.handle(ws, item)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections.discard(ws)
+
+    async def handle(self, ws, item):
+        task_type, task_uuid = item["taskType"], item.get("taskUUID")
+        if task_type == "authentication":
+            await asyncio.sleep(AUTH_DELAY)
+            if item["apiKey"] == "bad-key":
+                await ws.send(json.dumps({"errors": [{"taskType": "authentication", "code": "invalidApiKey",
+                                                      "message": "Invalid API key"}]}))
+                return
+            session = item.get("connectionSessionUUID") or str(uuid.uuid4())
+            self.auths.append((item["apiKey"], "connectionSessionUUID" in item))
+            await ws.send(json.dumps({"data": [{"taskType": "authentication", "connectionSessionUUID": session}]}))
+        elif task_type == "ping":
+            if not self.mute_pongs:
+                await ws.send(json.dumps({"data": [{"taskType": "ping", "pong": True}]}))
+        elif task_type == "videoInference":
+            assert item["deliveryMethod"] == "async" and item["frameImages"][0]["inputImage"].startswith("http")
+            self.tasks[task_uuid] = time.monotonic() + GEN_SEC
+            inflight = sum(1 for t in self.tasks.values() if t > time.monotonic())
+            self.max_inflight = max(self.max_inflight, inflight)
+            await ws.send(json.dumps({"data": [{"taskType": "videoInference", "taskUUID": task_uuid}]}))
+        elif task_type == "getResponse":
+            done_at = self.tasks.get(task_uuid)
+            if done_at is None:
+                await ws.send(json.dumps({"errors": [{"taskType": "getResponse", "taskUUID": task_uuid,
+                                                      "code": "taskNotFound", "message": "Task not found"}]}))
+            elif time.monotonic() < done_at:
+                await ws.send(json.dumps({"data": [{"taskType": "videoInference", "taskUUID": task_uuid,
+                                                    "status": "processing"}]}))
+            else:
+                await ws.send(json.dumps({"data": [{"taskType": "videoInference", "taskUUID": task_uuid,
+                                                    "status": "success", "videoUUID": task_uuid, "cost": 0.14,
+                                                    "videoURL": f"https://vm.runware.ai/video/{task_uuid}.mp4"}]}))
+
+    async def drop_all(self):
+        for ws in list(self.connections):
+            await ws.close()
+
+
+async def run_batch(api_keys, make_pool):
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i):
+        async with sem:
+            pool, owned = make_pool()
+            try:
+                return await runware_generate_video(f"https://example.com/{i}.png", "blink only",
+                                                    api_key=api_keys[i % len(api_keys)], pool=pool)
+            finally:
+                if owned:
+                    await pool.aclose()
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(N_REQUESTS)))
+    return time.perf_counter() - t0, results
+
+
+async def main():
+    stand_in = StandIn()
+    async with websockets.serve(stand_in.handler, "127.0.0.1", 0) as server:
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+        # 기존 방식: 요청마다 새 연결 + 인증 + 종료
+        legacy_time, results = await run_batch(["key-a"], lambda: (RunwareSessionPool(url), True))
+        assert all(r["video_url"] for r in results)
+        legacy_auths = len(stand_in.auths)
+
+        # pool: API key별 연결 1개에 multiplexing
+        stand_in.auths.clear()
+        pool = RunwareSessionPool(url, ping_interval=0.05, ping_timeout=0.3)
+        pool_time, results = await run_batch(["key-a", "key-b"], lambda: (pool, False))
+        assert all(r["video_url"] and r["status"] == "success" and r["cost"] == 0.14 for r in results)
+        assert sorted(k for k, _ in stand_in.auths) == ["key-a", "key-b"], stand_in.auths
+        print(f"[OK] {N_REQUESTS} videos: per-request connect {legacy_time:.2f}s ({legacy_auths} auths) "
+              f"→ pool {pool_time:.2f}s ({len(stand_in.auths)} auths, max {stand_in.max_inflight} in flight)")
+        assert legacy_auths == N_REQUESTS
+
+        # 서버가 연결을 끊음 → 진행 중 요청은 재연결 후 완료, 재연결은 key당 1회 + 세션 이어받기
+        stand_in.auths.clear()
+        session_a = pool.session("key-a")
+        before = session_a.connects
+
+        async def drop_later():
+            await asyncio.sleep(GEN_SEC / 2)
+            await stand_in.drop_all()
+
+        gen = [runware_generate_video(f"https://example.com/r{i}.png", "blink only", api_key="key-a", pool=pool)
+               for i in range(10)]
+        results = await asyncio.gather(drop_later(), *gen)
+        assert all(r["video_url"] for r in results[1:])
+        assert session_a.connects == before + 1 and stand_in.auths == [("key-a", True)], stand_in.auths
+        print("[OK] server dropped connection → 10 in-flight videos completed after 1 resumed reconnect")
+
+        # pong 중단 → heartbeat가 감지해서 연결 교체
+        stand_in.auths.clear()
+        stand_in.mute_pongs = True
+        disconnects = session_a.disconnects
+        await asyncio.sleep(0.5)
+        assert session_a.disconnects == disconnects + 1 and not session_a.connected
+        stand_in.mute_pongs = False
+        result = await runware_generate_video("https://example.com/hb.png", "blink only", api_key="key-a", pool=pool)
+        assert result["video_url"] and session_a.connected and stand_in.auths == [("key-a", True)]
+        print("[OK] missed pongs detected by heartbeat → reconnected on next request")
+
+        # 인증 실패 / 없는 태스크는 호출자에게 에러로 전달
+        try:
+            await runware_generate_video("https://example.com/x.png", "blink only", api_key="bad-key", pool=pool)
+            raise AssertionError("expected auth failure")
+        except RuntimeError as e:
+            assert "Invalid API key" in str(e)
+        try:
+            await pool.session("key-b").request({"taskType": "getResponse", "taskUUID": str(uuid.uuid4())})
+            raise AssertionError("expected task error")
+        except RunwareError as e:
+            assert e.code == "taskNotFound"
+        assert "RUNWARE_API_KEY" not in os.environ
+        print("[OK] auth / task errors surfaced, API key never written to os.environ")
+        print(f"pool stats: {pool.stats()}")
+        await pool.aclose()
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""download_video 스트리밍 relay 로컬 테스트 (로컬 stand-in CDN, 외부 호출 없음)
+
+- Range 지원 upstream → 206 relay
+- Range 무시 upstream(200) → 스트림에서 구간만 잘라 206
+- 큰 파일 전체 다운로드 시 프록시 메모리 피크가 파일 크기와 무관한지 확인
+"""
+import asyncio
+import re
+import sys
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from proxy.http_pool import UpstreamClients
+from proxy.streaming import open_upstream, relay_response
+
+SIZE = 64 * 1024 * 1024  # 64MB
+PATTERN = bytes(range(256)) * 4096  # 1MB 반복 패턴
+
+
+def expected(start, end):
+    return b"".join(PATTERN[i % len(PATTERN):i % len(PATTERN) + 1] for i in range(start, end + 1))
+
+
+class StandInCDN(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        start, end, status = 0, SIZE - 1, 200
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range") or "")
+        if match and self.path.startswith("/ranged"):
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else SIZE - 1
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{SIZE}")
+        self.end_headers()
+        pos = start
+        try:
+            while pos <= end:
+                offset = pos % len(PATTERN)
+                chunk = PATTERN[offset:offset + min(end - pos + 1, len(PATTERN) - offset)]
+                self.wfile.write(chunk)
+                pos += len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 프록시가 필요한 구간만 받고 연결을 끊는 경우
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StandInCDN)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+BASE = f"http://127.0.0.1:{server.server_port}"
+
+pool = UpstreamClients(http2=False)
+app = FastAPI()
+
+
+@app.get("/proxy/{kind}")
+async def proxy(kind: str, request: Request):
+    range_header = request.headers.get("Range")
+    upstream = await open_upstream(pool.client("video"), f"{BASE}/{kind}/video.mp4", range_header)
+    return relay_response(upstream, range_header, "video.mp4", "test")
+
+
+async def main():
+    # httpx.ASGITransport는 응답 body를 모아서 돌려주므로 실제 서버로 띄움
+    proxy_server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serve_task = asyncio.create_task(proxy_server.serve())
+    while not proxy_server.started:
+        await asyncio.sleep(0.05)
+    port = proxy_server.servers[0].sockets[0].getsockname()[1]
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60.0) as client:
+        for kind in ("ranged", "plain"):
+            r = await client.get(f"/proxy/{kind}", headers={"Range": "bytes=1000-1999"})
+            assert r.status_code == 206, (kind, r.status_code)
+            assert r.headers["content-range"] == f"bytes 1000-1999/{SIZE}", r.headers
+            assert r.content == expected(1000, 1999), kind
+            print(f"[OK] {kind}: 206 {r.headers['content-range']}")
+
+        r = await client.get("/proxy/plain", headers={"Range": f"bytes={SIZE}-"})
+        assert r.status_code == 416, r.status_code
+        print("[OK] plain: 416 for unsatisfiable range")
+
+        # 클라이언트는 받은 chunk를 버림 → traced 메모리 피크 = 프록시 측 버퍼
+        tracemalloc.start()
+        received = 0
+        async with client.stream("GET", "/proxy/ranged") as r:
+            assert r.status_code == 200 and int(r.headers["content-length"]) == SIZE
+            async for chunk in r.aiter_raw():
+                received += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert received == SIZE
+        print(f"[OK] full stream {SIZE // (1024 * 1024)}MB, peak traced memory {peak / (1024 * 1024):.1f}MB")
+        assert peak < SIZE / 8, "body가 메모리에 통째로 적재됨"
+
+    await pool.aclose()
+    proxy_server.should_exit = True
+    await serve_task
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    server.shutdown()
@@ -0,0 +1,153 @@
+"""중앙 태스크 폴러 로컬 테스트 (stand-in upstream 함수, 외부 호출 없음, 시간 축소)
+
+- 적응형 스케줄: 고정 간격 폴링 대비 upstream 조회 수 / 완료 인지 지연 비교
+- 연속 에러 → 지수 backoff 후 복구, 404 → 폴링 중단 + error 이벤트
+- 구독자에게 상태 변화 push, SSE 라우트 status* → complete
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from common.polling import PollSchedule
+from proxy.poller import PollProvider, TaskPoller
+
+DURATION = 1.2  # stand-in 태스크 완료 시간 (초) — 실제 ~60s를 1/50로 축소
+tasks = {}      # task_id → (created, duration, fail_first)
+calls = []
+
+
+async def stand_in_fetch(api_key, task_id):
+    calls.append((time.time(), task_id))
+    await asyncio.sleep(0.005)
+    if task_id not in tasks:
+        return 404, f'{{"error": "task {task_id} not found"}}'
+    created, duration, fail_first = tasks[task_id]
+    if fail_first and sum(1 for _, t in calls if t == task_id) <= fail_first:
+        return 503, "upstream busy"
+    elapsed = time.time() - created
+    status = "queued" if elapsed < 0.2 else "running" if elapsed < duration else "succeeded"
+    return 200, {"id": task_id, "status": status, "created_at": created,
+                 "updated_at": created + duration if status == "succeeded" else time.time()}
+
+
+def simulate(schedule, durations):
+    """가상 시간축에서 폴러와 같은 순서로 스케줄 적용 → (조회 수, 완료 인지 지연 목록), wall clock 무관"""
+    requests, delays = 0, []
+    for duration in durations:
+        age = schedule.next_interval(0.0)
+        while True:
+            requests += 1
+            if age >= duration:
+                delays.append(age - duration)
+                break
+            age += schedule.next_interval(age)
+    return requests, delays
+
+
+def make_poller(schedule):
+    return TaskPoller({"byteplus": PollProvider(stand_in_fetch, schedule)}, retain_sec=0.5)
+
+
+async def run_batch(schedule, n=20):
+    calls.clear()
+    poller = make_poller(schedule)
+    queues = []
+    for i in range(n):
+        task_id = f"cgt-{i}"
+        tasks[task_id] = (time.time(), DURATION * (0.75 + 0.025 * i), 0)
+        poller.track("byteplus", task_id, "key-a", created_at=time.time())
+        queues.append(poller.subscribe("byteplus", task_id, "key-a")[1])
+    finals = []
+    for q in queues:
+        while True:
+            event = await asyncio.wait_for(q.get(), 10)
+            if event["terminal"]:
+                finals.append(event)
+                break
+    stats = poller.stats()
+    await poller.aclose()
+    return finals, stats
+
+
+async def main():
+    # 실제 스케일(예상 60s, 45s~68s에 완료) 가상 시간축: 고정 5s vs 적응형 2s~15s
+    durations = [60 * (0.75 + 0.025 * i) for i in range(20)] + [60 * 2.5, 60 * 5]
+    f_req, f_delays = simulate(PollSchedule(expected_sec=0, min_interval=5, max_interval=5), durations)
+    a_req, a_delays = simulate(PollSchedule(expected_sec=60), durations)
+    print(f"[OK] simulated fixed 5s: {f_req} requests, max notice {max(f_delays):.1f}s")
+    print(f"[OK] simulated adaptive: {a_req} requests, max notice {max(a_delays):.1f}s")
+    assert a_req < f_req * 0.8, (a_req, f_req)
+    assert max(a_delays) <= 10.0, a_delays  # 고정 간격의 2배 이내
+
+    # 같은 비교를 실제 폴러로 (1/50 축소, created_at은 float 그대로 → 나이 왜곡 없음)
+    fixed = PollSchedule(expected_sec=0, min_interval=0.1, max_interval=0.1)
+    adaptive = PollSchedule(expected_sec=DURATION, min_interval=0.04, max_interval=0.3)
+
+    finals, fixed_stats = await run_batch(fixed)
+    assert all(e["status"] == "succeeded" and e["success"] for e in finals)
+    finals, adaptive_stats = await run_batch(adaptive)
+    assert all(e["status"] == "succeeded" for e in finals)
+    f_req, a_req = fixed_stats["upstream_requests"]["byteplus"], adaptive_stats["upstream_requests"]["byteplus"]
+    f_delay, a_delay = fixed_stats["notice_delay_sec"], adaptive_stats["notice_delay_sec"]
+    print(f"[OK] fixed:    {f_req} requests, notice p50={f_delay['p50']}s p95={f_delay['p95']}s")
+    print(f"[OK] adaptive: {a_req} requests, notice p50={a_delay['p50']}s p95={a_delay['p95']}s")
+    assert a_req < f_req, (a_req, f_req)
+    assert a_delay["p95"] < 0.2, a_delay  # 고정 간격의 2배 이내
+
+    # 연속 에러 → backoff 간격 증가 후 복구
+    calls.clear()
+    poller = make_poller(PollSchedule(expected_sec=0.2, min_interval=0.05, max_interval=0.2,
+                                      error_base=0.05, error_max=1.0))
+    tasks["cgt-flaky"] = (time.time() - 5, 0.5, 3)
+    _, q = poller.subscribe("byteplus", "cgt-flaky", "key-a")
+    event = await asyncio.wait_for(q.get(), 10)
+    assert event["status"] == "succeeded", event
+    times = [t for t, task in calls if task == "cgt-flaky"]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert gaps[1] > gaps[0] * 1.3 and gaps[2] > gaps[1] * 1.3, gaps
+    assert poller.stats()["upstream_errors"]["byteplus"] == 3
+    print(f"[OK] error backoff gaps: {[round(g, 3) for g in gaps]}")
+
+    # 404 → 폴링 중단
+    _, q = poller.subscribe("byteplus", "cgt-missing", "key-a")
+    event = await asyncio.wait_for(q.get(), 10)
+    assert event["terminal"] and not event["success"] and event["status"] == "poll_error"
+    n = len(calls)
+    await asyncio.sleep(0.3)
+    assert len(calls) == n
+    print("[OK] 404 → error event, polling stopped")
+
+    # 종료 후 retain_sec 동안 늦은 구독자도 마지막 상태 수신, 이후 정리
+    _, q = poller.subscribe("byteplus", "cgt-flaky", "key-a")
+    assert q.get_nowait()["status"] == "succeeded"
+    poller.unsubscribe(*poller.subscribe("byteplus", "cgt-flaky", "key-a"))
+    await asyncio.sleep(1.2)
+    print(f"stats: {poller.stats()}")
+    await poller.aclose()
+
+
+asyncio.run(main())
+
+# SSE 라우트 (폴러 provider 조회 함수만 stand-in으로 교체, 1080p prefetch는 끔)
+os.environ["EXPORT_PREFETCH"] = "false"
+import main_byteplus
+
+main_byteplus.task_poller.providers["byteplus"] = PollProvider(
+    stand_in_fetch, PollSchedule(expected_sec=0.6, min_interval=0.05, max_interval=0.2)
+)
+tasks["cgt-sse"] = (time.time(), 0.6, 0)
+with TestClient(main_byteplus.fast_app) as client:
+    r = client.get("/api/v3/tasks/byteplus/cgt-sse/events?api_key=key-s")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/event-stream")
+    events = [line.split(": ", 1)[1] for line in r.text.splitlines() if line.startswith("event: ")]
+    assert events[-1] == "complete" and set(events[:-1]) == {"status"}, events
+    print(f"[OK] SSE events: {events}")
+
+    r = client.get("/api/v3/tasks/unknown/cgt-sse/events?api_key=key-s")
+    assert r.status_code == 404
+print("OK")
@@ -0,0 +1,78 @@
+"""BytePlus 태스크 상태 캐시 로컬 테스트 (stand-in upstream 함수, 외부 호출 없음)
+
+- 같은 태스크 동시 조회 50건 → upstream 1회
+- 진행 중 상태는 짧은 TTL 후 재조회, 종료 상태는 유지
+- 에러는 캐시하지 않음, API key가 다르면 캐시 공유 X
+- POST /api/v3/content_generation/tasks/status 일괄 조회
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from proxy.task_cache import TaskStatusCache
+
+calls = []
+states = {"cgt-run": "running", "cgt-done": "succeeded"}
+
+
+async def stand_in_fetch(api_key, task_id):
+    calls.append((api_key, task_id))
+    await asyncio.sleep(0.05)
+    if task_id not in states:
+        return 404, f'{{"error": "task {task_id} not found"}}'
+    return 200, {"id": task_id, "status": states[task_id]}
+
+
+async def main():
+    cache = TaskStatusCache(stand_in_fetch, ttl_active=0.2, ttl_terminal=60)
+
+    results = await asyncio.gather(*(cache.get("key-a", "cgt-run") for _ in range(50)))
+    assert len(calls) == 1 and all(r[1]["status"] == "running" for r in results)
+    assert sorted({r[2] for r in results}) == ["coalesced", "miss"]
+    print(f"[OK] 50 concurrent polls → {len(calls)} upstream call")
+
+    assert (await cache.get("key-a", "cgt-run"))[2] == "hit"
+    time.sleep(0.25)
+    assert (await cache.get("key-a", "cgt-run"))[2] == "miss"
+    await cache.get("key-a", "cgt-done")
+    time.sleep(0.25)
+    assert (await cache.get("key-a", "cgt-done"))[2] == "hit"
+    print("[OK] running expires after short TTL, succeeded retained")
+
+    n = len(calls)
+    assert (await cache.get("key-a", "cgt-missing"))[0] == 404
+    assert (await cache.get("key-a", "cgt-missing"))[2] == "miss"
+    assert (await cache.get("key-b", "cgt-done"))[2] == "miss"
+    assert len(calls) == n + 3
+    print("[OK] errors not cached, cache partitioned by API key")
+    print(f"stats: {cache.stats()}")
+
+
+asyncio.run(main())
+
+# 일괄 조회 라우트 (upstream 조회 함수만 stand-in으로 교체, 1080p prefetch는 끔)
+os.environ["EXPORT_PREFETCH"] = "false"
+import main_byteplus
+
+main_byteplus.task_status.fetch = stand_in_fetch
+calls.clear()
+with TestClient(main_byteplus.fast_app) as client:
+    r = client.post(
+        "/api/v3/content_generation/tasks/status",
+        json={"task_ids": ["cgt-run", "cgt-done", "cgt-missing", "cgt-run"]},
+        headers={"Authorization": "Bearer key-c"},
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert set(body["tasks"]) == {"cgt-run", "cgt-done"}
+    assert body["errors"]["cgt-missing"]["status"] == 404
+    assert len(calls) == 3
+    r = client.get("/api/v3/content_generation/tasks/cgt-done", headers={"Authorization": "Bearer key-c"})
+    assert r.status_code == 200 and r.headers["x-cache"] == "hit"
+    print(f"[OK] bulk status: {len(body['tasks'])} tasks + {len(body['errors'])} error in one round trip")
+print("OK")
@@ -0,0 +1,143 @@
+"""업로드 파생본 로컬 테스트 (임시 디렉터리, 외부 호출 없음)
+
+- 업로드 시 generator 입력 해상도 파생본(960x544 crop / 1248x704 stretch)이 1회 생성됨
+- 파생본 픽셀은 generator에서 하던 crop + LANCZOS resize 결과와 동일 (pixel md5 일치)
+- load_rendition: "upload:{sha256}" / 프록시 업로드 URL 참조 → volume에서 바로 읽기, 그 외 None
+- 파생본 없는 업로드 참조: load_original로 volume 원본, 없는 "upload:" 참조는 UploadNotFound (HTTP로 받지 않음)
+- 파생본 없던 기존 이미지는 재업로드 / hash 확인 시 생성, /api/v3/uploads/derived/{filename} 서빙
+"""
+import hashlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["EXPORT_PREFETCH"] = "false"
+import main_byteplus
+from common.renditions import RENDITIONS, UploadNotFound, load_original, load_rendition, parse_upload_ref
+
+upload_dir = tempfile.mkdtemp()
+commits = []
+
+
+async def stand_in_commit():
+    commits.append(1)
+
+
+store = main_byteplus.upload_store
+store.upload_dir, store.meta_dir, store.commit = upload_dir, os.path.join(upload_dir, "meta"), stand_in_commit
+store.derived_dir = main_byteplus.derived_image_server.upload_dir = os.path.join(upload_dir, "derived")
+main_byteplus.UPLOAD_DIR = main_byteplus.image_server.upload_dir = upload_dir
+main_byteplus.user_store.db_path = os.path.join(upload_dir, "users.db")
+store.renditions = True
+
+
+def jpeg_bytes(size, seed):
+    img = Image.effect_noise(size, 60).convert("RGB")
+    img.paste((seed * 40 % 256, 90, 160), (0, 0, size[0] // 3, size[1] // 3))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def generator_main_py(data):
+    """main.py VideoGenerator.generate의 기존 전처리 (960x544 center crop + LANCZOS)
+    hash: np.array(RGB image).tobytes() == image.tobytes()"""
+    reference_image = Image.open(io.BytesIO(data)).convert("RGB")
+    target_width, target_height = 960, 544
+    img_width, img_height = reference_image.size
+    aspect_ratio = target_width / target_height
+    if img_width / img_height > aspect_ratio:
+        new_width = int(img_height * aspect_ratio)
+        left = (img_width - new_width) // 2
+        reference_image = reference_image.crop((left, 0, left + new_width, img_height))
+    else:
+        new_height = int(img_width / aspect_ratio)
+        top = (img_height - new_height) // 2
+        reference_image = reference_image.crop((0, top, img_width, top + new_height))
+    reference_image = reference_image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+    return hashlib.md5(reference_image.tobytes()).hexdigest()
+
+
+def generator_seedance(data):
+    """main_seedance.py의 기존 전처리 (1248x704 stretch)"""
+    img = Image.open(io.BytesIO(data)).convert("RGB").resize((1248, 704), Image.Resampling.LANCZOS)
+    return hashlib.md5(img.tobytes()).hexdigest()
+
+
+WIDE = jpeg_bytes((1600, 700), 1)
+TALL = jpeg_bytes((720, 1280), 2)
+
+with TestClient(main_byteplus.fast_app) as client:
+    for label, data in (("wide", WIDE), ("tall", TALL)):
+        sha = hashlib.sha256(data).hexdigest()
+        r = client.post("/api/v3/uploads", content=data, headers={"Content-Type": "image/jpeg"})
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["image_ref"] == f"upload:{sha}" and set(body["renditions"]) == set(RENDITIONS)
+
+        for ref in (body["image_ref"], body["image_url"], body["renditions"]["960x544"]):
+            assert parse_upload_ref(ref) == sha, ref
+            r960 = load_rendition(ref, "960x544", upload_dir=upload_dir)
+            assert r960 is not None and (r960.width, r960.height) == (960, 544)
+        assert r960.pixel_md5 == generator_main_py(data)
+        decoded = Image.open(io.BytesIO(r960.png)).convert("RGB")
+        assert hashlib.md5(decoded.tobytes()).hexdigest() == r960.pixel_md5  # PNG 무손실
+
+        r1248 = load_rendition(body["image_ref"], "1248x704", upload_dir=upload_dir)
+        assert r1248.pixel_md5 == generator_seedance(data)
+        print(f"[OK] {label} upload → renditions match generator preprocessing "
+              f"(960x544 {r960.pixel_md5[:8]}, 1248x704 {r1248.pixel_md5[:8]})")
+
+        r = client.get(body["renditions"]["1248x704"].replace(str(client.base_url), ""))
+        assert r.status_code == 200 and r.content == r1248.png
+        assert "immutable" in r.headers["cache-control"]
+        r2 = client.get(body["renditions"]["1248x704"].replace(str(client.base_url), ""),
+                        headers={"If-None-Match": r.headers["etag"]})
+        assert r2.status_code == 304
+    print("[OK] derived route serves renditions (immutable, 304 on revalidation)")
+
+    assert load_rendition("data:image/png;base64,AAAA", "960x544", upload_dir=upload_dir) is None
+    assert load_rendition("https://i.imgur.com/abc.png", "960x544", upload_dir=upload_dir) is None
+    reloads = []
+    assert load_rendition(f"upload:{'0' * 64}", "960x544", upload_dir=upload_dir,
+                          reload=lambda: reloads.append(1)) is None
+    assert reloads == [1]
+    print("[OK] non-upload refs / unknown hash fall back to the download path (None, one volume reload)")
+
+    # 파생본 기능 이전에 저장된 이미지: hash 확인 시 생성
+    store.renditions = False
+    legacy = jpeg_bytes((1024, 1024), 3)
+    legacy_sha = hashlib.sha256(legacy).hexdigest()
+    r = client.post("/api/v3/uploads", content=legacy, headers={"Content-Type": "image/jpeg"})
+    assert "renditions" not in r.json()
+    assert load_rendition(f"upload:{legacy_sha}", "960x544", upload_dir=upload_dir) is None
+    assert load_original(f"upload:{legacy_sha}", upload_dir=upload_dir) == legacy
+    assert load_original(f"https://proxy.example/api/v3/uploads/{legacy_sha}.jpg", upload_dir=upload_dir) == legacy
+    assert load_original("https://i.imgur.com/abc.png", upload_dir=upload_dir) is None
+    assert load_original("data:image/png;base64,AAAA", upload_dir=upload_dir) is None
+    reloads = []
+    try:
+        load_original(f"upload:{'0' * 64}", upload_dir=upload_dir, reload=lambda: reloads.append(1))
+        raise AssertionError("unknown upload: ref should raise")
+    except UploadNotFound as e:
+        assert "re-upload" in str(e) and reloads == [1]
+    assert load_original(f"https://proxy.example/api/v3/uploads/{'0' * 64}.png", upload_dir=upload_dir) is None
+    print("[OK] upload without renditions → original from the volume, unknown upload: ref → UploadNotFound")
+    store.renditions = True
+    store._meta.clear()
+    before = len(commits)
+    r = client.post("/api/v3/uploads", content=b"", headers={"Content-Type": "image/jpeg", "X-Content-SHA256": legacy_sha})
+    assert r.status_code == 200 and set(r.json()["renditions"]) == set(RENDITIONS)
+    assert len(commits) == before + 1
+    assert load_rendition(f"upload:{legacy_sha}", "960x544", upload_dir=upload_dir).pixel_md5 == generator_main_py(legacy)
+    r = client.post("/api/v3/uploads", content=legacy, headers={"Content-Type": "image/jpeg"})
+    assert r.json()["deduplicated"] and len(commits) == before + 1  # 이미 있음 → 재생성 / commit 없음
+    print("[OK] pre-existing upload gets renditions on hash check (once)")
+    print(f"stats: {store.stats()}")
+print("OK")
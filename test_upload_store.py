@@ -0,0 +1,100 @@
+"""이미지 업로드 저장소 로컬 테스트 (임시 디렉터리, 외부 호출 없음)
+
+- binary / multipart / data_url(JSON) 업로드 → {sha256}.{ext}로 저장, 같은 이미지는 기존 URL 반환
+- X-Content-SHA256 사전 확인 시 body 없이 반환, /api/v3/uploads/by-hash/{sha256}
+- 크기 초과는 읽는 도중 413 (임시 파일 정리), 시그니처 불일치 400
+"""
+import base64
+import hashlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["EXPORT_PREFETCH"] = "false"
+import main_byteplus
+
+upload_dir = tempfile.mkdtemp()
+commits = []
+
+
+async def stand_in_commit():
+    commits.append(1)
+
+
+store = main_byteplus.upload_store
+store.upload_dir, store.meta_dir, store.commit = upload_dir, os.path.join(upload_dir, "meta"), stand_in_commit
+store.derived_dir = main_byteplus.derived_image_server.upload_dir = os.path.join(upload_dir, "derived")
+main_byteplus.UPLOAD_DIR = main_byteplus.image_server.upload_dir = upload_dir
+main_byteplus.user_store.db_path = os.path.join(upload_dir, "users.db")
+
+
+def png_bytes(color, size=(64, 64)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color=color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+PNG = png_bytes((10, 120, 200))
+SHA = hashlib.sha256(PNG).hexdigest()
+
+with TestClient(main_byteplus.fast_app) as client:
+    r = client.post("/api/v3/uploads", content=PNG, headers={"Content-Type": "image/png"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["sha256"] == SHA and not body["deduplicated"]
+    assert body["image_url"].endswith(f"/api/v3/uploads/{SHA}.png")
+    assert len(commits) == 1
+    print(f"[OK] binary upload stored → {body['image_url']}")
+
+    r = client.post("/api/v3/uploads", files={"file": ("char.png", PNG, "image/png")}, data={"note": "x"})
+    assert r.status_code == 200 and r.json()["deduplicated"] and r.json()["sha256"] == SHA, r.text
+    data_url = "data:image/png;base64," + base64.b64encode(PNG).decode()
+    r = client.post("/api/v3/uploads", json={"data_url": data_url})
+    assert r.status_code == 200 and r.json()["deduplicated"]
+    assert len(commits) == 1 and store.stats()["stored"] == 1
+    print("[OK] multipart + data_url re-uploads deduplicated (no extra file / commit)")
+
+    r = client.post("/api/v3/uploads", content=b"", headers={"Content-Type": "image/png", "X-Content-SHA256": SHA})
+    assert r.status_code == 200 and r.json()["deduplicated"]
+    r = client.get(f"/api/v3/uploads/by-hash/{SHA}")
+    assert r.status_code == 200 and r.json()["sha256"] == SHA
+    assert client.get(f"/api/v3/uploads/by-hash/{'0' * 64}").status_code == 404
+    print("[OK] hash pre-check returns existing URL without body")
+
+    r = client.get(f"/api/v3/uploads/{SHA}.png")
+    assert r.status_code == 200 and r.content == PNG
+
+    other = png_bytes((200, 30, 30))
+    r = client.post("/api/v3/uploads", files={"file": ("b.png", other, "image/png")})
+    assert r.status_code == 200 and not r.json()["deduplicated"]
+    assert r.json()["sha256"] == hashlib.sha256(other).hexdigest()
+    print("[OK] multipart streaming upload of a new image stored")
+
+    big = b"\x89PNG\r\n\x1a\n" + os.urandom(6 * 1024 * 1024)
+
+    def chunked():
+        for i in range(0, len(big), 64 * 1024):
+            yield big[i:i + 64 * 1024]
+
+    r = client.post("/api/v3/uploads", content=chunked(), headers={"Content-Type": "image/png"})
+    assert r.status_code == 413, r.text
+    r = client.post("/api/v3/uploads", content=big, headers={"Content-Type": "image/png"})
+    assert r.status_code == 413  # Content-Length로 즉시 거절
+    assert not [n for n in os.listdir(upload_dir) if n.endswith(".part")]
+    print("[OK] oversize rejected mid-stream (413), temp file removed")
+
+    r = client.post("/api/v3/uploads", content=b"GIF89a" + b"\0" * 100, headers={"Content-Type": "image/png"})
+    assert r.status_code == 400 and "unsupported_format" in r.json()["detail"]
+    r = client.post("/api/v3/uploads", content=PNG, headers={"Content-Type": "image/jpeg"})
+    assert r.status_code == 400 and "mime_mismatch" in r.json()["detail"]
+    r = client.post("/api/v3/uploads", content=b"x", headers={"Content-Type": "text/plain"})
+    assert r.status_code == 415
+    print("[OK] signature check: GIF / mismatched MIME / wrong content type rejected")
+    print(f"stats: {store.stats()}")
+print("OK")
@@ -0,0 +1,187 @@
+"""Upstream circuit breaker / 재시도 로컬 테스트 (로컬 stand-in upstream, 외부 호출 없음)
+
+- 멱등 GET: 일시적 5xx → decorrelated jitter 재시도 후 성공, POST는 재시도 없음
+- 장애 지속 → breaker open → upstream 호출 없이 즉시 CircuitOpenError (라우트는 503 + Retry-After)
+- reset 후 half-open probe 1건 → 성공하면 closed
+- Runware: 연결 실패가 이어지면 breaker open → getResponse 즉시 실패
+- /health/upstreams 에 breaker 상태
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+os.environ["EXPORT_PREFETCH"] = "false"
+os.environ["RUNWARE_ENABLED"] = "true"
+from common.resilience import CircuitOpenError, RetryPolicy
+from proxy.http_pool import UpstreamClients
+
+state = {"fail_next": 0, "down": False, "throttled": False}
+hits = Counter()
+
+
+class StandInUpstream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self):
+        hits[(self.command, self.path)] += 1
+        failing = state["down"] or state["fail_next"] > 0
+        if state["fail_next"] > 0:
+            state["fail_next"] -= 1
+        body = b'{"error": "overloaded"}' if failing else b'{"id": "cgt-1", "status": "running"}'
+        if state["throttled"]:
+            body = b'{"error": "rate limited"}'
+        self.send_response(429 if state["throttled"] else 503 if failing else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._reply()
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StandInUpstream)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+BASE = f"http://127.0.0.1:{server.server_port}"
+
+
+async def pool_behaviour():
+    pool = UpstreamClients(http2=False, breaker_failures=3, breaker_reset_sec=0.5)
+    client = pool.client("byteplus")
+
+    # 일시적 5xx 2번 → GET은 재시도로 성공
+    state["fail_next"] = 2
+    r = await client.get(f"{BASE}/tasks/a")
+    assert r.status_code == 200 and hits[("GET", "/tasks/a")] == 3, hits
+    # POST(태스크 생성)는 재시도하지 않음 → 기존처럼 503 응답 그대로
+    state["fail_next"] = 1
+    r = await client.post(f"{BASE}/tasks", json={})
+    assert r.status_code == 503 and hits[("POST", "/tasks")] == 1
+    print("[OK] GET retried through 2 transient 503s, POST not retried")
+
+    # 429(한 API 키의 제한)는 host breaker 실패가 아님 → 다른 키 요청은 계속 upstream으로
+    state["throttled"] = True
+    for _ in range(10):
+        r = await client.get(f"{BASE}/tasks/throttled")
+        assert r.status_code == 429
+    assert hits[("GET", "/tasks/throttled")] == 10  # 재시도 없음
+    breaker = pool.stats()["upstreams"]["byteplus"]["breakers"]["127.0.0.1"]
+    assert breaker["state"] == "closed" and breaker["failures"] == 3, breaker
+    state["throttled"] = False
+    print("[OK] 10 × 429 → breaker stays closed, no retries")
+
+    # 장애 지속 → 연속 실패 3번에 open, 이후 upstream 호출 없이 즉시 실패
+    state["down"] = True
+    r = await client.get(f"{BASE}/tasks/b")
+    assert r.status_code == 503  # 재시도 소진(3회) → 마지막 응답 그대로
+    before = sum(hits.values())
+    t0 = time.perf_counter()
+    for _ in range(50):
+        try:
+            await client.get(f"{BASE}/tasks/c")
+            raise AssertionError("expected fast-fail")
+        except CircuitOpenError as e:
+            assert 0 < e.retry_after <= 0.5
+    fast_fail_ms = (time.perf_counter() - t0) * 1000
+    assert sum(hits.values()) == before
+    breaker = pool.stats()["upstreams"]["byteplus"]["breakers"]["127.0.0.1"]
+    assert breaker["state"] == "open" and breaker["rejected"] == 50
+    print(f"[OK] outage → breaker open, 50 calls fast-failed in {fast_fail_ms:.1f}ms with 0 upstream hits")
+
+    # reset 후 half-open: probe 실패 → 다시 open, 복구 후 probe 성공 → closed
+    await asyncio.sleep(0.55)
+    r = await client.get(f"{BASE}/tasks/d")
+    assert r.status_code == 503 and hits[("GET", "/tasks/d")] == 1  # probe 1건만, 재시도 없이 다시 open
+    await asyncio.sleep(0.55)
+    state["down"] = False
+    r = await client.get(f"{BASE}/tasks/e")
+    assert r.status_code == 200
+    assert pool.stats()["upstreams"]["byteplus"]["breakers"]["127.0.0.1"]["state"] == "closed"
+    print("[OK] half-open probe: failure → re-open, recovery → closed")
+    await pool.aclose()
+
+    # decorrelated jitter: base ≤ delay ≤ cap, 호출마다 다른 간격
+    policy = RetryPolicy(attempts=5, base=0.2, cap=2.0)
+    sequences = []
+    for _ in range(200):
+        delay, seq = policy.base, []
+        for _ in range(4):
+            delay = policy.next_delay(delay)
+            seq.append(delay)
+        sequences.append(tuple(round(d, 3) for d in seq))
+    flat = [d for seq in sequences for d in seq]
+    assert min(flat) >= 0.2 and max(flat) <= 2.0 and len(set(sequences)) == len(sequences)
+    print(f"[OK] decorrelated jitter: delays in [{min(flat):.2f}, {max(flat):.2f}]s, {len(set(sequences))} distinct schedules")
+
+
+async def runware_behaviour():
+    from providers import runware_client
+    from providers.runware_client import RUNWARE_BREAKER, runware_get_task
+    from providers.runware_pool import RunwareSessionPool
+
+    async def refuse(url, **kwargs):
+        raise ConnectionRefusedError("stand-in: connection refused")
+
+    RUNWARE_BREAKER.failure_threshold = 2
+    RUNWARE_BREAKER.reset_timeout = 5.0
+    runware_client.RUNWARE_RETRY = RetryPolicy(attempts=3, base=0.01, cap=0.05)
+    pool = RunwareSessionPool("ws://unused", connect=refuse)
+    try:
+        await runware_get_task("t-1", api_key="key-r", pool=pool)
+        raise AssertionError("expected failure")
+    except ConnectionRefusedError:
+        pass
+    assert RUNWARE_BREAKER.state == "open"
+    t0 = time.perf_counter()
+    try:
+        await runware_get_task("t-2", api_key="key-r", pool=pool)
+        raise AssertionError("expected fast-fail")
+    except CircuitOpenError:
+        pass
+    assert time.perf_counter() - t0 < 0.05
+    print("[OK] Runware: repeated connect failures → breaker open → getResponse fast-fails")
+    await pool.aclose()
+
+
+def route_behaviour():
+    """BytePlus 조회 라우트: breaker open → 503 + Retry-After, /health/upstreams 에 상태"""
+    from fastapi.testclient import TestClient
+
+    import main_byteplus
+
+    main_byteplus.BYTEPLUS_TASKS_ENDPOINT = f"{BASE}/tasks"
+    main_byteplus.upstreams.breaker_failures = 2
+    state["down"] = True
+    with TestClient(main_byteplus.fast_app) as client:
+        auth = {"Authorization": "Bearer key-b"}
+        r = client.get("/api/v3/content_generation/tasks/cgt-x", headers=auth)
+        assert r.status_code == 503, r.text  # 재시도 후 upstream 503 그대로
+        r = client.get("/api/v3/content_generation/tasks/cgt-y", headers=auth)
+        assert r.status_code == 503 and r.json()["error"] == "upstream_unavailable", r.text
+        assert int(r.headers["retry-after"]) >= 1
+        health = client.get("/health/upstreams").json()
+        assert health["upstreams"]["byteplus"]["breakers"]["127.0.0.1"]["state"] == "open"
+        assert "breaker" in health["runware"]
+        print(f"[OK] route fast-fail: 503 upstream_unavailable, Retry-After={r.headers['retry-after']}s; "
+              f"/health/upstreams shows byteplus breaker open")
+    state["down"] = False
+
+
+if __name__ == "__main__":
+    asyncio.run(pool_behaviour())
+    asyncio.run(runware_behaviour())
+    route_behaviour()
+    print("OK")
@@ -0,0 +1,110 @@
+"""UserStore 동작 테스트 (임시 디렉터리 SQLite, volume commit은 stand-in)
+
+- 회원가입 / username 중복 / 로그인 (승인 전후)
+- update_password: 기존 비밀번호 확인 + 변경이 UPDATE 1회 → 틀리면 변경 없음, 라우트는 wrong_password
+- 타이머 배치 commit: 쓰기 여러 번 → volume commit 1회, flush 후 재오픈해도 데이터 유지
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from proxy.user_store import UserStore
+
+commits = []
+
+
+async def volume_commit():
+    commits.append(1)
+
+
+def h(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+async def main():
+    db_path = os.path.join(tempfile.mkdtemp(), "nested", "users.db")
+    store = UserStore(db_path, commit=volume_commit, commit_interval=0.05)
+
+    # 회원가입 / 중복
+    assert await store.register("alice", h("pw1"), "alice@example.com") is True
+    assert await store.register("bob", h("pw2"), "bob@example.com") is True
+    assert await store.register("alice", h("other"), "dup@example.com") is False
+    users = await store.list_users()
+    assert sorted(u["username"] for u in users) == ["alice", "bob"] and all(u["approved"] == 0 for u in users)
+    alice_id = next(u["id"] for u in users if u["username"] == "alice")
+    print("[OK] register, duplicate username rejected by UNIQUE constraint")
+
+    # 로그인: 비밀번호 틀림 → None, 승인 전 approved=0, 승인 후 1
+    assert await store.authenticate("alice", h("wrong")) is None
+    assert await store.authenticate("nobody", h("pw1")) is None
+    assert await store.authenticate("alice", h("pw1")) == (alice_id, "alice", "alice@example.com", 0)
+    await store.set_approved(alice_id, 1)
+    assert (await store.authenticate("alice", h("pw1")))[3] == 1
+    print("[OK] login: wrong password / unknown user → None, approval reflected")
+
+    # update_password: 기존 비밀번호 틀림 / 없는 유저 → False, 변경 없음
+    writes = store.writes
+    assert await store.update_password("alice", h("wrong"), h("new")) is False
+    assert await store.update_password("nobody", h("pw1"), h("new")) is False
+    assert store.writes == writes
+    assert await store.authenticate("alice", h("pw1")) is not None
+    assert await store.update_password("alice", h("pw1"), h("new")) is True
+    assert await store.authenticate("alice", h("pw1")) is None
+    assert await store.authenticate("alice", h("new")) is not None
+    assert await store.update_password("alice", h("pw1"), h("again")) is False  # 이미 바뀐 비밀번호
+    print("[OK] update_password: single conditional UPDATE, wrong old password leaves row untouched")
+
+    # 쓰기 4번(register 2 + approve + password) → 타이머 만료 후 volume commit 1회
+    assert store.stats()["pending_commit"] is True and not commits
+    await asyncio.sleep(0.15)
+    assert len(commits) == 1 and store.stats()["pending_commit"] is False, (commits, store.stats())
+    await store.register("carol", h("pw3"), "")
+    await store.flush()
+    assert len(commits) == 2
+    await store.flush()  # 변경 없으면 no-op
+    assert len(commits) == 2
+    await store.aclose()
+    print(f"[OK] batched volume commits: {store.stats()}")
+
+    # 재오픈 (다른 컨테이너가 DB 파일만 보는 상황) → 데이터 유지
+    reopened = UserStore(db_path)
+    assert sorted(u["username"] for u in await reopened.list_users()) == ["alice", "bob", "carol"]
+    assert await reopened.authenticate("alice", h("new")) == (alice_id, "alice", "alice@example.com", 1)
+    assert await reopened.register("carol", h("x"), "") is False
+    await reopened.aclose()
+    assert not os.path.exists(db_path + "-wal") or os.path.getsize(db_path + "-wal") == 0
+    print("[OK] data survives flush + reopen, WAL checkpointed into the DB file")
+
+
+asyncio.run(main())
+
+# 라우트 응답 (user_store만 임시 DB로 교체)
+os.environ["EXPORT_PREFETCH"] = "false"
+import main_byteplus
+
+main_byteplus.user_store = UserStore(os.path.join(tempfile.mkdtemp(), "users.db"), commit_interval=0.05)
+with TestClient(main_byteplus.fast_app) as client:
+    def post(path, body):
+        return client.post(f"/api/v3/auth/{path}", json=body)
+
+    assert post("register", {"username": "dave", "password": "pw", "email": "d@x"}).json()["success"]
+    r = post("register", {"username": "dave", "password": "pw2", "email": ""})
+    assert r.json() == {"success": False, "error": "duplicate_username"}
+    assert post("login", {"username": "dave", "password": "pw"}).json()["error"] == "not_approved"
+    assert post("login", {"username": "dave", "password": "bad"}).json()["error"] == "invalid_credentials"
+
+    r = post("update-password", {"username": "dave", "old_password": "bad", "new_password": "pw3"})
+    assert r.status_code == 401 and r.json() == {"success": False, "error": "wrong_password"}
+    r = post("update-password", {"username": "dave", "old_password": "pw"})
+    assert r.status_code == 400 and r.json()["error"] == "missing_fields"
+    r = post("update-password", {"username": "dave", "old_password": "pw", "new_password": "pw3"})
+    assert r.status_code == 200 and r.json() == {"success": True}
+    assert post("login", {"username": "dave", "password": "pw3"}).json()["error"] == "not_approved"
+    print("[OK] routes: duplicate_username, not_approved / invalid_credentials, wrong_password → 401")
+print("OK")
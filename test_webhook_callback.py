@@ -0,0 +1,112 @@
+"""Webhook 전달 로컬 테스트 (로컬 stand-in 수신 서버, 외부 호출 없음)"""
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "modal-server"))
+from common import webhook
+
+SECRET = "local-test-secret"
+received = []
+redirects = []
+fail_first = {"remaining": 2}  # 처음 2번은 503 → 재시도 확인
+
+
+class Receiver(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path == "/redirect":
+            redirects.append(self.path)
+            self.send_response(307)
+            self.send_header("Location", "http://169.254.169.254/latest/meta-data/")
+            self.end_headers()
+            return
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if fail_first["remaining"] > 0:
+            fail_first["remaining"] -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        ok = webhook.verify(
+            body, SECRET,
+            self.headers[webhook.TIMESTAMP_HEADER],
+            self.headers[webhook.SIGNATURE_HEADER],
+        )
+        received.append({"ok": ok, "payload": json.loads(body)})
+        self.send_response(200 if ok else 401)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+server = HTTPServer(("127.0.0.1", 0), Receiver)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+url = f"http://127.0.0.1:{server.server_port}/hook"
+
+print("=== Test 0: 비공개 host 거부 (SSRF) ===")
+for blocked in ("http://127.0.0.1/hook", "http://localhost:8000/hook", "http://[::1]/hook",
+                "http://169.254.169.254/latest/meta-data/", "http://10.0.0.5/hook", "https://192.168.1.10/hook",
+                "http://[::ffff:127.0.0.1]/hook", "http://0.0.0.0/hook", "http:///hook"):
+    error = webhook.validate_callback(blocked, SECRET)
+    assert error and error.startswith("invalid_callback_url"), (blocked, error)
+assert webhook.validate_callback("https://93.184.216.34/hook", SECRET) is None
+assert not webhook.deliver(url, {"job_id": "x"}, SECRET, base_delay=0.05)  # 전송 직전 재검사
+assert not received
+callback, error = webhook.callback_from_request(
+    {"prompt": "p", "callback_url": "http://127.0.0.1/hook", "callback_secret": SECRET}, "http://srv/", "j1")
+assert callback is None and error
+print("OK")
+
+# 이하 로컬 수신 서버(127.0.0.1) 사용 → 로컬 개발용 opt-in
+os.environ["WEBHOOK_ALLOW_PRIVATE_HOSTS"] = "true"
+
+print("=== Test 1: 서명 검증 + 재시도 ===")
+payload = webhook.build_payload("abc12345", "complete", download_url="http://localhost/result/abc12345",
+                                meta={"total_time_sec": 12.3})
+delivered = webhook.deliver(url, payload, SECRET, base_delay=0.05)
+print(f"Delivered: {delivered}, received: {received}")
+assert delivered, "Should deliver after retries"
+assert len(received) == 1 and received[0]["ok"], "Signature should verify"
+assert received[0]["payload"]["event"] == "job.completed"
+print("OK")
+
+print("\n=== Test 2: 잘못된 secret → 401 (재시도 안 함) ===")
+received.clear()
+delivered = webhook.deliver(url, payload, "wrong-secret", base_delay=0.05)
+assert not delivered and len(received) == 1, "4xx should not be retried"
+print("OK")
+
+print("\n=== Test 3: 실패 job payload ===")
+failed = webhook.build_payload("def67890", "error", download_url="http://localhost/result/def67890", error="boom")
+assert failed["event"] == "job.failed" and failed["download_url"] is None
+print("OK")
+
+print("\n=== Test 4: callback 파라미터 검증 ===")
+assert webhook.validate_callback(None, None) is None
+assert webhook.validate_callback("ftp://x", SECRET) is not None
+assert webhook.validate_callback(url, SECRET) is None
+data = {"prompt": "p", "callback_url": url, "callback_secret": SECRET}
+callback, error = webhook.callback_from_request(data, "http://srv/", "j1", "result")
+assert error is None and data == {"prompt": "p"}
+assert callback == {"url": url, "secret": SECRET, "download_url": "http://srv/result/j1"}
+assert webhook.callback_from_request({"prompt": "p"}, "http://srv", "j1") == (None, None)
+print("OK")
+
+print("\n=== Test 5: notify (meta → payload) ===")
+received.clear()
+assert not webhook.notify("j1", {"status": "complete"}, None)
+assert webhook.notify("j1", {"status": "complete", "error": None, "size_bytes": 10}, callback)
+assert received[0]["ok"] and received[0]["payload"]["download_url"] == "http://srv/result/j1"
+assert received[0]["payload"]["meta"] == {"size_bytes": 10}, received
+print("OK")
+
+print("\n=== Test 6: redirect 따라가지 않음 ===")
+received.clear()
+assert not webhook.deliver(url.replace("/hook", "/redirect"), payload, SECRET, base_delay=0.05)
+assert redirects == ["/redirect"] and not received
+print("OK")
+
+server.shutdown()